@@ -1,40 +1,186 @@
-from .config.hardcoded import OcrLanguage, OcrPreset
-from .form import build_form
-from .options import AnyparserOption, AnyparserParsedOption, UploadedFile
-from .parser import (
-    Anyparser,
-    AnyparserCrawlDirective,
-    AnyparserCrawlDirectiveBase,
-    AnyparserCrawlResult,
-    AnyparserImageReference,
-    AnyparserPdfPage,
-    AnyparserPdfResult,
-    AnyparserResult,
-    AnyparserResultBase,
-    AnyparserRobotsTxtDirective,
-    AnyparserUrl,
-)
-from .validator import validate_and_parse, validate_option, validate_path
+"""
+Anyparser SDK for Python.
+
+Public names are resolved lazily on first attribute access (PEP 562), so
+``import anyparser_core`` only loads this module and the version. The parser,
+validators, HTTP stack and the OCR language tables are imported the first
+time one of their names is used.
+"""
+
 from .version import __version__
 
+# Maps each public name to the submodule that defines it
+_LAZY_ATTRIBUTES = {
+    "Anyparser": ".parser",
+    "AnyparserCrawlDirective": ".parser",
+    "AnyparserCrawlDirectiveBase": ".parser",
+    "AnyparserCrawlResult": ".parser",
+    "AnyparserImageReference": ".parser",
+    "AnyparserPdfPage": ".parser",
+    "AnyparserPdfResult": ".parser",
+    "AnyparserResult": ".parser",
+    "AnyparserResultBase": ".parser",
+    "AnyparserRobotsTxtDirective": ".parser",
+    "AnyparserUrl": ".parser",
+    "AnyparserOption": ".options",
+    "AnyparserParsedOption": ".options",
+    "UploadedFile": ".options",
+    "OcrLanguage": ".config.hardcoded",
+    "OcrPreset": ".config.hardcoded",
+    "build_form": ".form",
+    "PreparedParse": ".prepared",
+    "HedgePolicy": ".hedging",
+    "BreakerPolicy": ".breaker",
+    "CircuitOpenError": ".breaker",
+    "ParseHook": ".instrumentation",
+    "ParseSpan": ".instrumentation",
+    "StatsCollector": ".instrumentation",
+    "TracerHook": ".instrumentation",
+    "MetricsRegistry": ".metrics",
+    "default_registry": ".metrics",
+    "render_prometheus": ".metrics",
+    "resolve_options": ".validator",
+    "validate_and_parse": ".validator",
+    "validate_option": ".validator",
+    "validate_path": ".validator",
+    "Chunk": ".chunking",
+    "Chunker": ".chunking",
+    "ColumnarExporter": ".columnar",
+    "CrawlDiff": ".incremental",
+    "CrawlState": ".incremental",
+    "IncrementalCrawlResult": ".incremental",
+    "CrawlStore": ".store",
+    "CrawlOrchestrator": ".orchestrator",
+    "NearDuplicateFilter": ".dedup",
+    "SignatureIndex": ".dedup",
+    "NdjsonFileSink": ".sinks",
+    "ResultSink": ".sinks",
+    "RotatingFileSink": ".sinks",
+    "StdoutSink": ".sinks",
+    "sniff_content_type": ".sniff",
+    "sniff_file": ".sniff",
+    "DisallowedError": ".robots",
+    "RobotsCache": ".robots",
+    "StoredPage": ".store",
+    "BulkSummary": ".bulk",
+    "load_manifest": ".bulk",
+    "run_bulk": ".bulk",
+}
+
 __all__ = [
     "Anyparser",
     "AnyparserCrawlDirective",
     "AnyparserCrawlDirectiveBase",
     "AnyparserCrawlResult",
     "AnyparserImageReference",
+    "AnyparserOption",
+    "AnyparserParsedOption",
     "AnyparserPdfPage",
     "AnyparserPdfResult",
-    AnyparserResult,
+    "AnyparserResult",
     "AnyparserResultBase",
     "AnyparserRobotsTxtDirective",
     "AnyparserUrl",
-    "validate_and_parse",
+    "UploadedFile",
+    "resolve_options",
     "validate_and_parse",
     "validate_path",
     "validate_option",
     "build_form",
-    "Anyparser",
+    "PreparedParse",
+    "HedgePolicy",
+    "BreakerPolicy",
+    "CircuitOpenError",
+    "ParseHook",
+    "ParseSpan",
+    "StatsCollector",
+    "TracerHook",
+    "MetricsRegistry",
+    "default_registry",
+    "render_prometheus",
     "OcrPreset",
     "OcrLanguage",
+    "Chunk",
+    "Chunker",
+    "ColumnarExporter",
+    "CrawlDiff",
+    "CrawlState",
+    "IncrementalCrawlResult",
+    "CrawlStore",
+    "StoredPage",
+    "CrawlOrchestrator",
+    "NearDuplicateFilter",
+    "SignatureIndex",
+    "NdjsonFileSink",
+    "ResultSink",
+    "RotatingFileSink",
+    "StdoutSink",
+    "sniff_content_type",
+    "sniff_file",
+    "DisallowedError",
+    "RobotsCache",
+    "BulkSummary",
+    "load_manifest",
+    "run_bulk",
+    "__version__",
 ]
+
+# Avoid importing typing at runtime; type checkers treat this name as True
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from .breaker import BreakerPolicy, CircuitOpenError
+    from .bulk import BulkSummary, load_manifest, run_bulk
+    from .chunking import Chunk, Chunker
+    from .columnar import ColumnarExporter
+    from .config.hardcoded import OcrLanguage, OcrPreset
+    from .dedup import NearDuplicateFilter, SignatureIndex
+    from .form import build_form
+    from .hedging import HedgePolicy
+    from .incremental import CrawlDiff, CrawlState, IncrementalCrawlResult
+    from .instrumentation import ParseHook, ParseSpan, StatsCollector, TracerHook
+    from .metrics import MetricsRegistry, default_registry, render_prometheus
+    from .options import AnyparserOption, AnyparserParsedOption, UploadedFile
+    from .orchestrator import CrawlOrchestrator
+    from .prepared import PreparedParse
+    from .robots import DisallowedError, RobotsCache
+    from .sniff import sniff_content_type, sniff_file
+    from .sinks import NdjsonFileSink, ResultSink, RotatingFileSink, StdoutSink
+    from .store import CrawlStore, StoredPage
+    from .parser import (
+        Anyparser,
+        AnyparserCrawlDirective,
+        AnyparserCrawlDirectiveBase,
+        AnyparserCrawlResult,
+        AnyparserImageReference,
+        AnyparserPdfPage,
+        AnyparserPdfResult,
+        AnyparserResult,
+        AnyparserResultBase,
+        AnyparserRobotsTxtDirective,
+        AnyparserUrl,
+    )
+    from .validator import (
+        resolve_options,
+        validate_and_parse,
+        validate_option,
+        validate_path,
+    )
+
+
+def __getattr__(name: str):
+    """Import the submodule defining a public name on first access."""
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    from importlib import import_module
+
+    value = getattr(import_module(module_name, __name__), name)
+
+    # Cache the value so later lookups bypass this function
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
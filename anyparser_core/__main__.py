@@ -0,0 +1,91 @@
+"""
+Command-line entry point for running bulk parse jobs from a manifest.
+
+Usage:
+    python -m anyparser_core MANIFEST --output results.jsonl --checkpoint job.ckpt
+"""
+
+import argparse
+import asyncio
+import sys
+from typing import List, Optional
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m anyparser_core",
+        description="Parse every input listed in a manifest, resuming from a checkpoint.",
+    )
+    arg_parser.add_argument(
+        "manifest", help="File listing one file path or start URL per line"
+    )
+    arg_parser.add_argument(
+        "--output", required=True, help="JSONL file or Parquet directory"
+    )
+    arg_parser.add_argument(
+        "--checkpoint", required=True, help="File recording completed inputs"
+    )
+    arg_parser.add_argument(
+        "--output-format", choices=["jsonl", "parquet"], default="jsonl"
+    )
+    arg_parser.add_argument("--concurrency", type=int, default=4)
+    arg_parser.add_argument("--row-group-size", type=int, default=1000)
+    arg_parser.add_argument(
+        "--model", choices=["text", "ocr", "vlm", "lam", "crawler"], default="text"
+    )
+    arg_parser.add_argument(
+        "--format", choices=["json", "markdown", "html"], default="json"
+    )
+    return arg_parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run a bulk job and return the process exit code.
+
+    Args:
+        argv: Command-line arguments, defaulting to ``sys.argv[1:]``
+
+    Returns:
+        0 if every input succeeded, 1 otherwise
+    """
+    import os
+
+    from .bulk import load_manifest, run_bulk
+    from .config.hardcoded import FALLBACK_API_URL
+    from .options import AnyparserOption
+
+    args = _build_arg_parser().parse_args(argv)
+
+    options = AnyparserOption(
+        api_url=os.getenv("ANYPARSER_API_URL", FALLBACK_API_URL),
+        api_key=os.getenv("ANYPARSER_API_KEY"),
+        model=args.model,
+        format=args.format,
+    )
+
+    summary = asyncio.run(
+        run_bulk(
+            load_manifest(args.manifest),
+            output=args.output,
+            checkpoint=args.checkpoint,
+            options=options,
+            concurrency=args.concurrency,
+            output_format=args.output_format,
+            row_group_size=args.row_group_size,
+        )
+    )
+
+    for item, error in summary.errors.items():
+        print(f"FAILED {item}: {error}", file=sys.stderr)
+
+    print(
+        f"total={summary.total} skipped={summary.skipped} "
+        f"succeeded={summary.succeeded} failed={summary.failed}",
+        file=sys.stderr,
+    )
+
+    return 1 if summary.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Balancer module for spreading requests across several API endpoints.
+
+The pool picks an endpoint per attempt, either the one with the fewest
+outstanding requests or the one with the lowest peak-EWMA latency score, and
+tracks endpoint health passively: an endpoint failing several attempts in a
+row is ejected for a while, so a dead or overloaded node stops taking
+traffic until it has had time to recover.
+"""
+
+import random
+import time
+from typing import Any, Dict, Iterable, List, Literal, Optional, Sequence
+
+from .prepared import Endpoint, resolve_endpoint
+
+BalancingStrategy = Literal["least_outstanding", "ewma"]
+
+
+class EndpointState:
+    """Load and health of a single endpoint."""
+
+    __slots__ = (
+        "url",
+        "endpoint",
+        "outstanding",
+        "ewma",
+        "consecutive_failures",
+        "ejected_until",
+        "requests",
+        "failures",
+    )
+
+    def __init__(self, url: str, allow_http: bool = False) -> None:
+        self.url = url
+        self.endpoint: Endpoint = resolve_endpoint(url, allow_http)
+        self.outstanding = 0
+        self.ewma: Optional[float] = None
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    def healthy(self, now: float) -> bool:
+        """Return whether the endpoint is not currently ejected."""
+        return self.ejected_until <= now
+
+
+class EndpointPool:
+    """Client-side load balancer over a fixed list of API endpoints."""
+
+    def __init__(
+        self,
+        api_urls: Sequence[str],
+        strategy: BalancingStrategy = "least_outstanding",
+        ewma_decay: float = 0.3,
+        failure_threshold: int = 3,
+        ejection_time: float = 10.0,
+        allow_http: bool = False,
+    ) -> None:
+        """Create a pool.
+
+        Args:
+            api_urls: Base URLs of the Anyparser API endpoints
+            strategy: "least_outstanding" or "ewma" (peak EWMA latency weighted by load)
+            ewma_decay: Weight of the newest latency sample in the moving average
+            failure_threshold: Consecutive failed attempts that eject an endpoint
+            ejection_time: Seconds an ejected endpoint is skipped
+            allow_http: Connect to http:// endpoints of any host over plain HTTP
+
+        Raises:
+            ValueError: If no endpoints or an unknown strategy is given
+        """
+        if not api_urls:
+            raise ValueError("At least one endpoint is required")
+        if strategy not in ("least_outstanding", "ewma"):
+            raise ValueError(f'Unsupported balancing strategy: "{strategy}"')
+
+        self.endpoints: List[EndpointState] = [
+            EndpointState(url, allow_http) for url in api_urls
+        ]
+        self.strategy = strategy
+        self.ewma_decay = ewma_decay
+        self.failure_threshold = failure_threshold
+        self.ejection_time = ejection_time
+        self._random = random.Random()
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def _score(self, state: EndpointState) -> float:
+        if self.strategy == "ewma":
+            # Unmeasured endpoints score zero so each gets probed early
+            return (state.ewma or 0.0) * (state.outstanding + 1)
+        return state.outstanding
+
+    def choose(self, exclude: Iterable[EndpointState] = ()) -> EndpointState:
+        """Pick the endpoint for the next attempt.
+
+        Healthy endpoints not yet tried by the call are preferred. If every
+        endpoint is ejected or excluded, the one due back soonest is used, so
+        a call is never refused outright by the balancer.
+
+        Args:
+            exclude: Endpoints already tried by the current call
+
+        Returns:
+            The chosen endpoint
+        """
+        now = time.monotonic()
+        excluded = set(map(id, exclude))
+        candidates = [
+            state
+            for state in self.endpoints
+            if state.healthy(now) and id(state) not in excluded
+        ]
+        if not candidates:
+            candidates = [
+                state for state in self.endpoints if id(state) not in excluded
+            ] or self.endpoints
+            return min(candidates, key=lambda state: state.ejected_until)
+
+        best = min(self._score(state) for state in candidates)
+        return self._random.choice(
+            [state for state in candidates if self._score(state) == best]
+        )
+
+    def acquire(self, state: EndpointState) -> None:
+        """Record the start of an attempt on an endpoint."""
+        state.outstanding += 1
+        state.requests += 1
+
+    def release(self, state: EndpointState, latency: float, ok: bool) -> None:
+        """Record the outcome of an attempt on an endpoint.
+
+        Args:
+            state: The endpoint the attempt was sent to
+            latency: Seconds from sending the request to reading the response
+            ok: Whether the endpoint answered without a connection error or retryable status
+        """
+        state.outstanding -= 1
+        if ok:
+            state.consecutive_failures = 0
+            if state.ewma is None or latency > state.ewma:
+                # Peak EWMA: react to slowdowns at once, decay on recovery
+                state.ewma = latency
+            else:
+                state.ewma += self.ewma_decay * (latency - state.ewma)
+            return
+
+        state.failures += 1
+        state.consecutive_failures += 1
+        if state.consecutive_failures >= self.failure_threshold:
+            state.ejected_until = time.monotonic() + self.ejection_time
+            state.consecutive_failures = 0
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Return the load and health of every endpoint."""
+        now = time.monotonic()
+        return [
+            {
+                "url": state.url,
+                "healthy": state.healthy(now),
+                "outstanding": state.outstanding,
+                "ewma_ms": None if state.ewma is None else state.ewma * 1e3,
+                "requests": state.requests,
+                "failures": state.failures,
+            }
+            for state in self.endpoints
+        ]
@@ -0,0 +1,174 @@
+"""
+Circuit breaker module for failing fast while the API is degraded.
+
+The breaker watches the outcome and duration of the most recent calls. Once
+enough of them failed or were slow, it opens and rejects calls at once with
+``CircuitOpenError`` instead of letting each wait out a doomed request. After
+``open_duration`` it lets a few probe calls through (half-open) and closes
+again if they all succeed. Every admitted call is tagged with the state it
+was admitted in, so a call that outlives a state change cannot be mistaken
+for a probe or count towards a window it was not part of.
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Literal, Optional, Tuple
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+# The state a call was admitted in and the generation of that state
+Admission = Tuple[CircuitState, int]
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(
+            f"Circuit breaker is open, the API is unavailable for another {retry_after:.1f}s"
+        )
+        self.retry_after = retry_after
+
+
+@dataclass
+class BreakerPolicy:
+    """Thresholds of a circuit breaker.
+
+    A call counts as failed when no response was received or the API
+    answered with a 5xx or 429 status, and as slow when it took longer than
+    ``slow_call_duration`` seconds.
+    """
+
+    window: int = 50
+    min_calls: int = 20
+    failure_rate: float = 0.5
+    slow_call_duration: float = 30.0
+    slow_call_rate: float = 0.8
+    open_duration: float = 30.0
+    half_open_calls: int = 3
+
+
+class CircuitBreaker:
+    """Closed, open and half-open state machine over a sliding window of calls."""
+
+    def __init__(self, policy: Optional[BreakerPolicy] = None) -> None:
+        """Create a closed breaker.
+
+        Args:
+            policy: Thresholds, the defaults if omitted
+
+        Raises:
+            ValueError: If a rate is out of range or a count is less than 1
+        """
+        self.policy = policy or BreakerPolicy()
+        policy = self.policy
+        if not 0 < policy.failure_rate <= 1 or not 0 < policy.slow_call_rate <= 1:
+            raise ValueError("failure_rate and slow_call_rate must be between 0 and 1")
+        if min(policy.window, policy.min_calls, policy.half_open_calls) < 1:
+            raise ValueError("window, min_calls and half_open_calls must be at least 1")
+
+        self.state: CircuitState = "closed"
+        self.opened_at = 0.0
+        self.rejections = 0
+        self._generation = 0
+        self._calls: Deque[Tuple[bool, bool]] = deque()
+        self._failures = 0
+        self._slow = 0
+        self._probes = 0
+        self._probe_successes = 0
+
+    def _transition(self, state: CircuitState) -> None:
+        self.state = state
+        self._generation += 1
+
+    def _open(self) -> None:
+        self._transition("open")
+        self.opened_at = time.monotonic()
+        self._calls.clear()
+        self._failures = self._slow = 0
+
+    def acquire(self) -> Admission:
+        """Admit a call, or fail fast while the circuit is open.
+
+        Returns:
+            The admission to pass to ``release`` once the call is over
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with every probe taken
+        """
+        if self.state == "open":
+            remaining = self.opened_at + self.policy.open_duration - time.monotonic()
+            if remaining > 0:
+                self.rejections += 1
+                raise CircuitOpenError(remaining)
+            self._transition("half_open")
+            self._probes = self._probe_successes = 0
+
+        if self.state == "half_open":
+            if self._probes >= self.policy.half_open_calls:
+                self.rejections += 1
+                raise CircuitOpenError(0.0)
+            self._probes += 1
+        return self.state, self._generation
+
+    def release(
+        self, admission: Admission, success: Optional[bool], duration: float
+    ) -> None:
+        """Record the outcome of an admitted call.
+
+        Calls admitted before the last state change are ignored.
+
+        Args:
+            admission: What ``acquire`` returned for the call
+            success: Whether the API answered without degradation, None if the call was abandoned
+            duration: Seconds the call took
+        """
+        state, generation = admission
+        if generation != self._generation:
+            return
+
+        policy = self.policy
+        slow = duration > policy.slow_call_duration
+
+        if state == "half_open":
+            if success is None:
+                # Free the probe slot for another call
+                self._probes -= 1
+            elif not success or slow:
+                self._open()
+            else:
+                self._probe_successes += 1
+                if self._probe_successes >= policy.half_open_calls:
+                    self._transition("closed")
+            return
+
+        if success is None:
+            return
+
+        failed = not success
+        self._calls.append((failed, slow))
+        self._failures += failed
+        self._slow += slow
+        if len(self._calls) > policy.window:
+            old_failed, old_slow = self._calls.popleft()
+            self._failures -= old_failed
+            self._slow -= old_slow
+
+        calls = len(self._calls)
+        if calls >= policy.min_calls and (
+            self._failures >= policy.failure_rate * calls
+            or self._slow >= policy.slow_call_rate * calls
+        ):
+            self._open()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the state and the failure and slow-call rates of the window."""
+        calls = len(self._calls)
+        return {
+            "state": self.state,
+            "calls": calls,
+            "failure_rate": self._failures / calls if calls else 0.0,
+            "slow_call_rate": self._slow / calls if calls else 0.0,
+            "rejections": self.rejections,
+        }
@@ -0,0 +1,296 @@
+"""
+Bulk job runner module for parsing large manifests with checkpointing and resume.
+"""
+
+import os
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from .options import AnyparserOption
+from .parser import Anyparser
+from .serialize import dumps
+from .sinks import NdjsonFileSink
+
+BulkOutputFormat = Literal["jsonl", "parquet"]
+
+
+@dataclass
+class BulkSummary:
+    """Summary of a bulk run with counts for each outcome and per-input errors."""
+
+    total: int = 0
+    skipped: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+
+
+def load_manifest(manifest_path: Union[str, Path]) -> Iterator[str]:
+    """Lazily read inputs from a manifest file.
+
+    The manifest lists one file path or start URL per line. Blank lines and
+    lines starting with ``#`` are ignored.
+
+    Args:
+        manifest_path: Path to the manifest file
+
+    Yields:
+        Each input listed in the manifest, in order
+    """
+    with open(manifest_path, "r", encoding="utf-8") as manifest:
+        for line in manifest:
+            entry = line.strip()
+            if entry and not entry.startswith("#"):
+                yield entry
+
+
+def _truncate_torn_line(path: Union[str, Path], block_size: int = 4096) -> None:
+    """Cut off a last line left unfinished by a crash, so appends start on a new line.
+
+    Args:
+        path: File of newline-terminated records, left alone if missing
+        block_size: Bytes read at a time while looking back for the last newline
+    """
+    try:
+        f = open(path, "r+b")
+    except FileNotFoundError:
+        return
+
+    with f:
+        end = position = f.seek(0, os.SEEK_END)
+        while position > 0:
+            start = max(0, position - block_size)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline != -1:
+                if start + newline + 1 < end:
+                    f.truncate(start + newline + 1)
+                return
+            position = start
+        f.truncate(0)
+
+
+class Checkpoint:
+    """Append-only record of completed inputs, one per line."""
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        """Load previously completed inputs from the checkpoint file, if any.
+
+        An input whose line was cut short by a crash is dropped.
+
+        Args:
+            path: Path to the checkpoint file
+        """
+        self.path = Path(path)
+        self.completed: Set[str] = set()
+        _truncate_torn_line(self.path)
+
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.completed.update(line.rstrip("\n") for line in f if line.strip())
+
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def __contains__(self, item: str) -> bool:
+        return item in self.completed
+
+    def mark_done(self, items: Iterable[str]) -> None:
+        """Record inputs as completed and flush them to disk.
+
+        Args:
+            items: Inputs whose results have been durably written
+        """
+        for item in items:
+            self.completed.add(item)
+            self._file.write(item + "\n")
+
+        self._file.flush()
+
+    def close(self) -> None:
+        """Close the checkpoint file."""
+        self._file.close()
+
+
+class _JsonlWriter:
+    """Appends one JSON record per line through a file sink.
+
+    Lines are written on the sink's background writer, so an input is only
+    reported as durably written once the sink has written its line. A line
+    left unfinished by a crash is cut off before appending; its input was
+    never checkpointed, so it is parsed again.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        _truncate_torn_line(path)
+        self._sink = NdjsonFileSink(path)
+        # Inputs queued in the sink, with the number of lines written by then
+        self._pending: Deque[Tuple[int, str]] = deque()
+
+    async def write(self, item: str, result: Any) -> List[str]:
+        await self._sink.write({"input": item, "result": result})
+        self._pending.append((self._sink.records, item))
+
+        written = []
+        while self._pending and self._pending[0][0] <= self._sink.written:
+            written.append(self._pending.popleft()[1])
+        return written
+
+    async def close(self) -> List[str]:
+        await self._sink.close()
+        written = [item for _, item in self._pending]
+        self._pending.clear()
+        return written
+
+
+class _ParquetWriter:
+    """Writes each row group as its own complete part file inside a directory.
+
+    A Parquet file is only readable once its footer is written, so a file
+    kept open across row groups would be lost entirely on a crash. Each
+    buffered row group is instead written to a temporary file and renamed
+    into place before its inputs are reported as durably written.
+    """
+
+    def __init__(self, path: Union[str, Path], row_group_size: int) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(
+                "Parquet output requires pyarrow. Install it with `pip install pyarrow`."
+            ) from e
+
+        self._pa = pa
+        self._pq = pq
+        self._schema = pa.schema([("input", pa.string()), ("result", pa.string())])
+
+        # Parquet files cannot be appended to, so new parts follow existing ones
+        os.makedirs(path, exist_ok=True)
+        self._path = path
+        self._next_part = 1 + max(
+            [
+                int(name[5:-8])
+                for name in os.listdir(path)
+                if name.startswith("part-")
+                and name.endswith(".parquet")
+                and name[5:-8].isdigit()
+            ],
+            default=-1,
+        )
+        self._row_group_size = row_group_size
+        self._inputs: List[str] = []
+        self._results: List[str] = []
+
+    async def write(self, item: str, result: Any) -> List[str]:
+        self._inputs.append(item)
+        self._results.append(dumps(result))
+        if len(self._inputs) >= self._row_group_size:
+            return self._flush()
+        return []
+
+    def _flush(self) -> List[str]:
+        flushed = self._inputs
+        if flushed:
+            table = self._pa.Table.from_arrays(
+                [self._pa.array(flushed), self._pa.array(self._results)],
+                schema=self._schema,
+            )
+            name = f"part-{self._next_part:05d}.parquet"
+            part_path = os.path.join(self._path, name)
+            # Readers skip hidden files, so a write cut short is never picked up
+            temp_path = os.path.join(self._path, f".{name}.tmp")
+            self._pq.write_table(table, temp_path)
+            os.replace(temp_path, part_path)
+            self._next_part += 1
+        self._inputs, self._results = [], []
+        return flushed
+
+    async def close(self) -> List[str]:
+        return self._flush()
+
+
+async def run_bulk(
+    inputs: Iterable[str],
+    output: Union[str, Path],
+    checkpoint: Union[str, Path],
+    options: Optional[AnyparserOption] = None,
+    concurrency: int = 4,
+    output_format: BulkOutputFormat = "jsonl",
+    row_group_size: int = 1000,
+    parser: Optional[Anyparser] = None,
+) -> BulkSummary:
+    """Parse every input with bounded concurrency, resuming from a checkpoint.
+
+    Each input is parsed in its own request. Results are written to the output
+    as they complete, and an input is recorded in the checkpoint only once its
+    result has been written, so a restarted run skips finished work. A crash
+    between the two writes can repeat at most the results that were in flight.
+    Failed inputs are not checkpointed and are retried on the next run.
+
+    Args:
+        inputs: File paths, or start URLs when the crawler model is used
+        output: JSONL file to append to, or a directory of Parquet part files, one per row group
+        checkpoint: Path to the checkpoint file
+        options: Parser options, ignored when a parser is provided
+        concurrency: Maximum number of parse requests in flight at once
+        output_format: Either "jsonl" or "parquet"
+        row_group_size: Number of results buffered per Parquet row group
+        parser: Preconfigured parser to use instead of creating one
+
+    Returns:
+        Summary of the run
+
+    Raises:
+        ValueError: If the output format is not supported
+        ImportError: If Parquet output is requested without pyarrow installed
+    """
+    if output_format == "jsonl":
+        writer = _JsonlWriter(output)
+    elif output_format == "parquet":
+        writer = _ParquetWriter(output, row_group_size)
+    else:
+        raise ValueError(f'Unsupported output format: "{output_format}"')
+
+    parser = parser or Anyparser(options)
+    done = Checkpoint(checkpoint)
+    summary = BulkSummary()
+
+    def remaining() -> Iterator[str]:
+        for item in inputs:
+            summary.total += 1
+            if item in done:
+                summary.skipped += 1
+            else:
+                yield item
+
+    try:
+        async for batch, result in parser.parse_iter(
+            remaining(), concurrency=concurrency, return_exceptions=True
+        ):
+            item = batch[0]
+            if isinstance(result, BaseException):
+                summary.failed += 1
+                summary.errors[item] = str(result) or type(result).__name__
+                continue
+
+            summary.succeeded += 1
+            done.mark_done(await writer.write(item, result))
+    finally:
+        done.mark_done(await writer.close())
+        done.close()
+
+    return summary
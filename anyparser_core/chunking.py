@@ -0,0 +1,383 @@
+"""
+Chunking module for splitting parse results into retrieval-sized segments.
+
+Markdown is read once, line by line, into blocks: headings, tables, fenced
+code and paragraphs. Blocks are packed into chunks of at most ``max_size``,
+measured in characters or by any token counter. A heading always starts a
+new chunk and is tracked as the chunk's heading path. Tables are kept whole
+where they fit, and otherwise split by rows with their header repeated.
+Consecutive chunks of a section share up to ``overlap`` of trailing text.
+Every block is measured once and sliced once, so chunking is linear in the
+size of the input, and chunks are yielded as results stream in.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from .parser import AnyparserResult, AnyparserUrl
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)[\s#]*$")
+_TABLE_SEPARATOR = re.compile(r"^\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$")
+
+ChunkSource = Union["AnyparserResult", "AnyparserUrl", str]
+
+
+@dataclass
+class Chunk:
+    """A segment of a parsed document with its provenance."""
+
+    text: str
+    size: int
+    index: int
+    headings: List[str] = field(default_factory=list)
+    source: Optional[str] = None
+    page_number: Optional[int] = None
+    url: Optional[str] = None
+
+
+def _blocks(markdown: str) -> Iterator[Tuple[str, str, int]]:
+    """Split markdown into (kind, text, heading level) blocks in one pass."""
+    lines: List[str] = []
+    kind = "text"
+    fence = ""
+
+    for line in markdown.splitlines():
+        stripped = line.strip()
+        if fence:
+            lines.append(line)
+            if stripped.startswith(fence):
+                yield "code", "\n".join(lines), 0
+                lines, fence = [], ""
+            continue
+
+        heading = _HEADING.match(stripped)
+        opens_fence = stripped.startswith("```") or stripped.startswith("~~~")
+        is_table = stripped.startswith("|")
+        if lines and (
+            not stripped
+            or heading is not None
+            or opens_fence
+            or is_table != (kind == "table")
+        ):
+            yield kind, "\n".join(lines), 0
+            lines = []
+        if not stripped:
+            continue
+
+        if heading is not None:
+            yield "heading", stripped, len(heading.group(1))
+        elif opens_fence:
+            lines, fence = [line], stripped[:3]
+        else:
+            kind = "table" if is_table else "text"
+            lines.append(line.rstrip())
+
+    if lines:
+        yield ("code" if fence else kind), "\n".join(lines), 0
+
+
+class Chunker:
+    """Splits markdown into size-bounded chunks along its structure."""
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        overlap: int = 100,
+        length: Callable[[str], int] = len,
+    ) -> None:
+        """Configure the chunk sizes.
+
+        Args:
+            max_size: Largest chunk size, in the units of ``length``
+            overlap: Trailing text of a chunk repeated at the start of the next one in the same section
+            length: Measures a piece of text, characters by default; pass a token counter for token-bounded chunks
+
+        Raises:
+            ValueError: If max_size is not positive or overlap is not smaller than max_size
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if not 0 <= overlap < max_size:
+            raise ValueError("overlap must be at least 0 and smaller than max_size")
+        self.max_size = max_size
+        self.overlap = overlap
+        self.length = length
+        self._separator = length("\n\n")
+        self._space = length(" ")
+
+    def split(
+        self,
+        markdown: str,
+        source: Optional[str] = None,
+        page_number: Optional[int] = None,
+        url: Optional[str] = None,
+    ) -> Iterator[Chunk]:
+        """Split one markdown document into chunks.
+
+        Args:
+            markdown: The markdown
+            source: File name or start URL the markdown came from
+            page_number: PDF page the markdown came from
+            url: Crawled page the markdown came from
+
+        Yields:
+            The chunks, in document order
+        """
+        headings: List[str] = []
+        # Text, size and kind of the blocks of the chunk being built
+        parts: List[Tuple[str, int, str]] = []
+        size = 0
+        index = 0
+
+        def emit() -> Chunk:
+            nonlocal index
+            chunk = Chunk(
+                text="\n\n".join(text for text, _, _ in parts),
+                size=size,
+                index=index,
+                headings=list(headings),
+                source=source,
+                page_number=page_number,
+                url=url,
+            )
+            index += 1
+            return chunk
+
+        for kind, text, level in _blocks(markdown):
+            if kind == "heading":
+                if any(part_kind != "heading" for _, _, part_kind in parts):
+                    yield emit()
+                    parts, size = [], 0
+                del headings[level - 1 :]
+                headings.append(_HEADING.match(text).group(2))
+
+            block_size = self.length(text)
+            pieces = (
+                [(text, block_size)]
+                if block_size <= self.max_size
+                else self._split_block(kind, text)
+            )
+            for piece, piece_size in pieces:
+                if parts and size + self._separator + piece_size > self.max_size:
+                    yield emit()
+                    parts = self._overlap(parts)
+                    size = sum(part_size for _, part_size, _ in parts)
+                    size += self._separator * max(0, len(parts) - 1)
+                    if parts and size + self._separator + piece_size > self.max_size:
+                        parts, size = [], 0
+                if parts:
+                    size += self._separator
+                parts.append((piece, piece_size, kind))
+                size += piece_size
+
+        if any(part_kind != "heading" for _, _, part_kind in parts):
+            yield emit()
+
+    def _overlap(self, parts: List[Tuple[str, int, str]]) -> List[Tuple[str, int, str]]:
+        """Return the trailing text of a chunk to repeat at the start of the next."""
+        budget = self.overlap
+        carried: List[Tuple[str, int, str]] = []
+        for text, size, kind in reversed(parts):
+            if kind != "text" or budget <= 0:
+                break
+            if size <= budget:
+                carried.append((text, size, kind))
+                budget -= size + self._separator
+                continue
+
+            # Take whole words from the end of the block
+            words: List[str] = []
+            taken = 0
+            for word in reversed(text.split(" ")):
+                word_size = self.length(word) + self._space
+                if taken + word_size > budget:
+                    break
+                words.append(word)
+                taken += word_size
+            if words:
+                tail = " ".join(reversed(words))
+                carried.append((tail, self.length(tail), kind))
+            break
+
+        carried.reverse()
+        return carried
+
+    def _split_block(self, kind: str, text: str) -> List[Tuple[str, int]]:
+        """Split a block larger than max_size into pieces that fit."""
+        if kind == "table":
+            return self._split_table(text)
+
+        # Leave room for the overlap carried into the chunk of each piece
+        limit = max(1, self.max_size - self.overlap - self._separator)
+        pieces: List[Tuple[str, int]] = []
+        words: List[str] = []
+        size = 0
+        for word in text.split(" "):
+            word_size = self.length(word)
+            if words and size + self._space + word_size > limit:
+                pieces.append((" ".join(words), size))
+                words, size = [], 0
+            if word_size > limit:
+                # A single word longer than a piece, such as a data URI
+                pieces.extend(self._split_word(word, limit))
+                continue
+            size += word_size + (self._space if words else 0)
+            words.append(word)
+        if words:
+            pieces.append((" ".join(words), size))
+        return pieces
+
+    def _split_word(self, word: str, limit: int) -> List[Tuple[str, int]]:
+        """Cut a word into the longest slices that measure at most limit.
+
+        The end of each slice is found by doubling its length until it no
+        longer fits and then bisecting, so only slices up to twice the
+        length of the result are measured.
+        """
+        pieces: List[Tuple[str, int]] = []
+        start = 0
+        while start < len(word):
+            # Always take one character, even if it alone is over the limit
+            fits, fits_size = start + 1, self.length(word[start])
+            too_long = None
+            step = 1
+            while too_long is None and fits < len(word):
+                end = min(len(word), fits + step)
+                size = self.length(word[start:end])
+                if size > limit:
+                    too_long = end
+                else:
+                    fits, fits_size = end, size
+                    step *= 2
+            while too_long is not None and too_long - fits > 1:
+                middle = (fits + too_long) // 2
+                size = self.length(word[start:middle])
+                if size > limit:
+                    too_long = middle
+                else:
+                    fits, fits_size = middle, size
+            pieces.append((word[start:fits], fits_size))
+            start = fits
+        return pieces
+
+    def _split_table(self, text: str) -> List[Tuple[str, int]]:
+        """Split a table into row groups that fit, each repeating the header."""
+        rows = text.split("\n")
+        header: List[str] = rows[:1]
+        if len(rows) > 1 and _TABLE_SEPARATOR.match(rows[1].strip()):
+            header = rows[:2]
+        body = rows[len(header) :]
+
+        header_size = sum(self.length(row) + 1 for row in header)
+        pieces: List[Tuple[str, int]] = []
+        group: List[str] = []
+        size = header_size
+        for row in body:
+            row_size = self.length(row) + 1
+            if header_size + row_size > self.max_size:
+                # Not even alone with the header does the row fit
+                if group:
+                    pieces.append(("\n".join(header + group), size - 1))
+                    group, size = [], header_size
+                pieces.extend(self._split_block("text", row))
+                continue
+            if group and size + row_size > self.max_size:
+                pieces.append(("\n".join(header + group), size - 1))
+                group, size = [], header_size
+            group.append(row)
+            size += row_size
+        if group or not pieces:
+            pieces.append(("\n".join(header + group), size - 1))
+        return pieces
+
+    def chunk(
+        self, result: Union[ChunkSource, Iterable[ChunkSource]]
+    ) -> Iterator[Chunk]:
+        """Split a parse result, a crawled page, raw markdown or a list of them.
+
+        PDF results are split page by page, with each chunk carrying its
+        page number, and crawl results item by item, with each chunk
+        carrying the page URL.
+
+        Args:
+            result: What ``parse``, ``parse_iter`` or ``crawl_iter`` produced
+
+        Yields:
+            The chunks of every document, in order
+        """
+        from .parser import (
+            AnyparserCrawlResult,
+            AnyparserPdfResult,
+            AnyparserResultBase,
+            AnyparserUrl,
+        )
+
+        if isinstance(result, str):
+            yield from self.split(result)
+        elif isinstance(result, AnyparserUrl):
+            yield from self.split(result.markdown, source=result.url, url=result.url)
+        elif isinstance(result, AnyparserCrawlResult):
+            for item in result.items:
+                yield from self.split(
+                    item.markdown, source=result.start_url, url=item.url
+                )
+        elif isinstance(result, AnyparserPdfResult) and result.items:
+            for page in result.items:
+                yield from self.split(
+                    page.markdown,
+                    source=result.original_filename,
+                    page_number=page.page_number,
+                )
+        elif isinstance(result, AnyparserResultBase):
+            yield from self.split(
+                result.markdown or "", source=result.original_filename
+            )
+        else:
+            for item in result:
+                yield from self.chunk(item)
+
+    async def stream(
+        self, results: Union[Iterable[Any], AsyncIterable[Any]]
+    ) -> AsyncIterator[Chunk]:
+        """Yield chunks as results arrive.
+
+        Accepts the streams of ``crawl_iter``, ``parse_iter`` and
+        ``CrawlOrchestrator.crawl``, or any iterable of results. The tuples
+        ``parse_iter`` and the orchestrator yield are unpacked, and the
+        errors they report are skipped.
+
+        Args:
+            results: Results, pages or tuples ending in one, synchronously or asynchronously iterable
+
+        Yields:
+            The chunks of every result, in order
+        """
+        if hasattr(results, "__aiter__"):
+            async for result in results:
+                for chunk in self._chunk_streamed(result):
+                    yield chunk
+        else:
+            for result in results:
+                for chunk in self._chunk_streamed(result):
+                    yield chunk
+
+    def _chunk_streamed(self, result: Any) -> Iterator[Chunk]:
+        if isinstance(result, tuple):
+            result = result[-1]
+        if isinstance(result, BaseException):
+            return iter(())
+        return self.chunk(result)
@@ -0,0 +1,252 @@
+"""
+Command-line interface for streaming parse results as NDJSON.
+
+Usage:
+    anyparser [--concurrency N] [--batch-size N] [--cache-dir DIR] [--format FORMAT] [PATH ...]
+
+Paths are read from the arguments, or one per line from stdin when no paths
+are given or the only path is ``-``. Each result is written to stdout as one
+JSON line as soon as its request completes, so the command composes with
+``find``, ``xargs`` and other shell pipelines. Only ``argparse`` and ``sys``
+are imported at module load; everything else is imported once ``main`` runs.
+"""
+
+import argparse
+import sys
+from typing import TYPE_CHECKING, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    from .options import AnyparserOption
+
+# Options that change the result of parsing a file, and so key the cache
+_RESULT_OPTIONS = (
+    "api_url",
+    "format",
+    "model",
+    "encoding",
+    "image",
+    "table",
+    "ocr_language",
+    "ocr_preset",
+)
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(
+        prog="anyparser",
+        description="Parse files with the Anyparser API and write results to stdout as NDJSON.",
+    )
+    arg_parser.add_argument(
+        "paths", nargs="*", help="Files to parse; read from stdin if omitted or '-'"
+    )
+    arg_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Maximum number of requests in flight (default: 4)",
+    )
+    arg_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Number of files uploaded per request (default: 1)",
+    )
+    arg_parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for caching results by file content, skipping unchanged files",
+    )
+    arg_parser.add_argument(
+        "--format", choices=["json", "markdown", "html"], default="json"
+    )
+    arg_parser.add_argument(
+        "--model", choices=["text", "ocr", "vlm", "lam"], default="text"
+    )
+    return arg_parser
+
+
+def _read_paths(paths: List[str]) -> Iterator[str]:
+    """Yield paths from the arguments, or lazily from stdin."""
+    if paths and paths != ["-"]:
+        yield from paths
+        return
+
+    for line in sys.stdin:
+        path = line.strip()
+        if path:
+            yield path
+
+
+class ResultCache:
+    """On-disk cache of NDJSON output lines keyed by file path, content and options.
+
+    Cached lines carry the input path and file name, so the path is part of
+    the key: a renamed or copied file is parsed again instead of replaying
+    another file's identity.
+    """
+
+    def __init__(self, cache_dir: str, options: "AnyparserOption") -> None:
+        """Create the cache directory if needed.
+
+        Args:
+            cache_dir: Directory holding cached results
+            options: Options the cached results were produced with; the API
+                endpoint, format, model, encoding, image and table extraction
+                and OCR settings are part of every key
+        """
+        import os
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        values = [repr(getattr(options, name)) for name in _RESULT_OPTIONS]
+        self._salt = ("\0".join(values) + "\0").encode("utf-8")
+
+    def key(self, path: str) -> str:
+        """Compute the cache key for a file from its path and contents.
+
+        Args:
+            path: File to hash, as given on the command line
+
+        Returns:
+            Hex digest identifying the path, file contents and options
+        """
+        import hashlib
+
+        digest = hashlib.sha256(self._salt)
+        digest.update(path.encode("utf-8", "surrogateescape") + b"\0")
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        import os
+
+        return os.path.join(self.cache_dir, key[:2], key + ".ndjson")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached NDJSON lines for a key, or None on a miss."""
+        try:
+            with open(self._entry_path(key), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, lines: str) -> None:
+        """Atomically store NDJSON lines under a key."""
+        import os
+
+        entry_path = self._entry_path(key)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        temp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(lines)
+        os.replace(temp_path, entry_path)
+
+
+async def _run(args: argparse.Namespace) -> int:
+    import os
+
+    from .config.hardcoded import FALLBACK_API_URL
+    from .options import AnyparserOption
+    from .parser import Anyparser
+    from .serialize import dumps
+    from .sinks import StdoutSink
+
+    options = AnyparserOption(
+        api_url=os.getenv("ANYPARSER_API_URL", FALLBACK_API_URL),
+        api_key=os.getenv("ANYPARSER_API_KEY"),
+        format=args.format,
+        model=args.model,
+    )
+    parser = Anyparser(options)
+    cache = ResultCache(args.cache_dir, options) if args.cache_dir else None
+    keys = {}
+    failed = 0
+    # Pauses parsing while stdout is slower than the requests complete
+    sink = StdoutSink()
+
+    def uncached() -> Iterator[str]:
+        for path in _read_paths(args.paths):
+            if cache is None:
+                yield path
+                continue
+
+            try:
+                key = cache.key(path)
+            except OSError:
+                # Let the parser report missing or unreadable files
+                yield path
+                continue
+
+            hit = cache.get(key)
+            parser.metrics.record_cache("result", hit is not None)
+            if hit is None:
+                keys[path] = key
+                yield path
+            else:
+                sink.write_line_sync(hit)
+
+    try:
+        async for batch, result in parser.parse_iter(
+            uncached(),
+            concurrency=args.concurrency,
+            batch_size=args.batch_size,
+            return_exceptions=True,
+        ):
+            batch_keys = {path: keys.pop(path) for path in batch if path in keys}
+
+            if isinstance(result, BaseException):
+                failed += 1
+                print(f"anyparser: {', '.join(batch)}: {result}", file=sys.stderr)
+                continue
+
+            if isinstance(result, str):
+                lines = dumps({"inputs": batch, "content": result}) + "\n"
+                await sink.write_line(lines)
+                if cache is not None and len(batch) == 1 and batch_keys:
+                    cache.put(batch_keys[batch[0]], lines)
+                continue
+
+            lines = [dumps(item) + "\n" for item in result]
+            for line in lines:
+                await sink.write_line(line)
+
+            # Results come back in upload order, one per file
+            if cache is not None and len(lines) == len(batch):
+                for path, line in zip(batch, lines):
+                    if path in batch_keys:
+                        cache.put(batch_keys[path], line)
+    finally:
+        await sink.close()
+
+    return 1 if failed else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the command-line interface and return the process exit code.
+
+    Args:
+        argv: Command-line arguments, defaulting to ``sys.argv[1:]``
+
+    Returns:
+        0 if every input was parsed, 1 if any failed
+    """
+    import asyncio
+    import os
+
+    args = _build_arg_parser().parse_args(argv)
+
+    try:
+        return asyncio.run(_run(args))
+    except BrokenPipeError:
+        # The downstream reader went away, e.g. `anyparser ... | head`; point
+        # stdout at devnull so the interpreter's final flush does not fail again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
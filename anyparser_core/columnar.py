@@ -0,0 +1,342 @@
+"""
+Columnar export module writing results to Parquet or Feather files.
+
+Results are flattened into three tables with fixed schemas: ``pages``, one
+row per parsed document or PDF page, ``crawl_items``, one row per crawled
+page, and ``images``, one row per image of either. Rows are appended
+straight into per-column buffers, without converting results to
+dictionaries, and every ``row_group_size`` rows of a table are written as
+one Arrow record batch, which becomes one Parquet row group or one Feather
+record batch. Memory therefore stays bounded by the row group size however
+many results are exported.
+
+pyarrow is an optional dependency, imported when an exporter is created.
+"""
+
+import os
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
+
+if TYPE_CHECKING:
+    import pyarrow
+
+ColumnarFormat = Literal["parquet", "feather"]
+
+# Name, pyarrow type factory and nullability of the columns of each table
+TABLES: Dict[str, List[Tuple[str, str, bool]]] = {
+    "pages": [
+        ("rid", "string", False),
+        ("original_filename", "string", False),
+        ("checksum", "string", False),
+        ("page_number", "int32", True),
+        ("total_characters", "int64", True),
+        ("markdown", "string", True),
+        ("text", "string", True),
+    ],
+    "crawl_items": [
+        ("rid", "string", False),
+        ("start_url", "string", False),
+        ("url", "string", False),
+        ("status_code", "int32", False),
+        ("status_message", "string", False),
+        ("title", "string", True),
+        ("crawled_at", "string", True),
+        ("politeness_delay", "int32", False),
+        ("total_characters", "int64", False),
+        ("noindex", "bool_", True),
+        ("nofollow", "bool_", True),
+        ("markdown", "string", False),
+    ],
+    "images": [
+        ("rid", "string", False),
+        ("source", "string", False),
+        ("page_number", "int32", True),
+        ("image_index", "int32", False),
+        ("display_name", "string", True),
+        ("data", "string", False),
+    ],
+}
+
+
+def _import_pyarrow() -> Any:
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "Columnar export requires pyarrow. Install it with `pip install pyarrow`."
+        ) from e
+    return pyarrow
+
+
+def schema(table: str) -> "pyarrow.Schema":
+    """Return the Arrow schema of an exported table.
+
+    Args:
+        table: One of "pages", "crawl_items" or "images"
+
+    Returns:
+        The schema
+
+    Raises:
+        KeyError: If the table does not exist
+        ImportError: If pyarrow is not installed
+    """
+    pa = _import_pyarrow()
+    return pa.schema(
+        [
+            pa.field(name, getattr(pa, type_name)(), nullable=nullable)
+            for name, type_name, nullable in TABLES[table]
+        ]
+    )
+
+
+class _Table:
+    """Column buffers of one table and the writer they are flushed to."""
+
+    def __init__(self, name: str, path: str, exporter: "ColumnarExporter") -> None:
+        self.name = name
+        self.path = path
+        # Readers skip hidden files, so an unfinished file is never picked up
+        self.temp_path = os.path.join(
+            os.path.dirname(path), f".{os.path.basename(path)}.tmp"
+        )
+        self.schema = schema(name)
+        self.columns: List[List[Any]] = [[] for _ in self.schema]
+        self.rows = 0
+        self._exporter = exporter
+        self._writer: Any = None
+
+    def append(self, *values: Any) -> None:
+        for column, value in zip(self.columns, values):
+            column.append(value)
+        if len(self.columns[0]) >= self._exporter.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.columns[0]:
+            return
+
+        pa = self._exporter._pa
+        batch = pa.RecordBatch.from_arrays(
+            [
+                pa.array(column, type=field.type)
+                for column, field in zip(self.columns, self.schema)
+            ],
+            schema=self.schema,
+        )
+        if self._writer is None:
+            self._writer = self._exporter._open(self.temp_path, self.schema)
+        self._writer.write_batch(batch)
+        self.rows += batch.num_rows
+        self.columns = [[] for _ in self.schema]
+
+    def close(self) -> None:
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            os.replace(self.temp_path, self.path)
+
+    def abort(self) -> None:
+        self.columns = [[] for _ in self.schema]
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            os.remove(self.temp_path)
+
+
+class ColumnarExporter:
+    """Writes results to one Parquet or Feather file per table, batch by batch."""
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        format: ColumnarFormat = "parquet",
+        row_group_size: int = 10000,
+        compression: Optional[str] = None,
+    ) -> None:
+        """Create an exporter writing into a directory.
+
+        Tables are written to ``pages``, ``crawl_items`` and ``images`` files
+        with the format's extension. A table's file is only created once it
+        has rows, and only appears under its final name when the exporter
+        is closed.
+
+        Args:
+            directory: Directory for the table files, created if missing
+            format: Either "parquet" or "feather"
+            row_group_size: Rows buffered per table before they are written as one batch
+            compression: Codec such as "zstd" or "lz4", or None for the format's default
+
+        Raises:
+            ValueError: If the format is not supported or row_group_size is less than 1
+            ImportError: If pyarrow is not installed
+        """
+        if format not in ("parquet", "feather"):
+            raise ValueError(f'Unsupported columnar format: "{format}"')
+        if row_group_size < 1:
+            raise ValueError("row_group_size must be at least 1")
+
+        self._pa = _import_pyarrow()
+        os.makedirs(directory, exist_ok=True)
+        self.directory = Path(directory)
+        self.format = format
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self._tables = {
+            name: _Table(name, str(self.directory / f"{name}.{format}"), self)
+            for name in TABLES
+        }
+
+    def __enter__(self) -> "ColumnarExporter":
+        return self
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            for table in self._tables.values():
+                table.abort()
+
+    @property
+    def rows(self) -> Dict[str, int]:
+        """Rows exported so far per table, including buffered ones."""
+        return {
+            name: table.rows + len(table.columns[0])
+            for name, table in self._tables.items()
+        }
+
+    def _open(self, path: str, table_schema: "pyarrow.Schema") -> Any:
+        if self.format == "parquet":
+            import pyarrow.parquet as pq
+
+            return pq.ParquetWriter(
+                path, table_schema, compression=self.compression or "snappy"
+            )
+
+        options = self._pa.ipc.IpcWriteOptions(compression=self.compression)
+        return self._pa.ipc.new_file(path, table_schema, options=options)
+
+    def add(self, result: Any) -> None:
+        """Export a result, a crawled page, or a list of them.
+
+        Args:
+            result: What ``parse``, ``parse_iter`` or ``crawl_iter`` produced
+
+        Raises:
+            TypeError: If the result is raw text rather than a result dataclass
+        """
+        from .parser import (
+            AnyparserCrawlResult,
+            AnyparserPdfResult,
+            AnyparserResultBase,
+            AnyparserUrl,
+        )
+
+        if isinstance(result, AnyparserUrl):
+            self._add_url(result, "", "")
+        elif isinstance(result, AnyparserCrawlResult):
+            for item in result.items:
+                self._add_url(item, result.rid, result.start_url)
+        elif isinstance(result, AnyparserPdfResult) and result.items:
+            pages = self._tables["pages"]
+            images = self._tables["images"]
+            for page in result.items:
+                pages.append(
+                    result.rid,
+                    result.original_filename,
+                    result.checksum,
+                    page.page_number,
+                    len(page.markdown),
+                    page.markdown,
+                    page.text,
+                )
+                for index, data in enumerate(page.images):
+                    images.append(
+                        result.rid,
+                        result.original_filename,
+                        page.page_number,
+                        index,
+                        None,
+                        data,
+                    )
+        elif isinstance(result, AnyparserResultBase):
+            self._tables["pages"].append(
+                result.rid,
+                result.original_filename,
+                result.checksum,
+                None,
+                result.total_characters,
+                result.markdown,
+                None,
+            )
+        elif isinstance(result, str):
+            raise TypeError("Columnar export requires results parsed with format json")
+        else:
+            for item in result:
+                self.add(item)
+
+    def _add_url(self, page: Any, rid: str, start_url: str) -> None:
+        directive = page.directive
+        self._tables["crawl_items"].append(
+            rid,
+            start_url,
+            page.url,
+            page.status_code,
+            page.status_message,
+            page.title,
+            page.crawled_at,
+            page.politeness_delay,
+            page.total_characters,
+            directive.noindex if directive is not None else None,
+            directive.nofollow if directive is not None else None,
+            page.markdown,
+        )
+        images = self._tables["images"]
+        for image in page.images:
+            images.append(
+                rid,
+                page.url,
+                image.page,
+                image.image_index,
+                image.display_name,
+                image.base64_data,
+            )
+
+    async def export(self, results: Union[Iterable[Any], AsyncIterable[Any]]) -> None:
+        """Export results as they arrive, such as from ``crawl_iter``.
+
+        The tuples ``parse_iter`` and ``CrawlOrchestrator.crawl`` yield are
+        unpacked, and the errors they report are skipped.
+
+        Args:
+            results: Results, pages or tuples ending in one, synchronously or asynchronously iterable
+        """
+        if hasattr(results, "__aiter__"):
+            async for result in results:
+                self._add_streamed(result)
+        else:
+            for result in results:
+                self._add_streamed(result)
+
+    def _add_streamed(self, result: Any) -> None:
+        if isinstance(result, tuple):
+            result = result[-1]
+        if not isinstance(result, BaseException):
+            self.add(result)
+
+    def close(self) -> None:
+        """Write the buffered rows and finish every table file."""
+        for table in self._tables.values():
+            table.close()
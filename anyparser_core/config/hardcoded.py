@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Final, List
+from typing import Final, FrozenSet, List
 
 FALLBACK_API_URL: Final[str] = "https://anyparserapi.com"
 
@@ -20,6 +20,9 @@ OCR_PRESETS: Final[List[str]] = [
     "bank-statement",
 ]
 
+# Constant-time membership lookups for validation
+OCR_PRESET_SET: Final[FrozenSet[str]] = frozenset(OCR_PRESETS)
+
 
 class OcrPreset(Enum):
     """Enumeration of supported OCR presets for document processing."""
@@ -172,6 +175,9 @@ OCR_LANGUAGES: Final[List[str]] = [
     "yor",
 ]
 
+# Constant-time membership lookups for validation
+OCR_LANGUAGE_SET: Final[FrozenSet[str]] = frozenset(OCR_LANGUAGES)
+
 
 class OcrLanguage(Enum):
     """Enumeration of supported OCR languages for text recognition."""
@@ -0,0 +1,113 @@
+"""
+Decoding module for materialising large JSON responses off the event loop.
+
+Building thousands of result dataclasses for a big crawl takes long enough
+to stall every other coroutine. The helpers here run that work in a thread
+or a worker process instead. A worker process reads the response body from
+shared memory rather than receiving a pickled copy over its pipe, and
+writes the pickled results to a shared memory block of its own, so neither
+side is copied through the pipe. Unpickling the results still has to
+happen in the calling process and holds the GIL throughout, so it runs on
+the event loop; it takes about a third of the time decoding the JSON does.
+"""
+
+import json
+import pickle
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import asyncio
+    from concurrent.futures import Executor
+
+    from .parser import AnyparserResult
+
+
+def decode_json_bytes(
+    data: bytes, model: str, content_types: Optional[Dict[str, str]] = None
+) -> List["AnyparserResult"]:
+    """Decode a JSON response body into result dataclasses.
+
+    Args:
+        data: The response body
+        model: The model the request was made with
+        content_types: Content type of every uploaded file, by file name
+
+    Returns:
+        The decoded results
+    """
+    from .parser import _decode_json
+
+    return _decode_json(json.loads(data), model, content_types)
+
+
+def _decode_shared(
+    name: str, size: int, model: str, content_types: Optional[Dict[str, str]]
+) -> Tuple[str, int]:
+    """Decode a body held in shared memory into a new block of pickled results.
+
+    Returns:
+        The name and size of the block holding the pickled results
+    """
+    from multiprocessing import shared_memory
+
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        data = bytes(block.buf[:size])
+    finally:
+        block.close()
+
+    payload = pickle.dumps(decode_json_bytes(data, model, content_types), protocol=5)
+    block = shared_memory.SharedMemory(create=True, size=max(1, len(payload)))
+    try:
+        block.buf[: len(payload)] = payload
+    finally:
+        block.close()
+    return block.name, len(payload)
+
+
+def _load_shared(name: str, size: int) -> List["AnyparserResult"]:
+    """Unpickle the results in a shared memory block, then free the block."""
+    from multiprocessing import shared_memory
+
+    block = shared_memory.SharedMemory(name=name)
+    view = block.buf[:size]
+    try:
+        return pickle.loads(view)
+    finally:
+        view.release()
+        block.close()
+        block.unlink()
+
+
+async def decode_in_process(
+    loop: "asyncio.AbstractEventLoop",
+    executor: "Executor",
+    data: bytes,
+    model: str,
+    content_types: Optional[Dict[str, str]] = None,
+) -> List["AnyparserResult"]:
+    """Decode a JSON response body in a worker process.
+
+    Args:
+        loop: The running event loop
+        executor: Process pool to decode in
+        data: The response body
+        model: The model the request was made with
+        content_types: Content type of every uploaded file, by file name
+
+    Returns:
+        The decoded results
+    """
+    from multiprocessing import shared_memory
+
+    block = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    try:
+        block.buf[: len(data)] = data
+        name, size = await loop.run_in_executor(
+            executor, _decode_shared, block.name, len(data), model, content_types
+        )
+    finally:
+        block.close()
+        block.unlink()
+
+    return _load_shared(name, size)
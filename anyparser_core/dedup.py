@@ -0,0 +1,272 @@
+"""
+Near-duplicate detection module for crawled pages.
+
+Each page's markdown is reduced to a 64-bit SimHash over overlapping word
+shingles, so pages that differ only in small parts, such as pagination
+links, tag lists or print-view chrome, get signatures a few bits apart.
+Signatures are kept in a ``SignatureIndex`` split into bands: two
+signatures within ``max_distance`` bits of each other agree exactly on at
+least one of ``max_distance + 1`` bands, so candidates are found with one
+dictionary lookup per band instead of a scan. The index saves to a compact
+binary file, so duplicates are also recognised across crawls.
+"""
+
+import hashlib
+import re
+import struct
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .incremental import normalize_url
+
+if TYPE_CHECKING:
+    from .parser import AnyparserUrl
+
+_BITS = 64
+_LANE = 32
+_LANE_MASK = (1 << _LANE) - 1
+_WORD = re.compile(r"\w+")
+_MAGIC = b"APSIG1"
+
+# Byte value to its 8 bits spread one per 32-bit lane, so a single integer
+# addition counts all bits of a byte at once
+_SPREAD = [
+    sum(1 << (bit * _LANE) for bit in range(8) if byte >> bit & 1)
+    for byte in range(256)
+]
+
+
+def simhash(text: str, shingle: int = 3) -> int:
+    """Return the 64-bit SimHash of a text.
+
+    Args:
+        text: The text, typically a page's markdown
+        shingle: Number of consecutive words hashed together
+
+    Returns:
+        The signature, 0 for text without words
+    """
+    words = _WORD.findall(text.lower())
+    if not words:
+        return 0
+
+    count = max(1, len(words) - shingle + 1)
+    lanes = [0] * 8
+    for start in range(count):
+        digest = hashlib.blake2b(
+            " ".join(words[start : start + shingle]).encode("utf-8"), digest_size=8
+        ).digest()
+        for index in range(8):
+            lanes[index] += _SPREAD[digest[index]]
+
+    signature = 0
+    half = count / 2
+    for index, lane in enumerate(lanes):
+        for bit in range(8):
+            if (lane >> (bit * _LANE)) & _LANE_MASK > half:
+                signature |= 1 << (index * 8 + bit)
+    return signature
+
+
+def hamming(a: int, b: int) -> int:
+    """Return the number of bits two signatures differ in."""
+    return bin(a ^ b).count("1")
+
+
+class SignatureIndex:
+    """Banded index of SimHash signatures, keyed by normalized URL."""
+
+    def __init__(self, max_distance: int = 3) -> None:
+        """Create an empty index.
+
+        Args:
+            max_distance: Largest number of differing bits counted as a near-duplicate
+
+        Raises:
+            ValueError: If max_distance is negative or too large to band
+        """
+        if not 0 <= max_distance < _BITS // 2:
+            raise ValueError(f"max_distance must be between 0 and {_BITS // 2 - 1}")
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        bounds = [band * _BITS // bands for band in range(bands + 1)]
+        # Shift and mask of each band
+        self._bands: List[Tuple[int, int]] = [
+            (start, (1 << (end - start)) - 1) for start, end in zip(bounds, bounds[1:])
+        ]
+        self._buckets: List[Dict[int, List[str]]] = [{} for _ in self._bands]
+        self._signatures: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._signatures
+
+    def add(self, key: str, signature: int) -> None:
+        """Index a signature, replacing any earlier signature of the key."""
+        self.remove(key)
+        self._signatures[key] = signature
+        for buckets, (shift, mask) in zip(self._buckets, self._bands):
+            buckets.setdefault((signature >> shift) & mask, []).append(key)
+
+    def remove(self, key: str) -> None:
+        """Drop the signature of a key, if indexed."""
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        for buckets, (shift, mask) in zip(self._buckets, self._bands):
+            band = (signature >> shift) & mask
+            keys = buckets[band]
+            keys.remove(key)
+            if not keys:
+                del buckets[band]
+
+    def query(self, signature: int, exclude: Optional[str] = None) -> Optional[str]:
+        """Return the key of the closest indexed near-duplicate of a signature.
+
+        Args:
+            signature: The signature to look up
+            exclude: Key to ignore, such as the page's own URL
+
+        Returns:
+            The key within max_distance bits, or None if there is none
+        """
+        best: Optional[str] = None
+        best_distance = self.max_distance + 1
+        seen = set()
+        for buckets, (shift, mask) in zip(self._buckets, self._bands):
+            for key in buckets.get((signature >> shift) & mask, ()):
+                if key in seen or key == exclude:
+                    continue
+                seen.add(key)
+                distance = hamming(signature, self._signatures[key])
+                if distance < best_distance:
+                    best, best_distance = key, distance
+        return best
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the index to a file, 8 bytes per signature plus its key."""
+        with open(path, "wb") as f:
+            f.write(_MAGIC + struct.pack(">B", self.max_distance))
+            for key, signature in self._signatures.items():
+                encoded = key.encode("utf-8")
+                f.write(struct.pack(">QH", signature, len(encoded)))
+                f.write(encoded)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "SignatureIndex":
+        """Read an index written by ``save``.
+
+        Raises:
+            ValueError: If the file is not a saved signature index
+        """
+        data = Path(path).read_bytes()
+        if not data.startswith(_MAGIC):
+            raise ValueError(f"{path} is not a signature index")
+
+        offset = len(_MAGIC)
+        index = cls(data[offset])
+        offset += 1
+        while offset < len(data):
+            signature, length = struct.unpack_from(">QH", data, offset)
+            offset += 10
+            index.add(data[offset : offset + length].decode("utf-8"), signature)
+            offset += length
+        return index
+
+
+class NearDuplicateFilter:
+    """Streaming stage flagging or dropping pages that near-duplicate an earlier page."""
+
+    def __init__(
+        self,
+        index: Optional[SignatureIndex] = None,
+        max_distance: int = 3,
+        shingle: int = 3,
+    ) -> None:
+        """Create a filter.
+
+        Args:
+            index: Signatures of earlier pages, such as an index loaded from a previous crawl
+            max_distance: Largest number of differing bits counted as a near-duplicate, if no index is given
+            shingle: Number of consecutive words hashed together
+        """
+        self.index = index if index is not None else SignatureIndex(max_distance)
+        self.shingle = shingle
+        self.duplicates = 0
+
+    def check(self, page: "AnyparserUrl") -> Optional[str]:
+        """Return the URL a page near-duplicates, indexing the page if it is new.
+
+        A page matching its own earlier signature is not a duplicate; its
+        signature is updated instead. Failed and empty pages are ignored.
+
+        Args:
+            page: A crawled page
+
+        Returns:
+            The normalized URL of the earlier page, or None
+        """
+        if page.status_code >= 400 or not page.markdown:
+            return None
+
+        key = normalize_url(page.url)
+        signature = simhash(page.markdown, self.shingle)
+        original = self.index.query(signature, exclude=key)
+        if original is not None:
+            self.duplicates += 1
+            return original
+
+        self.index.add(key, signature)
+        return None
+
+    async def flag(
+        self, pages: Union[Iterable["AnyparserUrl"], AsyncIterable["AnyparserUrl"]]
+    ) -> AsyncIterator[Tuple["AnyparserUrl", Optional[str]]]:
+        """Yield every page with the URL it near-duplicates, or None.
+
+        Args:
+            pages: Pages such as ``AnyparserCrawlResult.items`` or a ``crawl_iter`` stream
+
+        Yields:
+            Tuples of the page and the normalized URL of its original
+        """
+        async for page in _aiter(pages):
+            yield page, self.check(page)
+
+    async def collapse(
+        self, pages: Union[Iterable["AnyparserUrl"], AsyncIterable["AnyparserUrl"]]
+    ) -> AsyncIterator["AnyparserUrl"]:
+        """Yield only the pages that do not near-duplicate an earlier page.
+
+        Args:
+            pages: Pages such as ``AnyparserCrawlResult.items`` or a ``crawl_iter`` stream
+
+        Yields:
+            The first page of every group of near-duplicates
+        """
+        async for page in _aiter(pages):
+            if self.check(page) is None:
+                yield page
+
+
+async def _aiter(
+    pages: Union[Iterable["AnyparserUrl"], AsyncIterable["AnyparserUrl"]]
+) -> AsyncIterator["AnyparserUrl"]:
+    if hasattr(pages, "__aiter__"):
+        async for page in pages:
+            yield page
+    else:
+        for page in pages:
+            yield page
@@ -2,97 +2,168 @@
 Form data builder module for creating multipart form data for API requests.
 """
 
-import mimetypes
-from typing import Any
+from typing import Any, List
 
-from .options import AnyparserParsedOption
+from .options import AnyparserParsedOption, UploadedFile
 
+CRLF: bytes = b"\r\n"
 
-def build_form(parsed: AnyparserParsedOption, boundary: str) -> bytes:
+
+def encode_field(name: str, value: Any, boundary: str) -> bytes:
+    """Encode a single form field as a multipart part.
+
+    Args:
+        name: Field name
+        value: Field value, converted with str()
+        boundary: The boundary string to use for the form
+
+    Returns:
+        The encoded part, including its leading boundary line
     """
-    Builds multipart form data from parsed options.
+    return b"".join(
+        [
+            f"--{boundary}".encode("utf-8"),
+            CRLF,
+            f'Content-Disposition: form-data; name="{name}"'.encode("utf-8"),
+            CRLF,
+            CRLF,
+            str(value).encode("utf-8"),
+            CRLF,
+        ]
+    )
+
+
+def build_option_parts(parsed: AnyparserParsedOption, boundary: str) -> bytes:
+    """
+    Builds the parts for option fields that do not change between requests.
 
     Args:
         parsed: Validated parser options
         boundary: The boundary string to use for the form
 
     Returns:
-        The form data as a byte string for use in an HTTP request
+        The encoded format, model, extraction and OCR fields
     """
-    form_data: bytearray = bytearray()
-    crlf: bytes = b"\r\n"
-
-    # Helper function to add a field to the form
-    def add_field(name: str, value: Any) -> None:
-        """Add a field to the form data.
-
-        Args:
-            name: Field name
-            value: Field value
-        """
-        form_data.extend(f"--{boundary}".encode("utf-8"))
-        form_data.extend(crlf)
-        form_data.extend(
-            f'Content-Disposition: form-data; name="{name}"'.encode("utf-8")
-        )
-        form_data.extend(crlf)
-        form_data.extend(crlf)
-        form_data.extend(str(value).encode("utf-8"))
-        form_data.extend(crlf)
+    parts: List[bytes] = []
 
     # Add regular form fields
-    add_field("format", parsed.format)
-    add_field("model", parsed.model)
+    parts.append(encode_field("format", parsed.format, boundary))
+    parts.append(encode_field("model", parsed.model, boundary))
 
     # Only add image and table fields if not using OCR model or crawler model
     if parsed.model != "ocr" and parsed.model != "crawler":
         if parsed.image is not None:
-            add_field("image", str(parsed.image))
+            parts.append(encode_field("image", str(parsed.image), boundary))
         if parsed.table is not None:
-            add_field("table", str(parsed.table))
+            parts.append(encode_field("table", str(parsed.table), boundary))
 
     if parsed.model == "ocr":
         if parsed.ocr_language:
-            add_field(
-                "ocr_language", ",".join([lang.value for lang in parsed.ocr_language])
+            parts.append(
+                encode_field(
+                    "ocr_language",
+                    ",".join([lang.value for lang in parsed.ocr_language]),
+                    boundary,
+                )
             )
 
         if parsed.ocr_preset:
-            add_field("ocr_preset", parsed.ocr_preset.value)
+            parts.append(encode_field("ocr_preset", parsed.ocr_preset.value, boundary))
+
+    return b"".join(parts)
+
+
+def build_crawl_parts(parsed: AnyparserParsedOption, boundary: str) -> bytes:
+    """
+    Builds the parts describing a crawl, starting with its URL.
+
+    Args:
+        parsed: Validated parser options for the crawler model
+        boundary: The boundary string to use for the form
+
+    Returns:
+        The encoded url and crawl settings fields, plus the known pages of an incremental crawl
+    """
+    parts: List[bytes] = [
+        encode_field("url", parsed.url, boundary),
+        encode_field("max_depth", parsed.max_depth, boundary),
+        encode_field("max_executions", parsed.max_executions, boundary),
+        encode_field("strategy", parsed.strategy, boundary),
+        encode_field("traversal_scope", parsed.traversal_scope, boundary),
+    ]
+
+    # Pages of an earlier crawl, so unchanged ones can be left out
+    if parsed.known_urls is not None:
+        from .incremental import encode_known_pages
+
+        parts.append(
+            encode_field("known_urls", encode_known_pages(parsed.known_urls), boundary)
+        )
+
+    return b"".join(parts)
+
+
+def build_file_part(file: UploadedFile, boundary: str) -> bytes:
+    """
+    Builds the part for a single uploaded file.
+
+    Args:
+        file: The file to upload
+        boundary: The boundary string to use for the form
+
+    Returns:
+        The encoded file part with its sniffed Content-Type
+    """
+    return b"".join(
+        [
+            f"--{boundary}".encode("utf-8"),
+            CRLF,
+            f'Content-Disposition: form-data; name="files"; filename="{file.filename}"'.encode(
+                "utf-8"
+            ),
+            CRLF,
+            f"Content-Type: {file.content_type}".encode("utf-8"),
+            CRLF,
+            CRLF,
+            file.contents,
+            CRLF,
+        ]
+    )
+
+
+def build_closing(boundary: str) -> bytes:
+    """
+    Builds the final boundary that terminates the form.
+
+    Args:
+        boundary: The boundary string to use for the form
+
+    Returns:
+        The encoded closing boundary line
+    """
+    return f"--{boundary}--".encode("utf-8") + CRLF
+
+
+def build_form(parsed: AnyparserParsedOption, boundary: str) -> bytes:
+    """
+    Builds multipart form data from parsed options.
+
+    Args:
+        parsed: Validated parser options
+        boundary: The boundary string to use for the form
+
+    Returns:
+        The form data as a byte string for use in an HTTP request
+    """
+    parts: List[bytes] = [build_option_parts(parsed, boundary)]
 
     if parsed.model == "crawler":
-        add_field("url", parsed.url)
-        add_field("max_depth", parsed.max_depth)
-        add_field("max_executions", parsed.max_executions)
-        add_field("strategy", parsed.strategy)
-        add_field("traversal_scope", parsed.traversal_scope)
+        parts.append(build_crawl_parts(parsed, boundary))
     else:
         # Add files to the form
-        for file in parsed.files:
-            file_content: bytes = file.contents
-            file_name: str = file.filename
-
-            # Guess the MIME type
-            content_type: str = (
-                mimetypes.guess_type(file_name)[0] or "application/octet-stream"
-            )
-
-            form_data.extend(f"--{boundary}".encode("utf-8"))
-            form_data.extend(crlf)
-            form_data.extend(
-                f'Content-Disposition: form-data; name="files"; filename="{file_name}"'.encode(
-                    "utf-8"
-                )
-            )
-            form_data.extend(crlf)
-            form_data.extend(f"Content-Type: {content_type}".encode("utf-8"))
-            form_data.extend(crlf)
-            form_data.extend(crlf)
-            form_data.extend(file_content)
-            form_data.extend(crlf)
+        parts.extend(build_file_part(file, boundary) for file in parsed.files)
 
     # Add the final boundary
-    form_data.extend(f"--{boundary}--".encode("utf-8"))
-    form_data.extend(crlf)
+    parts.append(build_closing(boundary))
 
-    return bytes(form_data)
+    return b"".join(parts)
@@ -0,0 +1,101 @@
+"""
+Hedging module for cutting the tail latency of small parse requests.
+
+When a hedged request has not completed within a delay taken from a recent
+latency percentile, a duplicate is sent and whichever answers first wins.
+A token budget caps the extra load: every eligible request earns
+``max_extra_load`` of a token and every duplicate spends a whole one, so at
+most that fraction of requests is ever duplicated.
+"""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from .metrics import HdrHistogram
+
+if TYPE_CHECKING:
+    from .options import AnyparserParsedOption
+
+
+@dataclass
+class HedgePolicy:
+    """When and how often requests are hedged."""
+
+    percentile: float = 0.95
+    min_delay: float = 0.01
+    max_delay: float = 10.0
+    max_extra_load: float = 0.05
+    max_burst: float = 10.0
+    min_samples: int = 20
+    window: int = 1000
+    max_body_bytes: int = 1024 * 1024
+
+
+class Hedger:
+    """Tracks recent request latencies and the budget of duplicate requests."""
+
+    def __init__(self, policy: Optional[HedgePolicy] = None) -> None:
+        """Create a hedger.
+
+        Args:
+            policy: Hedging settings, the defaults if omitted
+
+        Raises:
+            ValueError: If the percentile or the extra load is out of range
+        """
+        self.policy = policy or HedgePolicy()
+        if not 0 < self.policy.percentile < 1:
+            raise ValueError("percentile must be between 0 and 1")
+        if not 0 < self.policy.max_extra_load <= 1:
+            raise ValueError("max_extra_load must be between 0 and 1")
+
+        self.tokens = 0.0
+        self._current = HdrHistogram()
+        self._previous: Optional[HdrHistogram] = None
+
+    def eligible(self, parsed: "AnyparserParsedOption", body_bytes: int) -> bool:
+        """Return whether a request is small enough to be worth duplicating.
+
+        Only single-file uploads up to ``max_body_bytes`` are hedged; crawls
+        and batches are dominated by their own size, not by stragglers.
+
+        Args:
+            parsed: The options with inputs attached
+            body_bytes: Size of the request body
+        """
+        return (
+            parsed.model != "crawler"
+            and len(parsed.files or ()) == 1
+            and body_bytes <= self.policy.max_body_bytes
+        )
+
+    def record(self, latency: float) -> None:
+        """Record the latency of a completed request in seconds."""
+        if self._current.count >= self.policy.window:
+            # Keep the last full window so the percentile tracks recent traffic
+            self._previous, self._current = self._current, HdrHistogram()
+        self._current.record(latency)
+
+    def delay(self) -> Optional[float]:
+        """Return how long to wait before hedging, or None without enough samples."""
+        histogram = self._current
+        if histogram.count < self.policy.min_samples:
+            histogram = self._previous
+            if histogram is None:
+                return None
+
+        delay = histogram.percentile(self.policy.percentile)
+        return min(max(delay, self.policy.min_delay), self.policy.max_delay)
+
+    def deposit(self) -> None:
+        """Earn budget for an eligible request."""
+        self.tokens = min(
+            self.tokens + self.policy.max_extra_load, self.policy.max_burst
+        )
+
+    def withdraw(self) -> bool:
+        """Spend budget on a duplicate request, returning False if there is none."""
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
@@ -0,0 +1,518 @@
+"""
+HTTP/2 transport module multiplexing parse requests over one connection per endpoint.
+
+The transport keeps a single connection per endpoint and opens a stream per
+request, so hundreds of concurrent parses share one TLS handshake and one
+socket, and a large upload no longer holds a connection of its own. Request
+and response bodies honour HTTP/2 flow control. A stream's receive window
+is only reopened once its consumer has taken the data, so a slow consumer
+pauses the server instead of piling the response up in memory, while the
+connection window is reopened on arrival so it cannot stall other streams.
+
+HTTPS endpoints negotiate ``h2`` through ALPN; plain HTTP loopback
+endpoints, such as a local test server, speak h2c with prior knowledge.
+
+The protocol state machine comes from the optional ``h2`` package:
+
+    pip install "anyparser-core[http2]"
+"""
+
+import asyncio
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import h2.connection
+
+    from .prepared import Endpoint
+
+# Receive window advertised per stream and added to the connection window
+_RECEIVE_WINDOW = 1 << 20
+
+# Bytes taken before a window is reopened, to avoid a WINDOW_UPDATE per frame
+_WINDOW_UPDATE_THRESHOLD = _RECEIVE_WINDOW // 2
+
+
+def _require_h2() -> None:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        raise ImportError(
+            "The HTTP/2 transport requires h2. Install it with `pip install h2`."
+        )
+
+
+async def send_data(
+    conn: "h2.connection.H2Connection",
+    writer: asyncio.StreamWriter,
+    window_open: asyncio.Event,
+    stream_id: int,
+    data: bytes,
+    chunk_size: Optional[int] = None,
+    interval: float = 0.0,
+) -> None:
+    """Send a body on a stream as fast as flow control allows, then end the stream.
+
+    Args:
+        conn: The connection state machine
+        writer: Stream writer of the socket
+        window_open: Event set whenever the peer grants more window
+        stream_id: The stream to send on
+        data: The body
+        chunk_size: Largest frame to send, the peer's maximum frame size if omitted
+        interval: Seconds to sleep between frames
+
+    Raises:
+        ConnectionResetError: If the connection closes while waiting for window
+    """
+    view = memoryview(data)
+    offset = 0
+    while offset < len(data):
+        window = min(
+            conn.local_flow_control_window(stream_id),
+            conn.max_outbound_frame_size,
+            chunk_size or len(data),
+        )
+        if window <= 0:
+            if writer.is_closing():
+                raise ConnectionResetError("HTTP/2 connection closed")
+            window_open.clear()
+            await window_open.wait()
+            continue
+
+        chunk = view[offset : offset + window]
+        offset += len(chunk)
+        conn.send_data(stream_id, bytes(chunk), end_stream=offset >= len(data))
+        writer.write(conn.data_to_send())
+        await writer.drain()
+        if interval:
+            await asyncio.sleep(interval)
+
+    if not data:
+        conn.end_stream(stream_id)
+        writer.write(conn.data_to_send())
+        await writer.drain()
+
+
+class _Stream:
+    __slots__ = ("headers", "body", "done", "received", "held", "taken", "buffered")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.headers: "asyncio.Future" = loop.create_future()
+        self.body = bytearray()
+        self.done: "asyncio.Future" = loop.create_future()
+        self.received = asyncio.Event()
+        # Flow-controlled bytes in body, and bytes taken but not yet returned to the window
+        self.held = 0
+        self.taken = 0
+        # Whether the whole body is wanted, so data is taken as it arrives
+        self.buffered = False
+
+    def fail(self, error: BaseException) -> None:
+        self.received.set()
+        for future in (self.headers, self.done):
+            if not future.done():
+                future.set_exception(error)
+                # Mark as retrieved; whoever awaits it still sees the error
+                future.exception()
+
+
+class Http2Response:
+    """Response on an HTTP/2 stream, with the same shape as http.client's."""
+
+    def __init__(
+        self, connection: "Http2Connection", stream_id: int, stream: _Stream
+    ) -> None:
+        self.connection = connection
+        self.stream_id = stream_id
+        self.status = int(stream.headers.result()[b":status"])
+        self._stream = stream
+
+    async def read(self) -> bytes:
+        """Wait for the rest of the body and return all of it.
+
+        Cancelling the read resets the stream, so the server can stop work
+        on it, while other streams on the connection carry on.
+        """
+        stream = self._stream
+        stream.buffered = True
+        held, stream.held = stream.held, 0
+        self.connection.take(self.stream_id, stream, held)
+        try:
+            return await stream.done
+        except asyncio.CancelledError:
+            self.connection.cancel(self.stream_id)
+            raise
+        finally:
+            self.connection.release(self.stream_id)
+
+    async def iter_chunks(self) -> AsyncIterator[bytes]:
+        """Yield the body in parts as it arrives, instead of all at once.
+
+        Parts are handed over as they are received, so the body is never
+        held whole. The server may only send more once a part has been
+        consumed. Closing the iterator early resets the stream.
+        """
+        stream = self._stream
+        try:
+            while True:
+                if stream.body:
+                    chunk = bytes(stream.body)
+                    stream.body.clear()
+                    held, stream.held = stream.held, 0
+                    yield chunk
+                    self.connection.take(self.stream_id, stream, held)
+                elif stream.done.done():
+                    # Raises if the stream was reset
+                    stream.done.result()
+                    return
+                else:
+                    stream.received.clear()
+                    await stream.received.wait()
+        finally:
+            if stream.done.done():
+                self.connection.release(self.stream_id)
+            else:
+                self.connection.cancel(self.stream_id)
+
+
+class Http2Connection:
+    """Client side of one HTTP/2 connection carrying many concurrent streams."""
+
+    def __init__(self, endpoint: "Endpoint") -> None:
+        """Create an unconnected connection.
+
+        Args:
+            endpoint: The endpoint to connect to
+        """
+        _require_h2()
+
+        self.endpoint = endpoint
+        self.loop = asyncio.get_running_loop()
+        self.closed = False
+        self._conn: Optional["h2.connection.H2Connection"] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._streams: Dict[int, _Stream] = {}
+        # Bytes received but not yet returned to the connection window
+        self._unacknowledged = 0
+        self._window_open = asyncio.Event()
+        self._stream_closed = asyncio.Event()
+        self._reader_task: Optional["asyncio.Task"] = None
+        self.ready = asyncio.ensure_future(self._connect())
+
+    async def _connect(self) -> None:
+        import ssl
+        from urllib.parse import urlsplit
+
+        import h2.config
+        import h2.connection
+        import h2.settings
+
+        endpoint = self.endpoint
+        parts = urlsplit(f"//{endpoint.host}")
+        host = parts.hostname or ""
+        if endpoint.scheme == "https":
+            context = ssl.create_default_context()
+            context.set_alpn_protocols(["h2"])
+            reader, writer = await asyncio.open_connection(
+                host, parts.port or 443, ssl=context, server_hostname=host
+            )
+            protocol = writer.get_extra_info("ssl_object").selected_alpn_protocol()
+            if protocol != "h2":
+                writer.close()
+                raise ConnectionError(f"{endpoint.host} does not support HTTP/2")
+        else:
+            # Prior-knowledge h2c, only ever used for loopback endpoints
+            reader, writer = await asyncio.open_connection(host, parts.port or 80)
+
+        conn = h2.connection.H2Connection(
+            h2.config.H2Configuration(client_side=True, header_encoding=None)
+        )
+        conn.initiate_connection()
+        conn.update_settings(
+            {h2.settings.SettingCodes.INITIAL_WINDOW_SIZE: _RECEIVE_WINDOW}
+        )
+        conn.increment_flow_control_window(_RECEIVE_WINDOW)
+        writer.write(conn.data_to_send())
+        await writer.drain()
+
+        self._conn = conn
+        self._writer = writer
+        self._reader_task = asyncio.ensure_future(self._read_loop(reader))
+
+    async def _read_loop(self, reader: asyncio.StreamReader) -> None:
+        import h2.events
+        import h2.exceptions
+
+        conn = self._conn
+        error: BaseException = ConnectionResetError("HTTP/2 connection closed")
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+
+                for event in conn.receive_data(data):
+                    stream = self._streams.get(getattr(event, "stream_id", 0))
+                    if isinstance(event, h2.events.ResponseReceived):
+                        if stream is not None and not stream.headers.done():
+                            stream.headers.set_result(dict(event.headers))
+                    elif isinstance(event, h2.events.DataReceived):
+                        self._received(event.flow_controlled_length)
+                        if stream is not None:
+                            stream.body += event.data
+                            if stream.buffered:
+                                self.take(
+                                    event.stream_id,
+                                    stream,
+                                    event.flow_controlled_length,
+                                )
+                            else:
+                                stream.held += event.flow_controlled_length
+                            stream.received.set()
+                    elif isinstance(event, h2.events.StreamEnded):
+                        if stream is not None and not stream.done.done():
+                            stream.done.set_result(bytes(stream.body))
+                            stream.received.set()
+                        self._stream_closed.set()
+                    elif isinstance(event, h2.events.StreamReset):
+                        if stream is not None:
+                            stream.fail(
+                                ConnectionResetError(
+                                    f"HTTP/2 stream reset with error {event.error_code}"
+                                )
+                            )
+                        self._stream_closed.set()
+                    elif isinstance(
+                        event,
+                        (h2.events.WindowUpdated, h2.events.RemoteSettingsChanged),
+                    ):
+                        self._window_open.set()
+                        self._stream_closed.set()
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        error = ConnectionResetError(
+                            f"HTTP/2 connection terminated with error {event.error_code}"
+                        )
+                        return
+
+                self._flush()
+        except (OSError, h2.exceptions.ProtocolError) as e:
+            error = ConnectionResetError(f"HTTP/2 connection failed: {e}")
+        finally:
+            self.closed = True
+            for stream in self._streams.values():
+                stream.fail(error)
+            self._window_open.set()
+            self._stream_closed.set()
+            self._writer.close()
+
+    def _flush(self) -> None:
+        data = self._conn.data_to_send()
+        if data:
+            self._writer.write(data)
+
+    def _received(self, size: int) -> None:
+        """Reopen the connection window for data that has arrived.
+
+        Data waiting in a stream's buffer is bounded by the stream window,
+        so the connection window is returned straight away and one slow
+        consumer cannot stall the other streams.
+        """
+        self._unacknowledged += size
+        if self._unacknowledged >= _WINDOW_UPDATE_THRESHOLD:
+            self._conn.increment_flow_control_window(self._unacknowledged)
+            self._unacknowledged = 0
+
+    def take(self, stream_id: int, stream: _Stream, size: int) -> None:
+        """Count data on a stream as consumed, reopening its window once enough is.
+
+        Args:
+            stream_id: The stream the data arrived on
+            stream: State of the stream
+            size: Flow-controlled bytes consumed
+        """
+        import h2.exceptions
+
+        stream.taken += size
+        if stream.taken < _WINDOW_UPDATE_THRESHOLD or stream.done.done() or self.closed:
+            return
+        stream.taken, taken = 0, stream.taken
+        try:
+            self._conn.increment_flow_control_window(taken, stream_id)
+        except (KeyError, h2.exceptions.ProtocolError):
+            # The server already ended the stream
+            return
+        self._flush()
+
+    async def _open_stream(self) -> int:
+        conn = self._conn
+        while (
+            not self.closed
+            and conn.open_outbound_streams
+            >= conn.remote_settings.max_concurrent_streams
+        ):
+            self._stream_closed.clear()
+            await self._stream_closed.wait()
+
+        if self.closed:
+            raise ConnectionResetError("HTTP/2 connection closed")
+        return conn.get_next_available_stream_id()
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes,
+        headers: Dict[bytes, bytes],
+        on_sent: Optional[Callable[[], None]] = None,
+    ) -> Http2Response:
+        """Send a request on a new stream and wait for the response headers.
+
+        Args:
+            method: HTTP method
+            path: Request path
+            body: Request body
+            headers: Request headers; names are lowercased as HTTP/2 requires
+            on_sent: Called once the body has been sent
+
+        Returns:
+            The response, whose body is read with ``await response.read()``
+
+        Raises:
+            ConnectionError: If the connection or the stream fails
+        """
+        import h2.exceptions
+
+        await self.ready
+        stream_id = await self._open_stream()
+        stream = _Stream(self.loop)
+
+        request_headers: List[Tuple[bytes, bytes]] = [
+            (b":method", method.encode("ascii")),
+            (b":scheme", self.endpoint.scheme.encode("ascii")),
+            (b":authority", self.endpoint.host.encode("idna")),
+            (b":path", path.encode("ascii")),
+            (b"content-length", str(len(body)).encode("ascii")),
+        ]
+        request_headers += [
+            (name.lower(), value)
+            for name, value in headers.items()
+            if name.lower() != b"content-length"
+        ]
+
+        try:
+            try:
+                self._conn.send_headers(stream_id, request_headers)
+                # Only a stream whose headers went out is tracked and reset
+                self._streams[stream_id] = stream
+                self._flush()
+                await send_data(
+                    self._conn, self._writer, self._window_open, stream_id, body
+                )
+            except h2.exceptions.ProtocolError as e:
+                # h2 may already have updated its header compression state
+                # for headers it then rejected, so the connection is unusable
+                self.closed = True
+                self._writer.close()
+                raise ConnectionResetError(f"HTTP/2 request failed: {e}")
+
+            if on_sent is not None:
+                on_sent()
+
+            await stream.headers
+        except BaseException:
+            self.cancel(stream_id)
+            raise
+
+        return Http2Response(self, stream_id, stream)
+
+    def cancel(self, stream_id: int) -> None:
+        """Reset a stream that is no longer wanted and forget it."""
+        import h2.errors
+        import h2.exceptions
+
+        if self._streams.pop(stream_id, None) is None or self.closed:
+            return
+        try:
+            self._conn.reset_stream(stream_id, h2.errors.ErrorCodes.CANCEL)
+            self._flush()
+        except h2.exceptions.ProtocolError:
+            # The stream already ended
+            pass
+
+    def release(self, stream_id: int) -> None:
+        """Forget a stream whose response has been read."""
+        self._streams.pop(stream_id, None)
+
+    async def close(self) -> None:
+        """Close the connection, failing any streams still open."""
+        if self._reader_task is None:
+            self.ready.cancel()
+            return
+        if not self.closed:
+            self._conn.close_connection()
+            self._flush()
+        self._reader_task.cancel()
+        try:
+            await self._reader_task
+        except asyncio.CancelledError:
+            pass
+
+
+class Http2Transport:
+    """Pool holding one multiplexed HTTP/2 connection per endpoint."""
+
+    def __init__(self) -> None:
+        """Create an empty pool.
+
+        Raises:
+            ImportError: If the h2 package is not installed
+        """
+        _require_h2()
+        self._connections: Dict["Endpoint", Http2Connection] = {}
+
+    def _connection(self, endpoint: "Endpoint") -> Http2Connection:
+        connection = self._connections.get(endpoint)
+        if (
+            connection is None
+            or connection.closed
+            or connection.loop is not asyncio.get_running_loop()
+            or (connection.ready.done() and connection.ready.exception() is not None)
+        ):
+            connection = self._connections[endpoint] = Http2Connection(endpoint)
+        return connection
+
+    async def request(
+        self,
+        endpoint: "Endpoint",
+        body: bytes,
+        headers: Dict[bytes, bytes],
+        on_sent: Optional[Callable[[], None]] = None,
+    ) -> Http2Response:
+        """POST a body to an endpoint over its shared connection.
+
+        Args:
+            endpoint: The endpoint to send to
+            body: Request body
+            headers: Request headers
+            on_sent: Called once the body has been sent
+
+        Returns:
+            The response, whose body is read with ``await response.read()``
+        """
+        from urllib.parse import urlsplit
+
+        target = urlsplit(endpoint.target)
+        path = target.path + (f"?{target.query}" if target.query else "")
+        return await self._connection(endpoint).request(
+            "POST", path, body, headers, on_sent
+        )
+
+    def connections(self) -> int:
+        """Return the number of open connections."""
+        return sum(not connection.closed for connection in self._connections.values())
+
+    async def close(self) -> None:
+        """Close every connection."""
+        connections, self._connections = list(self._connections.values()), {}
+        for connection in connections:
+            await connection.close()
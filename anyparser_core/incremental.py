@@ -0,0 +1,201 @@
+"""
+Incremental crawl module for re-crawling a site against the state of an earlier crawl.
+
+The known pages of the previous crawl, each with a fingerprint of its
+markdown and the time it was crawled, are sent along with the crawl
+request, so the API can leave out pages that have not changed. Whatever
+comes back is compared with the previous state, and unchanged pages are
+merged in from it, so callers always get a complete crawl result plus a
+diff of new, changed, unchanged and removed pages.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    from .parser import AnyparserCrawlResult, AnyparserUrl
+
+# Statuses that mean a previously crawled page is gone
+_GONE_STATUSES = frozenset([404, 410])
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Return the canonical form of a URL, used as its identity across crawls.
+
+    The scheme and host are lowercased, default ports and fragments are
+    dropped, an empty path becomes "/" and query parameters are sorted.
+
+    Args:
+        url: The URL to normalize
+
+    Returns:
+        The normalized URL
+    """
+    from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port is not None and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def fingerprint(markdown: Optional[str]) -> str:
+    """Return the content fingerprint of a page's markdown.
+
+    Args:
+        markdown: The page markdown
+
+    Returns:
+        The SHA-256 hex digest of the UTF-8 encoded markdown
+    """
+    return hashlib.sha256((markdown or "").encode("utf-8")).hexdigest()
+
+
+@dataclass
+class KnownPage:
+    """A page from an earlier crawl, as sent to the API."""
+
+    url: str
+    checksum: str
+    crawled_at: Optional[str] = None
+
+
+def encode_known_pages(pages: Iterable[KnownPage]) -> str:
+    """Encode known pages as the JSON value of the ``known_urls`` form field."""
+    return json.dumps(
+        [
+            {"url": page.url, "checksum": page.checksum, "crawled_at": page.crawled_at}
+            for page in pages
+        ],
+        separators=(",", ":"),
+    )
+
+
+class CrawlState:
+    """Pages of an earlier crawl, keyed by normalized URL.
+
+    Any object with the same ``known_pages`` and ``page`` methods can stand
+    in for it as the state of an incremental crawl.
+    """
+
+    def __init__(self, pages: Iterable["AnyparserUrl"] = ()) -> None:
+        """Index pages by normalized URL.
+
+        Args:
+            pages: Pages of the earlier crawl; failed pages are skipped
+        """
+        self.pages: Dict[str, "AnyparserUrl"] = {}
+        for page in pages:
+            if page.status_code < 400:
+                self.pages[normalize_url(page.url)] = page
+
+    @classmethod
+    def from_result(cls, result: "AnyparserCrawlResult") -> "CrawlState":
+        """Build the state of a previous crawl result."""
+        return cls(result.items)
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    def known_pages(self) -> List[KnownPage]:
+        """Return the pages to send to the API with their fingerprints."""
+        return [
+            KnownPage(page.url, fingerprint(page.markdown), page.crawled_at)
+            for page in self.pages.values()
+        ]
+
+    def page(self, url: str) -> Optional["AnyparserUrl"]:
+        """Return the earlier version of a page, if it was crawled before."""
+        return self.pages.get(normalize_url(url))
+
+
+@dataclass
+class CrawlDiff:
+    """URLs of an incremental crawl grouped by how they changed."""
+
+    new: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+
+@dataclass
+class IncrementalCrawlResult:
+    """Merged crawl result and the diff against the earlier crawl."""
+
+    result: "AnyparserCrawlResult"
+    diff: CrawlDiff
+
+
+def merge_crawl(
+    result: "AnyparserCrawlResult",
+    state: CrawlState,
+    known_pages: Optional[List[KnownPage]] = None,
+) -> IncrementalCrawlResult:
+    """Merge the pages returned by an incremental crawl with the earlier state.
+
+    Returned pages replace their earlier versions. Known pages the API left
+    out are carried over unchanged, after the returned ones. Known pages
+    returned as 404 or 410 are reported as removed and dropped. The merged
+    markdown is rebuilt from the markdown of the merged pages, separated by
+    blank lines.
+
+    Args:
+        result: The crawl result returned by the API
+        state: The earlier crawl state
+        known_pages: The known pages sent with the request, so their
+            fingerprints are not computed again; read from the state if omitted
+
+    Returns:
+        The complete crawl result and the diff
+    """
+    from dataclasses import replace
+
+    if known_pages is None:
+        known_pages = state.known_pages()
+    known = {normalize_url(page.url): page for page in known_pages}
+    diff = CrawlDiff()
+    items: List["AnyparserUrl"] = []
+    seen = set()
+    for page in result.items:
+        key = normalize_url(page.url)
+        if key in seen:
+            continue
+        seen.add(key)
+
+        previous = known.get(key)
+        if page.status_code in _GONE_STATUSES:
+            if previous is not None:
+                diff.removed.append(page.url)
+                continue
+        elif previous is None:
+            diff.new.append(page.url)
+        elif previous.checksum != fingerprint(page.markdown):
+            diff.changed.append(page.url)
+        else:
+            diff.unchanged.append(page.url)
+        items.append(page)
+
+    for key, previous in known.items():
+        if key in seen:
+            continue
+        page = state.page(previous.url)
+        if page is not None:
+            diff.unchanged.append(page.url)
+            items.append(page)
+
+    merged = replace(
+        result,
+        items=items,
+        markdown="\n\n".join(page.markdown for page in items if page.markdown),
+        total_items=len(items),
+        total_characters=sum(page.total_characters for page in items),
+    )
+    return IncrementalCrawlResult(merged, diff)
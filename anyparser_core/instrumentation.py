@@ -0,0 +1,299 @@
+"""
+Instrumentation module for timing the phases of parse calls.
+
+Every parse call is split into the phases below. When hooks are registered
+on an ``Anyparser`` instance, a ``ParseSpan`` is emitted as each phase ends,
+followed by a ``parse`` span covering the whole call. Without hooks, no
+clocks are read and no spans are created.
+
+- ``validate``: option validation and reading input files
+- ``build_form``: encoding the multipart body
+- ``upload``: sending the request
+- ``server``: waiting for the response headers
+- ``download``: reading the response body
+- ``decode``: decoding JSON into result dataclasses
+"""
+
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+PHASES = ("validate", "build_form", "upload", "server", "download", "decode", "parse")
+
+_call_ids = itertools.count(1)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ParseSpan:
+    """Timed phase of a parse call with its byte, file and retry counts."""
+
+    phase: str
+    call_id: int
+    start_ns: int
+    duration_ns: int
+    bytes: int = 0
+    files: int = 0
+    retries: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def end_ns(self) -> int:
+        """Wall-clock end time in nanoseconds since the epoch."""
+        return self.start_ns + self.duration_ns
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds."""
+        return self.duration_ns / 1e9
+
+
+class ParseHook:
+    """Base class for instrumentation hooks. Subclasses override on_span."""
+
+    def on_span(self, span: ParseSpan) -> None:
+        """Handle a completed span.
+
+        Hooks run inline on the event loop and should return quickly.
+        Exceptions raised here are logged and otherwise ignored.
+
+        Args:
+            span: The completed span
+        """
+
+
+class CallbackHook(ParseHook):
+    """Hook that forwards spans to a plain callable."""
+
+    def __init__(self, callback: Callable[[ParseSpan], None]) -> None:
+        self.callback = callback
+
+    def on_span(self, span: ParseSpan) -> None:
+        self.callback(span)
+
+
+HookLike = Union[ParseHook, Callable[[ParseSpan], None]]
+
+
+def as_hooks(hooks: Optional[Iterable[HookLike]]) -> List[ParseHook]:
+    """Normalize hook objects and plain callables into a list of hooks.
+
+    Args:
+        hooks: Hook instances or callables taking a ParseSpan
+
+    Returns:
+        The hooks, with callables wrapped in CallbackHook
+    """
+    return [
+        hook if hasattr(hook, "on_span") else CallbackHook(hook) for hook in hooks or ()
+    ]
+
+
+@dataclass
+class PhaseStats:
+    """Aggregated timings and counts for one phase."""
+
+    count: int = 0
+    total_ns: int = 0
+    max_ns: int = 0
+    bytes: int = 0
+    files: int = 0
+    retries: int = 0
+    errors: int = 0
+
+
+class StatsCollector(ParseHook):
+    """Thread-safe hook that aggregates spans per phase."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.phases: Dict[str, PhaseStats] = {}
+
+    def on_span(self, span: ParseSpan) -> None:
+        with self._lock:
+            stats = self.phases.get(span.phase)
+            if stats is None:
+                stats = self.phases[span.phase] = PhaseStats()
+
+            stats.count += 1
+            stats.total_ns += span.duration_ns
+            stats.max_ns = max(stats.max_ns, span.duration_ns)
+            stats.bytes += span.bytes
+            stats.files += span.files
+            stats.retries += span.retries
+            if "error" in span.attributes:
+                stats.errors += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Return a copy of the aggregates with mean and max times in milliseconds.
+
+        Returns:
+            Per-phase dictionaries of counts, byte totals and timings
+        """
+        with self._lock:
+            return {
+                phase: {
+                    "count": stats.count,
+                    "mean_ms": stats.total_ns / stats.count / 1e6,
+                    "max_ms": stats.max_ns / 1e6,
+                    "total_ms": stats.total_ns / 1e6,
+                    "bytes": stats.bytes,
+                    "files": stats.files,
+                    "retries": stats.retries,
+                    "errors": stats.errors,
+                }
+                for phase, stats in self.phases.items()
+            }
+
+    def reset(self) -> None:
+        """Discard all aggregates."""
+        with self._lock:
+            self.phases = {}
+
+
+class TracerHook(ParseHook):
+    """Hook that records spans on an OpenTelemetry-style tracer.
+
+    The tracer only needs ``start_span(name, start_time=...)`` returning a
+    span with ``set_attribute(key, value)`` and ``end(end_time=...)``, which
+    is what ``opentelemetry.trace.Tracer`` provides. Spans of one call share
+    the ``anyparser.call_id`` attribute.
+    """
+
+    def __init__(self, tracer: Any, prefix: str = "anyparser.") -> None:
+        """Wrap a tracer.
+
+        Args:
+            tracer: OpenTelemetry-compatible tracer
+            prefix: Prefix for span names
+        """
+        self.tracer = tracer
+        self.prefix = prefix
+
+    def on_span(self, span: ParseSpan) -> None:
+        traced = self.tracer.start_span(
+            self.prefix + span.phase, start_time=span.start_ns
+        )
+        traced.set_attribute("anyparser.call_id", span.call_id)
+        traced.set_attribute("anyparser.bytes", span.bytes)
+        traced.set_attribute("anyparser.files", span.files)
+        traced.set_attribute("anyparser.retries", span.retries)
+        for key, value in span.attributes.items():
+            traced.set_attribute(f"anyparser.{key}", value)
+        traced.end(end_time=span.end_ns)
+
+
+class CallStats:
+    """Totals of a single parse call, tracked whether or not hooks are set."""
+
+    __slots__ = (
+        "model",
+        "endpoint",
+        "status",
+        "files",
+        "bytes_sent",
+        "bytes_received",
+        "retries",
+    )
+
+    def __init__(self, model: str = "text") -> None:
+        self.model = model
+        self.endpoint: Optional[str] = None
+        self.status: Optional[int] = None
+        self.files = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+
+
+class SpanRecorder:
+    """Times the phases of a single parse call and forwards them to hooks."""
+
+    def __init__(
+        self, hooks: List[ParseHook], stats: Optional[CallStats] = None
+    ) -> None:
+        """Start timing a call.
+
+        Args:
+            hooks: Hooks receiving the spans
+            stats: Totals of the call, reported on the final parse span
+        """
+        self.hooks = hooks
+        self.stats = stats if stats is not None else CallStats()
+        self.call_id = next(_call_ids)
+        self._perf_origin = time.perf_counter_ns()
+        self._wall_origin = time.time_ns()
+
+    @staticmethod
+    def now() -> int:
+        """Return a monotonic timestamp for starting or ending a phase."""
+        return time.perf_counter_ns()
+
+    def emit(
+        self,
+        phase: str,
+        started: int,
+        bytes: int = 0,
+        files: int = 0,
+        **attributes: Any,
+    ) -> int:
+        """Emit a span for a phase that started at a monotonic timestamp.
+
+        Args:
+            phase: Phase name
+            started: Value of now() when the phase began
+            bytes: Bytes processed in the phase
+            files: Files processed in the phase
+            attributes: Extra attributes recorded on the span
+
+        Returns:
+            The monotonic timestamp at which the phase ended
+        """
+        ended = time.perf_counter_ns()
+        span = ParseSpan(
+            phase=phase,
+            call_id=self.call_id,
+            start_ns=self._wall_origin + started - self._perf_origin,
+            duration_ns=ended - started,
+            bytes=bytes,
+            files=files,
+            retries=self.stats.retries,
+            attributes=attributes,
+        )
+        for hook in self.hooks:
+            try:
+                hook.on_span(span)
+            except Exception:
+                # A faulty hook must never fail or mask the parse call itself
+                logger.exception("Instrumentation hook %r failed", hook)
+        return ended
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        """Emit the span covering the whole call.
+
+        Args:
+            error: The exception the call failed with, if any
+        """
+        stats = self.stats
+        attributes: Dict[str, Any] = {
+            "model": stats.model,
+            "bytes_received": stats.bytes_received,
+        }
+        if stats.endpoint is not None:
+            attributes["endpoint"] = stats.endpoint
+        if stats.status is not None:
+            attributes["status"] = stats.status
+        if error is not None:
+            attributes["error"] = type(error).__name__
+
+        self.emit(
+            "parse",
+            self._perf_origin,
+            bytes=stats.bytes_sent,
+            files=stats.files,
+            **attributes,
+        )
@@ -0,0 +1,179 @@
+"""
+Incremental decoder for crawl responses, yielding pages as their JSON arrives.
+
+A crawl response is a JSON array of crawl results, each holding an ``items``
+array with one object per crawled page. The decoder walks that structure as
+bytes are fed to it and hands back every page object as soon as it is
+complete, so a crawl of thousands of pages can be processed page by page
+without holding the whole body or the whole result graph in memory. The
+other fields of each crawl result are collected in ``results``.
+
+Text arriving while a value is incomplete is only collected; it is joined
+onto the unparsed text once that has doubled, so a single large page costs
+linear time however many parts it arrives in.
+"""
+
+import codecs
+import json
+from typing import Any, Dict, List, Optional
+
+_WHITESPACE = " \t\n\r"
+
+# Parser states
+_ARRAY = 0
+_RESULTS = 1
+_KEY = 2
+_ITEMS = 3
+_DONE = 4
+
+
+class _Incomplete(Exception):
+    """The buffer ends before the value being decoded does."""
+
+
+class CrawlStreamDecoder:
+    """Incremental decoder of a JSON crawl response body."""
+
+    def __init__(self) -> None:
+        """Create a decoder expecting the start of the response."""
+        self.results: List[Dict[str, Any]] = []
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        # Text fed since the buffer was last parsed, and the total length
+        self._pieces: List[str] = []
+        self._size = 0
+        self._pos = 0
+        self._state = _ARRAY
+        self._result: Dict[str, Any] = {}
+        # Length the buffer must reach before an incomplete value is retried
+        self._retry_at = 0
+
+    def feed(self, data: bytes) -> List[Dict[str, Any]]:
+        """Decode the next part of the body.
+
+        Args:
+            data: The next bytes of the response body
+
+        Returns:
+            The page objects completed by this part, in order
+
+        Raises:
+            ValueError: If the body is not a crawl response
+        """
+        text = self._text.decode(data)
+        self._pieces.append(text)
+        self._size += len(text)
+        if self._size < self._retry_at:
+            return []
+        return self._parse(final=False)
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Finish decoding once the whole body has been fed.
+
+        Returns:
+            The page objects completed by the end of the body
+
+        Raises:
+            ValueError: If the body is truncated or is not a crawl response
+        """
+        self._pieces.append(self._text.decode(b"", final=True))
+        items = self._parse(final=True)
+        if self._state != _DONE or self._buffer[self._pos :].strip(_WHITESPACE):
+            raise ValueError("Truncated or malformed crawl response")
+        return items
+
+    def _parse(self, final: bool) -> List[Dict[str, Any]]:
+        self._buffer = "".join([self._buffer, *self._pieces])
+        self._pieces.clear()
+        items: List[Dict[str, Any]] = []
+        try:
+            while self._state != _DONE:
+                if self._state == _ITEMS:
+                    char = self._next()
+                    if char == "]":
+                        self._pos += 1
+                        self._state = _KEY
+                    else:
+                        items.append(self._value())
+                elif self._state == _KEY:
+                    char = self._next()
+                    if char == "}":
+                        self._pos += 1
+                        self.results.append(self._result)
+                        self._result = {}
+                        self._state = _RESULTS
+                    else:
+                        self._field()
+                elif self._state == _RESULTS:
+                    char = self._next()
+                    self._pos += 1
+                    if char == "]":
+                        self._state = _DONE
+                    elif char == "{":
+                        self._state = _KEY
+                    else:
+                        raise ValueError(f"Unexpected {char!r} in crawl response")
+                else:
+                    if self._next() != "[":
+                        raise ValueError("A crawl response must be a JSON array")
+                    self._pos += 1
+                    self._state = _RESULTS
+        except _Incomplete:
+            # Retry once the unparsed text has doubled, keeping decoding linear
+            pending = len(self._buffer) - self._pos
+            self._retry_at = len(self._buffer) + pending
+            if final:
+                return items
+        else:
+            self._retry_at = 0
+
+        # Drop the text that has been consumed
+        self._retry_at -= self._pos
+        self._buffer = self._buffer[self._pos :]
+        self._size = len(self._buffer)
+        self._pos = 0
+        return items
+
+    def _next(self) -> str:
+        """Skip whitespace and separating commas, returning the next character."""
+        buffer = self._buffer
+        pos = self._pos
+        while pos < len(buffer) and (buffer[pos] in _WHITESPACE or buffer[pos] == ","):
+            pos += 1
+        self._pos = pos
+        if pos >= len(buffer):
+            raise _Incomplete
+        return buffer[pos]
+
+    def _value(self, pos: Optional[int] = None) -> Any:
+        pos = self._pos if pos is None else pos
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            raise _Incomplete
+        if end >= len(self._buffer) and not isinstance(value, (dict, list, str)):
+            # A number or literal at the end of the buffer may continue
+            raise _Incomplete
+        self._pos = end
+        return value
+
+    def _field(self) -> None:
+        """Decode one key of a crawl result and its value, unless it is ``items``."""
+        start = self._pos
+        try:
+            key = self._value()
+            if not isinstance(key, str) or self._next() != ":":
+                raise ValueError("Malformed crawl result in crawl response")
+            self._pos += 1
+            if key == "items":
+                if self._next() != "[":
+                    raise ValueError("The items of a crawl result must be an array")
+                self._pos += 1
+                self._state = _ITEMS
+                return
+            self._next()
+            self._result[key] = self._value()
+        except _Incomplete:
+            self._pos = start
+            raise
@@ -0,0 +1,524 @@
+"""
+Metrics module with an in-process registry of counters, gauges and histograms.
+
+Every ``Anyparser`` client records its calls in a registry, the shared
+``default_registry`` unless another one is passed in. Snapshots are available
+as plain dictionaries or in the Prometheus text exposition format, so a web
+framework can serve ``render_prometheus()`` from a ``/metrics`` route.
+Throughput such as requests per second is derived from the counters, e.g.
+with ``rate(anyparser_requests_total[1m])`` in Prometheus. Gauges describing
+one client's circuit breaker or scheduler carry a ``client`` label, so
+clients sharing a registry do not overwrite each other's values.
+"""
+
+import itertools
+import math
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+LabelValues = Tuple[str, ...]
+
+# Quantiles reported for every histogram
+QUANTILES: Tuple[float, ...] = (0.5, 0.9, 0.99, 0.999)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class for metrics keyed by label values."""
+
+    type_name = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Iterable[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames: Tuple[str, ...] = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if len(labels) != len(self.labelnames) or not all(
+            name in labels for name in self.labelnames
+        ):
+            raise ValueError(
+                f"{self.name} expects labels {list(self.labelnames)}, got {sorted(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    type_name = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Iterable[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        """Increase the value for a label set.
+
+        Args:
+            amount: Amount to add
+            labels: Value for every label name of the metric
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        """Return the current value for a label set, or 0 if never set."""
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[Tuple[LabelValues, float]]:
+        """Return all label sets with their values."""
+        with self._lock:
+            return sorted(self._values.items())
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self.samples()
+        ]
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down."""
+
+    type_name = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: object) -> None:
+        """Decrease the value for a label set."""
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: object) -> None:
+        """Set the value for a label set."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class HdrHistogram:
+    """Log-linear histogram with bounded relative error, in the style of HdrHistogram.
+
+    Values are scaled to integers and bucketed exactly below
+    ``2 ** (precision_bits + 1)``. Above that, each power of two is split into
+    ``2 ** precision_bits`` buckets, so recorded values keep a relative error
+    below ``2 ** -precision_bits`` whatever their magnitude. Buckets are stored
+    sparsely, so memory grows with the number of distinct magnitudes seen.
+    """
+
+    def __init__(self, scale: float = 1e6, precision_bits: int = 5) -> None:
+        """Create an empty histogram.
+
+        Args:
+            scale: Multiplier applied before bucketing, e.g. 1e6 for seconds to microseconds
+            precision_bits: Sub-bucket bits per power of two
+        """
+        self.scale = scale
+        self.precision_bits = precision_bits
+        self._sub_buckets = 1 << precision_bits
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _index(self, value: float) -> int:
+        scaled = max(0, int(value * self.scale))
+        shift = max(0, scaled.bit_length() - self.precision_bits - 1)
+        return self._sub_buckets * shift + (scaled >> shift)
+
+    def _upper_bound(self, index: int) -> float:
+        if index < 2 * self._sub_buckets:
+            return (index + 1) / self.scale
+        shift = index // self._sub_buckets - 1
+        mantissa = index - self._sub_buckets * shift
+        return ((mantissa + 1) << shift) / self.scale
+
+    def record(self, value: float) -> None:
+        """Record a single value."""
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, quantile: float) -> float:
+        """Return the value at a quantile between 0 and 1.
+
+        The result is the upper bound of the bucket holding the quantile,
+        clamped to the observed minimum and maximum.
+
+        Args:
+            quantile: Quantile to compute, e.g. 0.99
+
+        Returns:
+            The estimated value, or 0 if nothing has been recorded
+        """
+        if not self.count:
+            return 0.0
+
+        target = max(1, math.ceil(quantile * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(max(self._upper_bound(index), self.min), self.max)
+
+        return self.max
+
+
+class Histogram(_Metric):
+    """Distribution of observed values per label set, backed by HdrHistogram."""
+
+    type_name = "summary"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        scale: float = 1e6,
+        precision_bits: int = 5,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._scale = scale
+        self._precision_bits = precision_bits
+        self._histograms: Dict[LabelValues, HdrHistogram] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        """Record a value for a label set.
+
+        Args:
+            value: Observed value, e.g. a latency in seconds
+            labels: Value for every label name of the metric
+        """
+        key = self._key(labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = HdrHistogram(
+                    self._scale, self._precision_bits
+                )
+            histogram.record(value)
+
+    def percentile(self, quantile: float, **labels: object) -> float:
+        """Return the value at a quantile for a label set, or 0 if never observed."""
+        with self._lock:
+            histogram = self._histograms.get(self._key(labels))
+            return histogram.percentile(quantile) if histogram else 0.0
+
+    def count(self, **labels: object) -> int:
+        """Return the number of observations for a label set."""
+        histogram = self._histograms.get(self._key(labels))
+        return histogram.count if histogram else 0
+
+    def summaries(self) -> List[Tuple[LabelValues, Dict[str, float]]]:
+        """Return count, sum, max and quantiles for every label set."""
+        with self._lock:
+            return [
+                (
+                    key,
+                    {
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "max": histogram.max,
+                        **{
+                            f"p{quantile * 100:g}": histogram.percentile(quantile)
+                            for quantile in QUANTILES
+                        },
+                    },
+                )
+                for key, histogram in sorted(self._histograms.items())
+            ]
+
+    def render(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = sorted(self._histograms.items())
+            for key, histogram in items:
+                for quantile in QUANTILES:
+                    labels = _format_labels(
+                        (*self.labelnames, "quantile"), (*key, f"{quantile:g}")
+                    )
+                    lines.append(
+                        f"{self.name}{labels} {_format_value(histogram.percentile(quantile))}"
+                    )
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(histogram.sum)}")
+                lines.append(
+                    f"{self.name}_count{labels} {_format_value(histogram.count)}"
+                )
+        return lines
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+
+class MetricsRegistry:
+    """Collection of named metrics with snapshot and Prometheus export."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Metric] = {}
+        self.created_at = time.time()
+
+    def _get_or_create(self, cls: type, name: str, *args, **kwargs) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(
+                    f"Metric {name} is already registered as a {metric.type_name}"
+                )
+            return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Iterable[str] = ()
+    ) -> Counter:
+        """Return the counter with a name, creating it if needed."""
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Iterable[str] = ()
+    ) -> Gauge:
+        """Return the gauge with a name, creating it if needed."""
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Iterable[str] = ()
+    ) -> Histogram:
+        """Return the histogram with a name, creating it if needed."""
+        return self._get_or_create(Histogram, name, documentation, labelnames)
+
+    def get(self, name: str) -> Optional[Metric]:
+        """Return a registered metric, or None."""
+        return self._metrics.get(name)
+
+    def snapshot(self) -> Dict[str, object]:
+        """Return the current value of every metric as plain data.
+
+        Returns:
+            The registry uptime and, per metric, its type and samples
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        snapshot: Dict[str, object] = {"uptime_seconds": time.time() - self.created_at}
+        for metric in metrics:
+            if isinstance(metric, Histogram):
+                samples = [
+                    {"labels": dict(zip(metric.labelnames, key)), **summary}
+                    for key, summary in metric.summaries()
+                ]
+            else:
+                samples = [
+                    {"labels": dict(zip(metric.labelnames, key)), "value": value}
+                    for key, value in metric.samples()
+                ]
+            snapshot[metric.name] = {"type": metric.type_name, "samples": samples}
+
+        return snapshot
+
+    def render_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            The exposition text, ending with a newline
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+
+        lines: List[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+
+        return "\n".join(lines) + "\n"
+
+
+default_registry = MetricsRegistry()
+
+
+def render_prometheus(registry: Optional[MetricsRegistry] = None) -> str:
+    """Render a registry, the default one if omitted, in Prometheus text format."""
+    return (registry or default_registry).render_prometheus()
+
+
+# Sequence numbers naming clients that were not given a name
+_client_ids = itertools.count(1)
+
+
+class ClientMetrics:
+    """The metrics recorded by Anyparser clients, registered on a registry."""
+
+    def __init__(
+        self, registry: Optional[MetricsRegistry] = None, client: Optional[str] = None
+    ) -> None:
+        """Register the client metrics, reusing any that already exist.
+
+        Args:
+            registry: Registry to record into, the default registry if omitted
+            client: Value of the client label of per-client gauges, a sequence number if omitted
+        """
+        self.registry = registry or default_registry
+        self.client = client if client is not None else str(next(_client_ids))
+        self.requests = self.registry.counter(
+            "anyparser_requests_total",
+            "HTTP requests sent, retries and hedges included, by model and response "
+            "status, or 'error' if no response was received, or 'cancelled' if the "
+            "request was abandoned first.",
+            ("model", "status"),
+        )
+        self.latency = self.registry.histogram(
+            "anyparser_request_duration_seconds",
+            "End-to-end parse call latency by model.",
+            ("model",),
+        )
+        self.bytes_uploaded = self.registry.counter(
+            "anyparser_uploaded_bytes_total", "Request body bytes sent.", ("model",)
+        )
+        self.bytes_downloaded = self.registry.counter(
+            "anyparser_downloaded_bytes_total",
+            "Response body bytes received.",
+            ("model",),
+        )
+        self.files = self.registry.counter(
+            "anyparser_files_total", "Files uploaded for parsing.", ("model",)
+        )
+        self.in_flight = self.registry.gauge(
+            "anyparser_requests_in_flight", "Parse calls currently in progress."
+        )
+        self.retries = self.registry.counter(
+            "anyparser_retries_total",
+            "Requests resent after a connection failure or retryable status.",
+            ("model",),
+        )
+        self.hedges = self.registry.counter(
+            "anyparser_hedges_total",
+            "Hedged requests by result: sent, won, or over_budget when the budget ran out.",
+            ("model", "result"),
+        )
+        self.circuit_state = self.registry.gauge(
+            "anyparser_circuit_state",
+            "Circuit breaker state of a client: 0 closed, 1 half-open, 2 open.",
+            ("client",),
+        )
+        self.circuit_rejections = self.registry.counter(
+            "anyparser_circuit_rejections_total",
+            "Calls failed fast by an open circuit breaker.",
+            ("model",),
+        )
+        self.slots = self.registry.gauge(
+            "anyparser_scheduler_slots",
+            "In-flight request slots of a client's priority scheduler by state (capacity or in_use).",
+            ("client", "state"),
+        )
+        self.queued = self.registry.gauge(
+            "anyparser_scheduler_queued",
+            "Calls of a client waiting for an in-flight slot by priority class.",
+            ("client", "priority"),
+        )
+        self.queue_wait = self.registry.histogram(
+            "anyparser_scheduler_wait_seconds",
+            "Time calls waited for an in-flight slot by priority class.",
+            ("priority",),
+        )
+        self.cache_lookups = self.registry.counter(
+            "anyparser_cache_lookups_total",
+            "Cache lookups by cache name and result (hit or miss).",
+            ("cache", "result"),
+        )
+
+    def record_request(self, model: str, status: Union[int, str]) -> None:
+        """Record one HTTP request sent by a parse call.
+
+        Args:
+            model: Model the request used
+            status: HTTP status, or "error" or "cancelled" if no response was received
+        """
+        self.requests.inc(model=model, status=status)
+
+    def record_call(
+        self,
+        model: str,
+        duration: float,
+        bytes_sent: int,
+        bytes_received: int,
+        files: int,
+    ) -> None:
+        """Record a completed or failed parse call.
+
+        Args:
+            model: Model the call used
+            duration: Call duration in seconds
+            bytes_sent: Request body bytes sent
+            bytes_received: Response body bytes received
+            files: Number of files uploaded
+        """
+        self.latency.observe(duration, model=model)
+        if bytes_sent:
+            self.bytes_uploaded.inc(bytes_sent, model=model)
+        if bytes_received:
+            self.bytes_downloaded.inc(bytes_received, model=model)
+        if files:
+            self.files.inc(files, model=model)
+
+    def record_circuit(self, state: int) -> None:
+        """Record the state of the client's circuit breaker.
+
+        Args:
+            state: 0 closed, 1 half-open or 2 open
+        """
+        self.circuit_state.set(state, client=self.client)
+
+    def record_slots(self, capacity: int, in_use: int, queued: Dict[str, int]) -> None:
+        """Record the slot usage of the client's priority scheduler.
+
+        Args:
+            capacity: In-flight slots
+            in_use: Slots currently held
+            queued: Calls waiting for a slot by priority class
+        """
+        self.slots.set(capacity, client=self.client, state="capacity")
+        self.slots.set(in_use, client=self.client, state="in_use")
+        for priority, count in queued.items():
+            self.queued.set(count, client=self.client, priority=priority)
+
+    def record_cache(self, cache: str, hit: bool) -> None:
+        """Record a cache lookup.
+
+        Args:
+            cache: Name of the cache
+            hit: Whether the lookup was a hit
+        """
+        self.cache_lookups.inc(cache=cache, result="hit" if hit else "miss")
+
+    def cache_hit_ratio(self, cache: str) -> float:
+        """Return the fraction of lookups that hit, or 0 if there were none."""
+        hits = self.cache_lookups.value(cache=cache, result="hit")
+        total = hits + self.cache_lookups.value(cache=cache, result="miss")
+        return hits / total if total else 0.0
@@ -2,10 +2,14 @@
 Options module for Anyparser configuration and parsing.
 """
 
-from dataclasses import dataclass, field
-from typing import List, Literal, Optional, TypedDict, Union
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Literal, Optional, TypedDict, Union
 
-from anyparser_core.config.hardcoded import OcrLanguage, OcrPreset
+if TYPE_CHECKING:
+    # The OCR tables are large, so they are only loaded once validation needs them
+    from anyparser_core.config.hardcoded import OcrLanguage, OcrPreset
+    from anyparser_core.incremental import KnownPage
 
 # Type aliases for better readability
 AnyparserFormatType = Literal["json", "markdown", "html"]
@@ -25,8 +29,8 @@ class AnyparserOption:
     image: Optional[bool] = None
     table: Optional[bool] = None
     files: Optional[Union[str, List[str]]] = None
-    ocr_language: Optional[List[OcrLanguage]] = None
-    ocr_preset: Optional[OcrPreset] = None
+    ocr_language: Optional[List["OcrLanguage"]] = None
+    ocr_preset: Optional["OcrPreset"] = None
     url: Optional[str] = None
     max_depth: Optional[int] = None
     max_executions: Optional[int] = None
@@ -40,6 +44,14 @@ class UploadedFile:
 
     filename: str
     contents: bytes
+    # Sniffed from the contents when the file is loaded, or else on creation
+    content_type: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        if self.content_type is None:
+            from .sniff import sniff_content_type
+
+            self.content_type = sniff_content_type(self.contents, self.filename)
 
 
 @dataclass
@@ -53,13 +65,14 @@ class AnyparserParsedOption:
     model: AnyparserModelType = "text"
     image: Optional[bool] = None
     table: Optional[bool] = None
-    ocr_language: Optional[List[OcrLanguage]] = None
-    ocr_preset: Optional[OcrPreset] = None
+    ocr_language: Optional[List["OcrLanguage"]] = None
+    ocr_preset: Optional["OcrPreset"] = None
     url: Optional[str] = None
     max_depth: Optional[int] = None
     max_executions: Optional[int] = None
     strategy: Optional[Literal["LIFO", "FIFO"]] = None
     traversal_scope: Optional[Literal["subtree", "domain"]] = None
+    known_urls: Optional[List["KnownPage"]] = None
 
 
 class DefaultOptions(TypedDict):
@@ -71,8 +84,8 @@ class DefaultOptions(TypedDict):
     model: AnyparserModelType
     image: Optional[bool]
     table: Optional[bool]
-    ocr_language: Optional[List[OcrLanguage]]
-    ocr_preset: Optional[OcrPreset]
+    ocr_language: Optional[List["OcrLanguage"]]
+    ocr_preset: Optional["OcrPreset"]
     url: Optional[str]
     max_depth: Optional[int]
     max_executions: Optional[int]
@@ -97,26 +110,15 @@ def validate_api_key(api_key: any) -> None:
         )
 
 
-def build_options(options: Optional[AnyparserOption] = None) -> DefaultOptions:
-    """Build final options by merging defaults with provided options.
+@lru_cache(maxsize=16)
+def _default_options(api_url: str, api_key: str) -> DefaultOptions:
+    """Validate the environment-provided API settings and build the defaults.
 
-    Args:
-        options: User-provided options to override defaults
-
-    Returns:
-        Complete options dictionary with all required fields
-
-    Raises:
-        ValueError: If required options are missing or invalid
+    Memoized on the environment values, so the API URL is only parsed once
+    per distinct configuration instead of on every request.
     """
-    import os
     from urllib.parse import urlparse
 
-    from .config.hardcoded import FALLBACK_API_URL
-
-    api_url = os.getenv("ANYPARSER_API_URL", FALLBACK_API_URL)
-    api_key = os.getenv("ANYPARSER_API_KEY", "")
-
     # Validate API URL
     try:
         result = urlparse(api_url)
@@ -128,7 +130,7 @@ def build_options(options: Optional[AnyparserOption] = None) -> DefaultOptions:
     # Validate API key
     validate_api_key(api_key)
 
-    defaults: DefaultOptions = {
+    return {
         "api_url": api_url,
         "api_key": api_key,
         "format": "json",
@@ -144,8 +146,30 @@ def build_options(options: Optional[AnyparserOption] = None) -> DefaultOptions:
         "traversal_scope": None,
     }
 
+
+def build_options(options: Optional[AnyparserOption] = None) -> DefaultOptions:
+    """Build final options by merging defaults with provided options.
+
+    Args:
+        options: User-provided options to override defaults
+
+    Returns:
+        Complete options dictionary with all required fields
+
+    Raises:
+        ValueError: If required options are missing or invalid
+    """
+    import os
+
+    from .config.hardcoded import FALLBACK_API_URL
+
+    defaults = _default_options(
+        os.getenv("ANYPARSER_API_URL", FALLBACK_API_URL),
+        os.getenv("ANYPARSER_API_KEY", ""),
+    )
+
     if options is None:
-        return defaults
+        return {**defaults}
 
     # Merge defaults with provided options
     return {**defaults, **vars(options)}
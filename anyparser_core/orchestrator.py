@@ -0,0 +1,209 @@
+"""
+Orchestrator module for crawling many seed URLs concurrently across domains.
+
+Seeds are grouped by host. Crawls of different hosts run concurrently up to
+a global limit, while the crawls of one host run one after another, each
+starting only once the previous one has finished and the host's delay has
+passed. A host's delay is the largest of the configured minimum, the
+``crawl_delay`` of its robots.txt and the ``politeness_delay`` its pages
+reported. Pages of every crawl are streamed out as one merged feed as soon
+as they arrive, so throughput grows with the number of distinct hosts.
+"""
+
+import heapq
+import itertools
+import time
+from collections import deque
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .robots import RobotsCache
+
+if TYPE_CHECKING:
+    import asyncio
+
+    from .parser import Anyparser, AnyparserUrl
+
+
+class _Host:
+    __slots__ = ("name", "seeds", "politeness")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.seeds: Deque[str] = deque()
+        # Largest politeness delay of the host's last crawl, in seconds
+        self.politeness = 0.0
+
+
+def _host_of(url: str) -> str:
+    from urllib.parse import urlsplit
+
+    return (urlsplit(url).hostname or "").lower()
+
+
+class CrawlOrchestrator:
+    """Runs crawls of many seeds, concurrent across hosts and spaced out per host."""
+
+    def __init__(
+        self,
+        parser: "Anyparser",
+        concurrency: int = 8,
+        min_delay: float = 0.0,
+        max_delay: float = 60.0,
+        buffer: int = 256,
+        clock: Callable[[], float] = time.monotonic,
+        robots: Optional[RobotsCache] = None,
+    ) -> None:
+        """Create an orchestrator.
+
+        Every crawl fills the orchestrator's robots cache, so crawl delays and
+        disallowed seeds are remembered between the crawls of a host. The
+        parser is left unchanged.
+
+        Args:
+            parser: Parser using the crawler model with the json format
+            concurrency: Crawls running at once across all hosts
+            min_delay: Seconds between the end of one crawl of a host and the start of the next
+            max_delay: Upper bound on a host's delay, whatever its robots.txt or pages ask for
+            buffer: Pages held while the consumer catches up, pausing the crawls beyond that
+            clock: Monotonic clock returning seconds
+            robots: Robots cache to use, by default the parser's if it has one, or else a new one
+
+        Raises:
+            ValueError: If concurrency is less than 1
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        self.parser = parser
+        if robots is None:
+            robots = parser.robots_cache
+        if robots is None:
+            robots = RobotsCache()
+        self.robots: RobotsCache = robots
+        self.concurrency = concurrency
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.buffer = buffer
+        self._clock = clock
+        self.rejected: List[str] = []
+
+    def delay(self, url: str, politeness: float = 0.0) -> float:
+        """Return the seconds to wait between crawls of a URL's host.
+
+        Args:
+            url: Any URL on the host
+            politeness: Largest politeness delay of the host's pages, in seconds
+
+        Returns:
+            The delay, between min_delay and max_delay
+        """
+        crawl_delay = self.robots.crawl_delay(url) or 0.0
+        return min(self.max_delay, max(self.min_delay, crawl_delay, politeness))
+
+    async def _crawl(
+        self, seed: str, host: _Host, feed: "asyncio.Queue", priority: str
+    ) -> None:
+        host.politeness = 0.0
+        async for page in self.parser.crawl_iter(
+            seed, priority=priority, robots_cache=self.robots
+        ):
+            # The API reports politeness delays in milliseconds
+            host.politeness = max(host.politeness, page.politeness_delay / 1000)
+            await feed.put((seed, page))
+
+    async def crawl(
+        self,
+        seeds: Iterable[str],
+        return_exceptions: bool = False,
+        priority: str = "default",
+    ) -> AsyncIterator[Tuple[str, Union["AnyparserUrl", BaseException]]]:
+        """Crawl every seed, yielding pages from all crawls as they arrive.
+
+        Seeds whose robots.txt is known to disallow them are skipped and
+        recorded in ``rejected``.
+
+        Args:
+            seeds: Start URLs
+            return_exceptions: Yield the error of a failed crawl instead of raising it
+            priority: Priority class of every crawl request
+
+        Yields:
+            Tuples of the seed and one of its crawled pages, or the error its crawl failed with
+        """
+        import asyncio
+
+        hosts: Dict[str, _Host] = {}
+        order = itertools.count()
+        # Hosts waiting for their next crawl, by the time it may start
+        waiting: List[Tuple[float, int, str]] = []
+        for seed in seeds:
+            name = _host_of(seed)
+            host = hosts.get(name)
+            if host is None:
+                host = hosts[name] = _Host(name)
+                heapq.heappush(waiting, (0.0, next(order), name))
+            host.seeds.append(seed)
+
+        feed: "asyncio.Queue" = asyncio.Queue(self.buffer)
+        running: Dict["asyncio.Future", Tuple[_Host, str]] = {}
+        try:
+            while waiting or running or not feed.empty():
+                now = self._clock()
+                while (
+                    waiting and len(running) < self.concurrency and waiting[0][0] <= now
+                ):
+                    _, _, name = heapq.heappop(waiting)
+                    host = hosts[name]
+                    seed = host.seeds.popleft()
+                    if self.robots.allowed(seed) is False:
+                        self.rejected.append(seed)
+                        if host.seeds:
+                            heapq.heappush(waiting, (now, next(order), name))
+                        continue
+                    task = asyncio.ensure_future(
+                        self._crawl(seed, host, feed, priority)
+                    )
+                    running[task] = (host, seed)
+
+                timeout = None
+                if waiting and len(running) < self.concurrency:
+                    timeout = max(0.0, waiting[0][0] - now)
+
+                getter = asyncio.ensure_future(feed.get())
+                await asyncio.wait(
+                    {getter, *running},
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if getter.done():
+                    yield getter.result()
+                else:
+                    getter.cancel()
+
+                for task in [task for task in running if task.done()]:
+                    host, seed = running.pop(task)
+                    if host.seeds:
+                        wake = self._clock() + self.delay(seed, host.politeness)
+                        heapq.heappush(waiting, (wake, next(order), host.name))
+
+                    error = task.exception()
+                    if error is None:
+                        continue
+                    if not return_exceptions:
+                        raise error
+                    yield seed, error
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
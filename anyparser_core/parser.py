@@ -1,16 +1,45 @@
-import http.client
-import json
-import uuid
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Union, Literal
-from urllib.parse import urljoin, urlparse
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from collections import OrderedDict
 from datetime import datetime
+import time
 
-from .form import build_form
-from .options import AnyparserOption
-from .request import async_request
-from .validator import validate_and_parse
-from .version import __version__
+from .breaker import BreakerPolicy, CircuitBreaker, CircuitOpenError
+from .balancer import BalancingStrategy, EndpointPool, EndpointState
+from .hedging import HedgePolicy, Hedger
+from .instrumentation import CallStats, HookLike, ParseHook, SpanRecorder, as_hooks
+from .metrics import ClientMetrics, MetricsRegistry
+from .options import AnyparserOption, AnyparserParsedOption
+from .prepared import Endpoint, PreparedParse
+from .scheduler import PriorityScheduler
+from .request import abort_connection, async_iter, async_read, async_request
+from .validator import resolve_options, validate_and_parse
+
+if TYPE_CHECKING:
+    import asyncio
+    from concurrent.futures import Executor
+
+    from .http2 import Http2Transport
+    from .incremental import CrawlState, IncrementalCrawlResult
+    from .rawstream import RawDestination
+    from .robots import RobotsCache
+    from .store import CrawlStore
 
 
 @dataclass
@@ -117,24 +146,302 @@ class AnyparserCrawlResult:
 AnyparserResult = Union[AnyparserPdfResult, AnyparserCrawlResult, AnyparserResultBase]
 
 
+def _batched(inputs: Iterable[str], batch_size: int) -> Iterator[List[str]]:
+    """Lazily group inputs into lists of at most batch_size items."""
+    batch: List[str] = []
+    for item in inputs:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+# Maximum number of distinct option sets a parser keeps prepared requests for
+_PREPARED_CACHE_SIZE = 16
+
+# Statuses retried on another endpoint; parse requests are safe to resend
+_RETRYABLE_STATUSES = frozenset([429, 502, 503, 504])
+
+# Values of the circuit state gauge
+_CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+# Delay before the first retry when there is no other endpoint to fail over to
+_RETRY_BACKOFF = 0.1
+
+
+def _decode_directive(directive: dict) -> AnyparserCrawlDirective:
+    """Build the crawl directive of a page from its decoded JSON object."""
+    return AnyparserCrawlDirective(
+        type=directive["type"],
+        priority=directive["priority"] if "priority" in directive else 0,
+        name=directive["name"] if "name" in directive else None,
+        noindex=directive["noindex"] if "noindex" in directive else False,
+        nofollow=directive["nofollow"] if "nofollow" in directive else False,
+        underlying=[
+            AnyparserCrawlDirectiveBase(**underlying)
+            for underlying in directive["underlying"]
+            if "underlying" in directive
+        ],
+    )
+
+
+def _decode_url(url_item: dict) -> AnyparserUrl:
+    """Build a crawled page from its decoded JSON object."""
+    return AnyparserUrl(
+        url=url_item["url"],
+        status_code=url_item["status_code"],
+        status_message=url_item["status_message"],
+        politeness_delay=url_item["politeness_delay"],
+        total_characters=url_item["total_characters"],
+        markdown=url_item["markdown"],
+        directive=_decode_directive(url_item["directive"]),
+        title=url_item["title"],
+        crawled_at=url_item["crawled_at"],
+    )
+
+
+def _decode_robots(robots_directive: dict) -> AnyparserRobotsTxtDirective:
+    """Build the robots.txt directive of a crawl from its decoded JSON object."""
+    return AnyparserRobotsTxtDirective(
+        user_agent=(
+            robots_directive["user_agent"] if "user_agent" in robots_directive else ""
+        ),
+        allow=robots_directive["allow"] if "allow" in robots_directive else [],
+        disallow=robots_directive["disallow"] if "disallow" in robots_directive else [],
+        crawl_delay=(
+            robots_directive["crawl_delay"] if "crawl_delay" in robots_directive else 0
+        ),
+    )
+
+
+def _crawl_robots(results: List[dict]) -> Optional[AnyparserRobotsTxtDirective]:
+    """Return the robots.txt directive of the first crawl result that has one."""
+    return next(
+        (
+            _decode_robots(result["robots_directive"])
+            for result in results
+            if "robots_directive" in result
+        ),
+        None,
+    )
+
+
+def _content_types(parsed: AnyparserParsedOption) -> Dict[str, str]:
+    """Map the name of every uploaded file to its content type."""
+    return {file.filename: file.content_type for file in parsed.files or ()}
+
+
+def _adopt_attempt(stats: CallStats, attempt: CallStats) -> None:
+    """Fold the totals of the hedged attempt that decided a request into its call."""
+    stats.endpoint = attempt.endpoint
+    stats.status = attempt.status
+    stats.bytes_sent += attempt.bytes_sent
+    stats.bytes_received += attempt.bytes_received
+
+
+def _is_pdf(filename: str, content_types: Optional[Mapping[str, str]]) -> bool:
+    """Tell whether a result is for a PDF, by the sniffed type of its upload."""
+    content_type = content_types.get(filename) if content_types else None
+    if content_type is None:
+        from .sniff import sniff_content_type
+
+        # Not among the uploads, so only the name is known
+        content_type = sniff_content_type(b"", filename)
+    return content_type == "application/pdf"
+
+
+def _decode_json(
+    json_data: List[dict],
+    model: str,
+    content_types: Optional[Mapping[str, str]] = None,
+) -> List[AnyparserResult]:
+    """Build result dataclasses from the decoded JSON response.
+
+    Args:
+        json_data: The decoded JSON response body
+        model: The model the request was made with
+        content_types: Content type of every uploaded file, by file name
+
+    Returns:
+        Crawl results for the crawler model, otherwise file results
+    """
+    if model == "crawler":
+        return [
+            AnyparserCrawlResult(
+                rid=item["rid"],
+                start_url=item["start_url"],
+                total_characters=item["total_characters"],
+                total_items=item["total_items"],
+                markdown=item["markdown"],
+                items=[
+                    _decode_url(url_item)
+                    for url_item in item["items"]
+                    if url_item["url"] is not None
+                ],
+                robots_directive=_decode_robots(item["robots_directive"]),
+            )
+            for item in json_data
+        ]
+
+    return [
+        (
+            AnyparserPdfResult(
+                **{
+                    **{k: v for k, v in item.items() if k != "items"},
+                    "items": [
+                        AnyparserPdfPage(**page) for page in item.get("items", [])
+                    ],
+                }
+            )
+            if _is_pdf(item["original_filename"], content_types)
+            else AnyparserResultBase(**item)
+        )
+        for item in json_data
+    ]
+
+
 class Anyparser:
     """Main class for parsing itemss using the Anyparser API."""
 
-    def __init__(self, options: Optional[AnyparserOption] = None) -> None:
+    def __init__(
+        self,
+        options: Optional[AnyparserOption] = None,
+        hooks: Optional[Iterable[HookLike]] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        endpoints: Optional[Sequence[str]] = None,
+        balancing: BalancingStrategy = "least_outstanding",
+        max_retries: Optional[int] = None,
+        hedging: Optional[HedgePolicy] = None,
+        circuit_breaker: Optional[BreakerPolicy] = None,
+        max_in_flight: Optional[int] = None,
+        priority_weights: Optional[Mapping[str, float]] = None,
+        http2: bool = False,
+        decode_executor: Union[None, str, "Executor"] = None,
+        decode_offload_bytes: int = 256 * 1024,
+        robots_cache: Optional["RobotsCache"] = None,
+        name: Optional[str] = None,
+        allow_http: bool = False,
+    ) -> None:
         """Initialize the parser with optional configuration.
 
         Args:
             options: Configuration options for the parser
+            hooks: Instrumentation hooks, or callables, receiving a ParseSpan per phase
+            metrics: Registry updated on every call, the shared default registry if omitted
+            endpoints: API base URLs to balance requests over instead of the single api_url
+            balancing: "least_outstanding" or "ewma", how the endpoint of each attempt is picked
+            max_retries: Resends after a connection failure or a 429, 502, 503 or 504 response, one per extra endpoint if omitted
+            hedging: Duplicate slow single-file requests according to this policy, never if omitted
+            circuit_breaker: Fail fast with CircuitOpenError while the API is degraded by these thresholds, never if omitted
+            max_in_flight: Requests sent at once, shared between priority classes by weighted fair queuing, unlimited if omitted
+            priority_weights: Share of in-flight slots per priority class, interactive 8, default 4 and bulk 1 if omitted
+            http2: Multiplex requests as streams over one HTTP/2 connection per endpoint, requires the h2 package
+            decode_executor: Decode large JSON responses off the event loop: "thread", "process", or an executor to use
+            decode_offload_bytes: Smallest response body decoded off the event loop
+            robots_cache: Cache of robots.txt directives, filled by crawls and checked before each crawl request
+            name: Client label of the circuit breaker and scheduler gauges in the metrics registry, a sequence number if omitted
+            allow_http: Connect to http:// API URLs over plain HTTP even for remote hosts, sending the API key in cleartext; otherwise only loopback hosts are
+
+        Raises:
+            ValueError: If max_retries is negative, max_in_flight is less than 1, or the balancing strategy, a priority weight or the decode executor is invalid
+            ImportError: If http2 is set without the h2 package installed
         """
+        if max_retries is not None and max_retries < 0:
+            raise ValueError("max_retries must not be negative")
+        if isinstance(decode_executor, str) and decode_executor not in (
+            "thread",
+            "process",
+        ):
+            raise ValueError(f'Unsupported decode executor: "{decode_executor}"')
+
         self.options: Optional[AnyparserOption] = options
+        self.hooks: List[ParseHook] = as_hooks(hooks)
+        self.metrics = ClientMetrics(metrics, name)
+        self.allow_http = allow_http
+        self.pool: Optional[EndpointPool] = (
+            EndpointPool(endpoints, balancing, allow_http=allow_http)
+            if endpoints
+            else None
+        )
+        self.breaker: Optional[CircuitBreaker] = (
+            CircuitBreaker(circuit_breaker) if circuit_breaker is not None else None
+        )
+        self.scheduler: Optional[PriorityScheduler] = (
+            PriorityScheduler(max_in_flight, priority_weights)
+            if max_in_flight is not None
+            else None
+        )
+        self.decode_executor = decode_executor
+        self.decode_offload_bytes = decode_offload_bytes
+        self._process_pool: Optional["Executor"] = None
+        self.robots_cache = robots_cache
+        self.transport: Optional["Http2Transport"] = None
+        if http2:
+            from .http2 import Http2Transport
+
+            self.transport = Http2Transport()
+        self.hedger: Optional[Hedger] = Hedger(hedging) if hedging is not None else None
+        self.max_retries: int = (
+            max_retries
+            if max_retries is not None
+            else (len(self.pool) - 1 if self.pool is not None else 0)
+        )
+        self._prepared: "OrderedDict[tuple, PreparedParse]" = OrderedDict()
+
+    def prepare(self) -> PreparedParse:
+        """Validate the options once and precompute the request parts for them.
+
+        The returned object reuses the headers, encoded option fields and
+        resolved endpoint for every call, which suits issuing many requests
+        with identical options.
+
+        Returns:
+            A prepared parse bound to this parser
+
+        Raises:
+            ValueError: If the options are invalid
+        """
+        return PreparedParse(self, resolve_options(self.options))
+
+    def _prepared_for(self, parsed: AnyparserParsedOption) -> PreparedParse:
+        """Return the cached prepared parse matching the options of a request."""
+        key = (
+            parsed.api_url,
+            parsed.api_key,
+            parsed.format,
+            parsed.model,
+            parsed.image,
+            parsed.table,
+            tuple(parsed.ocr_language or ()),
+            parsed.ocr_preset,
+            parsed.max_depth,
+            parsed.max_executions,
+            parsed.strategy,
+            parsed.traversal_scope,
+        )
+
+        prepared = self._prepared.get(key)
+        self.metrics.record_cache("prepared", prepared is not None)
+        if prepared is None:
+            prepared = self._prepared[key] = PreparedParse(self, parsed)
+            if len(self._prepared) > _PREPARED_CACHE_SIZE:
+                self._prepared.popitem(last=False)
+        else:
+            self._prepared.move_to_end(key)
+
+        return prepared
 
     async def parse(
-        self, file_paths_or_url: Union[str, List[str]]
+        self, file_paths_or_url: Union[str, List[str]], priority: str = "default"
     ) -> Union[List[AnyparserResult], str]:
         """Parse files using the Anyparser API.
 
         Args:
             file_paths_or_url: A single file path or list of file paths to parse, or a start URL for crawling
+            priority: Priority class the call queues in for an in-flight slot when max_in_flight is set
 
         Returns:
             List of parsed file results if format is JSON, or raw text content if format is text/markdown
@@ -144,141 +451,789 @@ class Anyparser:
         """
 
         # Parse and validate the input
-        parsed = await validate_and_parse(file_paths_or_url, self.options)
+        return await self._run(
+            lambda: validate_and_parse(file_paths_or_url, self.options),
+            priority=priority,
+        )
 
-        # Generate a single boundary for the form
-        boundary: str = uuid.uuid4().hex
+    async def parse_to(
+        self,
+        file_paths_or_url: Union[str, List[str]],
+        destination: "RawDestination",
+        priority: str = "default",
+    ) -> int:
+        """Parse files, streaming the raw response to a destination as it arrives.
 
-        # Build the form data, passing the boundary
-        form_data: bytes = build_form(parsed, boundary)
+        Meant for the markdown and html formats: the body is written in parts
+        and never held in memory as a whole, so very large exports run in
+        constant memory. A text file receives incrementally decoded UTF-8,
+        other destinations the bytes unchanged. A request is not retried once
+        the body has started streaming.
 
-        # Set up the headers, using the same boundary
-        headers: Dict[str, str] = {
-            "Content-Type": f"multipart/form-data; boundary={boundary}",
-            "User-Agent": f"anyparser_core@{__version__}",
-        }
+        Args:
+            file_paths_or_url: A single file path or list of file paths to parse, or a start URL for crawling
+            destination: Binary or text file, socket, or ``asyncio.StreamWriter``; it is not closed
+            priority: Priority class the call queues in for an in-flight slot when max_in_flight is set
+
+        Returns:
+            The number of bytes of the response body written
+
+        Raises:
+            http.client.HTTPException: If the API request fails
+            TypeError: If the destination cannot be written to
+            UnicodeDecodeError: If a text destination receives invalid UTF-8
+        """
+        from .rawstream import RawWriter
+
+        writer = RawWriter(destination)
+        await self._run(
+            lambda: validate_and_parse(file_paths_or_url, self.options),
+            priority=priority,
+            consume=writer.write,
+        )
+        await writer.close()
+        return writer.bytes_written
+
+    async def crawl_incremental(
+        self,
+        url: str,
+        previous: Union["AnyparserCrawlResult", "CrawlState"],
+        priority: str = "default",
+    ) -> "IncrementalCrawlResult":
+        """Re-crawl a site, fetching only pages that are new or changed since an earlier crawl.
+
+        The known pages are sent with their content fingerprints and crawl
+        times, so the API can leave unchanged pages out. Pages it does not
+        return are merged in from the earlier state, and the returned ones
+        are compared with it, so the diff is correct either way.
+
+        Args:
+            url: Start URL of the crawl
+            previous: Result of the earlier crawl, or a crawl state holding its pages
+            priority: Priority class the call queues in for an in-flight slot when max_in_flight is set
+
+        Returns:
+            The complete, merged crawl result and the diff against the earlier crawl
+
+        Raises:
+            ValueError: If the options do not use the crawler model with the json format
+        """
+        from dataclasses import replace
+
+        from .incremental import CrawlState, merge_crawl
+
+        state = (
+            CrawlState.from_result(previous)
+            if isinstance(previous, AnyparserCrawlResult)
+            else previous
+        )
+
+        known_pages = state.known_pages()
+
+        async def load() -> AnyparserParsedOption:
+            parsed = await self._load_crawl(url)
+            return replace(parsed, known_urls=known_pages)
+
+        results = await self._run(load, priority=priority)
+        return merge_crawl(results[0], state, known_pages)
+
+    async def crawl_iter(
+        self,
+        url: str,
+        store: Optional["CrawlStore"] = None,
+        priority: str = "default",
+        buffer: int = 64,
+        robots_cache: Optional["RobotsCache"] = None,
+    ) -> AsyncIterator[AnyparserUrl]:
+        """Crawl a site, yielding each page as soon as it has been received.
+
+        The response is decoded incrementally, so neither its body nor the
+        full list of pages is ever held in memory. Reading the response
+        pauses while ``buffer`` decoded pages wait to be consumed.
+
+        Args:
+            url: Start URL of the crawl
+            store: Crawl store every page is written to as it arrives, recorded as one run
+            priority: Priority class the call queues in for an in-flight slot when max_in_flight is set
+            buffer: Number of decoded pages held while the consumer catches up
+            robots_cache: Cache also filled with the crawl's robots.txt directive, besides the parser's own
+
+        Yields:
+            The crawled pages, in response order
+
+        Raises:
+            ValueError: If the options do not use the crawler model with the json format, or the response is malformed
+        """
+        import asyncio
+
+        from .jsonstream import CrawlStreamDecoder
+
+        decoder = CrawlStreamDecoder()
+        pages: "asyncio.Queue[AnyparserUrl]" = asyncio.Queue(buffer)
+
+        async def consume(chunk: bytes) -> None:
+            for item in decoder.feed(chunk):
+                if item.get("url") is not None:
+                    await pages.put(_decode_url(item))
+
+        run_id = store.begin_run(url) if store is not None else None
+        task = asyncio.ensure_future(
+            self._run(lambda: self._load_crawl(url), priority=priority, consume=consume)
+        )
+        try:
+            while True:
+                getter = asyncio.ensure_future(pages.get())
+                await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    break
+                page = getter.result()
+                if store is not None:
+                    store.add(run_id, page)
+                yield page
+
+            # Raise the error the request failed with, if any
+            task.result()
+            remaining = [pages.get_nowait() for _ in range(pages.qsize())]
+            remaining += [
+                _decode_url(item)
+                for item in decoder.close()
+                if item.get("url") is not None
+            ]
+            if store is not None:
+                # Only a crawl received in full is recorded as a finished run
+                for page in remaining:
+                    store.add(run_id, page)
+                store.finish_run(run_id, _crawl_robots(decoder.results))
+            for page in remaining:
+                yield page
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            robots = _crawl_robots(decoder.results)
+            if robots is not None:
+                if self.robots_cache is not None:
+                    self.robots_cache.put(url, robots)
+                if robots_cache is not None and robots_cache is not self.robots_cache:
+                    robots_cache.put(url, robots)
+
+    async def _load_crawl(self, url: str) -> AnyparserParsedOption:
+        """Validate the options and start URL of a crawl that needs json results."""
+        parsed = await validate_and_parse(url, self.options)
+        if parsed.model != "crawler" or parsed.format != "json":
+            raise ValueError(
+                "Incremental and streaming crawls require the crawler model and the json format"
+            )
+        return parsed
+
+    async def _run(
+        self,
+        load: Callable[[], Awaitable[AnyparserParsedOption]],
+        prepared: Optional[PreparedParse] = None,
+        priority: str = "default",
+        consume: Optional[Callable[[bytes], Awaitable[None]]] = None,
+    ) -> Union[List[AnyparserResult], str]:
+        """Load the inputs, then send the request, tracing the call if hooks are set.
+
+        Every call is recorded in the metrics registry, failed ones included.
+        With a scheduler, the request waits for an in-flight slot after the
+        inputs are loaded, so slots are never held while reading files.
+
+        Args:
+            load: Coroutine factory returning validated options with inputs attached
+            prepared: Precomputed request parts, looked up from the options if omitted
+            priority: Priority class used to queue for an in-flight slot
+            consume: Receives the body of a successful response in parts as it arrives, instead of it being decoded
+
+        Returns:
+            List of parsed file results if format is JSON, or raw text content if format is text/markdown
+        """
+        scheduler = self.scheduler
+        if scheduler is not None:
+            scheduler.check(priority)
+
+        stats = CallStats(getattr(self.options, "model", None) or "text")
+        trace = SpanRecorder(self.hooks, stats) if self.hooks else None
+        error: Optional[BaseException] = None
+        metrics = self.metrics
+        metrics.in_flight.inc()
+        called_at = time.perf_counter()
+        try:
+            started = trace.now() if trace is not None else 0
+            parsed = await load()
+            stats.model = parsed.model
+            stats.files = len(parsed.files or ())
+            if trace is not None:
+                trace.emit(
+                    "validate",
+                    started,
+                    bytes=sum(len(file.contents) for file in parsed.files or ()),
+                    files=stats.files,
+                )
+            if self.robots_cache is not None and parsed.url is not None:
+                self.robots_cache.check(parsed.url)
+            prepared = prepared or self._prepared_for(parsed)
+            if scheduler is None:
+                return await self._execute(prepared, parsed, stats, trace, consume)
+
+            await self._acquire_slot(scheduler, priority)
+            try:
+                return await self._execute(prepared, parsed, stats, trace, consume)
+            finally:
+                scheduler.release()
+                self._record_slots(scheduler)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            metrics.in_flight.dec()
+            metrics.record_call(
+                stats.model,
+                time.perf_counter() - called_at,
+                stats.bytes_sent,
+                stats.bytes_received,
+                stats.files,
+            )
+            if trace is not None:
+                trace.finish(error)
+
+    async def _acquire_slot(self, scheduler: PriorityScheduler, priority: str) -> None:
+        """Wait for an in-flight slot, recording the wait and the slot usage."""
+        queued_at = time.perf_counter()
+        try:
+            await scheduler.acquire(priority)
+        finally:
+            self._record_slots(scheduler)
+        self.metrics.queue_wait.observe(
+            time.perf_counter() - queued_at, priority=priority
+        )
+
+    def _record_slots(self, scheduler: PriorityScheduler) -> None:
+        self.metrics.record_slots(
+            scheduler.capacity, scheduler.in_flight, scheduler.snapshot()["queued"]
+        )
+
+    async def _execute(
+        self,
+        prepared: PreparedParse,
+        parsed: AnyparserParsedOption,
+        stats: CallStats,
+        trace: Optional[SpanRecorder] = None,
+        consume: Optional[Callable[[bytes], Awaitable[None]]] = None,
+    ) -> Union[List[AnyparserResult], str]:
+        """Send a request for options with inputs attached and decode the response.
+
+        Args:
+            prepared: Precomputed request parts for the options
+            parsed: The options with files or a crawl URL filled in
+            stats: Totals of the call, updated as the request progresses
+            trace: Recorder for phase timings, or None when tracing is disabled
+            consume: Receives the body of a successful response in parts as it arrives
+
+        Returns:
+            List of parsed file results if format is JSON, or raw text content if format is text/markdown, or an empty list if the body was consumed
+
+        Raises:
+            http.client.HTTPException: If the API request fails
+            CircuitOpenError: If the circuit breaker rejects the call
+        """
+        import http.client
+        import json
+
+        # Splice the inputs into the prepared form
+        started = trace.now() if trace is not None else 0
+        form_data, headers = prepared.build_body(parsed)
+        if trace is not None:
+            trace.emit("build_form", started, bytes=len(form_data))
+
+        breaker = self.breaker
+        if breaker is not None:
+            try:
+                admission = breaker.acquire()
+            except CircuitOpenError:
+                self.metrics.circuit_rejections.inc(model=stats.model)
+                self.metrics.record_circuit(_CIRCUIT_STATES[breaker.state])
+                raise
+
+        called_at = time.perf_counter()
+        success: Optional[bool] = None
+        try:
+            response_data = await self._send_with_retries(
+                prepared, parsed, form_data, headers, stats, trace, consume
+            )
+            success = True
+        except (OSError, http.client.HTTPException):
+            # Only an API error answer, a 4xx other than 429, means it is healthy
+            status = stats.status
+            success = status is not None and 400 <= status < 500 and status != 429
+            raise
+        finally:
+            if breaker is not None:
+                breaker.release(admission, success, time.perf_counter() - called_at)
+                self.metrics.record_circuit(_CIRCUIT_STATES[breaker.state])
+
+        if consume is not None:
+            return []
+
+        started = trace.now() if trace is not None else 0
+        if parsed.format != "json":
+            results = response_data.decode()
+        elif (
+            self.decode_executor is None
+            or len(response_data) < self.decode_offload_bytes
+        ):
+            results = _decode_json(
+                json.loads(response_data.decode()),
+                parsed.model,
+                _content_types(parsed),
+            )
+        else:
+            results = await self._decode_offloaded(
+                response_data, parsed.model, _content_types(parsed)
+            )
+
+        if self.robots_cache is not None and parsed.model == "crawler":
+            for result in results:
+                self.robots_cache.record(result)
+
+        if trace is not None:
+            trace.emit(
+                "decode",
+                started,
+                bytes=len(response_data),
+                results=len(results) if parsed.format == "json" else 1,
+            )
+
+        return results
+
+    async def _decode_offloaded(
+        self,
+        response_data: bytes,
+        model: str,
+        content_types: Optional[Dict[str, str]] = None,
+    ) -> List[AnyparserResult]:
+        """Decode a large JSON response in the configured thread or process pool."""
+        import asyncio
+        from concurrent.futures import ProcessPoolExecutor
+
+        from .decoding import decode_in_process, decode_json_bytes
+
+        loop = asyncio.get_running_loop()
+        executor = self.decode_executor
+        if executor == "process":
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor()
+            executor = self._process_pool
+
+        if isinstance(executor, ProcessPoolExecutor):
+            return await decode_in_process(
+                loop, executor, response_data, model, content_types
+            )
+
+        return await loop.run_in_executor(
+            None if executor == "thread" else executor,
+            decode_json_bytes,
+            response_data,
+            model,
+            content_types,
+        )
+
+    async def _send_with_retries(
+        self,
+        prepared: PreparedParse,
+        parsed: AnyparserParsedOption,
+        form_data: bytes,
+        headers: Dict[bytes, bytes],
+        stats: CallStats,
+        trace: Optional[SpanRecorder] = None,
+        consume: Optional[Callable[[bytes], Awaitable[None]]] = None,
+    ) -> bytes:
+        """Send a request until it succeeds or the retries are spent.
+
+        Connection failures and retryable statuses are retried up to
+        ``max_retries`` times, on another endpoint when a pool is configured.
+        A response that fails while its body is being consumed is not
+        retried, since part of it has already been handed over.
+
+        Args:
+            prepared: Precomputed request parts for the options
+            parsed: The options with files or a crawl URL filled in
+            form_data: The multipart request body
+            headers: The request headers
+            stats: Totals of the call, updated as the request progresses
+            trace: Recorder for phase timings, or None when tracing is disabled
+            consume: Receives the body of a successful response in parts as it arrives
+
+        Returns:
+            The body of the successful response, empty if it was consumed
+
+        Raises:
+            http.client.HTTPException: If the API request fails
+        """
+        import asyncio
+        import http.client
+
+        hedger = self.hedger
+        if hedger is not None and (
+            consume is not None or not hedger.eligible(parsed, len(form_data))
+        ):
+            hedger = None
+
+        pool = self.pool
+        tried: List[EndpointState] = []
+        attempt = 0
+        while True:
+            state = pool.choose(tried) if pool is not None else None
+            endpoint = state.endpoint if state is not None else prepared.endpoint
+            try:
+                if hedger is not None:
+                    status, response_data = await self._send_hedged(
+                        hedger, endpoint, state, form_data, headers, stats, trace
+                    )
+                else:
+                    status, response_data = await self._send(
+                        endpoint, state, form_data, headers, stats, trace, consume
+                    )
+            except (OSError, http.client.HTTPException):
+                # No complete response was received, so the request is safe to resend
+                if attempt >= self.max_retries or (
+                    consume is not None and stats.status == 200
+                ):
+                    raise
+            else:
+                if status == 200:
+                    break
+                if status not in _RETRYABLE_STATUSES or attempt >= self.max_retries:
+                    raise http.client.HTTPException(
+                        f"HTTP {status}: {response_data.decode()}"
+                    )
+
+            attempt += 1
+            stats.retries += 1
+            self.metrics.retries.inc(model=stats.model)
+            if state is not None:
+                tried.append(state)
+                if len(tried) >= len(pool):
+                    tried = []
+            if pool is None or len(pool) == 1:
+                # Nowhere else to fail over to, so give the endpoint a moment
+                await asyncio.sleep(min(_RETRY_BACKOFF * 2 ** (attempt - 1), 1.0))
+
+        return response_data
+
+    async def _send(
+        self,
+        endpoint: Endpoint,
+        state: Optional[EndpointState],
+        form_data: bytes,
+        headers: Dict[bytes, bytes],
+        stats: CallStats,
+        trace: Optional[SpanRecorder] = None,
+        consume: Optional[Callable[[bytes], Awaitable[None]]] = None,
+    ) -> Tuple[int, bytes]:
+        """Send the request body to one endpoint and read the whole response.
+
+        Args:
+            endpoint: The endpoint to send to
+            state: Pool entry of the endpoint, or None without a pool
+            form_data: The multipart request body
+            headers: The request headers
+            stats: Totals of the call, updated as the request progresses
+            trace: Recorder for phase timings, or None when tracing is disabled
+            consume: Receives the body of a successful response in parts as it arrives
+
+        Returns:
+            The response status and body, empty if the body was consumed
+        """
+        import asyncio
+
+        stats.endpoint = endpoint.host
+        stats.status = None
+
+        started = trace.now() if trace is not None else 0
+        on_sent: Optional[Callable[[], None]] = None
+        if trace is not None:
 
-        if parsed.api_key:
-            headers["Authorization"] = f"Bearer {parsed.api_key}"
+            def on_sent() -> None:
+                nonlocal started
+                started = trace.emit("upload", started, bytes=len(form_data))
 
-        # Parse the URL to extract host and path
-        parsed_url = urlparse(str(parsed.api_url))
-        host: str = parsed_url.netloc
-        path: str = urljoin(str(parsed.api_url), "/parse/v1")
+        if state is not None:
+            self.pool.acquire(state)
+        sent_at = time.perf_counter()
+        healthy = False
+        outcome: Union[int, str] = "error"
 
-        # Create a connection to the host
-        conn = http.client.HTTPSConnection(host)
+        # Create a connection to the host, unless streams share an HTTP/2 one
+        transport = self.transport
+        conn = endpoint.connect() if transport is None else None
         try:
             # Make the HTTP request asynchronously
-            response = await async_request(conn, "POST", path, form_data, headers)
-
-            # Check if the response is OK
-            if response.status != 200:
-                text = response.read().decode()
-                raise http.client.HTTPException(f"HTTP {response.status}: {text}")
-
-            # Process the response based on the requested format
-            # This reads the entire response into memory at once. Avoid uploading too many files or else this could cause OOM errors.
-            response_data: bytes = response.read()
-
-            if parsed.format == "json":
-                json_data = json.loads(response_data.decode())
-
-                if parsed.model == "crawler":
-                    return [
-                        AnyparserCrawlResult(
-                            rid=item["rid"],
-                            start_url=item["start_url"],
-                            total_characters=item["total_characters"],
-                            total_items=item["total_items"],
-                            markdown=item["markdown"],
-                            items=[
-                                AnyparserUrl(
-                                    url=url_item["url"],
-                                    status_code=url_item["status_code"],
-                                    status_message=url_item["status_message"],
-                                    politeness_delay=url_item["politeness_delay"],
-                                    total_characters=url_item["total_characters"],
-                                    markdown=url_item["markdown"],
-                                    directive=AnyparserCrawlDirective(
-                                        type=url_item["directive"]["type"],
-                                        priority=(
-                                            url_item["directive"]["priority"]
-                                            if "priority" in url_item["directive"]
-                                            else 0
-                                        ),
-                                        name=(
-                                            url_item["directive"]["name"]
-                                            if "name" in url_item["directive"]
-                                            else None
-                                        ),
-                                        noindex=(
-                                            url_item["directive"]["noindex"]
-                                            if "noindex" in url_item["directive"]
-                                            else False
-                                        ),
-                                        nofollow=(
-                                            url_item["directive"]["nofollow"]
-                                            if "nofollow" in url_item["directive"]
-                                            else False
-                                        ),
-                                        underlying=[
-                                            AnyparserCrawlDirectiveBase(**directive)
-                                            for directive in url_item["directive"][
-                                                "underlying"
-                                            ]
-                                            if "underlying" in url_item["directive"]
-                                        ],
-                                    ),
-                                    title=url_item["title"],
-                                    crawled_at=url_item["crawled_at"],
-                                )
-                                for url_item in item["items"]
-                                if url_item["url"] is not None
-                            ],
-                            robots_directive=AnyparserRobotsTxtDirective(
-                                user_agent=(
-                                    item["robots_directive"]["user_agent"]
-                                    if "user_agent" in item["robots_directive"]
-                                    else ""
-                                ),
-                                allow=(
-                                    item["robots_directive"]["allow"]
-                                    if "allow" in item["robots_directive"]
-                                    else []
-                                ),
-                                disallow=(
-                                    item["robots_directive"]["disallow"]
-                                    if "disallow" in item["robots_directive"]
-                                    else []
-                                ),
-                                crawl_delay=(
-                                    item["robots_directive"]["crawl_delay"]
-                                    if "crawl_delay" in item["robots_directive"]
-                                    else 0
-                                ),
-                            ),
-                        )
-                        for item in json_data
-                    ]
-
-                return [
-                    (
-                        AnyparserPdfResult(
-                            **{
-                                **{k: v for k, v in item.items() if k != "items"},
-                                "items": [
-                                    AnyparserPdfPage(**page)
-                                    for page in item.get("items", [])
-                                ],
-                            }
+            try:
+                if conn is None:
+                    response = await transport.request(
+                        endpoint, form_data, headers, on_sent=on_sent
+                    )
+                else:
+                    response = await async_request(
+                        conn,
+                        "POST",
+                        endpoint.target,
+                        form_data,
+                        headers,
+                        on_sent=on_sent,
+                        read=consume is None,
+                    )
+            except asyncio.CancelledError:
+                # Lost a hedge race: unblock the executor thread and keep the endpoint healthy
+                healthy = True
+                outcome = "cancelled"
+                if conn is not None:
+                    abort_connection(conn)
+                raise
+
+            stats.bytes_sent += len(form_data)
+            stats.status = outcome = response.status
+            if trace is not None:
+                started = trace.emit("server", started, status=response.status)
+
+            # This reads the entire response into memory at once, unless it is consumed in parts. Avoid uploading too many files or else this could cause OOM errors.
+            received = 0
+            try:
+                if consume is not None and response.status == 200:
+                    response_data = b""
+                    chunks = (
+                        response.iter_chunks() if conn is None else async_iter(response)
+                    )
+                    try:
+                        async for chunk in chunks:
+                            received += len(chunk)
+                            await consume(chunk)
+                    finally:
+                        await chunks.aclose()
+                elif conn is None:
+                    response_data: bytes = await response.read()
+                elif consume is None:
+                    # Already read along with the response head
+                    response_data = response.read()
+                else:
+                    response_data = await async_read(response)
+            except asyncio.CancelledError:
+                healthy = True
+                if conn is not None:
+                    abort_connection(conn)
+                raise
+            healthy = response.status < 500 and response.status != 429
+
+            if response.status == 200:
+                received += len(response_data)
+                stats.bytes_received += received
+                if trace is not None:
+                    trace.emit("download", started, bytes=received)
+
+            return response.status, response_data
+        finally:
+            self.metrics.record_request(stats.model, outcome)
+            if conn is not None:
+                conn.close()
+            if state is not None:
+                self.pool.release(state, time.perf_counter() - sent_at, healthy)
+
+    async def _send_hedged(
+        self,
+        hedger: Hedger,
+        endpoint: Endpoint,
+        state: Optional[EndpointState],
+        form_data: bytes,
+        headers: Dict[bytes, bytes],
+        stats: CallStats,
+        trace: Optional[SpanRecorder] = None,
+    ) -> Tuple[int, bytes]:
+        """Send a request, duplicating it if it is slower than the hedge delay.
+
+        The duplicate goes to another endpoint when the pool has one. The
+        first usable response wins and the other request is cancelled. If
+        both fail, the outcome of the one finishing last is returned or
+        raised, so the caller can retry as usual. Each attempt keeps its own
+        totals and only those of the deciding one are added to the call's.
+        The hedge delay is learned from the first request alone: its latency
+        is recorded whenever it completes, and when the duplicate wins, the
+        time it had taken so far is recorded as a lower bound.
+
+        Args:
+            hedger: Latency tracker and budget deciding whether to hedge
+            endpoint: The endpoint for the first request
+            state: Pool entry of the endpoint, or None without a pool
+            form_data: The multipart request body
+            headers: The request headers
+            stats: Totals of the call, updated as the request progresses
+            trace: Recorder for phase timings, or None when tracing is disabled
+
+        Returns:
+            The response status and body
+        """
+        import asyncio
+
+        hedger.deposit()
+        sent_at = time.perf_counter()
+        primary_stats = CallStats(stats.model)
+        primary = asyncio.ensure_future(
+            self._send(endpoint, state, form_data, headers, primary_stats, trace)
+        )
+        attempts: Dict["asyncio.Future", CallStats] = {primary: primary_stats}
+
+        try:
+            delay = hedger.delay()
+            if delay is not None:
+                await asyncio.wait([primary], timeout=delay)
+
+            if not primary.done() and delay is not None:
+                if hedger.withdraw():
+                    backup_state = state
+                    if self.pool is not None and len(self.pool) > 1:
+                        backup_state = self.pool.choose([state])
+                    backup = (
+                        backup_state.endpoint if backup_state is not None else endpoint
+                    )
+                    backup_stats = CallStats(stats.model)
+                    task = asyncio.ensure_future(
+                        self._send(
+                            backup,
+                            backup_state,
+                            form_data,
+                            headers,
+                            backup_stats,
+                            trace,
                         )
-                        if item["original_filename"].endswith(".pdf")
-                        else AnyparserResultBase(**item)
                     )
-                    for item in json_data
-                ]
+                    attempts[task] = backup_stats
+                    self.metrics.hedges.inc(model=stats.model, result="sent")
+                else:
+                    self.metrics.hedges.inc(model=stats.model, result="over_budget")
+
+            pending = set(attempts)
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                if primary in done and primary.exception() is None:
+                    hedger.record(time.perf_counter() - sent_at)
+                for task in done:
+                    if task.exception() is not None:
+                        continue
+                    status, response_data = task.result()
+                    if status in _RETRYABLE_STATUSES:
+                        continue
+
+                    if task is not primary:
+                        self.metrics.hedges.inc(model=stats.model, result="won")
+                        if not primary.done():
+                            hedger.record(time.perf_counter() - sent_at)
+                    _adopt_attempt(stats, attempts[task])
+                    return status, response_data
+
+                if not pending:
+                    # Every attempt failed, report the last one
+                    _adopt_attempt(stats, attempts[task])
+                    return task.result()
+        finally:
+            losers = [task for task in attempts if not task.done()]
+            for task in losers:
+                task.cancel()
+            if losers:
+                # Let the losers close their connections and release their endpoints
+                await asyncio.gather(*losers, return_exceptions=True)
+
+    async def aclose(self) -> None:
+        """Close the HTTP/2 connections and the decode process pool, if any."""
+        if self.transport is not None:
+            await self.transport.close()
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
+            self._process_pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the health of the transport.
+
+        Returns:
+            A dictionary with one entry per pooled endpoint under "endpoints",
+            the circuit breaker state under "breaker" and the in-flight slot
+            usage under "scheduler", each None when not configured
+        """
+        return {
+            "endpoints": self.pool.snapshot() if self.pool is not None else [],
+            "breaker": self.breaker.snapshot() if self.breaker is not None else None,
+            "scheduler": (
+                self.scheduler.snapshot() if self.scheduler is not None else None
+            ),
+        }
+
+    async def parse_iter(
+        self,
+        inputs: Iterable[str],
+        concurrency: int = 4,
+        batch_size: int = 1,
+        return_exceptions: bool = False,
+        priority: str = "default",
+    ) -> AsyncIterator[
+        Tuple[List[str], Union[List[AnyparserResult], str, BaseException]]
+    ]:
+        """Parse many inputs with bounded concurrency, yielding results as they complete.
+
+        Inputs are consumed lazily, so a generator over a very large manifest
+        never has more than ``concurrency`` batches in flight.
+
+        Args:
+            inputs: File paths, or start URLs when the crawler model is used
+            concurrency: Maximum number of parse requests in flight at once
+            batch_size: Number of inputs uploaded per request
+            return_exceptions: Yield failures as the result instead of raising them
+            priority: Priority class of every request, e.g. "bulk" for background work
+
+        Yields:
+            Tuples of the input batch and its parse result, in completion order
+
+        Raises:
+            ValueError: If concurrency or batch_size is less than 1
+        """
+        import asyncio
+
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        batches = _batched(inputs, batch_size)
+        pending: Dict["asyncio.Future", List[str]] = {}
+        exhausted = False
+
+        try:
+            while True:
+                while not exhausted and len(pending) < concurrency:
+                    batch = next(batches, None)
+                    if batch is None:
+                        exhausted = True
+                        break
+
+                    target = batch[0] if len(batch) == 1 else batch
+                    call = self.parse(target, priority=priority)
+                    pending[asyncio.ensure_future(call)] = batch
+
+                if not pending:
+                    return
 
-            return response_data.decode()
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    batch = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        yield batch, task.result()
+                    elif return_exceptions:
+                        yield batch, error
+                    else:
+                        raise error
         finally:
-            conn.close()
+            for task in pending:
+                task.cancel()
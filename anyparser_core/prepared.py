@@ -0,0 +1,197 @@
+"""
+Prepared request module for reusing encoded request parts across parse calls.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+from .form import (
+    build_closing,
+    build_crawl_parts,
+    build_file_part,
+    build_form,
+    build_option_parts,
+)
+from .options import AnyparserParsedOption
+from .validator import load_inputs
+from .version import __version__
+
+if TYPE_CHECKING:
+    import http.client
+
+    from .parser import Anyparser, AnyparserResult
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """Resolved parse endpoint with the connection scheme, host and request target."""
+
+    scheme: str
+    host: str
+    target: str
+
+    def connect(self) -> "http.client.HTTPConnection":
+        """Create a new, not yet connected, HTTP connection to the endpoint.
+
+        Returns:
+            An HTTPS connection, or a plain HTTP connection for the http scheme
+        """
+        import http.client
+
+        if self.scheme == "http":
+            return http.client.HTTPConnection(self.host)
+        return http.client.HTTPSConnection(self.host)
+
+
+def _is_loopback(hostname: Optional[str]) -> bool:
+    """Return whether a hostname refers to the local machine."""
+    import ipaddress
+
+    if not hostname:
+        return False
+    if hostname.lower() == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(hostname).is_loopback
+    except ValueError:
+        return False
+
+
+@lru_cache(maxsize=64)
+def resolve_endpoint(api_url: str, allow_http: bool = False) -> Endpoint:
+    """Resolve the parse endpoint for an API URL.
+
+    Plain HTTP is only used for loopback hosts, such as a local test server,
+    unless allow_http is set. Any other http:// URL is still connected over
+    HTTPS so the API key is never sent in cleartext by accident.
+
+    Args:
+        api_url: Base URL of the Anyparser API
+        allow_http: Connect to http:// URLs of any host over plain HTTP
+
+    Returns:
+        The endpoint for the /parse/v1 route
+    """
+    from urllib.parse import urljoin, urlparse
+
+    parsed_url = urlparse(str(api_url))
+    scheme = parsed_url.scheme
+    if scheme == "http" and not allow_http and not _is_loopback(parsed_url.hostname):
+        scheme = "https"
+
+    return Endpoint(
+        scheme=scheme,
+        host=parsed_url.netloc,
+        target=urljoin(str(api_url), "/parse/v1"),
+    )
+
+
+def build_headers(boundary: str, api_key: Optional[str]) -> Dict[bytes, bytes]:
+    """Build pre-encoded request headers for a multipart form.
+
+    http.client sends bytes header names and values as-is, so encoding them
+    once avoids re-encoding on every request.
+
+    Args:
+        boundary: The boundary string used by the form
+        api_key: API key for the Authorization header, if any
+
+    Returns:
+        Header names mapped to values, both as bytes
+    """
+    headers: Dict[bytes, bytes] = {
+        b"Content-Type": f"multipart/form-data; boundary={boundary}".encode("latin-1"),
+        b"User-Agent": f"anyparser_core@{__version__}".encode("latin-1"),
+    }
+
+    if api_key:
+        headers[b"Authorization"] = f"Bearer {api_key}".encode("latin-1")
+
+    return headers
+
+
+class PreparedParse:
+    """Request parts precomputed once for a validated set of options.
+
+    The boundary, headers, encoded option fields and endpoint are built on
+    creation, so each request only encodes its file parts (or crawl URL) and
+    splices them between the cached prefix and closing boundary.
+    """
+
+    def __init__(
+        self,
+        parser: "Anyparser",
+        parsed: AnyparserParsedOption,
+        boundary: Optional[str] = None,
+    ) -> None:
+        """Precompute the request parts for validated options.
+
+        Args:
+            parser: Parser used to send requests and decode responses
+            parsed: Validated options; any files or URL on them are ignored
+            boundary: Form boundary, generated randomly if omitted
+        """
+        import uuid
+
+        self.parser = parser
+        self.parsed = parsed
+        self.boundary: str = boundary or uuid.uuid4().hex
+        self.endpoint: Endpoint = resolve_endpoint(parsed.api_url, parser.allow_http)
+        self.headers: Dict[bytes, bytes] = build_headers(self.boundary, parsed.api_key)
+
+        self._boundary_bytes: bytes = self.boundary.encode("utf-8")
+        self._option_parts: bytes = build_option_parts(parsed, self.boundary)
+        self._closing: bytes = build_closing(self.boundary)
+
+    def build_body(
+        self, parsed: AnyparserParsedOption
+    ) -> Tuple[bytes, Dict[bytes, bytes]]:
+        """Build the request body and headers for options with inputs attached.
+
+        If an uploaded file happens to contain the prepared boundary, the
+        whole form is rebuilt with a fresh boundary for that request.
+
+        Args:
+            parsed: The prepared options with files or a crawl URL filled in
+
+        Returns:
+            The multipart body and the headers to send it with
+        """
+        if parsed.model == "crawler":
+            parts: List[bytes] = [build_crawl_parts(parsed, self.boundary)]
+        else:
+            files = parsed.files or []
+            if any(self._boundary_bytes in file.contents for file in files):
+                import uuid
+
+                boundary = uuid.uuid4().hex
+                return build_form(parsed, boundary), build_headers(
+                    boundary, parsed.api_key
+                )
+
+            parts = [build_file_part(file, self.boundary) for file in files]
+
+        return (
+            b"".join([self._option_parts, *parts, self._closing]),
+            self.headers,
+        )
+
+    async def parse(
+        self, file_paths_or_url: Union[str, List[str]], priority: str = "default"
+    ) -> Union[List["AnyparserResult"], str]:
+        """Parse files or crawl a URL with the prepared options.
+
+        Args:
+            file_paths_or_url: A single file path or list of file paths to parse, or a start URL for crawling
+            priority: Priority class the call queues in for an in-flight slot when max_in_flight is set
+
+        Returns:
+            List of parsed file results if format is JSON, or raw text content if format is text/markdown
+
+        Raises:
+            http.client.HTTPException: If the API request fails
+        """
+        return await self.parser._run(
+            lambda: load_inputs(file_paths_or_url, self.parsed), self, priority
+        )
@@ -0,0 +1,93 @@
+"""
+Raw response streaming module writing a response body to a destination in parts.
+
+Each part of the body is written as soon as it arrives. Binary files and
+sockets receive the bytes unchanged. Text files receive text decoded with
+an incremental UTF-8 decoder, which holds back a character split across
+two parts until the rest of it arrives, so the body is never materialised
+as one Python string. Writes to files and blocking sockets run on a worker
+thread, and writes to an ``asyncio.StreamWriter`` wait for it to drain, so
+a slow destination pauses reading the response instead of buffering it.
+"""
+
+import codecs
+import io
+import socket
+from typing import TYPE_CHECKING, Any, BinaryIO, TextIO, Union
+
+if TYPE_CHECKING:
+    import asyncio
+
+RawDestination = Union[BinaryIO, TextIO, socket.socket, "asyncio.StreamWriter"]
+
+
+class RawWriter:
+    """Writes the parts of a response body to a file, socket or stream writer."""
+
+    def __init__(self, destination: RawDestination) -> None:
+        """Wrap a destination.
+
+        Args:
+            destination: Binary or text file, socket, or ``asyncio.StreamWriter``
+
+        Raises:
+            TypeError: If the destination cannot be written to
+        """
+        if not isinstance(destination, socket.socket) and not hasattr(
+            destination, "write"
+        ):
+            raise TypeError(f"Cannot stream a response to {type(destination).__name__}")
+        self.destination = destination
+        self.bytes_written = 0
+        self._decoder: Any = None
+        if isinstance(destination, io.TextIOBase):
+            self._decoder = codecs.getincrementaldecoder("utf-8")()
+
+    async def write(self, chunk: bytes) -> None:
+        """Write one part of the body.
+
+        Raises:
+            UnicodeDecodeError: If a text destination receives invalid UTF-8
+        """
+        self.bytes_written += len(chunk)
+        if self._decoder is not None:
+            await self._write(self._decoder.decode(chunk))
+        else:
+            await self._write(chunk)
+
+    async def close(self) -> None:
+        """Finish the body, without closing the destination.
+
+        Raises:
+            UnicodeDecodeError: If the body ends inside a character
+        """
+        if self._decoder is not None:
+            await self._write(self._decoder.decode(b"", final=True))
+        if hasattr(self.destination, "drain"):
+            await self.destination.drain()
+        elif hasattr(self.destination, "flush"):
+            await self._in_thread(self.destination.flush)
+
+    async def _write(self, data: Union[bytes, str]) -> None:
+        if not data:
+            return
+
+        destination = self.destination
+        if isinstance(destination, socket.socket):
+            if destination.gettimeout() == 0:
+                import asyncio
+
+                await asyncio.get_running_loop().sock_sendall(destination, data)
+            else:
+                await self._in_thread(destination.sendall, data)
+        elif hasattr(destination, "drain"):
+            destination.write(data)
+            await destination.drain()
+        else:
+            await self._in_thread(destination.write, data)
+
+    @staticmethod
+    async def _in_thread(function: Any, *args: Any) -> Any:
+        import asyncio
+
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
@@ -1,16 +1,34 @@
-import asyncio
-import http.client
-from http.client import HTTPResponse
-from typing import Dict
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, Optional, Union
+
+if TYPE_CHECKING:
+    import http.client
+
+
+class PreloadedResponse:
+    """A response whose body was read along with its head."""
+
+    __slots__ = ("status", "reason", "headers", "_body")
+
+    def __init__(self, response: "http.client.HTTPResponse") -> None:
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+        self._body = response.read()
+
+    def read(self) -> bytes:
+        """Return the body, which never blocks."""
+        return self._body
 
 
 async def async_request(
-    conn: http.client.HTTPSConnection,
+    conn: "http.client.HTTPSConnection",
     method: str,
     url: str,
     body: bytes,
-    headers: Dict[str, str],
-) -> HTTPResponse:
+    headers: Union[Dict[str, str], Dict[bytes, bytes]],
+    on_sent: Optional[Callable[[], None]] = None,
+    read: bool = False,
+) -> Union["http.client.HTTPResponse", PreloadedResponse]:
     """
     Helper function to make an HTTP request asynchronously using asyncio.
 
@@ -20,18 +38,93 @@ async def async_request(
         url: Request URL
         body: Request body as bytes
         headers: Request headers
+        on_sent: Called once the request has been sent, before waiting for the response
+        read: Read the whole body in the same executor call as the response head
 
     Returns:
-        HTTPResponse object containing the server's response
+        HTTPResponse object containing the server's response, or a PreloadedResponse if read is set
     """
+    import asyncio
+
     loop = asyncio.get_event_loop()
 
     # Asynchronously send the request and get the response (using thread pool for non-blocking)
     future = loop.run_in_executor(None, conn.request, method, url, body, headers)
     await future
 
-    # Read the response asynchronously
-    future = loop.run_in_executor(None, conn.getresponse)
+    if on_sent is not None:
+        on_sent()
+
+    # Read the response asynchronously, saving the body a second executor call
+    if read:
+        future = loop.run_in_executor(
+            None, lambda: PreloadedResponse(conn.getresponse())
+        )
+    else:
+        future = loop.run_in_executor(None, conn.getresponse)
     response = await future
 
     return response
+
+
+async def async_read(response: "http.client.HTTPResponse") -> bytes:
+    """
+    Helper function to read a response body without blocking the event loop.
+
+    Args:
+        response: Response returned by async_request
+
+    Returns:
+        The full response body
+    """
+    import asyncio
+
+    loop = asyncio.get_event_loop()
+
+    # Slow or large bodies would otherwise stall every coroutine on the loop
+    return await loop.run_in_executor(None, response.read)
+
+
+async def async_iter(
+    response: "http.client.HTTPResponse", chunk_size: int = 65536
+) -> AsyncIterator[bytes]:
+    """
+    Helper function to read a response body in chunks as they arrive.
+
+    Args:
+        response: Response returned by async_request
+        chunk_size: Largest chunk to read at once
+
+    Yields:
+        Parts of the body, in order
+    """
+    import asyncio
+
+    loop = asyncio.get_event_loop()
+
+    while True:
+        chunk = await loop.run_in_executor(None, response.read1, chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def abort_connection(conn: "http.client.HTTPConnection") -> None:
+    """
+    Helper function to close a connection that another thread may be blocked on.
+
+    Closing the socket alone does not wake a thread blocked reading from it,
+    so the socket is shut down first.
+
+    Args:
+        conn: HTTP connection object
+    """
+    import socket
+
+    sock = conn.sock
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    conn.close()
@@ -0,0 +1,270 @@
+"""
+Robots module for evaluating robots.txt directives locally.
+
+``RobotsMatcher`` compiles the ``allow`` and ``disallow`` rules of an
+``AnyparserRobotsTxtDirective`` into a trie, where ``*`` matches any run of
+characters and a trailing ``$`` anchors a rule to the end of the URL. A URL
+path is matched against every rule in a single pass, and as in RFC 9309 the
+longest matching rule decides, with allow winning ties.
+
+``RobotsCache`` keeps the directive of each origin for a configurable time,
+so later crawls of the same sites can reject disallowed seed URLs and honour
+``crawl_delay`` without another request to the API.
+"""
+
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .parser import AnyparserCrawlResult, AnyparserRobotsTxtDirective
+
+
+class DisallowedError(ValueError):
+    """Raised when robots.txt disallows crawling a URL."""
+
+    def __init__(self, url: str) -> None:
+        super().__init__(f"Crawling {url} is disallowed by robots.txt")
+        self.url = url
+
+
+class _Node:
+    __slots__ = ("children", "star", "loop", "prefix", "anchored")
+
+    def __init__(self, loop: bool = False) -> None:
+        self.children: Dict[str, "_Node"] = {}
+        # State entered through a "*", which consumes any character
+        self.star: Optional["_Node"] = None
+        self.loop = loop
+        # Longest allow and disallow rule ending here, as (length, allow)
+        self.prefix: Optional[Tuple[int, bool]] = None
+        self.anchored: Optional[Tuple[int, bool]] = None
+
+
+def _better(
+    current: Optional[Tuple[int, bool]], candidate: Optional[Tuple[int, bool]]
+) -> Optional[Tuple[int, bool]]:
+    """Return the deciding rule: the longer one, or allow on a tie."""
+    if candidate is None:
+        return current
+    if current is None or candidate > current:
+        return candidate
+    return current
+
+
+def _path_of(url: str) -> str:
+    """Return the path and query of a URL, the part robots.txt rules match."""
+    from urllib.parse import urlsplit
+
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    return f"{path}?{parts.query}" if parts.query else path
+
+
+def _origin_of(url: str) -> str:
+    """Return the scheme and host of a URL, which a robots.txt file covers."""
+    from urllib.parse import urlsplit
+
+    parts = urlsplit(url)
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+
+class RobotsMatcher:
+    """Compiled allow and disallow rules of one robots.txt group."""
+
+    def __init__(self, allow: Iterable[str] = (), disallow: Iterable[str] = ()) -> None:
+        """Compile the rules.
+
+        Args:
+            allow: Allow rule paths
+            disallow: Disallow rule paths; empty rules, which allow everything, are ignored
+        """
+        self._root = _Node()
+        self.rules = 0
+        for rules, allowed in ((allow, True), (disallow, False)):
+            for rule in rules:
+                if rule:
+                    self._insert(rule, allowed)
+                    self.rules += 1
+
+    @classmethod
+    def from_directive(
+        cls, directive: "AnyparserRobotsTxtDirective"
+    ) -> "RobotsMatcher":
+        """Compile the rules of a robots.txt directive returned by a crawl."""
+        return cls(directive.allow, directive.disallow)
+
+    def _insert(self, rule: str, allowed: bool) -> None:
+        anchored = rule.endswith("$")
+        pattern = rule[:-1] if anchored else rule
+        node = self._root
+        for char in pattern:
+            if char == "*":
+                if node.star is None:
+                    node.star = _Node(loop=True)
+                node = node.star
+            else:
+                node = node.children.setdefault(char, _Node())
+
+        decision = (len(rule), allowed)
+        if anchored:
+            node.anchored = _better(node.anchored, decision)
+        else:
+            node.prefix = _better(node.prefix, decision)
+
+    @staticmethod
+    def _closure(states: List[_Node]) -> List[_Node]:
+        """Add the states reachable through "*" without consuming a character."""
+        result: List[_Node] = []
+        seen = set()
+        for node in states:
+            while node is not None and id(node) not in seen:
+                seen.add(id(node))
+                result.append(node)
+                node = node.star
+        return result
+
+    def decide(self, path: str) -> Optional[Tuple[int, bool]]:
+        """Return the length and verdict of the deciding rule for a path, if any matches.
+
+        Args:
+            path: URL path, with its query if any
+
+        Returns:
+            The length of the deciding rule and whether it allows the path, or None
+        """
+        best: Optional[Tuple[int, bool]] = None
+        states = self._closure([self._root])
+        for char in path:
+            for node in states:
+                best = _better(best, node.prefix)
+
+            following: List[_Node] = []
+            for node in states:
+                child = node.children.get(char)
+                if child is not None:
+                    following.append(child)
+                if node.loop:
+                    following.append(node)
+            if not following:
+                return best
+            states = self._closure(following)
+
+        for node in states:
+            best = _better(best, node.prefix)
+            best = _better(best, node.anchored)
+        return best
+
+    def allowed(self, url: str) -> bool:
+        """Return whether the rules allow crawling a URL or path.
+
+        Args:
+            url: Absolute URL, or a path starting with "/"
+
+        Returns:
+            True unless the longest matching rule is a disallow rule
+        """
+        decision = self.decide(url if url.startswith("/") else _path_of(url))
+        return decision is None or decision[1]
+
+
+class RobotsCache:
+    """Per-origin cache of robots.txt directives with a time to live."""
+
+    def __init__(
+        self,
+        ttl: float = 24 * 3600,
+        max_origins: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create an empty cache.
+
+        Args:
+            ttl: Seconds a directive is trusted after it was recorded
+            max_origins: Number of origins kept, the oldest being evicted first
+            clock: Monotonic clock returning seconds
+        """
+        self.ttl = ttl
+        self.max_origins = max_origins
+        self._clock = clock
+        self._entries: Dict[
+            str, Tuple[float, "AnyparserRobotsTxtDirective", RobotsMatcher]
+        ] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, url: str, directive: "AnyparserRobotsTxtDirective") -> None:
+        """Cache the robots.txt directive covering a URL's origin.
+
+        Args:
+            url: Any URL on the origin
+            directive: The directive returned for it
+        """
+        origin = _origin_of(url)
+        self._entries.pop(origin, None)
+        if len(self._entries) >= self.max_origins:
+            del self._entries[next(iter(self._entries))]
+        self._entries[origin] = (
+            self._clock() + self.ttl,
+            directive,
+            RobotsMatcher.from_directive(directive),
+        )
+
+    def record(self, result: "AnyparserCrawlResult") -> None:
+        """Cache the robots.txt directive a crawl result was made under."""
+        if result.start_url:
+            self.put(result.start_url, result.robots_directive)
+
+    def _entry(
+        self, url: str
+    ) -> Optional[Tuple[float, "AnyparserRobotsTxtDirective", RobotsMatcher]]:
+        origin = _origin_of(url)
+        entry = self._entries.get(origin)
+        if entry is not None and entry[0] <= self._clock():
+            del self._entries[origin]
+            return None
+        return entry
+
+    def get(self, url: str) -> Optional["AnyparserRobotsTxtDirective"]:
+        """Return the cached directive covering a URL, or None if unknown or expired."""
+        entry = self._entry(url)
+        return entry[1] if entry is not None else None
+
+    def allowed(self, url: str) -> Optional[bool]:
+        """Return whether a URL may be crawled, or None if its origin is not cached."""
+        entry = self._entry(url)
+        return entry[2].allowed(url) if entry is not None else None
+
+    def crawl_delay(self, url: str) -> Optional[float]:
+        """Return the cached crawl delay of a URL's origin in seconds, if any."""
+        directive = self.get(url)
+        return float(directive.crawl_delay) if directive is not None else None
+
+    def check(self, url: str) -> None:
+        """Raise if the cached directive disallows crawling a URL.
+
+        Args:
+            url: URL about to be crawled
+
+        Raises:
+            DisallowedError: If robots.txt disallows the URL
+        """
+        if self.allowed(url) is False:
+            raise DisallowedError(url)
+
+    def filter_seeds(self, urls: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """Split seed URLs into those that may be crawled and those robots.txt disallows.
+
+        Seeds on origins that are not cached are kept.
+
+        Args:
+            urls: Seed URLs
+
+        Returns:
+            The allowed seeds and the rejected seeds, each in input order
+        """
+        allowed: List[str] = []
+        rejected: List[str] = []
+        for url in urls:
+            (rejected if self.allowed(url) is False else allowed).append(url)
+        return allowed, rejected
@@ -0,0 +1,119 @@
+"""
+Scheduler module for sharing a parser's in-flight request slots between priorities.
+
+Calls wait for one of ``max_in_flight`` slots. When calls of several
+priority classes are queued, slots are handed out by weighted fair queuing:
+each waiter is stamped with a virtual finish time of the class's previous
+finish time (or the current virtual time, if later) plus ``1 / weight``,
+and the smallest stamp goes first. A high-weight class therefore jumps
+ahead of a long low-weight backlog, while the backlog still receives its
+share of slots instead of starving.
+"""
+
+import heapq
+import itertools
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional
+
+if TYPE_CHECKING:
+    import asyncio
+
+DEFAULT_PRIORITY_WEIGHTS: Dict[str, float] = {
+    "interactive": 8.0,
+    "default": 4.0,
+    "bulk": 1.0,
+}
+
+
+class PriorityScheduler:
+    """Weighted fair queue over a fixed number of in-flight slots."""
+
+    def __init__(
+        self, max_in_flight: int, weights: Optional[Mapping[str, float]] = None
+    ) -> None:
+        """Create a scheduler.
+
+        Args:
+            max_in_flight: Number of calls allowed in flight at once
+            weights: Share of slots per priority class, the interactive, default and bulk classes if omitted
+
+        Raises:
+            ValueError: If max_in_flight is less than 1 or a weight is not positive
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.weights: Dict[str, float] = dict(weights or DEFAULT_PRIORITY_WEIGHTS)
+        if not self.weights or min(self.weights.values()) <= 0:
+            raise ValueError("Priority weights must be positive")
+
+        self.capacity = max_in_flight
+        self.in_flight = 0
+        self.virtual_time = 0.0
+        self._finish: Dict[str, float] = {}
+        self._queued: Dict[str, int] = dict.fromkeys(self.weights, 0)
+        self._heap: List[tuple] = []
+        self._order = itertools.count()
+
+    def check(self, priority: str) -> None:
+        """Raise ValueError if a priority class is unknown."""
+        if priority not in self.weights:
+            raise ValueError(
+                f'Invalid priority: "{priority}". Valid priorities are: {", ".join(self.weights)}'
+            )
+
+    async def acquire(self, priority: str) -> None:
+        """Wait for an in-flight slot.
+
+        Args:
+            priority: Priority class of the call
+
+        Raises:
+            ValueError: If the priority class is unknown
+        """
+        import asyncio
+
+        self.check(priority)
+        finish = max(self.virtual_time, self._finish.get(priority, 0.0))
+        finish += 1 / self.weights[priority]
+        self._finish[priority] = finish
+
+        if self.in_flight < self.capacity and not self._heap:
+            self.in_flight += 1
+            self.virtual_time = finish
+            return
+
+        waiter: "asyncio.Future" = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (finish, next(self._order), priority, waiter))
+        self._queued[priority] += 1
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just as the call was cancelled
+                self.release()
+            else:
+                waiter.cancel()
+                self._queued[priority] -= 1
+            raise
+
+    def release(self) -> None:
+        """Return a slot and hand it to the waiter with the earliest finish time."""
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._heap and self.in_flight < self.capacity:
+            finish, _, priority, waiter = heapq.heappop(self._heap)
+            if waiter.cancelled():
+                continue
+            self._queued[priority] -= 1
+            self.in_flight += 1
+            self.virtual_time = finish
+            waiter.set_result(None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the slot usage and the number of queued calls per priority."""
+        return {
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "queued": dict(self._queued),
+        }
@@ -0,0 +1,86 @@
+"""
+Serialization module for converting parse results into JSON-compatible data.
+
+Result dataclasses are converted one level at a time from a cached tuple of
+their field names, instead of with ``dataclasses.asdict``, which recursively
+deep-copies every field. ``dumps`` goes further and lets the json encoder
+walk lists, dicts and strings natively, calling back into Python only for
+each dataclass it meets.
+"""
+
+import json
+from dataclasses import fields, is_dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Tuple, Union
+
+# Field names of each dataclass type seen so far
+_FIELD_NAMES: Dict[type, Tuple[str, ...]] = {}
+
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def _field_names(value: Any) -> Union[Tuple[str, ...], None]:
+    """Return the field names of a dataclass instance, or None for other values."""
+    cls = type(value)
+    names = _FIELD_NAMES.get(cls)
+    if names is None:
+        if not is_dataclass(value) or isinstance(value, type):
+            return None
+        names = _FIELD_NAMES[cls] = tuple(field.name for field in fields(cls))
+    return names
+
+
+def result_to_dict(result: Any) -> Any:
+    """Convert a parse result into JSON-compatible data.
+
+    Args:
+        result: A result dataclass, a list or dict of results, or raw text content
+
+    Returns:
+        Dictionaries and lists mirroring the result, or the text unchanged
+    """
+    if isinstance(result, _SCALARS):
+        return result
+
+    if isinstance(result, (list, tuple)):
+        return [result_to_dict(item) for item in result]
+
+    if isinstance(result, dict):
+        return {key: result_to_dict(value) for key, value in result.items()}
+
+    names = _field_names(result)
+    if names is not None:
+        return {name: result_to_dict(getattr(result, name)) for name in names}
+
+    return result
+
+
+def _json_default(value: Any) -> Any:
+    """Fallback encoder for values the json module cannot handle natively."""
+    names = _field_names(value)
+    if names is not None:
+        return {name: getattr(value, name) for name in names}
+
+    if isinstance(value, datetime):
+        return value.isoformat()
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(
+    ensure_ascii=False,
+    separators=(",", ":"),
+    default=_json_default,
+)
+
+
+def dumps(value: Union[Any, List[Any]]) -> str:
+    """Serialize a parse result to a single-line JSON string.
+
+    Args:
+        value: A result dataclass, a list of results, raw text, or plain data
+
+    Returns:
+        The compact JSON representation without embedded newlines
+    """
+    return _encoder.encode(value)
@@ -0,0 +1,358 @@
+"""
+Result sink module writing results as NDJSON while they are produced.
+
+A sink serializes each record to one JSON line and hands it to a background
+writer through a bounded queue. The writer takes every line that is ready
+and writes them in one call on a worker thread, so the event loop keeps
+running parse requests while the disk or pipe catches up. Once ``buffer``
+lines are waiting, ``write`` blocks until the writer has made room, which
+pauses the producer, such as a ``parse_iter`` or ``crawl_iter`` loop,
+instead of letting output pile up in memory.
+"""
+
+import os
+import sys
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    Iterable,
+    List,
+    Optional,
+    Union,
+)
+
+from .serialize import dumps
+
+if TYPE_CHECKING:
+    import asyncio
+
+
+class ResultSink(ABC):
+    """Base class of sinks writing NDJSON lines on a background writer.
+
+    Subclasses implement ``_write_lines`` and may override ``_close_output``,
+    both of which run on a worker thread.
+    """
+
+    def __init__(self, buffer: int = 256) -> None:
+        """Create a sink.
+
+        Args:
+            buffer: Lines waiting to be written before producers are paused
+
+        Raises:
+            ValueError: If buffer is less than 1
+        """
+        if buffer < 1:
+            raise ValueError("buffer must be at least 1")
+        self.buffer = buffer
+        # Lines queued and lines written so far
+        self.records = 0
+        self.written = 0
+        self._queue: Optional["asyncio.Queue"] = None
+        self._writer: Optional["asyncio.Future"] = None
+        self._error: Optional[BaseException] = None
+        # Serializes writes from the background writer and write_sync
+        self._lock = threading.Lock()
+        self._closed = False
+
+    async def __aenter__(self) -> "ResultSink":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    @abstractmethod
+    def _write_lines(self, lines: List[str]) -> None:
+        """Write a batch of lines to the output."""
+
+    def _close_output(self) -> None:
+        pass
+
+    def _emit(self, lines: List[str]) -> None:
+        with self._lock:
+            self._write_lines(lines)
+
+    async def _drain(self) -> None:
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        while True:
+            lines = [await self._queue.get()]
+            while len(lines) < self.buffer and not self._queue.empty():
+                lines.append(self._queue.get_nowait())
+
+            batch = [line for line in lines if line is not None]
+            try:
+                if batch and self._error is None:
+                    await loop.run_in_executor(None, self._emit, batch)
+                    self.written += len(batch)
+            except BaseException as e:
+                # Keep draining, so producers waiting for room are released
+                self._error = e
+            finally:
+                for _ in lines:
+                    self._queue.task_done()
+            if len(batch) < len(lines):
+                return
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    async def write_line(self, line: str) -> None:
+        """Queue one serialized line, waiting while the queue is full.
+
+        Args:
+            line: A JSON document ending in a newline, such as a cached result
+
+        Raises:
+            ValueError: If the sink is closed
+            Exception: The error an earlier write failed with
+        """
+        import asyncio
+
+        if self._closed:
+            raise ValueError("Sink is closed")
+        self._raise_error()
+        if self._writer is None:
+            self._queue = asyncio.Queue(self.buffer)
+            self._writer = asyncio.ensure_future(self._drain())
+        await self._queue.put(line)
+        self.records += 1
+
+    async def write(self, record: Any) -> None:
+        """Serialize a record to one line and queue it.
+
+        Args:
+            record: A result dataclass, a list of results, or plain data
+
+        Raises:
+            ValueError: If the sink is closed
+            Exception: The error an earlier write failed with
+        """
+        await self.write_line(dumps(record) + "\n")
+
+    def write_sync(self, record: Any) -> None:
+        """Serialize and write a record immediately, blocking the caller.
+
+        For synchronous producers, such as a generator feeding ``parse_iter``.
+
+        Args:
+            record: A result dataclass, a list of results, or plain data
+
+        Raises:
+            ValueError: If the sink is closed
+            Exception: The error an earlier write failed with
+        """
+        self.write_line_sync(dumps(record) + "\n")
+
+    def write_line_sync(self, line: str) -> None:
+        """Write one serialized line immediately, blocking the caller.
+
+        Args:
+            line: A JSON document ending in a newline, such as a cached result
+
+        Raises:
+            ValueError: If the sink is closed
+            Exception: The error an earlier write failed with
+        """
+        if self._closed:
+            raise ValueError("Sink is closed")
+        self._raise_error()
+        self._emit([line])
+        self.records += 1
+        self.written += 1
+
+    async def consume(self, results: Union[Iterable[Any], AsyncIterable[Any]]) -> int:
+        """Write every item of a stream, pausing it whenever the sink falls behind.
+
+        Items are written as they are. The tuples ``parse_iter`` yields are
+        written as ``{"inputs": ..., "result": ...}`` records, and failures
+        as ``{"inputs": ..., "error": ...}`` records.
+
+        Args:
+            results: Results, crawled pages or ``parse_iter`` tuples, synchronously or asynchronously iterable
+
+        Returns:
+            The number of records written
+        """
+        start = self.records
+        if hasattr(results, "__aiter__"):
+            async for item in results:
+                await self.write(_record(item))
+        else:
+            for item in results:
+                await self.write(_record(item))
+        await self.flush()
+        return self.records - start
+
+    async def flush(self) -> None:
+        """Wait until every queued line has been written.
+
+        Raises:
+            Exception: The error a write failed with
+        """
+        if self._queue is not None:
+            await self._queue.join()
+        self._raise_error()
+
+    async def close(self) -> None:
+        """Write the queued lines and close the output.
+
+        Raises:
+            Exception: The error a write failed with
+        """
+        import asyncio
+
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is not None:
+            await self._queue.put(None)
+            await self._writer
+        await asyncio.get_running_loop().run_in_executor(None, self._close_output)
+        self._raise_error()
+
+
+def _record(item: Any) -> Any:
+    """Return the record written for an item of a result stream."""
+    if not isinstance(item, tuple):
+        return item
+    inputs, result = item
+    if isinstance(result, BaseException):
+        return {"inputs": inputs, "error": str(result) or type(result).__name__}
+    return {"inputs": inputs, "result": result}
+
+
+class StdoutSink(ResultSink):
+    """Writes NDJSON lines to standard output, or another text stream."""
+
+    def __init__(self, stream: Optional[IO[str]] = None, buffer: int = 256) -> None:
+        """Create a sink.
+
+        Args:
+            stream: Text stream to write to, standard output by default
+            buffer: Lines waiting to be written before producers are paused
+        """
+        super().__init__(buffer)
+        self._stream = stream
+
+    def _write_lines(self, lines: List[str]) -> None:
+        stream = self._stream or sys.stdout
+        stream.write("".join(lines))
+        stream.flush()
+
+
+class NdjsonFileSink(ResultSink):
+    """Appends NDJSON lines to a file."""
+
+    def __init__(
+        self, path: Union[str, Path], append: bool = True, buffer: int = 256
+    ) -> None:
+        """Open the file.
+
+        Args:
+            path: File to write to
+            append: Keep existing lines instead of truncating the file
+            buffer: Lines waiting to be written before producers are paused
+        """
+        super().__init__(buffer)
+        self.path = Path(path)
+        self._file = open(path, "ab" if append else "wb")
+
+    def _write_lines(self, lines: List[str]) -> None:
+        self._file.write("".join(lines).encode("utf-8"))
+        self._file.flush()
+
+    def _close_output(self) -> None:
+        self._file.close()
+
+
+class RotatingFileSink(ResultSink):
+    """Writes NDJSON lines to numbered files, starting a new one when a file is full."""
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        prefix: str = "results",
+        max_bytes: int = 64 * 1024 * 1024,
+        max_records: Optional[int] = None,
+        buffer: int = 256,
+    ) -> None:
+        """Create a sink.
+
+        Files are named ``{prefix}-00000.ndjson``, ``{prefix}-00001.ndjson``
+        and so on, continuing after files left by an earlier run. A record
+        is never split across files, so a file exceeds max_bytes only when
+        a single record does.
+
+        Args:
+            directory: Directory for the files, created if missing
+            prefix: Start of every file name
+            max_bytes: Size after which the next record starts a new file
+            max_records: Records after which the next record starts a new file, if set
+            buffer: Lines waiting to be written before producers are paused
+        """
+        super().__init__(buffer)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_records = max_records
+        self.files: List[Path] = []
+
+        start = f"{prefix}-"
+        self._next_file = 1 + max(
+            [
+                int(name[len(start) : -7])
+                for name in os.listdir(directory)
+                if name.startswith(start)
+                and name.endswith(".ndjson")
+                and name[len(start) : -7].isdigit()
+            ],
+            default=-1,
+        )
+        self._file: Optional[IO[bytes]] = None
+        self._bytes = 0
+        self._records = 0
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        path = self.directory / f"{self.prefix}-{self._next_file:05d}.ndjson"
+        self._next_file += 1
+        self._file = open(path, "wb")
+        self.files.append(path)
+        self._bytes = self._records = 0
+
+    def _write_lines(self, lines: List[str]) -> None:
+        pending: List[bytes] = []
+        for line in lines:
+            data = line.encode("utf-8")
+            full = self._file is None or (
+                self._records
+                and (
+                    self._bytes + len(data) > self.max_bytes
+                    or (self.max_records and self._records >= self.max_records)
+                )
+            )
+            if full:
+                if pending:
+                    self._file.write(b"".join(pending))
+                    pending = []
+                self._rotate()
+            pending.append(data)
+            self._bytes += len(data)
+            self._records += 1
+        self._file.write(b"".join(pending))
+        self._file.flush()
+
+    def _close_output(self) -> None:
+        if self._file is not None:
+            self._file.close()
@@ -0,0 +1,234 @@
+"""
+Content sniffing module detecting a file's MIME type from its first bytes.
+
+The leading bytes of a file are matched against one compiled regular
+expression holding the signature of every recognised format, so detection
+is a single match call however many formats there are. Formats with a
+signature, such as PDF or PNG, are recognised whatever the file is called.
+Without a signature the file name's extension decides, and failing that,
+files whose first bytes decode as UTF-8 are treated as text. Containers
+shared by several formats, such as ZIP for DOCX and XLSX, are told apart by
+the entries named in their first bytes, or by the extension.
+
+Detection only reads ``HEAD_SIZE`` bytes, and results are cached by the
+file's device, inode, modification time and size, so an unchanged file is
+never read twice for sniffing.
+"""
+
+import codecs
+import mimetypes
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import BinaryIO, Dict, FrozenSet, Optional, Tuple, Union
+
+HEAD_SIZE = 512
+
+OCTET_STREAM = "application/octet-stream"
+
+_ZIP = "application/zip"
+_OLE = "application/x-ole-storage"
+
+# Named signatures; each group name maps to a type in _SIGNATURE_TYPES
+_SIGNATURES = re.compile(
+    rb"""
+    (?P<pdf>%PDF-)
+    | (?P<png>\x89PNG\r\n\x1a\n)
+    | (?P<jpeg>\xff\xd8\xff)
+    | (?P<gif>GIF8[79]a)
+    | (?P<webp>RIFF.{4}WEBP)
+    | (?P<wav>RIFF.{4}WAVE)
+    | (?P<tiff>II\*\x00|MM\x00\*)
+    | (?P<bmp>BM.{4}\x00\x00\x00\x00)
+    | (?P<heic>.{4}ftyp(?:heic|heix|mif1|msf1))
+    | (?P<avif>.{4}ftypavi[fs])
+    | (?P<mp4>.{4}ftyp)
+    | (?P<zip>PK\x03\x04)
+    | (?P<ole>\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1)
+    | (?P<rtf>\{\\rtf)
+    | (?P<gzip>\x1f\x8b)
+    | (?P<mp3>ID3)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_SIGNATURE_TYPES = {
+    "pdf": "application/pdf",
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "gif": "image/gif",
+    "webp": "image/webp",
+    "wav": "audio/wav",
+    "tiff": "image/tiff",
+    "bmp": "image/bmp",
+    "heic": "image/heic",
+    "avif": "image/avif",
+    "mp4": "video/mp4",
+    "zip": _ZIP,
+    "ole": _OLE,
+    "rtf": "application/rtf",
+    "gzip": "application/gzip",
+    "mp3": "audio/mpeg",
+}
+
+# Entry names that identify a ZIP-based format within the first bytes
+_ZIP_ENTRIES = re.compile(
+    rb"mimetype(?P<mimetype>application/[\w.+-]+)|(?P<word>word/)|(?P<xl>xl/)|(?P<ppt>ppt/)"
+)
+
+_OOXML = "application/vnd.openxmlformats-officedocument."
+_ZIP_ENTRY_TYPES = {
+    "word": _OOXML + "wordprocessingml.document",
+    "xl": _OOXML + "spreadsheetml.sheet",
+    "ppt": _OOXML + "presentationml.presentation",
+}
+
+# Types a container may hold, taken from the extension when its first
+# bytes do not tell
+_CONTAINED: Dict[str, FrozenSet[str]] = {
+    _ZIP: frozenset(
+        list(_ZIP_ENTRY_TYPES.values())
+        + [
+            "application/epub+zip",
+            "application/vnd.oasis.opendocument.text",
+            "application/vnd.oasis.opendocument.spreadsheet",
+            "application/vnd.oasis.opendocument.presentation",
+        ]
+    ),
+    _OLE: frozenset(
+        [
+            "application/msword",
+            "application/vnd.ms-excel",
+            "application/vnd.ms-powerpoint",
+            "application/vnd.ms-outlook",
+        ]
+    ),
+}
+
+_HTML = re.compile(rb"\s*<(?:!doctype\s+html|html|head|body)[\s>]", re.IGNORECASE)
+_XML = re.compile(rb"\s*<\?xml\s")
+_BOMS = (codecs.BOM_UTF8, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+
+# Extensions missing from the mimetypes registry of older Pythons
+_EXTENSION_TYPES = {
+    ".md": "text/markdown",
+    ".markdown": "text/markdown",
+    ".msg": "application/vnd.ms-outlook",
+}
+
+# Type from a signature, and type of a file without one, by file identity
+_Detected = Tuple[Optional[str], Optional[str]]
+_CACHE_SIZE = 4096
+_cache: "OrderedDict[Tuple[int, int, int, int], _Detected]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _detect(head: bytes) -> _Detected:
+    """Return the type a file's first bytes identify, and the type if they identify none."""
+    match = _SIGNATURES.match(head)
+    if match is not None:
+        detected = _SIGNATURE_TYPES[match.lastgroup]
+        if detected == _ZIP:
+            entry = _ZIP_ENTRIES.search(head)
+            if entry is not None:
+                detected = (
+                    entry.group("mimetype").decode("ascii")
+                    if entry.lastgroup == "mimetype"
+                    else _ZIP_ENTRY_TYPES[entry.lastgroup]
+                )
+        return detected, None
+
+    if head.startswith(_BOMS[1:]):
+        return None, "text/plain"
+    if b"\x00" in head:
+        return None, None
+    try:
+        # The head may end inside a character
+        codecs.getincrementaldecoder("utf-8")().decode(head)
+    except UnicodeDecodeError:
+        return None, None
+
+    text = head[3:] if head.startswith(codecs.BOM_UTF8) else head
+    if _HTML.match(text):
+        return None, "text/html"
+    if _XML.match(text):
+        return None, "application/xml"
+    return None, "text/plain"
+
+
+def _resolve(detected: _Detected, filename: str) -> str:
+    """Combine what the first bytes identify with the file name's extension."""
+    signature, fallback = detected
+    guessed = None
+    if filename:
+        extension = os.path.splitext(filename)[1].lower()
+        guessed = _EXTENSION_TYPES.get(extension) or mimetypes.guess_type(filename)[0]
+    if signature in _CONTAINED:
+        return guessed if guessed in _CONTAINED[signature] else signature
+    return signature or guessed or fallback or OCTET_STREAM
+
+
+def sniff_content_type(head: bytes, filename: str = "") -> str:
+    """Return the MIME type of a file from its first bytes and name.
+
+    Args:
+        head: The file's first bytes; only the first ``HEAD_SIZE`` are looked at
+        filename: The file's name, consulted when the bytes have no signature
+
+    Returns:
+        The MIME type, "application/octet-stream" if unknown
+    """
+    return _resolve(_detect(head[:HEAD_SIZE]), filename)
+
+
+def sniff_file(file: Union[str, Path, BinaryIO], filename: Optional[str] = None) -> str:
+    """Return the MIME type of a file, reading at most ``HEAD_SIZE`` bytes of it.
+
+    Results are cached by the file's device, inode, modification time and
+    size. An open file's position is left unchanged.
+
+    Args:
+        file: Path of the file, or the file opened in binary mode
+        filename: Name used for the extension fallback, by default the path's name
+
+    Returns:
+        The MIME type, "application/octet-stream" if unknown
+    """
+    if isinstance(file, (str, Path)):
+        stat = os.stat(file)
+        name = filename if filename is not None else Path(file).name
+    else:
+        stat = os.fstat(file.fileno())
+        name = filename if filename is not None else Path(file.name).name
+
+    key = (stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        detected = _cache.get(key)
+        if detected is not None:
+            _cache.move_to_end(key)
+    if detected is None:
+        detected = _detect(_read_head(file))
+        with _cache_lock:
+            _cache[key] = detected
+            if len(_cache) > _CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    return _resolve(detected, name)
+
+
+def _read_head(file: Union[str, Path, BinaryIO]) -> bytes:
+    if isinstance(file, (str, Path)):
+        with open(file, "rb") as f:
+            return f.read(HEAD_SIZE)
+
+    if hasattr(os, "pread"):
+        return os.pread(file.fileno(), HEAD_SIZE, 0)
+
+    position = file.tell()
+    try:
+        file.seek(0)
+        return file.read(HEAD_SIZE)
+    finally:
+        file.seek(position)
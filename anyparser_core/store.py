@@ -0,0 +1,385 @@
+"""
+Crawl store module persisting crawled pages across runs in SQLite.
+
+Each page is stored once under its normalized URL with its latest status,
+crawl time, content fingerprint, directives and markdown, and every run
+records the fingerprint and status it saw for each page. Lookups go
+through the primary key, diffs between runs are computed in SQL, and pages
+are written one at a time, so ``Anyparser.crawl_iter`` can fill the store
+while the crawl streams in without holding the crawl in memory.
+
+The store has the ``known_pages`` and ``page`` methods of ``CrawlState``,
+so it can be passed to ``Anyparser.crawl_incremental`` directly.
+"""
+
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, List, Optional, Union
+
+from .incremental import CrawlDiff, KnownPage, fingerprint, normalize_url
+from .serialize import dumps
+
+if TYPE_CHECKING:
+    from .parser import (
+        AnyparserCrawlDirective,
+        AnyparserCrawlResult,
+        AnyparserRobotsTxtDirective,
+        AnyparserUrl,
+    )
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    start_url TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    robots_directive TEXT
+);
+CREATE TABLE IF NOT EXISTS pages (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    status_code INTEGER NOT NULL,
+    status_message TEXT NOT NULL,
+    crawled_at TEXT,
+    checksum TEXT NOT NULL,
+    title TEXT,
+    politeness_delay INTEGER NOT NULL,
+    total_characters INTEGER NOT NULL,
+    directive TEXT NOT NULL,
+    markdown TEXT
+);
+CREATE TABLE IF NOT EXISTS run_pages (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    key TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status_code INTEGER NOT NULL,
+    checksum TEXT NOT NULL,
+    PRIMARY KEY (run_id, key)
+) WITHOUT ROWID;
+"""
+
+_PAGE_COLUMNS = (
+    "url, status_code, status_message, crawled_at, checksum, title, "
+    "politeness_delay, total_characters, directive, markdown"
+)
+
+
+@dataclass
+class StoredPage:
+    """Latest stored state of a page, without its markdown."""
+
+    url: str
+    status_code: int
+    crawled_at: Optional[str]
+    checksum: str
+    directive: "AnyparserCrawlDirective"
+    robots_directive: Optional["AnyparserRobotsTxtDirective"]
+    run_id: int
+
+
+@dataclass
+class CrawlRun:
+    """A crawl recorded in the store."""
+
+    id: int
+    start_url: str
+    started_at: float
+    finished_at: Optional[float]
+    pages: int
+
+
+class CrawlStore:
+    """SQLite store of crawled pages keyed by normalized URL."""
+
+    def __init__(
+        self,
+        path: Union[str, Path] = ":memory:",
+        keep_markdown: bool = True,
+        commit_every: int = 500,
+    ) -> None:
+        """Open or create a store.
+
+        Args:
+            path: Database file, an in-memory database if omitted
+            keep_markdown: Store page markdown, which incremental crawls need to merge unchanged pages
+            commit_every: Pages written between commits while a run is open
+        """
+        self.path = str(path)
+        self.keep_markdown = keep_markdown
+        self.commit_every = commit_every
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._pending = 0
+
+    def __enter__(self) -> "CrawlStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Commit outstanding writes and close the database."""
+        self._db.commit()
+        self._db.close()
+
+    def begin_run(self, start_url: str) -> int:
+        """Record the start of a crawl.
+
+        Args:
+            start_url: Start URL of the crawl
+
+        Returns:
+            The id of the run, to pass to ``add`` and ``finish_run``
+        """
+        cursor = self._db.execute(
+            "INSERT INTO runs (start_url, started_at) VALUES (?, ?)",
+            (start_url, time.time()),
+        )
+        self._db.commit()
+        return cursor.lastrowid
+
+    def add(self, run_id: int, page: "AnyparserUrl") -> None:
+        """Write a crawled page, replacing the stored version of its URL.
+
+        Args:
+            run_id: The run the page was crawled in
+            page: The crawled page
+        """
+        key = normalize_url(page.url)
+        checksum = fingerprint(page.markdown)
+        self._db.execute(
+            f"INSERT OR REPLACE INTO pages (key, run_id, {_PAGE_COLUMNS}) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                run_id,
+                page.url,
+                page.status_code,
+                page.status_message,
+                page.crawled_at,
+                checksum,
+                page.title,
+                page.politeness_delay,
+                page.total_characters,
+                dumps(page.directive),
+                page.markdown if self.keep_markdown else None,
+            ),
+        )
+        self._db.execute(
+            "INSERT OR REPLACE INTO run_pages (run_id, key, url, status_code, checksum) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (run_id, key, page.url, page.status_code, checksum),
+        )
+
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self._db.commit()
+            self._pending = 0
+
+    def finish_run(
+        self,
+        run_id: int,
+        robots_directive: Optional["AnyparserRobotsTxtDirective"] = None,
+    ) -> None:
+        """Record the end of a crawl and commit its pages.
+
+        Args:
+            run_id: The run to finish
+            robots_directive: The robots.txt directive the crawl followed
+        """
+        self._db.execute(
+            "UPDATE runs SET finished_at = ?, robots_directive = ? WHERE id = ?",
+            (
+                time.time(),
+                dumps(robots_directive) if robots_directive is not None else None,
+                run_id,
+            ),
+        )
+        self._db.commit()
+        self._pending = 0
+
+    def record(self, result: "AnyparserCrawlResult") -> int:
+        """Write a whole crawl result as one run.
+
+        Args:
+            result: The crawl result
+
+        Returns:
+            The id of the run
+        """
+        run_id = self.begin_run(result.start_url)
+        for page in result.items:
+            self.add(run_id, page)
+        self.finish_run(run_id, result.robots_directive)
+        return run_id
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def __contains__(self, url: str) -> bool:
+        return (
+            self._db.execute(
+                "SELECT 1 FROM pages WHERE key = ?", (normalize_url(url),)
+            ).fetchone()
+            is not None
+        )
+
+    def get(self, url: str) -> Optional[StoredPage]:
+        """Return the stored state of a page.
+
+        Args:
+            url: URL of the page, in any equivalent form
+
+        Returns:
+            The page's latest status, fingerprint and directives, or None if it was never crawled
+        """
+        from .parser import _decode_directive, _decode_robots
+
+        row = self._db.execute(
+            "SELECT pages.url, pages.status_code, pages.crawled_at, pages.checksum, "
+            "pages.directive, runs.robots_directive, pages.run_id "
+            "FROM pages JOIN runs ON runs.id = pages.run_id WHERE pages.key = ?",
+            (normalize_url(url),),
+        ).fetchone()
+        if row is None:
+            return None
+
+        url, status_code, crawled_at, checksum, directive, robots, run_id = row
+        return StoredPage(
+            url=url,
+            status_code=status_code,
+            crawled_at=crawled_at,
+            checksum=checksum,
+            directive=_decode_directive(json.loads(directive)),
+            robots_directive=(
+                _decode_robots(json.loads(robots)) if robots is not None else None
+            ),
+            run_id=run_id,
+        )
+
+    def page(self, url: str) -> Optional["AnyparserUrl"]:
+        """Return the stored version of a successfully crawled page, markdown included."""
+        row = self._db.execute(
+            f"SELECT {_PAGE_COLUMNS} FROM pages WHERE key = ? AND status_code < 400",
+            (normalize_url(url),),
+        ).fetchone()
+        return _page_from_row(row) if row is not None else None
+
+    def pages(self) -> Iterator["AnyparserUrl"]:
+        """Iterate over every stored page without loading them all at once."""
+        for row in self._db.execute(f"SELECT {_PAGE_COLUMNS} FROM pages ORDER BY key"):
+            yield _page_from_row(row)
+
+    def known_pages(self) -> List[KnownPage]:
+        """Return the successfully crawled pages with their fingerprints."""
+        return [
+            KnownPage(url, checksum, crawled_at)
+            for url, checksum, crawled_at in self._db.execute(
+                "SELECT url, checksum, crawled_at FROM pages WHERE status_code < 400"
+            )
+        ]
+
+    def runs(self) -> List[CrawlRun]:
+        """Return every recorded run, oldest first."""
+        return [
+            CrawlRun(*row)
+            for row in self._db.execute(
+                "SELECT runs.id, start_url, started_at, finished_at, COUNT(key) "
+                "FROM runs LEFT JOIN run_pages ON run_pages.run_id = runs.id "
+                "GROUP BY runs.id ORDER BY runs.id"
+            )
+        ]
+
+    def diff(self, old_run: int, new_run: int) -> CrawlDiff:
+        """Compare the pages two runs saw.
+
+        Pages only the new run saw are new, and pages whose fingerprint
+        differs are changed. Pages the new run did not see, or saw as
+        failed after the old run crawled them successfully, are removed.
+
+        Args:
+            old_run: Id of the earlier run
+            new_run: Id of the later run
+
+        Returns:
+            The URLs of the new run grouped by how they changed
+
+        Raises:
+            ValueError: If either run does not exist or did not finish, as after a failed or abandoned crawl
+        """
+        finished = {
+            run_id
+            for (run_id,) in self._db.execute(
+                "SELECT id FROM runs WHERE id IN (?, ?) AND finished_at IS NOT NULL",
+                (old_run, new_run),
+            )
+        }
+        for run_id in (old_run, new_run):
+            if run_id not in finished:
+                raise ValueError(f"Run {run_id} is unknown or did not finish")
+
+        diff = CrawlDiff()
+        rows = self._db.execute(
+            "SELECT new.url, old.checksum, new.checksum, old.status_code, new.status_code "
+            "FROM run_pages AS new LEFT JOIN run_pages AS old "
+            "ON old.run_id = ? AND old.key = new.key "
+            "WHERE new.run_id = ? ORDER BY new.key",
+            (old_run, new_run),
+        )
+        for url, old_checksum, new_checksum, old_status, new_status in rows:
+            if old_checksum is None or old_status >= 400:
+                if new_status < 400:
+                    diff.new.append(url)
+            elif new_status >= 400:
+                diff.removed.append(url)
+            elif old_checksum != new_checksum:
+                diff.changed.append(url)
+            else:
+                diff.unchanged.append(url)
+
+        diff.removed += [
+            url
+            for (url,) in self._db.execute(
+                "SELECT old.url FROM run_pages AS old WHERE old.run_id = ? "
+                "AND old.status_code < 400 AND NOT EXISTS (SELECT 1 FROM run_pages "
+                "AS new WHERE new.run_id = ? AND new.key = old.key) ORDER BY old.key",
+                (old_run, new_run),
+            )
+        ]
+        return diff
+
+
+def _page_from_row(row: tuple) -> "AnyparserUrl":
+    from .parser import _decode_url
+
+    (
+        url,
+        status_code,
+        status_message,
+        crawled_at,
+        _checksum,
+        title,
+        politeness_delay,
+        total_characters,
+        directive,
+        markdown,
+    ) = row
+    return _decode_url(
+        {
+            "url": url,
+            "status_code": status_code,
+            "status_message": status_message,
+            "politeness_delay": politeness_delay,
+            "total_characters": total_characters,
+            "markdown": markdown or "",
+            "directive": json.loads(directive),
+            "title": title,
+            "crawled_at": crawled_at,
+        }
+    )
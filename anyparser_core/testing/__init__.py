@@ -0,0 +1,24 @@
+"""
+Test doubles for the Anyparser API.
+
+``FakeAnyparserServer`` serves the ``/parse/v1`` contract locally with
+generated results and injectable faults, so concurrency, retry and pooling
+behaviour can be load-tested without reaching the live service. The server
+runs on a background thread, so the client's event loop stays free:
+
+    with FakeAnyparserServer(faults=FaultProfile(latency=0.05)) as server:
+        parser = Anyparser(AnyparserOption(api_url=server.url, api_key="test"))
+        results = asyncio.run(parser.parse("document.pdf"))
+"""
+
+from .multipart import FormFile, MultipartForm, parse_multipart
+from .server import FakeAnyparserServer, FaultProfile, ServerStats
+
+__all__ = [
+    "FakeAnyparserServer",
+    "FaultProfile",
+    "ServerStats",
+    "FormFile",
+    "MultipartForm",
+    "parse_multipart",
+]
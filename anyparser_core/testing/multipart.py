@@ -0,0 +1,94 @@
+"""
+Multipart decoding for the form bodies built by ``anyparser_core.form``.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+_SEPARATOR = b"\r\n\r\n"
+
+
+@dataclass
+class FormFile:
+    """Uploaded file part of a multipart form."""
+
+    filename: str
+    content_type: str
+    contents: bytes
+
+
+@dataclass
+class MultipartForm:
+    """Decoded multipart form with plain fields and uploaded files."""
+
+    fields: Dict[str, str] = field(default_factory=dict)
+    files: List[FormFile] = field(default_factory=list)
+
+    def get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """Return a field value, treating the encoded ``None`` as missing."""
+        value = self.fields.get(name)
+        return default if value is None or value == "None" else value
+
+
+def _header_params(value: str) -> Dict[str, str]:
+    params = {}
+    for item in value.split(";")[1:]:
+        key, _, param = item.strip().partition("=")
+        params[key.lower()] = param.strip('"')
+    return params
+
+
+def parse_multipart(body: bytes, boundary: str) -> MultipartForm:
+    """Decode a multipart/form-data body.
+
+    Args:
+        body: The request body
+        boundary: Boundary from the request's Content-Type header
+
+    Returns:
+        The decoded fields and files
+
+    Raises:
+        ValueError: If the body is not a well-formed multipart form
+    """
+    delimiter = b"--" + boundary.encode("utf-8")
+    if not body.startswith(delimiter):
+        raise ValueError("Body does not start with the multipart boundary")
+
+    form = MultipartForm()
+    position = len(delimiter)
+    while True:
+        if body.startswith(b"--", position):
+            return form
+        if not body.startswith(b"\r\n", position):
+            raise ValueError("Malformed multipart delimiter")
+
+        headers_end = body.find(_SEPARATOR, position + 2)
+        next_delimiter = body.find(b"\r\n" + delimiter, position + 2)
+        if headers_end < 0 or next_delimiter < 0 or headers_end > next_delimiter:
+            raise ValueError("Unterminated multipart part")
+
+        headers = {}
+        for line in body[position + 2 : headers_end].decode("utf-8").split("\r\n"):
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        contents = body[headers_end + len(_SEPARATOR) : next_delimiter]
+        disposition = _header_params(headers.get("content-disposition", ""))
+        if "name" not in disposition:
+            raise ValueError("Multipart part without a field name")
+
+        if "filename" in disposition:
+            form.files.append(
+                FormFile(
+                    filename=disposition["filename"],
+                    content_type=headers.get(
+                        "content-type", "application/octet-stream"
+                    ),
+                    contents=contents,
+                )
+            )
+        else:
+            form.fields[disposition["name"]] = contents.decode("utf-8")
+
+        position = next_delimiter + 2 + len(delimiter)
@@ -0,0 +1,142 @@
+"""
+Generators for response JSON shaped like the real API output.
+
+The dictionaries decode into ``AnyparserResultBase``, ``AnyparserPdfResult``
+and ``AnyparserCrawlResult`` exactly like live responses do.
+"""
+
+from typing import Any, Dict, List, Optional
+
+_SENTENCE = "The quick brown fox jumps over the lazy dog. "
+
+_TABLE = "| Quarter | Revenue | Growth |\n| --- | --- | --- |\n| Q1 | 1,200 | 4% |\n| Q2 | 1,350 | 12% |\n"
+
+
+def markdown(chars: int, title: str = "Document") -> str:
+    """Return markdown of roughly the given length with a heading and paragraphs.
+
+    Args:
+        chars: Approximate number of body characters
+        title: Text of the leading heading
+
+    Returns:
+        Markdown with a heading, paragraphs of about 500 characters and a table
+    """
+    body = (_SENTENCE * (chars // len(_SENTENCE) + 1))[: max(0, chars)]
+    paragraphs = [body[start : start + 500] for start in range(0, len(body), 500)]
+    if len(paragraphs) > 1:
+        paragraphs.insert(1, _TABLE)
+    return f"# {title}\n\n" + "\n\n".join(paragraphs)
+
+
+def text_result(
+    filename: str, chars: int, checksum: Optional[str] = None
+) -> Dict[str, Any]:
+    """Return a plain file result.
+
+    Args:
+        filename: Original name of the uploaded file
+        chars: Approximate length of the markdown
+        checksum: Checksum of the uploaded contents
+    """
+    content = markdown(chars, filename)
+    return {
+        "rid": f"rid-{filename}",
+        "original_filename": filename,
+        "checksum": checksum or "0" * 64,
+        "total_characters": len(content),
+        "markdown": content,
+    }
+
+
+def pdf_result(
+    filename: str, pages: int, chars_per_page: int, checksum: Optional[str] = None
+) -> Dict[str, Any]:
+    """Return a PDF result with one item per page.
+
+    Args:
+        filename: Original name of the uploaded file
+        pages: Number of pages
+        chars_per_page: Approximate length of each page's markdown
+        checksum: Checksum of the uploaded contents
+    """
+    items = []
+    for number in range(1, pages + 1):
+        page = markdown(chars_per_page, f"Page {number}")
+        items.append(
+            {
+                "page_number": number,
+                "markdown": page,
+                "text": page.replace("#", "").replace("|", " "),
+                "images": [],
+            }
+        )
+
+    content = "\n\n".join(item["markdown"] for item in items)
+    return {
+        "rid": f"rid-{filename}",
+        "original_filename": filename,
+        "checksum": checksum or "0" * 64,
+        "total_characters": len(content),
+        "markdown": content,
+        "total_items": pages,
+        "items": items,
+    }
+
+
+def crawl_result(start_url: str, pages: int, chars_per_page: int) -> Dict[str, Any]:
+    """Return a crawl result with the given number of crawled pages.
+
+    Args:
+        start_url: URL the crawl started from
+        pages: Number of crawled pages, the first being the start URL
+        chars_per_page: Approximate length of each page's markdown
+    """
+    base = start_url.rstrip("/")
+    items: List[Dict[str, Any]] = []
+    for number in range(pages):
+        url = start_url if number == 0 else f"{base}/page/{number}"
+        page = markdown(chars_per_page, f"Page {number}")
+        items.append(
+            {
+                "url": url,
+                "status_code": 200,
+                "status_message": "OK",
+                "politeness_delay": 0,
+                "total_characters": len(page),
+                "markdown": page,
+                "directive": {
+                    "type": "Combined",
+                    "priority": 0,
+                    "name": None,
+                    "noindex": False,
+                    "nofollow": False,
+                    "underlying": [
+                        {
+                            "type": "HTML Meta",
+                            "priority": 1,
+                            "name": "robots",
+                            "noindex": False,
+                            "nofollow": False,
+                        }
+                    ],
+                },
+                "title": f"Page {number}",
+                "crawled_at": "2024-01-01T00:00:00Z",
+            }
+        )
+
+    return {
+        "rid": "rid-crawl",
+        "start_url": start_url,
+        "total_characters": sum(item["total_characters"] for item in items),
+        "total_items": pages,
+        "markdown": "",
+        "items": items,
+        "robots_directive": {
+            "user_agent": "*",
+            "disallow": ["/private/"],
+            "allow": ["/"],
+            "crawl_delay": 0,
+        },
+    }
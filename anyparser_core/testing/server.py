@@ -0,0 +1,620 @@
+"""
+Fake Anyparser API server with fault injection for offline load testing.
+
+The server speaks enough HTTP/1.1 for ``http.client``, or h2c for the
+HTTP/2 transport, decodes the multipart form built by
+``anyparser_core.form``, validates it like the live ``/parse/v1``
+endpoint, and answers with generated results. A ``FaultProfile`` injects
+latency, rate limiting, server errors, slow-drip responses, connection
+resets and connection shutdowns at configurable rates.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import socket
+import struct
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple, Union
+from urllib.parse import urlsplit
+
+from . import payloads
+from .multipart import MultipartForm, parse_multipart
+
+if TYPE_CHECKING:
+    import h2.connection
+
+FORMATS = frozenset(["json", "markdown", "html"])
+MODELS = frozenset(["text", "ocr", "vlm", "lam", "crawler"])
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    502: "Bad Gateway",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+ResultsFactory = Callable[[MultipartForm], List[dict]]
+
+# Status, payload, extra headers and whether to drip the body
+_Response = Tuple[int, object, Dict[str, str], bool]
+
+# Ways of dropping a request instead of answering it
+_RESET = "reset"
+_GOAWAY = "goaway"
+
+
+def _omit_unchanged(result: dict, known_urls: str) -> dict:
+    """Drop crawled pages whose content matches a known page of an earlier crawl."""
+    from ..incremental import fingerprint, normalize_url
+
+    known = {
+        normalize_url(page["url"]): page["checksum"] for page in json.loads(known_urls)
+    }
+    items = [
+        item
+        for item in result.get("items", [])
+        if known.get(normalize_url(item["url"])) != fingerprint(item.get("markdown"))
+    ]
+    return {
+        **result,
+        "items": items,
+        "total_items": len(items),
+        "total_characters": sum(item["total_characters"] for item in items),
+    }
+
+
+@dataclass
+class FaultProfile:
+    """Rates and shapes of injected faults.
+
+    Rates are probabilities between 0 and 1, drawn independently for every
+    request in the order straggler, reset, goaway, rate limit, server error,
+    slow drip. A straggler waits ``straggler_latency`` on top of the usual
+    latency. A goaway shuts the whole connection down: over HTTP/2 with a
+    GOAWAY frame failing every stream on it, over HTTP/1.1 by closing the
+    connection without a response.
+    """
+
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    straggler_rate: float = 0.0
+    straggler_latency: float = 1.0
+    reset_rate: float = 0.0
+    goaway_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: int = 1
+    server_error_rate: float = 0.0
+    server_error_statuses: Tuple[int, ...] = (500, 502, 503)
+    slow_drip_rate: float = 0.0
+    drip_chunk_size: int = 256
+    drip_interval: float = 0.01
+    seed: Optional[int] = None
+
+
+@dataclass
+class ServerStats:
+    """Counters describing the traffic the server has seen."""
+
+    connections: int = 0
+    requests: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    stragglers: int = 0
+    resets: int = 0
+    goaways: int = 0
+    slow_drips: int = 0
+    cancelled_streams: int = 0
+    bytes_received: int = 0
+    statuses: Dict[int, int] = field(default_factory=dict)
+
+
+class _HttpError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class FakeAnyparserServer:
+    """Asyncio HTTP server implementing the parse endpoint contract.
+
+    A plain ``with`` block serves from a background thread with its own
+    loop and works with any client, including synchronous code and
+    benchmarks. ``async with`` serves on the running event loop instead, so
+    it only suits clients that never block that loop: a client doing
+    blocking socket I/O on it would deadlock waiting for a response the
+    server can no longer send. ``Anyparser`` performs all socket I/O in
+    executor threads or, over HTTP/2, on the loop without blocking, and is
+    safe either way. ``faults`` can be replaced while the server runs to
+    change scenarios mid-test. With ``http2=True`` the server stands in for
+    an HTTP/2 endpoint, speaking h2c and answering streams concurrently.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        api_key: Optional[str] = None,
+        faults: Optional[FaultProfile] = None,
+        chars: int = 2_000,
+        pdf_pages: int = 10,
+        crawl_pages: int = 50,
+        results_factory: Optional[ResultsFactory] = None,
+        http2: bool = False,
+        max_streams: Optional[int] = None,
+    ) -> None:
+        """Configure the server.
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on, 0 for an ephemeral port
+            api_key: Bearer token every request must carry, any token if omitted
+            faults: Injected faults, none if omitted
+            chars: Characters of markdown per file, page or crawled page
+            pdf_pages: Pages per uploaded PDF
+            crawl_pages: Pages per crawl, capped by the request's max_executions
+            results_factory: Builds the result dictionaries for a decoded form instead of the generators
+            http2: Speak h2c with prior knowledge instead of HTTP/1.1, requires the h2 package
+            max_streams: Streams an HTTP/2 client may have open at once per connection, unlimited if omitted
+        """
+        self.host = host
+        self.http2 = http2
+        self.max_streams = max_streams
+        self.port = port
+        self.api_key = api_key
+        self.faults = faults or FaultProfile()
+        self.chars = chars
+        self.pdf_pages = pdf_pages
+        self.crawl_pages = crawl_pages
+        self.results_factory = results_factory
+        self.stats = ServerStats()
+        self._random = random.Random(self.faults.seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to use as ``api_url``."""
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> "FakeAnyparserServer":
+        """Start listening on the running event loop."""
+        self._random.seed(self.faults.seed)
+        self._server = await asyncio.start_server(
+            self._handle_h2 if self.http2 else self._handle,
+            self.host,
+            self.port,
+            backlog=1024,
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        """Stop listening and close the server."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "FakeAnyparserServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.stop()
+
+    def __enter__(self) -> "FakeAnyparserServer":
+        ready = threading.Event()
+        errors: List[BaseException] = []
+
+        def serve() -> None:
+            self._loop = asyncio.new_event_loop()
+            try:
+                self._loop.run_until_complete(self.start())
+            except BaseException as e:
+                errors.append(e)
+                ready.set()
+                return
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=serve, daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+            self._thread = None
+
+    def results_for(self, form: MultipartForm) -> List[dict]:
+        """Build the result dictionaries for a validated form.
+
+        Args:
+            form: The decoded request form
+
+        Returns:
+            One crawl result for the crawler model, leaving out the unchanged
+            known pages of an incremental crawl, otherwise one result per file
+        """
+        if self.results_factory is not None:
+            return self.results_factory(form)
+
+        if form.get("model") == "crawler":
+            pages = self.crawl_pages
+            max_executions = form.get("max_executions")
+            if max_executions is not None:
+                pages = max(1, min(pages, int(max_executions)))
+            result = payloads.crawl_result(form.get("url"), pages, self.chars)
+            known_urls = form.get("known_urls")
+            if known_urls is not None:
+                result = _omit_unchanged(result, known_urls)
+            return [result]
+
+        results = []
+        for file in form.files:
+            checksum = hashlib.sha256(file.contents).hexdigest()
+            if file.filename.endswith(".pdf") or file.contents.startswith(b"%PDF"):
+                results.append(
+                    payloads.pdf_result(
+                        file.filename, self.pdf_pages, self.chars, checksum
+                    )
+                )
+            else:
+                results.append(
+                    payloads.text_result(file.filename, self.chars, checksum)
+                )
+        return results
+
+    def _validate(
+        self, method: str, target: str, headers: Dict[str, str], body: bytes
+    ) -> MultipartForm:
+        if urlsplit(target).path != "/parse/v1":
+            raise _HttpError(404, f"No route for {target}")
+        if method != "POST":
+            raise _HttpError(405, f"Method {method} not allowed")
+
+        authorization = headers.get("authorization", "")
+        if not authorization.startswith("Bearer ") or (
+            self.api_key is not None and authorization[7:] != self.api_key
+        ):
+            raise _HttpError(401, "Invalid or missing API key")
+
+        content_type = headers.get("content-type", "")
+        boundary = None
+        for param in content_type.split(";")[1:]:
+            key, _, value = param.strip().partition("=")
+            if key == "boundary":
+                boundary = value.strip('"')
+        if not content_type.startswith("multipart/form-data") or not boundary:
+            raise _HttpError(400, "Expected a multipart/form-data body")
+
+        try:
+            form = parse_multipart(body, boundary)
+        except ValueError as e:
+            raise _HttpError(400, str(e))
+
+        if form.get("format", "json") not in FORMATS:
+            raise _HttpError(400, f"Invalid format: {form.get('format')}")
+        if form.get("model", "text") not in MODELS:
+            raise _HttpError(400, f"Invalid model: {form.get('model')}")
+        if form.get("model") == "crawler":
+            if not form.get("url"):
+                raise _HttpError(400, "The crawler model requires a url")
+        elif not form.files:
+            raise _HttpError(400, "No files uploaded")
+
+        return form
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.stats.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+
+                method, target, version = request_line.decode("latin-1").split()
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                if "content-length" not in headers:
+                    await self._send(writer, 411, {"error": "Content-Length required"})
+                    break
+
+                body = await reader.readexactly(int(headers["content-length"]))
+                if not await self._serve(writer, method, target, headers, body):
+                    break
+                if version != "HTTP/1.1" or headers.get("connection") == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # The loop is shutting down mid-request, e.g. behind a straggler
+            pass
+        finally:
+            writer.close()
+
+    async def _serve(
+        self,
+        writer: asyncio.StreamWriter,
+        method: str,
+        target: str,
+        headers: Dict[str, str],
+        body: bytes,
+    ) -> bool:
+        """Answer one request, returning False if the connection was dropped."""
+        self._begin(body)
+        try:
+            response = await self._respond(method, target, headers, body)
+            if response == _RESET:
+                self._reset(writer)
+                return False
+            if response == _GOAWAY:
+                return False
+
+            await self._send(writer, *response)
+            return True
+        finally:
+            self.stats.in_flight -= 1
+
+    def _begin(self, body: bytes) -> None:
+        stats = self.stats
+        stats.requests += 1
+        stats.bytes_received += len(body)
+        stats.in_flight += 1
+        stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+
+    async def _respond(
+        self, method: str, target: str, headers: Dict[str, str], body: bytes
+    ) -> Union[_Response, str]:
+        """Apply the faults and build the response, or return how to drop the request."""
+        stats = self.stats
+        faults = self.faults
+        delay = faults.latency + self._random.uniform(0, faults.latency_jitter)
+        if faults.straggler_rate and self._random.random() < faults.straggler_rate:
+            stats.stragglers += 1
+            delay += faults.straggler_latency
+        if delay:
+            await asyncio.sleep(delay)
+
+        if self._random.random() < faults.reset_rate:
+            stats.resets += 1
+            return _RESET
+
+        if faults.goaway_rate and self._random.random() < faults.goaway_rate:
+            stats.goaways += 1
+            return _GOAWAY
+
+        if self._random.random() < faults.rate_limit_rate:
+            return (
+                429,
+                {"error": "Rate limit exceeded"},
+                {"Retry-After": str(faults.retry_after)},
+                False,
+            )
+
+        if self._random.random() < faults.server_error_rate:
+            status = self._random.choice(faults.server_error_statuses)
+            return status, {"error": _REASONS.get(status, "")}, {}, False
+
+        try:
+            form = self._validate(method, target, headers, body)
+        except _HttpError as e:
+            return e.status, {"error": str(e)}, {}, False
+
+        results = self.results_for(form)
+        if form.get("format", "json") == "json":
+            payload = json.dumps(results).encode("utf-8")
+            content_type = "application/json"
+        else:
+            payload = "\n\n".join(result["markdown"] for result in results).encode(
+                "utf-8"
+            )
+            content_type = f"text/{form.get('format')}; charset=utf-8"
+
+        drip = self._random.random() < faults.slow_drip_rate
+        if drip:
+            stats.slow_drips += 1
+        return 200, payload, {"Content-Type": content_type}, drip
+
+    def _encode(
+        self, status: int, payload: object, headers: Dict[str, str]
+    ) -> Tuple[bytes, Dict[str, str]]:
+        """Serialize a payload and count the status being sent."""
+        if not isinstance(payload, bytes):
+            payload = json.dumps(payload).encode("utf-8")
+            headers = {"Content-Type": "application/json", **headers}
+
+        self.stats.statuses[status] = self.stats.statuses.get(status, 0) + 1
+        return payload, headers
+
+    async def _send(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: object,
+        headers: Optional[Dict[str, str]] = None,
+        drip: bool = False,
+    ) -> None:
+        payload, headers = self._encode(status, payload, headers or {})
+        head = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"]
+        head += [f"{name}: {value}" for name, value in headers.items()]
+        head.append(f"Content-Length: {len(payload)}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+
+        if not drip:
+            writer.write(payload)
+            await writer.drain()
+            return
+
+        chunk_size = max(1, self.faults.drip_chunk_size)
+        for start in range(0, len(payload), chunk_size):
+            writer.write(payload[start : start + chunk_size])
+            await writer.drain()
+            await asyncio.sleep(self.faults.drip_interval)
+
+    async def _handle_h2(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve an h2c connection, answering each stream concurrently."""
+        import h2.config
+        import h2.connection
+        import h2.events
+        import h2.exceptions
+        import h2.settings
+
+        conn = h2.connection.H2Connection(
+            h2.config.H2Configuration(client_side=False, header_encoding=None)
+        )
+        self.stats.connections += 1
+        conn.initiate_connection()
+        if self.max_streams is not None:
+            conn.update_settings(
+                {h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: self.max_streams}
+            )
+        writer.write(conn.data_to_send())
+
+        requests: Dict[int, Tuple[Dict[str, str], bytearray]] = {}
+        window_open = asyncio.Event()
+        tasks: Set["asyncio.Task"] = set()
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+
+                for event in conn.receive_data(data):
+                    if isinstance(event, h2.events.RequestReceived):
+                        headers = {
+                            name.decode("latin-1").lower(): value.decode("latin-1")
+                            for name, value in event.headers
+                        }
+                        requests[event.stream_id] = (headers, bytearray())
+                    elif isinstance(event, h2.events.DataReceived):
+                        conn.acknowledge_received_data(
+                            event.flow_controlled_length, event.stream_id
+                        )
+                        if event.stream_id in requests:
+                            requests[event.stream_id][1].extend(event.data)
+                    elif isinstance(event, h2.events.StreamEnded):
+                        headers, body = requests.pop(event.stream_id)
+                        task = asyncio.ensure_future(
+                            self._serve_h2(
+                                conn,
+                                writer,
+                                window_open,
+                                event.stream_id,
+                                headers,
+                                bytes(body),
+                            )
+                        )
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+                    elif isinstance(event, h2.events.StreamReset):
+                        requests.pop(event.stream_id, None)
+                        self.stats.cancelled_streams += 1
+                    elif isinstance(
+                        event,
+                        (h2.events.WindowUpdated, h2.events.RemoteSettingsChanged),
+                    ):
+                        window_open.set()
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        return
+
+                writer.write(conn.data_to_send())
+        except (ConnectionError, h2.exceptions.ProtocolError, asyncio.CancelledError):
+            # The client went away or broke the protocol
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def _serve_h2(
+        self,
+        conn: "h2.connection.H2Connection",
+        writer: asyncio.StreamWriter,
+        window_open: asyncio.Event,
+        stream_id: int,
+        headers: Dict[str, str],
+        body: bytes,
+    ) -> None:
+        import h2.errors
+        import h2.exceptions
+
+        from ..http2 import send_data
+
+        self._begin(body)
+        try:
+            response = await self._respond(
+                headers.get(":method", ""), headers.get(":path", ""), headers, body
+            )
+            if response == _RESET:
+                conn.reset_stream(stream_id, h2.errors.ErrorCodes.INTERNAL_ERROR)
+                writer.write(conn.data_to_send())
+                return
+            if response == _GOAWAY:
+                conn.close_connection(h2.errors.ErrorCodes.INTERNAL_ERROR)
+                writer.write(conn.data_to_send())
+                return
+
+            status, payload, extra, drip = response
+            payload, extra = self._encode(status, payload, extra)
+            conn.send_headers(
+                stream_id,
+                [(":status", str(status))]
+                + [(name.lower(), value) for name, value in extra.items()]
+                + [("content-length", str(len(payload)))],
+            )
+            writer.write(conn.data_to_send())
+            await send_data(
+                conn,
+                writer,
+                window_open,
+                stream_id,
+                payload,
+                self.faults.drip_chunk_size if drip else None,
+                self.faults.drip_interval if drip else 0.0,
+            )
+        except (h2.exceptions.StreamClosedError, ConnectionError):
+            # The client cancelled the stream or went away
+            pass
+        finally:
+            self.stats.in_flight -= 1
+
+    @staticmethod
+    def _reset(writer: asyncio.StreamWriter) -> None:
+        """Abort the connection with a TCP reset instead of an orderly close."""
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            try:
+                sock.setsockopt(
+                    socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0)
+                )
+            except OSError:
+                pass
+        writer.transport.abort()
@@ -1,5 +1,12 @@
-from .main import UploadedFile, validate_and_parse
+from .main import UploadedFile, load_inputs, resolve_options, validate_and_parse
 from .option import validate_option
 from .path import validate_path
 
-__all__ = ["validate_and_parse", "UploadedFile", "validate_option", "validate_path"]
+__all__ = [
+    "validate_and_parse",
+    "UploadedFile",
+    "load_inputs",
+    "resolve_options",
+    "validate_option",
+    "validate_path",
+]
@@ -2,11 +2,12 @@
 Option validation and parsing module
 """
 
-import fcntl
 import os
 from contextlib import contextmanager
+from dataclasses import replace
+from functools import lru_cache
 from pathlib import Path
-from typing import Generator, List, Union
+from typing import Any, Generator, List, Optional, Tuple, Union
 
 from anyparser_core.options import AnyparserOption, UploadedFile
 from anyparser_core.validator.url import validate_url
@@ -30,6 +31,8 @@ def file_lock(file_path: Union[str, Path]) -> Generator:
         IOError: If file is locked by another process
         FileNotFoundError: If file does not exist
     """
+    import fcntl
+
     if isinstance(file_path, Path):
         file_path = str(file_path)
 
@@ -46,51 +49,125 @@ def file_lock(file_path: Union[str, Path]) -> Generator:
             fcntl.flock(f.fileno(), fcntl.LOCK_UN)
 
 
-async def validate_and_parse(
-    file_paths: Union[str, List[str]], options: Union[AnyparserOption, None] = None
+def _build_parsed_option(options: Optional[AnyparserOption]) -> AnyparserParsedOption:
+    """Merge options with defaults, validate them, and build the parsed option."""
+    parsed = build_options(options)
+    validate_option(parsed)
+
+    return AnyparserParsedOption(
+        api_url=parsed["api_url"],
+        api_key=parsed["api_key"],
+        format=parsed.get("format", "json"),
+        model=parsed.get("model", "text"),
+        image=parsed.get("image", True),
+        table=parsed.get("table", True),
+        ocr_language=parsed.get("ocr_language"),
+        ocr_preset=parsed.get("ocr_preset"),
+        url=parsed.get("url"),
+        max_depth=parsed.get("max_depth"),
+        max_executions=parsed.get("max_executions"),
+        strategy=parsed.get("strategy"),
+        traversal_scope=parsed.get("traversal_scope"),
+    )
+
+
+@lru_cache(maxsize=128)
+def _prevalidated_option(
+    option_items: Optional[Tuple[Tuple[str, Any], ...]],
+    env_api_url: Optional[str],
+    env_api_key: Optional[str],
 ) -> AnyparserParsedOption:
+    """Build a validated option template, memoized on the options and environment.
+
+    The environment values are only part of the cache key; build_options
+    reads them itself.
     """
-    Validates options and processes input files
+    options = (
+        None
+        if option_items is None
+        else AnyparserOption(
+            **{
+                name: list(value) if isinstance(value, tuple) else value
+                for name, value in option_items
+            }
+        )
+    )
+    return _build_parsed_option(options)
+
+
+def resolve_options(options: Optional[AnyparserOption] = None) -> AnyparserParsedOption:
+    """
+    Resolves and validates options, reusing the result for repeated identical options
+
+    Validation results are cached on the option values and the API environment
+    variables, so repeated calls with the same options skip re-validation.
 
     Args:
-        file_paths: Files to process
         options: Parser options
 
     Returns:
-        Processed options and files
+        A fresh copy of the validated options, without files
+
+    Raises:
+        ValueError: If the options are invalid
     """
+    option_items = (
+        None
+        if options is None
+        else tuple(
+            (name, tuple(value) if isinstance(value, list) else value)
+            for name, value in vars(options).items()
+        )
+    )
 
-    parsed = build_options(options)
-    validate_option(parsed)
+    try:
+        hash(option_items)
+    except TypeError:
+        # Unhashable option values cannot be cached
+        return _build_parsed_option(options)
+
+    template = _prevalidated_option(
+        option_items,
+        os.getenv("ANYPARSER_API_URL"),
+        os.getenv("ANYPARSER_API_KEY"),
+    )
+    # The template is shared by every caller, so copy its only mutable field
+    return replace(
+        template,
+        ocr_language=(
+            list(template.ocr_language) if template.ocr_language is not None else None
+        ),
+    )
+
+
+async def load_inputs(
+    file_paths: Union[str, List[str]], parsed: AnyparserParsedOption
+) -> AnyparserParsedOption:
+    """
+    Validates input paths or the start URL and attaches them to validated options
 
+    Args:
+        file_paths: Files to process, or the start URL for the crawler model
+        parsed: Validated options, which are left unchanged
+
+    Returns:
+        A copy of the options with the files or URL filled in
+    """
     result = (
         await validate_url(file_paths)
-        if options is not None and options.model == "crawler"
+        if parsed.model == "crawler"
         else await validate_path(file_paths)
     )
 
     if not result.valid:
         raise result.error
 
-    parsedOption = AnyparserParsedOption(
-        api_url=parsed["api_url"],
-        api_key=parsed["api_key"],
-        format=parsed.get("format", "json"),
-        model=parsed.get("model", "text"),
-        image=parsed.get("image", True),
-        table=parsed.get("table", True),
-        ocr_language=parsed.get("ocr_language"),
-        ocr_preset=parsed.get("ocr_preset"),
-        url=parsed.get("url"),
-        max_depth=parsed.get("max_depth"),
-        max_executions=parsed.get("max_executions"),
-        strategy=parsed.get("strategy"),
-        traversal_scope=parsed.get("traversal_scope"),
-    )
+    from ..sniff import sniff_file
 
+    parsedOption = replace(parsed)
     processed = []
 
-    if options is not None and options.model == "crawler":
+    if parsed.model == "crawler":
         url = result.files[0]
         parsedOption.url = url
     else:
@@ -98,9 +175,14 @@ async def validate_and_parse(
             path = Path(file_path)
             try:
                 with file_lock(path) as f:
+                    content_type = sniff_file(f, path.name)
                     contents = f.read()
                     processed.append(
-                        UploadedFile(filename=path.name, contents=contents)
+                        UploadedFile(
+                            filename=path.name,
+                            contents=contents,
+                            content_type=content_type,
+                        )
                     )
             except BlockingIOError:
                 raise IOError(f"File {path} is locked by another process")
@@ -110,3 +192,19 @@ async def validate_and_parse(
         parsedOption.files = processed
 
     return parsedOption
+
+
+async def validate_and_parse(
+    file_paths: Union[str, List[str]], options: Union[AnyparserOption, None] = None
+) -> AnyparserParsedOption:
+    """
+    Validates options and processes input files
+
+    Args:
+        file_paths: Files to process
+        options: Parser options
+
+    Returns:
+        Processed options and files
+    """
+    return await load_inputs(file_paths, resolve_options(options))
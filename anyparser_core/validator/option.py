@@ -2,7 +2,6 @@
 Validation module for options
 """
 
-from ..config.hardcoded import OCR_LANGUAGES, OCR_PRESETS
 from ..options import AnyparserParsedOption
 
 
@@ -13,14 +12,16 @@ def validate_option(parsed: AnyparserParsedOption) -> None:
     Raises:
         ValueError: If validation fails
     """
+    from ..config.hardcoded import OCR_LANGUAGE_SET, OCR_PRESET_SET
+
     if not parsed.get("api_url"):
         raise ValueError("API URL is required")
 
     if ocr_language := parsed.get("ocr_language"):
         for language in ocr_language:
-            if language.value not in OCR_LANGUAGES:
+            if language.value not in OCR_LANGUAGE_SET:
                 raise ValueError(f'Invalid OCR language: "{language.value}"')
 
     if ocr_preset := parsed.get("ocr_preset"):
-        if ocr_preset.value not in OCR_PRESETS:
+        if ocr_preset.value not in OCR_PRESET_SET:
             raise ValueError(f'Invalid OCR preset: "{ocr_preset.value}"')
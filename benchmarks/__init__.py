@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for the Anyparser SDK.
+
+Run ``python -m benchmarks`` from the repository root. See ``benchmarks/README.md``.
+"""
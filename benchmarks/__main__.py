@@ -0,0 +1,86 @@
+"""
+Run the benchmarks and compare them against stored baselines.
+
+Usage:
+    python -m benchmarks [--quick] [--check] [--update-baseline] [--threshold 0.25] [NAME ...]
+"""
+
+import argparse
+import sys
+from typing import List, Optional
+
+from .bench import (
+    BASELINE_PATH,
+    BENCHMARKS,
+    DEFAULT_THRESHOLD,
+    compare,
+    format_row,
+    load_baselines,
+    run,
+    save_baselines,
+)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmarks and return the process exit code.
+
+    Args:
+        argv: Command-line arguments, defaulting to ``sys.argv[1:]``
+
+    Returns:
+        1 if --check is set and any metric regressed, otherwise 0
+    """
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description=__doc__.strip().splitlines()[0]
+    )
+    arg_parser.add_argument(
+        "names",
+        nargs="*",
+        metavar="NAME",
+        help=f"Benchmarks to run: {', '.join(BENCHMARKS)} (default: all)",
+    )
+    arg_parser.add_argument(
+        "--quick", action="store_true", help="Use fewer iterations for a smoke run"
+    )
+    arg_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit with status 1 if any metric regressed beyond the threshold",
+    )
+    arg_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Allowed relative regression (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help=f"Store the results as the new baselines in {BASELINE_PATH}",
+    )
+    args = arg_parser.parse_args(argv)
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        arg_parser.error(f"unknown benchmark: {', '.join(unknown)}")
+
+    baselines = load_baselines()
+    results = run(args.names, quick=args.quick)
+
+    for name, measurement in results.items():
+        print(format_row(name, measurement, baselines.get(name)))
+
+    if args.update_baseline:
+        save_baselines(results)
+        print(f"Baselines written to {BASELINE_PATH}")
+        return 0
+
+    regressions = compare(results, baselines, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+"""
+Benchmark definitions and the runner comparing results against stored baselines.
+
+Each benchmark returns a mapping of metric names to ``Measurement`` values.
+Metrics ending in ``_per_s`` are throughputs (higher is better); every other
+metric is a cost in milliseconds or megabytes (lower is better).
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+
+from anyparser_core import Anyparser, AnyparserOption
+from anyparser_core.form import build_form
+from anyparser_core.metrics import HdrHistogram
+from anyparser_core.options import AnyparserParsedOption, UploadedFile
+from anyparser_core.parser import _decode_json
+from anyparser_core.testing import FakeAnyparserServer, FaultProfile
+from anyparser_core.testing import payloads
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+DEFAULT_THRESHOLD = 0.25
+
+
+@dataclass
+class Measurement:
+    """A single benchmark metric."""
+
+    value: float
+    unit: str
+
+    @property
+    def higher_is_better(self) -> bool:
+        return self.unit.endswith("/s")
+
+
+def _best_of(fn: Callable[[], None], repeat: int, number: int) -> float:
+    """Return the fastest mean seconds per call across repeats."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - started) / number)
+    return min(timings)
+
+
+def bench_build_form(quick: bool) -> Dict[str, Measurement]:
+    """Throughput of multipart encoding for small and large uploads."""
+    parsed = AnyparserParsedOption(
+        api_url="http://127.0.0.1", api_key="bench", format="json", model="text"
+    )
+    results = {}
+    for label, size, count in [("small", 4 << 10, 1), ("large", 8 << 20, 4)]:
+        parsed.files = [
+            UploadedFile(filename=f"file-{index}.txt", contents=os.urandom(size))
+            for index in range(count)
+        ]
+        number = 20 if label == "large" else 2000
+        if quick:
+            number //= 10
+
+        seconds = _best_of(lambda: build_form(parsed, "benchboundary"), 3, number)
+        results[f"build_form_{label}_per_s"] = Measurement(1 / seconds, "ops/s")
+        results[f"build_form_{label}_mb_per_s"] = Measurement(
+            size * count / seconds / 1e6, "MB/s"
+        )
+
+    return results
+
+
+def bench_decode(quick: bool) -> Dict[str, Measurement]:
+    """Cost of decoding large PDF and crawler responses into dataclasses."""
+    pdf = json.dumps(
+        [payloads.pdf_result("report.pdf", pages=500, chars_per_page=2_000)]
+    ).encode("utf-8")
+    crawl = json.dumps(
+        [
+            payloads.crawl_result(
+                "https://example.com", pages=2_000, chars_per_page=2_000
+            )
+        ]
+    ).encode("utf-8")
+    number = 2 if quick else 10
+
+    results = {}
+    for label, body, model in [("pdf", pdf, "ocr"), ("crawler", crawl, "crawler")]:
+        seconds = _best_of(
+            lambda: _decode_json(json.loads(body.decode("utf-8")), model), 3, number
+        )
+        results[f"decode_{label}_ms"] = Measurement(seconds * 1e3, "ms")
+
+    return results
+
+
+async def _parse_latency(
+    server: FakeAnyparserServer, paths: List[str], requests: int
+) -> HdrHistogram:
+    parser = Anyparser(
+        AnyparserOption(api_url=server.url, api_key="bench", format="json")
+    )
+    histogram = HdrHistogram()
+    for index in range(requests):
+        started = time.perf_counter()
+        await parser.parse(paths[index % len(paths)])
+        histogram.record(time.perf_counter() - started)
+    return histogram
+
+
+async def _parse_throughput(
+    server: FakeAnyparserServer, paths: List[str], requests: int, concurrency: int
+) -> float:
+    parser = Anyparser(
+        AnyparserOption(api_url=server.url, api_key="bench", format="json")
+    )
+    inputs = (paths[index % len(paths)] for index in range(requests))
+    started = time.perf_counter()
+    async for _, result in parser.parse_iter(inputs, concurrency=concurrency):
+        assert result
+    return requests / (time.perf_counter() - started)
+
+
+def bench_parse(quick: bool) -> Dict[str, Measurement]:
+    """End-to-end parse latency and throughput against the local server."""
+    # Option defaults are validated before per-call options are applied, so a
+    # key must be in the environment; patch it only for this benchmark
+    with patch.dict(
+        os.environ,
+        {"ANYPARSER_API_KEY": os.environ.get("ANYPARSER_API_KEY") or "bench"},
+    ):
+        return _bench_parse(quick)
+
+
+def _bench_parse(quick: bool) -> Dict[str, Measurement]:
+    results = {}
+    requests = 50 if quick else 300
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for index in range(8):
+            path = os.path.join(directory, f"doc-{index}.txt")
+            with open(path, "wb") as f:
+                f.write(os.urandom(16 << 10))
+            paths.append(path)
+
+        with FakeAnyparserServer() as server:
+            histogram = asyncio.run(_parse_latency(server, paths, requests))
+            results["parse_p50_ms"] = Measurement(histogram.percentile(0.5) * 1e3, "ms")
+            results["parse_p99_ms"] = Measurement(
+                histogram.percentile(0.99) * 1e3, "ms"
+            )
+
+        # A fixed server delay makes throughput a measure of client-side concurrency
+        with FakeAnyparserServer(faults=FaultProfile(latency=0.02)) as server:
+            for concurrency in [1, 4, 16]:
+                throughput = asyncio.run(
+                    _parse_throughput(
+                        server, paths, max(requests // 2, concurrency * 4), concurrency
+                    )
+                )
+                results[f"parse_concurrency_{concurrency}_per_s"] = Measurement(
+                    throughput, "req/s"
+                )
+
+    return results
+
+
+def rss_probe(kind: str) -> None:
+    """Decode a large payload and print the process peak RSS in bytes.
+
+    Runs in a child process so the measurement is isolated from the runner.
+    """
+    if kind == "crawler":
+        body = json.dumps(
+            [payloads.crawl_result("https://example.com", 5_000, 2_000)]
+        ).encode("utf-8")
+        results = _decode_json(json.loads(body.decode("utf-8")), "crawler")
+    else:
+        body = json.dumps([payloads.pdf_result("report.pdf", 2_000, 2_000)]).encode(
+            "utf-8"
+        )
+        results = _decode_json(json.loads(body.decode("utf-8")), "ocr")
+
+    assert results
+    print(_peak_rss())
+
+
+def _peak_rss() -> int:
+    """Return the peak resident set size of this process in bytes."""
+    import resource
+
+    # ru_maxrss survives exec on Linux, so a child would report the runner's
+    # peak; the high-water mark in /proc is reset when the process image is
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def bench_peak_rss(quick: bool) -> Dict[str, Measurement]:
+    """Peak resident memory of a process decoding a large response."""
+    results = {}
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for kind in ["pdf", "crawler"]:
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                f"from benchmarks.bench import rss_probe; rss_probe({kind!r})",
+            ],
+            cwd=root,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results[f"peak_rss_decode_{kind}_mb"] = Measurement(int(output) / 2**20, "MB")
+
+    return results
+
+
+BENCHMARKS: Dict[str, Callable[[bool], Dict[str, Measurement]]] = {
+    "build_form": bench_build_form,
+    "decode": bench_decode,
+    "parse": bench_parse,
+    "peak_rss": bench_peak_rss,
+}
+
+
+def run(
+    names: Optional[List[str]] = None, quick: bool = False
+) -> Dict[str, Measurement]:
+    """Run benchmarks by name, or all of them.
+
+    Args:
+        names: Benchmarks to run, all if omitted
+        quick: Use fewer iterations for a fast smoke run
+
+    Returns:
+        Measurements by metric name
+    """
+    results: Dict[str, Measurement] = {}
+    for name in names or list(BENCHMARKS):
+        results.update(BENCHMARKS[name](quick))
+    return results
+
+
+def load_baselines(path: str = BASELINE_PATH) -> Dict[str, float]:
+    """Load stored baseline values by metric name."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["metrics"]
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(results: Dict[str, Measurement], path: str = BASELINE_PATH) -> None:
+    """Store measurements as the new baselines, keeping metrics not re-run."""
+    metrics = load_baselines(path)
+    metrics.update({name: round(m.value, 3) for name, m in results.items()})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "python": sys.version.split()[0],
+                "platform": sys.platform,
+                "metrics": dict(sorted(metrics.items())),
+            },
+            f,
+            indent=2,
+        )
+        f.write("\n")
+
+
+def compare(
+    results: Dict[str, Measurement],
+    baselines: Dict[str, float],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[str]:
+    """Return a description of every metric that regressed beyond the threshold.
+
+    Args:
+        results: Fresh measurements
+        baselines: Stored baseline values
+        threshold: Allowed relative change in the bad direction, e.g. 0.25 for 25%
+
+    Returns:
+        One message per regressed metric
+    """
+    regressions = []
+    for name, measurement in results.items():
+        baseline = baselines.get(name)
+        if not baseline:
+            continue
+
+        change = (measurement.value - baseline) / baseline
+        if measurement.higher_is_better:
+            change = -change
+        if change > threshold:
+            regressions.append(
+                f"{name}: {measurement.value:.3f} {measurement.unit} vs baseline "
+                f"{baseline:.3f} ({change:+.0%} worse)"
+            )
+
+    return regressions
+
+
+def format_row(name: str, measurement: Measurement, baseline: Optional[float]) -> str:
+    """Format one result row, with the relative change when a baseline exists."""
+    line = f"{name:<36} {measurement.value:>12.3f} {measurement.unit:<6}"
+    if baseline:
+        line += f" {measurement.value / baseline - 1:+8.1%}"
+    return line
@@ -0,0 +1,139 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+import http.client
+
+from anyparser_core import Anyparser, AnyparserOption
+from anyparser_core.balancer import EndpointPool
+from anyparser_core.metrics import MetricsRegistry
+from anyparser_core.testing import FakeAnyparserServer, FaultProfile
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("ANYPARSER_API_KEY", "test-key")
+
+
+@pytest.fixture
+def text_file(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("hello")
+    return str(path)
+
+
+def make_parser(servers, **kwargs):
+    return Anyparser(
+        AnyparserOption(api_url=servers[0].url, api_key="test-key"),
+        endpoints=[server.url for server in servers],
+        metrics=MetricsRegistry(),
+        **kwargs,
+    )
+
+
+def test_pool_prefers_least_outstanding():
+    """Test the endpoint with the fewest requests in flight is chosen"""
+    pool = EndpointPool(["http://127.0.0.1:1", "http://127.0.0.1:2"])
+    first, second = pool.endpoints
+
+    pool.acquire(first)
+    assert pool.choose() is second
+
+    pool.acquire(second)
+    pool.acquire(second)
+    assert pool.choose() is first
+    assert pool.choose(exclude=[first]) is second
+
+
+def test_pool_ewma_avoids_slow_endpoint():
+    """Test the EWMA strategy routes around an endpoint that got slow"""
+    pool = EndpointPool(["http://127.0.0.1:1", "http://127.0.0.1:2"], "ewma")
+    fast, slow = pool.endpoints
+
+    for state, latency in ((fast, 0.01), (slow, 0.5)):
+        pool.acquire(state)
+        pool.release(state, latency, True)
+
+    assert pool.choose() is fast
+    assert pool.snapshot()[1]["ewma_ms"] == pytest.approx(500)
+
+
+def test_pool_ejects_failing_endpoint():
+    """Test consecutive failures eject an endpoint until every other is excluded"""
+    pool = EndpointPool(
+        ["http://127.0.0.1:1", "http://127.0.0.1:2"], failure_threshold=2
+    )
+    bad, good = pool.endpoints
+
+    for _ in range(2):
+        pool.acquire(bad)
+        pool.release(bad, 0.01, False)
+
+    assert [entry["healthy"] for entry in pool.snapshot()] == [False, True]
+    assert all(pool.choose() is good for _ in range(10))
+    assert pool.choose(exclude=[good]) is bad
+
+
+def test_pool_rejects_bad_configuration():
+    """Test an empty endpoint list and unknown strategies are rejected"""
+    with pytest.raises(ValueError):
+        EndpointPool([])
+    with pytest.raises(ValueError):
+        EndpointPool(["http://127.0.0.1:1"], "random")
+    with pytest.raises(ValueError):
+        Anyparser(max_retries=-1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "faults",
+    [
+        FaultProfile(reset_rate=1.0),
+        FaultProfile(server_error_rate=1.0, server_error_statuses=(503,)),
+    ],
+)
+async def test_parse_fails_over_to_healthy_endpoint(text_file, faults):
+    """Test connection resets and retryable statuses are retried on another endpoint"""
+    async with FakeAnyparserServer(faults=faults) as bad:
+        async with FakeAnyparserServer() as good:
+            parser = make_parser([bad, good])
+            results = await asyncio.gather(*[parser.parse(text_file) for _ in range(6)])
+
+    assert all(result[0].original_filename == "notes.txt" for result in results)
+    assert good.stats.statuses == {200: 6}
+    assert parser.metrics.retries.value(model="text") == bad.stats.requests
+
+    endpoints = {entry["url"]: entry for entry in parser.stats()["endpoints"]}
+    assert endpoints[bad.url]["failures"] == bad.stats.requests
+    assert endpoints[good.url]["outstanding"] == 0
+
+
+@pytest.mark.asyncio
+async def test_parse_gives_up_after_max_retries(text_file):
+    """Test the last failure is raised once the retries are spent"""
+    faults = FaultProfile(server_error_rate=1.0, server_error_statuses=(502,))
+    async with FakeAnyparserServer(faults=faults) as first:
+        async with FakeAnyparserServer(faults=faults) as second:
+            parser = make_parser([first, second], max_retries=3)
+            with pytest.raises(http.client.HTTPException, match="HTTP 502"):
+                await parser.parse(text_file)
+
+    assert first.stats.requests == 2
+    assert second.stats.requests == 2
+
+
+@pytest.mark.asyncio
+async def test_parse_does_not_retry_client_errors(text_file):
+    """Test a 401 is raised at once instead of being resent"""
+    async with FakeAnyparserServer(api_key="other-key") as first:
+        async with FakeAnyparserServer(api_key="other-key") as second:
+            parser = make_parser([first, second])
+            with pytest.raises(http.client.HTTPException, match="HTTP 401"):
+                await parser.parse(text_file)
+
+    assert first.stats.requests + second.stats.requests == 1
+    assert parser.stats()["endpoints"][0]["failures"] == 0
@@ -0,0 +1,193 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import http.client
+from unittest.mock import Mock, patch
+
+from anyparser_core import Anyparser, AnyparserOption, BreakerPolicy, CircuitOpenError
+from anyparser_core import breaker as breaker_module
+from anyparser_core.breaker import CircuitBreaker
+from anyparser_core.metrics import MetricsRegistry
+from anyparser_core.testing import FakeAnyparserServer, FaultProfile
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("ANYPARSER_API_KEY", "test-key")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(breaker_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def text_file(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("hello")
+    return str(path)
+
+
+def call(breaker, success, duration=0.01):
+    breaker.release(breaker.acquire(), success, duration)
+
+
+def test_breaker_opens_on_failure_rate(clock):
+    """Test the circuit opens once failures reach the rate over enough calls"""
+    breaker = CircuitBreaker(BreakerPolicy(window=10, min_calls=4, failure_rate=0.5))
+    call(breaker, False)
+    call(breaker, False)
+    call(breaker, True)
+    assert breaker.state == "closed"
+
+    call(breaker, True)
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.acquire()
+    assert excinfo.value.retry_after == pytest.approx(30.0)
+    assert breaker.snapshot()["rejections"] == 1
+
+
+def test_breaker_opens_on_slow_calls(clock):
+    """Test slow successful calls trip the breaker like failures"""
+    breaker = CircuitBreaker(
+        BreakerPolicy(min_calls=3, slow_call_duration=1.0, slow_call_rate=0.6)
+    )
+    call(breaker, True, 5.0)
+    call(breaker, True, 0.1)
+    assert breaker.state == "closed"
+    assert breaker.snapshot()["slow_call_rate"] == 0.5
+
+    call(breaker, True, 5.0)
+    assert breaker.state == "open"
+
+
+def test_breaker_window_forgets_old_calls(clock):
+    """Test only the most recent calls count towards the rates"""
+    breaker = CircuitBreaker(BreakerPolicy(window=4, min_calls=4, failure_rate=0.5))
+    call(breaker, False)
+    for _ in range(4):
+        call(breaker, True)
+    call(breaker, False)
+
+    assert breaker.state == "closed"
+    assert breaker.snapshot()["failure_rate"] == 0.25
+
+
+def test_breaker_half_open_probes(clock):
+    """Test probes close the circuit when they succeed and reopen it when one fails"""
+    policy = BreakerPolicy(min_calls=1, open_duration=10, half_open_calls=2)
+    breaker = CircuitBreaker(policy)
+    call(breaker, False)
+    assert breaker.state == "open"
+
+    clock[0] += 10
+    first = breaker.acquire()
+    second = breaker.acquire()
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+    breaker.release(first, True, 0.01)
+    breaker.release(second, False, 0.01)
+    assert breaker.state == "open"
+
+    clock[0] += 10
+    call(breaker, None)
+    call(breaker, True)
+    call(breaker, True)
+    assert breaker.state == "closed"
+
+
+def test_breaker_ignores_calls_admitted_before_a_state_change(clock):
+    """Test a call outliving the closed state is neither a probe nor a window call"""
+    policy = BreakerPolicy(min_calls=1, open_duration=10, half_open_calls=1)
+    breaker = CircuitBreaker(policy)
+    call(breaker, None)
+    assert breaker.snapshot()["calls"] == 0
+    straggler = breaker.acquire()
+    call(breaker, False)
+    assert breaker.state == "open"
+
+    clock[0] += 10
+    probe = breaker.acquire()
+    breaker.release(straggler, False, 0.01)
+    assert breaker.state == "half_open"
+
+    breaker.release(probe, True, 0.01)
+    assert breaker.state == "closed"
+    breaker.release(straggler, False, 0.01)
+    assert breaker.snapshot()["calls"] == 0
+
+
+def test_breaker_rejects_bad_policy():
+    """Test out-of-range thresholds are rejected"""
+    with pytest.raises(ValueError):
+        CircuitBreaker(BreakerPolicy(failure_rate=0))
+    with pytest.raises(ValueError):
+        CircuitBreaker(BreakerPolicy(half_open_calls=0))
+
+
+@pytest.mark.asyncio
+async def test_parse_fails_fast_when_open(text_file):
+    """Test server errors open the circuit and later calls never reach the server"""
+    faults = FaultProfile(server_error_rate=1.0, server_error_statuses=(503,))
+    async with FakeAnyparserServer(faults=faults) as server:
+        parser = Anyparser(
+            AnyparserOption(api_url=server.url, api_key="test-key"),
+            metrics=MetricsRegistry(),
+            circuit_breaker=BreakerPolicy(min_calls=3),
+        )
+        for _ in range(3):
+            with pytest.raises(http.client.HTTPException):
+                await parser.parse(text_file)
+
+        with pytest.raises(CircuitOpenError):
+            await parser.parse(text_file)
+
+    assert server.stats.requests == 3
+    assert parser.stats()["breaker"]["state"] == "open"
+    assert parser.metrics.circuit_state.value(client=parser.metrics.client) == 2
+    assert parser.metrics.circuit_rejections.value(model="text") == 1
+
+
+@pytest.mark.asyncio
+async def test_parse_client_errors_keep_circuit_closed(text_file):
+    """Test 4xx responses do not count as API degradation"""
+    async with FakeAnyparserServer(api_key="other-key") as server:
+        parser = Anyparser(
+            AnyparserOption(api_url=server.url, api_key="test-key"),
+            metrics=MetricsRegistry(),
+            circuit_breaker=BreakerPolicy(min_calls=2),
+        )
+        for _ in range(3):
+            with pytest.raises(http.client.HTTPException, match="HTTP 401"):
+                await parser.parse(text_file)
+
+    assert parser.stats()["breaker"]["state"] == "closed"
+    assert parser.stats()["breaker"]["failure_rate"] == 0
+
+
+@pytest.mark.asyncio
+async def test_parse_broken_success_response_counts_as_failure(text_file):
+    """Test a 2xx response that breaks off is not mistaken for a healthy answer"""
+    response = Mock()
+    response.status = 200
+    response.read.side_effect = http.client.IncompleteRead(b"[")
+    parser = Anyparser(
+        AnyparserOption(api_url="https://api.example.com", api_key="test-key"),
+        metrics=MetricsRegistry(),
+        circuit_breaker=BreakerPolicy(min_calls=1),
+    )
+    with patch("anyparser_core.parser.async_request", return_value=response):
+        with pytest.raises(http.client.IncompleteRead):
+            await parser.parse(text_file)
+
+    assert parser.stats()["breaker"]["state"] == "open"
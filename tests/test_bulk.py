@@ -0,0 +1,252 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import runpy
+from unittest.mock import patch
+
+from anyparser_core import Anyparser, AnyparserResultBase
+from anyparser_core.__main__ import main
+from anyparser_core.bulk import (
+    Checkpoint,
+    _JsonlWriter,
+    _truncate_torn_line,
+    load_manifest,
+    run_bulk,
+)
+from anyparser_core.options import AnyparserOption
+
+
+def make_result(path):
+    return [AnyparserResultBase(rid=path, original_filename=path, checksum="abc")]
+
+
+async def fake_parse(self, file_paths_or_url, priority="default"):
+    if "bad" in file_paths_or_url:
+        raise ValueError(f"cannot parse {file_paths_or_url}")
+    return make_result(file_paths_or_url)
+
+
+def test_load_manifest_skips_blank_and_comment_lines(tmp_path):
+    """Test manifest loading ignores blank lines and comments"""
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("a.pdf\n\n# comment\n  b.pdf  \n")
+
+    assert list(load_manifest(manifest)) == ["a.pdf", "b.pdf"]
+
+
+def test_checkpoint_persists_completed_items(tmp_path):
+    """Test checkpoint entries survive reopening"""
+    path = tmp_path / "job.ckpt"
+    checkpoint = Checkpoint(path)
+    checkpoint.mark_done(["a.pdf", "b.pdf"])
+    checkpoint.close()
+
+    reopened = Checkpoint(path)
+    assert "a.pdf" in reopened
+    assert "b.pdf" in reopened
+    assert "c.pdf" not in reopened
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_run_bulk_writes_results_and_checkpoint(tmp_path):
+    """Test a bulk run writes one JSONL record per success and checkpoints it"""
+    output = tmp_path / "out.jsonl"
+    checkpoint = tmp_path / "job.ckpt"
+
+    with patch.object(Anyparser, "parse", fake_parse):
+        summary = await run_bulk(
+            ["a.pdf", "bad.pdf", "b.pdf"],
+            output=output,
+            checkpoint=checkpoint,
+            options=AnyparserOption(),
+            concurrency=2,
+        )
+
+    assert summary.total == 3
+    assert summary.succeeded == 2
+    assert summary.failed == 1
+    assert "bad.pdf" in summary.errors
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(record["input"] for record in records) == ["a.pdf", "b.pdf"]
+    assert records[0]["result"][0]["checksum"] == "abc"
+    assert sorted(checkpoint.read_text().split()) == ["a.pdf", "b.pdf"]
+
+
+@pytest.mark.asyncio
+async def test_run_bulk_resumes_from_checkpoint(tmp_path):
+    """Test a restarted run skips completed inputs and retries failures"""
+    output = tmp_path / "out.jsonl"
+    checkpoint = tmp_path / "job.ckpt"
+    checkpoint.write_text("a.pdf\n")
+    parsed = []
+
+    async def recording_parse(self, file_paths_or_url, priority="default"):
+        parsed.append(file_paths_or_url)
+        return make_result(file_paths_or_url)
+
+    with patch.object(Anyparser, "parse", recording_parse):
+        summary = await run_bulk(
+            ["a.pdf", "bad.pdf", "b.pdf"], output=output, checkpoint=checkpoint
+        )
+
+    assert sorted(parsed) == ["b.pdf", "bad.pdf"]
+    assert summary.skipped == 1
+    assert summary.succeeded == 2
+    assert sorted(checkpoint.read_text().split()) == ["a.pdf", "b.pdf", "bad.pdf"]
+
+
+@pytest.mark.asyncio
+async def test_run_bulk_resumes_after_torn_lines(tmp_path):
+    """Test lines cut short by a crash are dropped before the run appends"""
+    output = tmp_path / "out.jsonl"
+    checkpoint = tmp_path / "job.ckpt"
+    output.write_text('{"input":"a.pdf","result":[]}\n{"input":"b.p')
+    checkpoint.write_text("a.pdf\nb.p")
+
+    with patch.object(Anyparser, "parse", fake_parse):
+        summary = await run_bulk(
+            ["a.pdf", "b.pdf"], output=output, checkpoint=checkpoint
+        )
+
+    assert summary.skipped == summary.succeeded == 1
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [record["input"] for record in records] == ["a.pdf", "b.pdf"]
+    assert checkpoint.read_text() == "a.pdf\nb.pdf\n"
+
+
+@pytest.mark.parametrize(
+    "contents, expected",
+    [
+        (b"", b""),
+        (b"no newline", b""),
+        (b"one\n", b"one\n"),
+        (b"one\n" + b"x" * 10, b"one\n"),
+        (b"one\ntwo\n" + b"x" * 10, b"one\ntwo\n"),
+    ],
+)
+def test_truncate_torn_line(tmp_path, contents, expected):
+    """Test everything after the last newline is cut, looking back block by block"""
+    path = tmp_path / "out.jsonl"
+    path.write_bytes(contents)
+    _truncate_torn_line(path, block_size=3)
+    assert path.read_bytes() == expected
+
+    _truncate_torn_line(tmp_path / "missing.jsonl")
+    assert not (tmp_path / "missing.jsonl").exists()
+
+
+@pytest.mark.asyncio
+async def test_jsonl_writer_reports_inputs_once_written(tmp_path):
+    """Test an input is reported as written only after the sink wrote its line"""
+    writer = _JsonlWriter(tmp_path / "out.jsonl")
+    await writer.write("a.pdf", [])
+    await writer._sink.flush()
+
+    assert await writer.write("b.pdf", []) == ["a.pdf"]
+    assert await writer.close() == ["b.pdf"]
+
+
+@pytest.mark.asyncio
+async def test_run_bulk_parquet_requires_pyarrow(tmp_path, monkeypatch):
+    """Test Parquet output without pyarrow explains how to install it"""
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with pytest.raises(ImportError, match="pip install pyarrow"):
+        await run_bulk(
+            [], tmp_path / "parts", tmp_path / "job.ckpt", output_format="parquet"
+        )
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_main_runs_as_module(monkeypatch, capsys):
+    """Test the package runs as a module and exits with main's status"""
+    monkeypatch.setattr(sys, "argv", ["anyparser_core", "--help"])
+    with pytest.raises(SystemExit) as exc_info:
+        runpy.run_module("anyparser_core", run_name="__main__")
+
+    assert exc_info.value.code == 0
+    assert "python -m anyparser_core" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_run_bulk_invalid_output_format(tmp_path):
+    """Test unsupported output formats are rejected"""
+    with pytest.raises(ValueError, match="Unsupported output format"):
+        await run_bulk([], tmp_path / "out", tmp_path / "job.ckpt", output_format="csv")
+
+
+def test_main_runs_manifest(tmp_path, monkeypatch, capsys):
+    """Test the module entry point runs the manifest and reports failures"""
+    monkeypatch.setenv("ANYPARSER_API_KEY", "test-key")
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("a.pdf\nbad.pdf\n")
+
+    with patch.object(Anyparser, "parse", fake_parse):
+        exit_code = main(
+            [
+                str(manifest),
+                "--output",
+                str(tmp_path / "out.jsonl"),
+                "--checkpoint",
+                str(tmp_path / "job.ckpt"),
+            ]
+        )
+
+    assert exit_code == 1
+    stderr = capsys.readouterr().err
+    assert "FAILED bad.pdf" in stderr
+    assert "succeeded=1 failed=1" in stderr
+
+
+@pytest.mark.asyncio
+async def test_run_bulk_parquet_survives_crash(tmp_path):
+    """Test every checkpointed input is readable after a crash mid-run"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    from anyparser_core.bulk import _ParquetWriter
+
+    output = tmp_path / "parts"
+    checkpoint = tmp_path / "job.ckpt"
+    inputs = [f"{name}.pdf" for name in "abcde"]
+
+    def crash(self):
+        raise KeyboardInterrupt("killed")
+
+    # The process dies before the writer is closed, leaving one row buffered
+    with (
+        patch.object(Anyparser, "parse", fake_parse),
+        patch.object(_ParquetWriter, "close", crash),
+    ):
+        with pytest.raises(KeyboardInterrupt):
+            await run_bulk(
+                inputs,
+                output=output,
+                checkpoint=checkpoint,
+                output_format="parquet",
+                row_group_size=2,
+                concurrency=1,
+            )
+
+    checkpointed = checkpoint.read_text().split()
+    assert sorted(checkpointed) == inputs[:4]
+    written = pq.read_table(str(output)).column("input").to_pylist()
+    assert sorted(written) == sorted(checkpointed)
+
+    # Resuming writes the remaining input to a new part next to the old ones
+    with patch.object(Anyparser, "parse", fake_parse):
+        summary = await run_bulk(
+            inputs,
+            output=output,
+            checkpoint=checkpoint,
+            output_format="parquet",
+            row_group_size=2,
+        )
+
+    assert summary.skipped == 4
+    assert summary.succeeded == 1
+    assert sorted(pq.read_table(str(output)).column("input").to_pylist()) == inputs
@@ -0,0 +1,219 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import math
+import time
+
+from anyparser_core import (
+    AnyparserCrawlResult,
+    AnyparserPdfPage,
+    AnyparserPdfResult,
+    AnyparserResultBase,
+    AnyparserRobotsTxtDirective,
+    AnyparserUrl,
+    Chunker,
+)
+
+DOCUMENT = """# Guide
+
+Intro paragraph.
+
+## Install
+
+Run the installer. Then restart the machine. Then log in again.
+
+```
+# not a heading
+pip install anyparser-core
+```
+
+## Limits
+
+| Plan | Pages |
+|------|-------|
+| Free | 10 |
+| Pro | 1000 |
+"""
+
+
+def test_headings_start_chunks_and_build_paths():
+    """Test each section becomes a chunk carrying its heading path"""
+    chunks = list(Chunker(max_size=500, overlap=0).split(DOCUMENT, source="doc.md"))
+
+    assert [chunk.headings for chunk in chunks] == [
+        ["Guide"],
+        ["Guide", "Install"],
+        ["Guide", "Limits"],
+    ]
+    assert chunks[0].text == "# Guide\n\nIntro paragraph."
+    assert "# not a heading\npip install" in chunks[1].text
+    assert chunks[2].text.endswith("| Pro | 1000 |")
+    assert [chunk.index for chunk in chunks] == [0, 1, 2]
+    assert all(chunk.source == "doc.md" for chunk in chunks)
+    assert all(chunk.size == len(chunk.text) for chunk in chunks)
+
+
+def test_large_blocks_split_with_overlap():
+    """Test long paragraphs split on words and consecutive chunks overlap"""
+    words = " ".join(f"w{number}" for number in range(300))
+    chunks = list(Chunker(max_size=100, overlap=20).split(words))
+
+    assert len(chunks) > 10
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.size <= 100
+        tail = chunk.text.split(" ")[0]
+        assert tail in previous.text.split(" ")
+    assert chunks[-1].text.endswith("w299")
+
+
+def test_tables_split_by_rows_with_header():
+    """Test an oversized table splits into row groups repeating its header"""
+    rows = "\n".join(f"| row{number} | {number} |" for number in range(50))
+    table = "| Name | Value |\n|---|---|\n" + rows
+    chunks = list(Chunker(max_size=120, overlap=30).split(table))
+
+    assert len(chunks) > 3
+    for chunk in chunks:
+        assert chunk.size <= 120
+        assert chunk.text.startswith("| Name | Value |\n|---|---|\n| row")
+    body = [line for chunk in chunks for line in chunk.text.split("\n")[2:]]
+    assert body == rows.split("\n")
+
+
+def test_oversized_table_rows_split_like_text():
+    """Test a row too large to fit beside the header is split on its own"""
+    header = "| Name | Value |\n|---|---|"
+    huge = "| big | " + " ".join(["cell"] * 60) + " |"
+    table = "\n".join([header, "| a | 1 |", huge, "| b | 2 |"])
+    chunks = list(Chunker(max_size=100, overlap=0).split(table))
+
+    assert all(chunk.size <= 100 for chunk in chunks)
+    assert chunks[0].text == header + "\n| a | 1 |"
+    assert chunks[-1].text.endswith("|\n\n" + header + "\n| b | 2 |")
+    assert " ".join(chunk.text for chunk in chunks[1:]).startswith(huge + "\n\n")
+
+
+def test_long_words_split_by_measured_size():
+    """Test a word longer than a chunk is cut into pieces of max_size units"""
+    tokens = lambda text: math.ceil(len(text) / 4)
+    word = "x" * 1000
+    chunks = list(Chunker(max_size=50, overlap=0, length=tokens).split(word))
+
+    assert [chunk.size for chunk in chunks] == [49, 49, 49, 49, 49, 5]
+    assert "".join(chunk.text for chunk in chunks) == word
+
+
+def test_overlap_carries_whole_blocks_and_drops_what_cannot_fit():
+    """Test short trailing blocks are carried whole unless the next block leaves no room"""
+    text = "\n\n".join(["x" * 20, "tiny", "y" * 20])
+    chunks = list(Chunker(max_size=30, overlap=12).split(text))
+    assert [chunk.text for chunk in chunks] == [
+        "x" * 20 + "\n\ntiny",
+        "tiny\n\n" + "y" * 20,
+    ]
+
+    table = "| " + "t" * 24 + " |"
+    chunks = list(Chunker(max_size=30, overlap=12).split("a b c\n\n" + table))
+    assert [chunk.text for chunk in chunks] == ["a b c", table]
+
+
+def test_token_counter_bounds_chunks():
+    """Test a custom length function bounds chunks in its own units"""
+    tokens = lambda text: len(text.split())
+    text = " ".join(["alpha"] * 95)
+    chunks = list(Chunker(max_size=10, overlap=2, length=tokens).split(text))
+
+    assert all(tokens(chunk.text) <= 10 for chunk in chunks)
+    assert chunks[1].text.split() == ["alpha"] * 10
+
+
+def test_chunking_is_linear():
+    """Test chunking ten times the text takes about ten times as long"""
+    chunker = Chunker(max_size=200, overlap=40)
+    section = "## Part\n\n" + "word " * 400 + "\n\n| a | b |\n|---|---|\n| 1 | 2 |\n\n"
+
+    def measure(copies):
+        text = section * copies
+        start = time.perf_counter()
+        count = sum(1 for _ in chunker.split(text))
+        return time.perf_counter() - start, count
+
+    measure(20)
+    small, small_count = measure(50)
+    large, large_count = measure(500)
+
+    assert large_count == 10 * small_count
+    assert large < small * 30
+
+
+@pytest.mark.asyncio
+async def test_stream_carries_page_and_url_provenance():
+    """Test PDF pages and crawled pages keep their provenance while streaming"""
+    pdf = AnyparserPdfResult(
+        rid="1",
+        original_filename="report.pdf",
+        checksum="x",
+        total_characters=10,
+        markdown="",
+        items=[
+            AnyparserPdfPage(page_number=1, markdown="First page.", text="", images=[]),
+            AnyparserPdfPage(
+                page_number=2, markdown="Second page.", text="", images=[]
+            ),
+        ],
+    )
+    page = AnyparserUrl(
+        url="https://example.com/a", status_code=200, markdown="Crawled text."
+    )
+    crawl = AnyparserCrawlResult(
+        rid="2",
+        start_url="https://example.com",
+        total_characters=10,
+        total_items=1,
+        markdown="",
+        items=[page],
+        robots_directive=AnyparserRobotsTxtDirective(),
+    )
+
+    async def results():
+        yield (["report.pdf"], [pdf])
+        yield (["broken.pdf"], ValueError("failed"))
+        yield page
+        yield crawl
+
+    chunks = [chunk async for chunk in Chunker().stream(results())]
+
+    assert [(chunk.text, chunk.page_number, chunk.url) for chunk in chunks] == [
+        ("First page.", 1, None),
+        ("Second page.", 2, None),
+        ("Crawled text.", None, "https://example.com/a"),
+        ("Crawled text.", None, "https://example.com/a"),
+    ]
+    assert chunks[0].source == "report.pdf"
+    assert chunks[3].source == "https://example.com"
+
+
+@pytest.mark.asyncio
+async def test_stream_accepts_plain_iterables():
+    """Test raw markdown and results without pages chunk from a plain iterable"""
+    result = AnyparserResultBase(
+        rid="1", original_filename="notes.docx", checksum="x", markdown="Notes."
+    )
+    chunks = [chunk async for chunk in Chunker().stream(["Raw text.", result])]
+
+    assert [(chunk.text, chunk.source) for chunk in chunks] == [
+        ("Raw text.", None),
+        ("Notes.", "notes.docx"),
+    ]
+
+
+def test_rejects_bad_sizes():
+    """Test the overlap must be smaller than the chunk size"""
+    with pytest.raises(ValueError):
+        Chunker(max_size=0)
+    with pytest.raises(ValueError):
+        Chunker(max_size=100, overlap=100)
@@ -0,0 +1,227 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import io
+import json
+import runpy
+from unittest.mock import patch
+
+from anyparser_core import Anyparser, AnyparserOption, AnyparserResultBase
+from anyparser_core.cli import ResultCache, main
+
+
+@pytest.fixture
+def api_key(monkeypatch):
+    monkeypatch.setenv("ANYPARSER_API_KEY", "test-key")
+
+
+@pytest.fixture
+def sample_files(tmp_path):
+    paths = []
+    for name in ["a.txt", "b.txt"]:
+        path = tmp_path / name
+        path.write_text(f"contents of {name}")
+        paths.append(str(path))
+    return paths
+
+
+def make_parse(calls):
+    async def fake_parse(self, file_paths_or_url, priority="default"):
+        paths = (
+            [file_paths_or_url]
+            if isinstance(file_paths_or_url, str)
+            else file_paths_or_url
+        )
+        calls.append(paths)
+        if self.options.format != "json":
+            return "\n".join(f"# {os.path.basename(path)}" for path in paths)
+        return [
+            AnyparserResultBase(
+                rid="rid", original_filename=os.path.basename(path), checksum="abc"
+            )
+            for path in paths
+        ]
+
+    return fake_parse
+
+
+def test_cli_writes_ndjson_per_result(api_key, sample_files, capsys):
+    """Test each JSON result is written as its own line"""
+    calls = []
+    with patch.object(Anyparser, "parse", make_parse(calls)):
+        exit_code = main(["--batch-size", "2", *sample_files])
+
+    assert exit_code == 0
+    assert calls == [sample_files]
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [line["original_filename"] for line in lines] == ["a.txt", "b.txt"]
+
+
+def test_cli_reads_paths_from_stdin(api_key, sample_files, capsys, monkeypatch):
+    """Test paths are read from stdin when none are given"""
+    monkeypatch.setattr(sys, "stdin", io.StringIO("\n".join(sample_files) + "\n\n"))
+    calls = []
+    with patch.object(Anyparser, "parse", make_parse(calls)):
+        exit_code = main(["--format", "markdown", "-"])
+
+    assert exit_code == 0
+    assert sorted(calls) == [[sample_files[0]], [sample_files[1]]]
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert sorted(line["content"] for line in lines) == ["# a.txt", "# b.txt"]
+
+
+def test_cli_cache_skips_unchanged_files(api_key, sample_files, tmp_path, capsys):
+    """Test cached files are emitted without a second request"""
+    cache_dir = str(tmp_path / "cache")
+    calls = []
+    with patch.object(Anyparser, "parse", make_parse(calls)):
+        main(["--cache-dir", cache_dir, *sample_files])
+        first = capsys.readouterr().out
+        main(["--cache-dir", cache_dir, *sample_files])
+        second = capsys.readouterr().out
+
+    assert len(calls) == 2
+    assert sorted(first.splitlines()) == sorted(second.splitlines())
+
+
+def test_cli_reports_failures(api_key, capsys):
+    """Test failed inputs are reported on stderr with a non-zero exit code"""
+
+    async def failing_parse(self, file_paths_or_url, priority="default"):
+        raise FileNotFoundError("File does not exist: missing.txt")
+
+    with patch.object(Anyparser, "parse", failing_parse):
+        exit_code = main(["missing.txt"])
+
+    assert exit_code == 1
+    assert "missing.txt" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "changed",
+    [
+        {"format": "markdown"},
+        {"model": "ocr"},
+        {"image": True},
+        {"table": False},
+        {"api_url": "https://eu.example.com"},
+    ],
+)
+def test_result_cache_key_depends_on_options(tmp_path, sample_files, changed):
+    """Test every option that changes the result changes the cache key"""
+    options = AnyparserOption(api_url="https://api.example.com", api_key="a")
+    cache = ResultCache(str(tmp_path), options)
+    other = ResultCache(str(tmp_path), AnyparserOption(**{**vars(options), **changed}))
+    same = ResultCache(
+        str(tmp_path), AnyparserOption(**{**vars(options), "api_key": "b"})
+    )
+
+    assert cache.key(sample_files[0]) != other.key(sample_files[0])
+    assert cache.key(sample_files[0]) == same.key(sample_files[0])
+    assert cache.get(cache.key(sample_files[0])) is None
+
+
+def test_cli_cache_keys_on_api_url(api_key, sample_files, tmp_path, monkeypatch):
+    """Test results cached from one API endpoint are not replayed for another"""
+    cache_dir = str(tmp_path / "cache")
+    calls = []
+    with patch.object(Anyparser, "parse", make_parse(calls)):
+        main(["--cache-dir", cache_dir, sample_files[0]])
+        monkeypatch.setenv("ANYPARSER_API_URL", "https://eu.example.com")
+        main(["--cache-dir", cache_dir, sample_files[0]])
+
+    assert len(calls) == 2
+
+
+def test_cli_caches_text_formats(api_key, sample_files, tmp_path, capsys):
+    """Test markdown output of single files is cached and replayed"""
+    cache_dir = str(tmp_path / "cache")
+    calls = []
+    with patch.object(Anyparser, "parse", make_parse(calls)):
+        for _ in range(2):
+            main(["--format", "markdown", "--cache-dir", cache_dir, sample_files[0]])
+
+    assert calls == [[sample_files[0]]]
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == lines[1]
+
+
+def test_cli_cache_passes_unreadable_files_to_parser(api_key, tmp_path):
+    """Test files that cannot be hashed are left to the parser to report"""
+    calls = []
+    missing = str(tmp_path / "missing.txt")
+    with patch.object(Anyparser, "parse", make_parse(calls)):
+        main(["--cache-dir", str(tmp_path / "cache"), missing])
+
+    assert calls == [[missing]]
+
+
+def test_cli_exits_quietly_on_broken_pipe(api_key, monkeypatch):
+    """Test a closed stdout ends the command and silences the final flush"""
+    redirected = []
+    monkeypatch.setattr(sys, "stdout", io.TextIOWrapper(io.BytesIO()))
+    monkeypatch.setattr(sys.stdout, "fileno", lambda: 99, raising=False)
+    monkeypatch.setattr(os, "open", lambda path, flags: 42)
+    monkeypatch.setattr(os, "dup2", lambda fd, fd2: redirected.append((fd, fd2)))
+    with patch("anyparser_core.cli._run", side_effect=BrokenPipeError):
+        assert main(["a.txt"]) == 1
+
+    assert redirected == [(42, 99)]
+
+
+def test_cli_exit_code_on_interrupt(api_key):
+    """Test Ctrl-C exits with the conventional status"""
+    with patch("anyparser_core.cli._run", side_effect=KeyboardInterrupt):
+        assert main(["a.txt"]) == 130
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_cli_runs_as_script(monkeypatch, capsys):
+    """Test the module runs as a script and exits with main's status"""
+    monkeypatch.setattr(sys, "argv", ["anyparser", "--help"])
+    with pytest.raises(SystemExit) as exc_info:
+        runpy.run_module("anyparser_core.cli", run_name="__main__")
+
+    assert exc_info.value.code == 0
+    assert "usage: anyparser" in capsys.readouterr().out
+
+
+def test_cli_cache_does_not_replay_other_paths(api_key, sample_files, tmp_path, capsys):
+    """Test a copy with identical bytes is parsed under its own name"""
+    cache_dir = str(tmp_path / "cache")
+    copy = tmp_path / "copy.txt"
+    copy.write_bytes(open(sample_files[0], "rb").read())
+    calls = []
+    with patch.object(Anyparser, "parse", make_parse(calls)):
+        main(["--cache-dir", cache_dir, sample_files[0]])
+        capsys.readouterr()
+        main(["--cache-dir", cache_dir, str(copy)])
+        output = capsys.readouterr().out
+
+    assert calls == [[sample_files[0]], [str(copy)]]
+    assert json.loads(output)["original_filename"] == "copy.txt"
+
+
+def test_cli_cache_matches_results_by_position(api_key, tmp_path, capsys):
+    """Test files sharing a basename in one batch each cache only their own result"""
+    paths = []
+    for directory in ["a", "b"]:
+        (tmp_path / directory).mkdir()
+        path = tmp_path / directory / "x.txt"
+        path.write_text(f"contents in {directory}")
+        paths.append(str(path))
+
+    cache_dir = str(tmp_path / "cache")
+    calls = []
+    with patch.object(Anyparser, "parse", make_parse(calls)):
+        main(["--cache-dir", cache_dir, "--batch-size", "2", *paths])
+        first = capsys.readouterr().out
+        main(["--cache-dir", cache_dir, "--batch-size", "2", *paths])
+        second = capsys.readouterr().out
+
+    assert len(calls) == 1
+    assert len(first.splitlines()) == len(second.splitlines()) == 2
@@ -0,0 +1,152 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from anyparser_core import (
+    AnyparserCrawlResult,
+    AnyparserImageReference,
+    AnyparserPdfPage,
+    AnyparserPdfResult,
+    AnyparserResultBase,
+    AnyparserRobotsTxtDirective,
+    AnyparserUrl,
+    ColumnarExporter,
+)
+from anyparser_core.columnar import schema
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def pdf(rid, pages):
+    return AnyparserPdfResult(
+        rid=rid,
+        original_filename=f"{rid}.pdf",
+        checksum="c" + rid,
+        markdown="",
+        items=[
+            AnyparserPdfPage(
+                page_number=number,
+                markdown=f"page {number}",
+                text=f"text {number}",
+                images=["aW1n"] if number == 1 else [],
+            )
+            for number in range(1, pages + 1)
+        ],
+    )
+
+
+def crawl():
+    page = AnyparserUrl(
+        url="https://example.com/a",
+        status_code=200,
+        status_message="OK",
+        total_characters=4,
+        markdown="body",
+        crawled_at="2024-01-01T00:00:00Z",
+        images=[
+            AnyparserImageReference(
+                base64_data="cG5n", display_name="logo.png", image_index=0
+            )
+        ],
+    )
+    return AnyparserCrawlResult(
+        rid="crawl",
+        start_url="https://example.com",
+        total_characters=4,
+        total_items=1,
+        markdown="body",
+        items=[page],
+        robots_directive=AnyparserRobotsTxtDirective(),
+    )
+
+
+def test_parquet_tables_follow_fixed_schemas(tmp_path):
+    """Test results land in the pages, crawl items and images tables"""
+    with ColumnarExporter(tmp_path, row_group_size=2) as exporter:
+        exporter.add([pdf("a", 3), AnyparserResultBase("b", "b.docx", "cb", 5, "doc")])
+        exporter.add(crawl())
+        assert exporter.rows == {"pages": 4, "crawl_items": 1, "images": 2}
+
+    pages = pq.read_table(tmp_path / "pages.parquet")
+    assert pages.schema == schema("pages")
+    assert pages.column("page_number").to_pylist() == [1, 2, 3, None]
+    assert pages.column("original_filename").to_pylist()[-1] == "b.docx"
+    assert pq.ParquetFile(tmp_path / "pages.parquet").metadata.num_row_groups == 2
+
+    items = pq.read_table(tmp_path / "crawl_items.parquet").to_pylist()
+    assert items[0]["url"] == "https://example.com/a"
+    assert items[0]["start_url"] == "https://example.com"
+    assert items[0]["noindex"] is False
+
+    images = pq.read_table(tmp_path / "images.parquet").to_pylist()
+    assert [(image["source"], image["data"]) for image in images] == [
+        ("a.pdf", "aW1n"),
+        ("https://example.com/a", "cG5n"),
+    ]
+    assert sorted(os.listdir(tmp_path)) == [
+        "crawl_items.parquet",
+        "images.parquet",
+        "pages.parquet",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_feather_export_from_stream(tmp_path):
+    """Test streamed results are written in batches and failures skipped"""
+    feather = pytest.importorskip("pyarrow.feather")
+
+    async def results():
+        for number in range(25):
+            yield [f"{number}"], [pdf(str(number), 2)]
+        yield ["broken"], ValueError("failed")
+
+    with ColumnarExporter(tmp_path, format="feather", row_group_size=10) as exporter:
+        await exporter.export(results())
+
+    reader = pa.ipc.open_file(tmp_path / "pages.feather")
+    assert reader.num_record_batches == 5
+    assert feather.read_table(tmp_path / "pages.feather").num_rows == 50
+    assert not (tmp_path / "crawl_items.feather").exists()
+
+
+def test_failed_export_leaves_no_files(tmp_path):
+    """Test an exception while exporting discards the unfinished files"""
+    with pytest.raises(RuntimeError):
+        with ColumnarExporter(tmp_path, row_group_size=1) as exporter:
+            exporter.add(pdf("a", 3))
+            raise RuntimeError("crash")
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_rejects_raw_text_and_bad_options(tmp_path):
+    """Test raw markdown and unknown formats are rejected"""
+    with pytest.raises(ValueError):
+        ColumnarExporter(tmp_path, format="csv")
+    with pytest.raises(ValueError):
+        ColumnarExporter(tmp_path, row_group_size=0)
+    with pytest.raises(TypeError):
+        ColumnarExporter(tmp_path).add("# markdown")
+
+
+@pytest.mark.asyncio
+async def test_export_pages_from_iterable(tmp_path):
+    """Test bare crawled pages and synchronous iterables are exported"""
+    page = crawl().items[0]
+    with ColumnarExporter(tmp_path) as exporter:
+        await exporter.export([page, ("https://example.com/b", page)])
+
+    items = pq.read_table(tmp_path / "crawl_items.parquet").to_pylist()
+    assert [(item["rid"], item["start_url"]) for item in items] == [("", "")] * 2
+    assert exporter.rows["images"] == 2
+
+
+def test_missing_pyarrow_is_reported(monkeypatch):
+    """Test exporting without pyarrow names the package to install"""
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with pytest.raises(ImportError, match="pip install pyarrow"):
+        schema("pages")
@@ -0,0 +1,115 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+from anyparser_core import Anyparser, AnyparserCrawlResult, AnyparserOption
+from anyparser_core import parser as parser_module
+from anyparser_core.decoding import _decode_shared, _load_shared, decode_json_bytes
+from anyparser_core.metrics import MetricsRegistry
+from anyparser_core.testing import FakeAnyparserServer
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("ANYPARSER_API_KEY", "test-key")
+
+
+@pytest.fixture
+def decode_threads(monkeypatch):
+    """Record the thread each JSON decode runs on."""
+    threads = []
+    decode_json = parser_module._decode_json
+
+    def recording_decode(json_data, model, content_types=None):
+        threads.append(threading.current_thread())
+        return decode_json(json_data, model, content_types)
+
+    monkeypatch.setattr(parser_module, "_decode_json", recording_decode)
+    return threads
+
+
+async def crawl(server, **kwargs):
+    parser = Anyparser(
+        AnyparserOption(
+            api_url=server.url, api_key="test-key", model="crawler", max_executions=500
+        ),
+        metrics=MetricsRegistry(),
+        **kwargs,
+    )
+    try:
+        return await parser.parse("https://example.com")
+    finally:
+        await parser.aclose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "executor", ["thread", lambda: ThreadPoolExecutor(1)], ids=["thread", "custom"]
+)
+async def test_decode_in_thread(decode_threads, executor):
+    """Test large responses are decoded off the event loop thread"""
+    executor = executor() if callable(executor) else executor
+    async with FakeAnyparserServer(crawl_pages=500, chars=200) as server:
+        inline = await crawl(server)
+        offloaded = await crawl(
+            server, decode_executor=executor, decode_offload_bytes=1024
+        )
+
+    assert offloaded == inline
+    assert decode_threads[0] is threading.current_thread()
+    assert decode_threads[1] is not threading.current_thread()
+
+
+@pytest.mark.asyncio
+async def test_decode_small_responses_inline(decode_threads):
+    """Test responses under the threshold skip the executor"""
+    async with FakeAnyparserServer(crawl_pages=2, chars=10) as server:
+        await crawl(server, decode_executor="thread")
+
+    assert decode_threads == [threading.current_thread()]
+
+
+@pytest.mark.asyncio
+async def test_decode_in_process():
+    """Test a worker process decodes from shared memory into equal results"""
+    async with FakeAnyparserServer(crawl_pages=500, chars=200) as server:
+        inline = await crawl(server)
+        offloaded = await crawl(
+            server, decode_executor="process", decode_offload_bytes=1024
+        )
+
+    assert isinstance(offloaded[0], AnyparserCrawlResult)
+    assert offloaded == inline
+
+
+def test_decode_shared_round_trip():
+    """Test the worker's decode returns its results through shared memory"""
+    from anyparser_core.testing import payloads
+
+    data = json.dumps([payloads.crawl_result("https://example.com", 20, 50)]).encode()
+    block = shared_memory.SharedMemory(create=True, size=len(data))
+    try:
+        block.buf[: len(data)] = data
+        name, size = _decode_shared(block.name, len(data), "crawler", None)
+    finally:
+        block.close()
+        block.unlink()
+
+    assert _load_shared(name, size) == decode_json_bytes(data, "crawler")
+    # The results block is freed once loaded
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_decode_executor_validated():
+    """Test unknown executor names are rejected"""
+    with pytest.raises(ValueError, match="decode executor"):
+        Anyparser(decode_executor="fibers")
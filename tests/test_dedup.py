@@ -0,0 +1,111 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import random
+
+from anyparser_core import AnyparserUrl, NearDuplicateFilter, SignatureIndex
+from anyparser_core.dedup import hamming, simhash
+
+VOCABULARY = [f"word{number}" for number in range(2000)]
+
+
+def text(seed, words=400):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def page(url, markdown, status_code=200):
+    return AnyparserUrl(url=url, status_code=status_code, markdown=markdown)
+
+
+def test_simhash_distance_tracks_similarity():
+    """Test small edits move a signature a few bits and unrelated text far"""
+    base = text(1)
+    edited = base.replace(base.split()[10], "changed", 1) + " page 2 of 9"
+
+    assert simhash(base) == simhash(base.upper())
+    assert hamming(simhash(base), simhash(edited)) <= 3
+    assert hamming(simhash(base), simhash(text(2))) > 10
+    assert simhash("") == 0
+
+
+@pytest.mark.parametrize("max_distance", [0, 3, 8, 12])
+def test_index_finds_every_signature_within_distance(max_distance):
+    """Test banding never misses a signature within the distance"""
+    rng = random.Random(max_distance)
+    index = SignatureIndex(max_distance)
+    original = rng.getrandbits(64)
+    index.add("original", original)
+    for number in range(200):
+        index.add(f"noise{number}", rng.getrandbits(64))
+    assert len(index) == 201
+    assert "original" in index and "missing" not in index
+
+    for _ in range(100):
+        flipped = original
+        for bit in rng.sample(range(64), max_distance):
+            flipped ^= 1 << bit
+        assert index.query(flipped) == "original"
+
+
+@pytest.mark.asyncio
+async def test_collapse_drops_near_duplicates():
+    """Test pagination and print views collapse onto the first page"""
+    article = text(3)
+    pages = [
+        page("https://example.com/post", article),
+        page("https://example.com/post?print=1", article + " print view"),
+        page("https://example.com/other", text(4)),
+        page("https://example.com/missing", article, status_code=404),
+        page("https://example.com/empty", ""),
+    ]
+    stage = NearDuplicateFilter()
+
+    kept = [item.url async for item in stage.collapse(pages)]
+
+    assert kept == [
+        "https://example.com/post",
+        "https://example.com/other",
+        "https://example.com/missing",
+        "https://example.com/empty",
+    ]
+    assert stage.duplicates == 1
+
+
+@pytest.mark.asyncio
+async def test_index_persists_across_crawls(tmp_path):
+    """Test a saved index flags duplicates in the next crawl but not recrawled pages"""
+    article = text(5)
+    first = NearDuplicateFilter()
+    async for _ in first.flag([page("https://example.com/a", article)]):
+        pass
+    path = tmp_path / "signatures.bin"
+    first.index.save(path)
+    assert path.stat().st_size < 64
+
+    second = NearDuplicateFilter(SignatureIndex.load(path))
+
+    async def crawl():
+        yield page("https://EXAMPLE.com/a", article + " updated")
+        yield page("https://example.com/a-copy", article)
+
+    flagged = [(item.url, original) async for item, original in second.flag(crawl())]
+
+    assert flagged == [
+        ("https://EXAMPLE.com/a", None),
+        ("https://example.com/a-copy", "https://example.com/a"),
+    ]
+
+
+def test_index_rejects_bad_files(tmp_path):
+    """Test loading something other than a saved index fails"""
+    path = tmp_path / "bogus.bin"
+    path.write_bytes(b"not an index")
+    with pytest.raises(ValueError):
+        SignatureIndex.load(path)
+    with pytest.raises(ValueError):
+        SignatureIndex(40)
@@ -191,7 +191,7 @@ def test_build_form_unknown_mime_type(tmp_path):
         api_key="test-key",
         format="json",
         model="text",
-        files=[UploadedFile(filename="test.unknown", contents=b"test content")],
+        files=[UploadedFile(filename="test.unknown", contents=b"\x00\x01binary")],
     )
     form_data = build_form(option, "boundary")
     assert b"Content-Type: application/octet-stream" in form_data
@@ -0,0 +1,234 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+import time
+from unittest.mock import patch
+
+from anyparser_core import Anyparser, AnyparserOption, AnyparserParsedOption
+from anyparser_core import HedgePolicy
+from anyparser_core.hedging import Hedger
+from anyparser_core.instrumentation import CallStats
+from anyparser_core.metrics import MetricsRegistry
+from anyparser_core.options import UploadedFile
+from anyparser_core.testing import FakeAnyparserServer, FaultProfile
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("ANYPARSER_API_KEY", "test-key")
+
+
+@pytest.fixture
+def text_file(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("hello")
+    return str(path)
+
+
+def test_hedger_delay_tracks_percentile():
+    """Test the delay is the clamped latency percentile once enough samples exist"""
+    hedger = Hedger(HedgePolicy(percentile=0.9, min_samples=10, max_delay=0.5))
+    for _ in range(9):
+        hedger.record(0.02)
+    assert hedger.delay() is None
+
+    hedger.record(0.02)
+    assert hedger.delay() == pytest.approx(0.02, rel=0.05)
+
+    for _ in range(10):
+        hedger.record(3.0)
+    assert hedger.delay() == 0.5
+
+
+def test_hedger_rejects_bad_policy():
+    """Test out-of-range percentiles and extra loads are rejected"""
+    with pytest.raises(ValueError, match="percentile"):
+        Hedger(HedgePolicy(percentile=1))
+    with pytest.raises(ValueError, match="max_extra_load"):
+        Hedger(HedgePolicy(max_extra_load=0))
+
+
+def test_hedger_window_rotates():
+    """Test old samples stop counting once a new window fills up"""
+    hedger = Hedger(HedgePolicy(min_samples=5, window=10))
+    for _ in range(10):
+        hedger.record(1.0)
+    for _ in range(4):
+        hedger.record(0.1)
+    assert hedger.delay() == pytest.approx(1.0, rel=0.05)
+
+    hedger.record(0.1)
+    assert hedger.delay() == pytest.approx(0.1, rel=0.05)
+
+
+def test_hedger_budget_caps_extra_load():
+    """Test duplicates are limited to the configured fraction of requests"""
+    hedger = Hedger(HedgePolicy(max_extra_load=0.25))
+    granted = 0
+    for _ in range(100):
+        hedger.deposit()
+        granted += hedger.withdraw()
+
+    assert granted == 25
+
+    with pytest.raises(ValueError):
+        Hedger(HedgePolicy(max_extra_load=2))
+
+
+def test_hedger_only_hedges_small_single_files():
+    """Test crawls, batches and large uploads are never duplicated"""
+    hedger = Hedger(HedgePolicy(max_body_bytes=100))
+    one = [UploadedFile(filename="a.txt", contents=b"a")]
+    parsed = AnyparserParsedOption(
+        api_url="https://api.example.com", api_key="k", files=one
+    )
+
+    assert hedger.eligible(parsed, 50)
+    assert not hedger.eligible(parsed, 500)
+    assert not hedger.eligible(
+        AnyparserParsedOption(
+            api_url="https://api.example.com", api_key="k", files=one * 2
+        ),
+        50,
+    )
+    assert not hedger.eligible(
+        AnyparserParsedOption(
+            api_url="https://api.example.com",
+            api_key="k",
+            model="crawler",
+            url="https://a.com",
+        ),
+        50,
+    )
+
+
+@pytest.mark.asyncio
+async def test_parse_hedges_stragglers(text_file):
+    """Test a straggling request is beaten by its duplicate on another endpoint"""
+    faults = FaultProfile(straggler_rate=1.0, straggler_latency=5.0)
+    async with FakeAnyparserServer(faults=faults) as slow:
+        async with FakeAnyparserServer() as fast:
+            parser = Anyparser(
+                AnyparserOption(api_url=fast.url, api_key="test-key"),
+                metrics=MetricsRegistry(),
+                endpoints=[slow.url, fast.url],
+                hedging=HedgePolicy(max_extra_load=1.0, min_samples=1),
+            )
+            parser.hedger.record(0.05)
+
+            started = time.perf_counter()
+            calls = 0
+            while slow.stats.requests < 2 and calls < 40:
+                results = await parser.parse(text_file)
+                assert results[0].original_filename == "notes.txt"
+                calls += 1
+            elapsed = time.perf_counter() - started
+
+    hedges = parser.metrics.hedges
+    assert slow.stats.requests == 2
+    assert elapsed < 2.5
+    assert hedges.value(model="text", result="sent") == 2
+    assert hedges.value(model="text", result="won") == 2
+    assert fast.stats.requests == calls
+    assert all(entry["outstanding"] == 0 for entry in parser.stats()["endpoints"])
+
+
+@pytest.mark.asyncio
+async def test_parse_skips_hedge_without_budget(text_file):
+    """Test no duplicate is sent once the extra load budget is spent"""
+    faults = FaultProfile(latency=0.05)
+    async with FakeAnyparserServer(faults=faults) as server:
+        parser = Anyparser(
+            AnyparserOption(api_url=server.url, api_key="test-key"),
+            metrics=MetricsRegistry(),
+            hedging=HedgePolicy(max_extra_load=0.01, min_samples=1, min_delay=0.001),
+        )
+        parser.hedger.record(0.001)
+        await parser.parse(text_file)
+
+    assert server.stats.requests == 1
+    assert parser.metrics.hedges.value(model="text", result="over_budget") == 1
+
+
+@pytest.mark.asyncio
+async def test_hedged_attempts_keep_their_own_totals():
+    """Test only the deciding attempt's totals count and the first request's latency is learned"""
+    durations = []
+
+    async def fake_send(self, endpoint, state, form_data, headers, stats, trace=None):
+        duration, outcome = durations.pop(0)
+        stats.endpoint = f"host-{duration}"
+        stats.status = None
+        await asyncio.sleep(duration)
+        if isinstance(outcome, Exception):
+            raise outcome
+        stats.bytes_sent += len(form_data)
+        stats.bytes_received += 2
+        stats.status = outcome
+        return outcome, b"ok"
+
+    parser = Anyparser(
+        AnyparserOption(api_url="https://api.example.com", api_key="test-key"),
+        metrics=MetricsRegistry(),
+        hedging=HedgePolicy(max_extra_load=1.0, min_samples=1, min_delay=0.01),
+    )
+    hedger = parser.hedger
+    hedger.record(0.01)
+
+    with patch.object(Anyparser, "_send", fake_send):
+        # The first request answers 503 before its duplicate succeeds
+        durations[:] = [(0.05, 503), (0.1, 200)]
+        stats = CallStats()
+        assert await parser._send_hedged(hedger, None, None, b"body", {}, stats) == (
+            200,
+            b"ok",
+        )
+        assert (stats.endpoint, stats.status) == ("host-0.1", 200)
+        assert (stats.bytes_sent, stats.bytes_received, stats.retries) == (4, 2, 0)
+        assert hedger._current.count == 2
+
+        # The duplicate wins while the first request is still out
+        durations[:] = [(5.0, 200), (0.02, 200)]
+        stats = CallStats()
+        await parser._send_hedged(hedger, None, None, b"body", {}, stats)
+        assert stats.endpoint == "host-0.02"
+        assert stats.bytes_sent == 4
+        assert hedger._current.count == 3
+        assert hedger._current.max >= 0.02
+
+        # Both fail, and the outcome of the last one to finish is reported
+        durations[:] = [(0.2, OSError("reset")), (0.3, 503)]
+        stats = CallStats()
+        assert await parser._send_hedged(hedger, None, None, b"body", {}, stats) == (
+            503,
+            b"ok",
+        )
+        assert (stats.endpoint, stats.status) == ("host-0.3", 503)
+        assert hedger._current.count == 3
+
+
+@pytest.mark.asyncio
+async def test_batches_are_not_hedged(tmp_path):
+    """Test requests uploading several files are sent once"""
+    paths = []
+    for name in ["a.txt", "b.txt"]:
+        (tmp_path / name).write_text(name)
+        paths.append(str(tmp_path / name))
+
+    async with FakeAnyparserServer(faults=FaultProfile(latency=0.05)) as server:
+        parser = Anyparser(
+            AnyparserOption(api_url=server.url, api_key="test-key"),
+            metrics=MetricsRegistry(),
+            hedging=HedgePolicy(max_extra_load=1.0, min_samples=1, min_delay=0.001),
+        )
+        parser.hedger.tokens = parser.hedger.policy.max_burst
+        parser.hedger.record(0.001)
+        await parser.parse(paths)
+
+    assert server.stats.requests == 1
+    assert parser.metrics.hedges.value(model="text", result="sent") == 0
@@ -0,0 +1,417 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+import http.client
+import socket
+from types import SimpleNamespace
+
+pytest.importorskip("h2")
+
+from anyparser_core import Anyparser, AnyparserOption, HedgePolicy
+from anyparser_core.http2 import _RECEIVE_WINDOW, Http2Transport
+from anyparser_core.metrics import MetricsRegistry
+from anyparser_core.prepared import Endpoint
+from anyparser_core.testing import FakeAnyparserServer, FaultProfile
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("ANYPARSER_API_KEY", "test-key")
+
+
+@pytest.fixture
+def pdf_file(tmp_path):
+    path = tmp_path / "report.pdf"
+    path.write_bytes(b"%PDF-1.7 " + os.urandom(200_000))
+    return str(path)
+
+
+def make_parser(server, **kwargs):
+    return Anyparser(
+        AnyparserOption(api_url=server.url, api_key="test-key"),
+        metrics=MetricsRegistry(),
+        http2=True,
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_http2_multiplexes_concurrent_parses(pdf_file):
+    """Test concurrent parses share one connection as overlapping streams"""
+    faults = FaultProfile(latency=0.05)
+    async with FakeAnyparserServer(http2=True, faults=faults, pdf_pages=40) as server:
+        parser = make_parser(server)
+        results = await asyncio.gather(*[parser.parse(pdf_file) for _ in range(20)])
+        assert parser.transport.connections() == 1
+        await parser.aclose()
+
+    assert all(result[0].total_items == 40 for result in results)
+    assert server.stats.connections == 1
+    assert server.stats.requests == 20
+    assert server.stats.max_in_flight > 1
+    assert server.stats.bytes_received > 20 * 200_000
+
+
+@pytest.mark.asyncio
+async def test_http2_flow_controlled_drip(pdf_file):
+    """Test small dripped frames are reassembled into the full body"""
+    faults = FaultProfile(slow_drip_rate=1.0, drip_chunk_size=1000, drip_interval=0)
+    async with FakeAnyparserServer(http2=True, faults=faults) as server:
+        parser = Anyparser(
+            AnyparserOption(api_url=server.url, api_key="test-key", format="markdown"),
+            http2=True,
+        )
+        content = await parser.parse(pdf_file)
+        await parser.aclose()
+
+    assert content.startswith("# Page 1")
+    assert server.stats.slow_drips == 1
+
+
+@pytest.mark.asyncio
+async def test_http2_errors_and_stream_resets(pdf_file):
+    """Test error statuses raise and reset streams surface as connection errors"""
+    async with FakeAnyparserServer(http2=True, api_key="other-key") as server:
+        parser = make_parser(server)
+        with pytest.raises(http.client.HTTPException, match="HTTP 401"):
+            await parser.parse(pdf_file)
+        await parser.aclose()
+
+    faults = FaultProfile(reset_rate=1.0)
+    async with FakeAnyparserServer(http2=True, faults=faults) as server:
+        parser = make_parser(server)
+        with pytest.raises(ConnectionResetError):
+            await parser.parse(pdf_file)
+        # The connection survives a stream reset
+        assert parser.transport.connections() == 1
+        await parser.aclose()
+
+
+@pytest.mark.asyncio
+async def test_http2_hedge_loser_is_reset(tmp_path):
+    """Test a losing hedge is cancelled with a stream reset, not a new socket"""
+    path = tmp_path / "notes.txt"
+    path.write_text("hello")
+    faults = FaultProfile(straggler_rate=1.0, straggler_latency=5.0)
+    async with FakeAnyparserServer(http2=True, faults=faults) as slow:
+        async with FakeAnyparserServer(http2=True) as fast:
+            parser = Anyparser(
+                AnyparserOption(api_url=fast.url, api_key="test-key"),
+                metrics=MetricsRegistry(),
+                endpoints=[slow.url, fast.url],
+                hedging=HedgePolicy(max_extra_load=1.0, min_samples=1),
+                http2=True,
+            )
+            parser.hedger.record(0.05)
+            while slow.stats.requests < 1:
+                await parser.parse(str(path))
+            await asyncio.sleep(0.05)
+            await parser.aclose()
+
+    assert slow.stats.cancelled_streams == 1
+    assert slow.stats.connections == 1
+
+
+def test_http2_runs_across_event_loops(pdf_file):
+    """Test a parser reconnects when reused from a new event loop"""
+    with FakeAnyparserServer(http2=True) as server:
+        parser = make_parser(server)
+        for _ in range(2):
+            results = asyncio.run(parser.parse(pdf_file))
+            assert results[0].original_filename == "report.pdf"
+
+    assert server.stats.connections == 2
+
+
+@pytest.mark.asyncio
+async def test_http2_crawl_iter_streams_pages():
+    """Test streamed crawls read the body of their stream in parts"""
+    faults = FaultProfile(slow_drip_rate=1.0, drip_chunk_size=2000, drip_interval=0)
+    async with FakeAnyparserServer(http2=True, faults=faults, chars=300) as server:
+        parser = Anyparser(
+            AnyparserOption(
+                api_url=server.url,
+                api_key="test-key",
+                model="crawler",
+                max_executions=30,
+            ),
+            metrics=MetricsRegistry(),
+            http2=True,
+        )
+        pages = [page async for page in parser.crawl_iter("https://example.com")]
+        await parser.aclose()
+
+    assert len(pages) == 30
+    assert pages[-1].url == "https://example.com/page/29"
+
+
+def test_http2_requires_h2(monkeypatch):
+    """Test the transport explains how to install the missing h2 package"""
+    monkeypatch.setitem(sys.modules, "h2", None)
+    with pytest.raises(ImportError, match="requires h2"):
+        Http2Transport()
+
+
+class GatedDestination:
+    """Stream writer whose drain blocks until the gate opens."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.waiting = asyncio.Event()
+        self.gate = asyncio.Event()
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        self.waiting.set()
+        await self.gate.wait()
+
+
+@pytest.mark.asyncio
+async def test_http2_slow_consumer_pauses_the_server(tmp_path):
+    """Test unread data holds the stream window closed instead of piling up"""
+    path = tmp_path / "notes.txt"
+    path.write_text("hello")
+    body = "# Large\n\n" + "x" * (8 * _RECEIVE_WINDOW)
+    async with FakeAnyparserServer(
+        http2=True, results_factory=lambda form: [{"markdown": body}]
+    ) as server:
+        parser = Anyparser(
+            AnyparserOption(api_url=server.url, api_key="test-key", format="markdown"),
+            metrics=MetricsRegistry(),
+            http2=True,
+        )
+        destination = GatedDestination()
+        task = asyncio.ensure_future(parser.parse_to(str(path), destination))
+        await destination.waiting.wait()
+        await asyncio.sleep(0.2)
+
+        (connection,) = parser.transport._connections.values()
+        (stream,) = connection._streams.values()
+        assert len(stream.body) <= _RECEIVE_WINDOW
+        assert len(destination.data) + len(stream.body) < len(body) // 2
+
+        destination.gate.set()
+        assert await task == len(body)
+        assert destination.data.decode("utf-8") == body
+
+        # A body read whole reopens the window as it arrives
+        assert await parser.parse(str(path)) == body
+        await parser.aclose()
+
+
+@pytest.mark.asyncio
+async def test_http2_cancelled_read_resets_the_stream(pdf_file):
+    """Test cancelling a parse mid-body resets only its stream"""
+    faults = FaultProfile(slow_drip_rate=1.0, drip_chunk_size=100, drip_interval=0.01)
+    async with FakeAnyparserServer(http2=True, faults=faults) as server:
+        parser = make_parser(server)
+        task = asyncio.ensure_future(parser.parse(pdf_file))
+        while server.stats.slow_drips == 0:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.05)
+        assert server.stats.cancelled_streams == 1
+        assert parser.transport.connections() == 1
+        await parser.aclose()
+
+
+@pytest.mark.asyncio
+async def test_http2_abandoned_crawl_resets_the_stream():
+    """Test closing a streamed crawl early resets its stream"""
+    faults = FaultProfile(slow_drip_rate=1.0, drip_chunk_size=500, drip_interval=0.01)
+    async with FakeAnyparserServer(http2=True, faults=faults, chars=300) as server:
+        parser = Anyparser(
+            AnyparserOption(api_url=server.url, api_key="test-key", model="crawler"),
+            metrics=MetricsRegistry(),
+            http2=True,
+        )
+        pages = parser.crawl_iter("https://example.com")
+        first = await pages.__anext__()
+        await pages.aclose()
+        await asyncio.sleep(0.05)
+        await parser.aclose()
+
+    assert first.url == "https://example.com"
+    assert server.stats.cancelled_streams == 1
+
+
+@pytest.mark.asyncio
+async def test_http2_traces_the_upload(pdf_file):
+    """Test instrumentation sees the upload phase of a multiplexed request"""
+    spans = []
+    async with FakeAnyparserServer(http2=True) as server:
+        parser = make_parser(server, hooks=[spans.append])
+        await parser.parse(pdf_file)
+        await parser.aclose()
+
+    assert "upload" in [span.phase for span in spans]
+
+
+@pytest.mark.asyncio
+async def test_http2_waits_for_stream_slots_and_fails_on_goaway(pdf_file):
+    """Test the server's stream limit is honoured and a GOAWAY fails every stream"""
+    faults = FaultProfile(latency=0.05)
+    async with FakeAnyparserServer(http2=True, faults=faults, max_streams=2) as server:
+        parser = make_parser(server)
+        # Learn the limit from the server's settings
+        await parser.parse(pdf_file)
+        await asyncio.gather(*[parser.parse(pdf_file) for _ in range(6)])
+        assert server.stats.max_in_flight == 2
+
+        server.faults = FaultProfile(latency=0.05, goaway_rate=1.0)
+        results = await asyncio.gather(
+            *[parser.parse(pdf_file) for _ in range(4)], return_exceptions=True
+        )
+        await parser.aclose()
+
+    assert all(isinstance(result, ConnectionResetError) for result in results)
+    assert any("terminated" in str(result) for result in results)
+    assert server.stats.goaways >= 1
+
+
+@pytest.mark.asyncio
+async def test_http2_invalid_request_headers():
+    """Test headers h2 rejects fail the request and retire the connection"""
+    async with FakeAnyparserServer(http2=True) as server:
+        transport = Http2Transport()
+        endpoint = Endpoint("http", f"127.0.0.1:{server.port}", "/parse/v1")
+        with pytest.raises(ConnectionResetError, match="request failed"):
+            await transport.request(endpoint, b"", {b"TE": b"gzip"})
+        assert transport.connections() == 0
+
+        response = await transport.request(endpoint, b"", {b"Connection": b"close"})
+        assert response.status == 401
+        assert b"API key" in await response.read()
+        await transport.close()
+
+    assert server.stats.connections == 2
+
+
+@pytest.mark.asyncio
+async def test_http2_upload_waiting_for_window_fails_on_goaway():
+    """Test an upload stalled by flow control fails once the server goes away"""
+    import h2.config
+    import h2.connection
+    import h2.events
+
+    async def handle(reader, writer):
+        conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+        conn.initiate_connection()
+        writer.write(conn.data_to_send())
+        received = 0
+        while received < 65535:
+            for event in conn.receive_data(await reader.read(65536)):
+                if isinstance(event, h2.events.DataReceived):
+                    # Never acknowledged, so the client runs out of window
+                    received += event.flow_controlled_length
+            writer.write(conn.data_to_send())
+        conn.close_connection()
+        writer.write(conn.data_to_send())
+        await reader.read()
+        writer.close()
+
+    listener = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    async with listener:
+        transport = Http2Transport()
+        endpoint = Endpoint("http", f"127.0.0.1:{port}", "/parse/v1")
+        with pytest.raises(ConnectionResetError, match="connection closed"):
+            await transport.request(endpoint, b"x" * 200_000, {})
+        await transport.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("protocol", ["h2", "http/1.1"])
+async def test_http2_negotiates_h2_over_tls(monkeypatch, protocol):
+    """Test HTTPS endpoints require h2 to be selected through ALPN"""
+    opened = []
+    open_connection = asyncio.open_connection
+
+    async def open_tls(host, port, ssl=None, server_hostname=None):
+        opened.append((server_hostname, ssl is not None))
+        reader, writer = await open_connection(host, port)
+        # Stand in for the TLS layer, which the fake server does not speak
+        tls = SimpleNamespace(selected_alpn_protocol=lambda: protocol)
+        writer.get_extra_info = lambda name, default=None: tls
+        return reader, writer
+
+    monkeypatch.setattr(asyncio, "open_connection", open_tls)
+    async with FakeAnyparserServer(http2=True) as server:
+        transport = Http2Transport()
+        endpoint = Endpoint("https", f"127.0.0.1:{server.port}", "/parse/v1")
+        if protocol == "h2":
+            response = await transport.request(endpoint, b"", {})
+            assert response.status == 401
+            await response.read()
+        else:
+            with pytest.raises(ConnectionError, match="does not support HTTP/2"):
+                await transport.request(endpoint, b"", {})
+        await transport.close()
+
+    assert opened == [("127.0.0.1", True)]
+
+
+async def serve_raw(reply):
+    """Start a server that reads the client's request, answers raw bytes and hangs up."""
+
+    async def handle(reader, writer):
+        while True:
+            try:
+                data = await asyncio.wait_for(reader.read(65536), 0.1)
+            except asyncio.TimeoutError:
+                break
+            if not data:
+                break
+        writer.write(reply)
+        await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "reply, message",
+    [
+        (b"", "connection closed"),
+        # A DATA frame on stream 0, which HTTP/2 forbids
+        (b"\x00\x00\x00\x00\x01\x00\x00\x00\x00", "connection failed"),
+    ],
+)
+async def test_http2_connection_lost(reply, message):
+    """Test streams fail when the server hangs up or breaks the protocol"""
+    listener = await serve_raw(reply)
+    port = listener.sockets[0].getsockname()[1]
+    async with listener:
+        transport = Http2Transport()
+        endpoint = Endpoint("http", f"127.0.0.1:{port}", "/parse/v1")
+        with pytest.raises(ConnectionResetError, match=message):
+            await transport.request(endpoint, b"body", {})
+        assert transport.connections() == 0
+        await transport.close()
+
+
+@pytest.mark.asyncio
+async def test_http2_connection_refused():
+    """Test a refused connection fails each request and is retried afresh"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    transport = Http2Transport()
+    endpoint = Endpoint("http", f"127.0.0.1:{port}", "/parse/v1")
+    for _ in range(2):
+        with pytest.raises(OSError):
+            await transport.request(endpoint, b"body", {})
+    await transport.close()
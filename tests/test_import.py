@@ -0,0 +1,89 @@
+"""
+Test import cost of the package
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import anyparser_core
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Cumulative `python -X importtime` budget for `import anyparser_core`, in
+# microseconds. Eagerly importing the parser stack costs well over 100ms, so
+# this catches regressions while leaving headroom for slow CI machines.
+IMPORT_TIME_BUDGET_US = 30_000
+
+HEAVY_MODULES = [
+    "anyparser_core.parser",
+    "anyparser_core.validator",
+    "anyparser_core.config.hardcoded",
+    "asyncio",
+    "fcntl",
+    "http.client",
+    "json",
+    "mimetypes",
+    "uuid",
+]
+
+
+def run_python(*args):
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def cumulative_import_time_us(module):
+    """Return the best cumulative import time of a module over a few runs."""
+    timings = []
+    for _ in range(3):
+        stderr = run_python("-X", "importtime", "-c", f"import {module}").stderr
+        for line in stderr.splitlines():
+            fields = [field.strip() for field in line.split("|")]
+            if len(fields) == 3 and fields[2] == module:
+                timings.append(int(fields[1]))
+    return min(timings)
+
+
+@pytest.mark.parametrize("module", ["anyparser_core", "anyparser_core.cli"])
+def test_import_does_not_load_heavy_modules(module):
+    """Test importing the package or the CLI defers heavy imports"""
+    code = (
+        "import sys; before = set(sys.modules); "
+        f"import {module}; "
+        "print('\\n'.join(set(sys.modules) - before))"
+    )
+    loaded = set(run_python("-c", code).stdout.split())
+
+    assert loaded.isdisjoint(HEAVY_MODULES), sorted(loaded & set(HEAVY_MODULES))
+
+
+def test_import_time_budget():
+    """Test the cumulative import time stays within the regression budget"""
+    assert cumulative_import_time_us("anyparser_core") < IMPORT_TIME_BUDGET_US
+
+
+def test_lazy_attributes_resolve():
+    """Test every public name resolves on first access"""
+    for name in anyparser_core.__all__:
+        assert getattr(anyparser_core, name) is not None
+
+
+def test_unknown_attribute_raises():
+    """Test unknown names still raise AttributeError"""
+    with pytest.raises(AttributeError, match="no attribute 'missing'"):
+        anyparser_core.missing
+
+
+def test_dir_lists_lazy_attributes():
+    """Test lazily loaded names are discoverable"""
+    assert "Anyparser" in dir(anyparser_core)
@@ -0,0 +1,183 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from anyparser_core import (
+    Anyparser,
+    AnyparserCrawlResult,
+    AnyparserOption,
+    AnyparserRobotsTxtDirective,
+    AnyparserUrl,
+    CrawlState,
+)
+from anyparser_core.form import build_crawl_parts
+from anyparser_core.incremental import (
+    KnownPage,
+    fingerprint,
+    merge_crawl,
+    normalize_url,
+)
+from anyparser_core.metrics import MetricsRegistry
+from anyparser_core.options import AnyparserParsedOption
+from anyparser_core.testing import FakeAnyparserServer, payloads
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("ANYPARSER_API_KEY", "test-key")
+
+
+def crawler(server, **kwargs):
+    return Anyparser(
+        AnyparserOption(
+            api_url=server.url,
+            api_key="test-key",
+            model="crawler",
+            max_executions=100,
+            **kwargs,
+        ),
+        metrics=MetricsRegistry(),
+    )
+
+
+def test_normalize_url():
+    """Test equivalent URLs normalize to the same key"""
+    assert normalize_url("HTTPS://Example.com:443?b=2&a=1#top") == (
+        "https://example.com/?a=1&b=2"
+    )
+    assert normalize_url("http://example.com:8080/docs") == (
+        "http://example.com:8080/docs"
+    )
+
+
+def test_known_urls_form_field():
+    """Test known pages are sent as a JSON form field"""
+    parsed = AnyparserParsedOption(
+        api_url="http://localhost",
+        api_key="k",
+        model="crawler",
+        url="https://example.com",
+        known_urls=[KnownPage("https://example.com", "abc", "2024-01-01T00:00:00Z")],
+    )
+
+    body = build_crawl_parts(parsed, "b").decode()
+
+    assert 'name="known_urls"' in body
+    assert (
+        '[{"url":"https://example.com","checksum":"abc",'
+        '"crawled_at":"2024-01-01T00:00:00Z"}]'
+    ) in body
+
+
+@pytest.mark.asyncio
+async def test_unchanged_pages_are_merged_from_state():
+    """Test only new pages come back and known ones are filled in locally"""
+    async with FakeAnyparserServer(crawl_pages=5, chars=200) as server:
+        parser = crawler(server)
+        previous = (await parser.parse("https://example.com"))[0]
+
+        server.crawl_pages = 8
+        incremental = await parser.crawl_incremental("https://example.com", previous)
+
+    diff = incremental.diff
+    assert diff.new == [f"https://example.com/page/{number}" for number in (5, 6, 7)]
+    assert len(diff.unchanged) == 5
+    assert diff.changed == diff.removed == []
+
+    result = incremental.result
+    assert result.total_items == len(result.items) == 8
+    assert result.items[3] is previous.items[0]
+    assert result.total_characters == sum(
+        item.total_characters for item in result.items
+    )
+
+
+@pytest.mark.asyncio
+async def test_changed_and_removed_pages_when_api_returns_everything():
+    """Test the diff is computed locally when the API returns every page"""
+    pages = {"https://example.com": "# Home", "https://example.com/a": "# A"}
+
+    def results(form):
+        result = payloads.crawl_result(form.get("url"), 1, 0)
+        template = result["items"].pop()
+        for url, markdown in pages.items():
+            result["items"].append(
+                {
+                    **template,
+                    "url": url,
+                    "status_code": 404 if markdown is None else 200,
+                    "total_characters": len(markdown or ""),
+                    "markdown": markdown or "",
+                }
+            )
+        return [result]
+
+    async with FakeAnyparserServer(results_factory=results) as server:
+        parser = crawler(server)
+        previous = (await parser.parse("https://example.com"))[0]
+        state = CrawlState.from_result(previous)
+        assert [page.checksum for page in state.known_pages()] == [
+            fingerprint("# Home"),
+            fingerprint("# A"),
+        ]
+
+        pages["https://example.com/a"] = None
+        pages["https://example.com/b"] = "# B"
+        pages["https://example.com"] = "# Home, updated"
+        incremental = await parser.crawl_incremental("https://example.com/", state)
+
+    diff = incremental.diff
+    assert diff.changed == ["https://example.com"]
+    assert diff.removed == ["https://example.com/a"]
+    assert diff.new == ["https://example.com/b"]
+    assert [item.url for item in incremental.result.items] == [
+        "https://example.com",
+        "https://example.com/b",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_incremental_crawl_requires_crawler_json():
+    """Test incremental crawls reject other models and formats"""
+    async with FakeAnyparserServer() as server:
+        parser = crawler(server, format="markdown")
+        with pytest.raises(ValueError, match="crawler model"):
+            await parser.crawl_incremental("https://example.com", CrawlState())
+
+    assert server.stats.requests == 0
+
+
+def test_merge_reuses_known_pages_and_rebuilds_markdown():
+    """Test fingerprints sent with the request are reused and markdown covers every page"""
+
+    class State(CrawlState):
+        def known_pages(self):
+            raise AssertionError("fingerprints recomputed")
+
+    home = AnyparserUrl(url="https://example.com", status_code=200, markdown="# Home")
+    kept = AnyparserUrl(url="https://example.com/a", status_code=200, markdown="# A")
+    state = State([home, kept])
+    known = [
+        KnownPage(page.url, fingerprint(page.markdown)) for page in state.pages.values()
+    ]
+    known.append(KnownPage("https://example.com/gone", fingerprint("# Gone")))
+    result = AnyparserCrawlResult(
+        rid="1",
+        start_url="https://example.com",
+        total_characters=0,
+        total_items=2,
+        markdown="# Home",
+        items=[home, AnyparserUrl(url="https://EXAMPLE.com/", status_code=200)],
+        robots_directive=AnyparserRobotsTxtDirective(),
+    )
+
+    merged = merge_crawl(result, state, known)
+
+    assert len(state) == 2
+    assert merged.diff.unchanged == ["https://example.com", "https://example.com/a"]
+    assert merged.result.items == [home, kept]
+    assert merged.result.markdown == "# Home\n\n# A"
+    assert merge_crawl(result, CrawlState([home, kept])).result.items == [home, kept]
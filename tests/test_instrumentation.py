@@ -0,0 +1,228 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import http.client
+import json
+from unittest.mock import Mock, patch
+
+from anyparser_core import Anyparser
+from anyparser_core.instrumentation import (
+    ParseSpan,
+    SpanRecorder,
+    StatsCollector,
+    TracerHook,
+)
+from anyparser_core.options import AnyparserOption, AnyparserParsedOption, UploadedFile
+
+
+@pytest.fixture
+def parsed_option():
+    return AnyparserParsedOption(
+        files=[UploadedFile(filename="test.txt", contents=b"hello")],
+        api_url="https://api.example.com",
+        api_key="test-key",
+        format="json",
+    )
+
+
+def make_response(status=200, body=None):
+    response = Mock()
+    response.status = status
+    response.read.return_value = (
+        body
+        or json.dumps(
+            [
+                {
+                    "rid": "rid",
+                    "original_filename": "test.txt",
+                    "checksum": "abc",
+                    "markdown": "hello",
+                }
+            ]
+        ).encode()
+    )
+    return response
+
+
+def fake_async_request(response):
+    async def request(conn, method, url, body, headers, on_sent=None, read=False):
+        if on_sent is not None:
+            on_sent()
+        return response
+
+    return request
+
+
+@pytest.mark.asyncio
+async def test_hooks_receive_every_phase(parsed_option):
+    """Test a traced parse emits one span per phase and a final parse span"""
+    spans = []
+    response = make_response()
+
+    with (
+        patch(
+            "anyparser_core.parser.async_request",
+            fake_async_request(response),
+        ),
+        patch("anyparser_core.parser.validate_and_parse", return_value=parsed_option),
+    ):
+        parser = Anyparser(AnyparserOption(), hooks=[spans.append])
+        await parser.parse("test.txt")
+
+    assert [span.phase for span in spans] == [
+        "validate",
+        "build_form",
+        "upload",
+        "server",
+        "download",
+        "decode",
+        "parse",
+    ]
+    assert len({span.call_id for span in spans}) == 1
+
+    by_phase = {span.phase: span for span in spans}
+    assert by_phase["validate"].files == 1
+    assert by_phase["validate"].bytes == 5
+    assert by_phase["upload"].bytes == by_phase["build_form"].bytes
+    assert by_phase["server"].attributes["status"] == 200
+    assert by_phase["download"].bytes == len(response.read.return_value)
+    assert by_phase["decode"].attributes["results"] == 1
+
+    total = by_phase["parse"]
+    assert total.bytes == by_phase["upload"].bytes
+    assert total.files == 1
+    assert total.retries == 0
+    assert total.attributes["model"] == "text"
+    assert total.attributes["bytes_received"] == by_phase["download"].bytes
+    assert all(span.duration_ns >= 0 for span in spans)
+    assert total.start_ns <= by_phase["validate"].start_ns
+
+
+@pytest.mark.asyncio
+async def test_hooks_record_errors(parsed_option):
+    """Test failed calls still emit a parse span carrying the error"""
+    collector = StatsCollector()
+
+    with (
+        patch(
+            "anyparser_core.parser.async_request",
+            fake_async_request(make_response(503, b"unavailable")),
+        ),
+        patch("anyparser_core.parser.validate_and_parse", return_value=parsed_option),
+    ):
+        parser = Anyparser(AnyparserOption(), hooks=[collector])
+        with pytest.raises(http.client.HTTPException):
+            await parser.parse("test.txt")
+
+    snapshot = collector.snapshot()
+    assert snapshot["parse"]["count"] == 1
+    assert snapshot["parse"]["errors"] == 1
+    assert "download" not in snapshot
+    assert snapshot["server"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_no_hooks_skips_tracing(parsed_option):
+    """Test untraced parses never create a span recorder"""
+    with (
+        patch(
+            "anyparser_core.parser.async_request",
+            fake_async_request(make_response()),
+        ),
+        patch("anyparser_core.parser.validate_and_parse", return_value=parsed_option),
+        patch("anyparser_core.parser.SpanRecorder") as recorder,
+    ):
+        await Anyparser(AnyparserOption()).parse("test.txt")
+
+    recorder.assert_not_called()
+
+
+def test_stats_collector_aggregates():
+    """Test the collector sums counts and tracks the maximum duration"""
+    collector = StatsCollector()
+    for duration in [1_000_000, 3_000_000]:
+        collector.on_span(
+            ParseSpan(
+                phase="upload",
+                call_id=1,
+                start_ns=0,
+                duration_ns=duration,
+                bytes=10,
+            )
+        )
+
+    assert ParseSpan("upload", 1, 0, 3_000_000).duration == 0.003
+
+    upload = collector.snapshot()["upload"]
+    assert upload["count"] == 2
+    assert upload["mean_ms"] == 2.0
+    assert upload["max_ms"] == 3.0
+    assert upload["bytes"] == 20
+
+    collector.reset()
+    assert collector.snapshot() == {}
+
+
+def test_tracer_hook_records_spans():
+    """Test spans are forwarded to an OpenTelemetry-style tracer"""
+    tracer = Mock()
+    traced = tracer.start_span.return_value
+    recorder = SpanRecorder([TracerHook(tracer)])
+
+    recorder.emit("upload", recorder.now(), bytes=42, status=200)
+
+    name = tracer.start_span.call_args.args[0]
+    assert name == "anyparser.upload"
+    traced.set_attribute.assert_any_call("anyparser.bytes", 42)
+    traced.set_attribute.assert_any_call("anyparser.status", 200)
+    traced.end.assert_called_once()
+    assert (
+        traced.end.call_args.kwargs["end_time"]
+        >= tracer.start_span.call_args.kwargs["start_time"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_failing_hook_does_not_break_parse(parsed_option, caplog):
+    """Test hook exceptions are logged without affecting the parse result"""
+    spans = []
+
+    def broken(span):
+        raise RuntimeError("tracer down")
+
+    with (
+        patch(
+            "anyparser_core.parser.async_request",
+            fake_async_request(make_response()),
+        ),
+        patch("anyparser_core.parser.validate_and_parse", return_value=parsed_option),
+    ):
+        parser = Anyparser(AnyparserOption(), hooks=[broken, spans.append])
+        result = await parser.parse("test.txt")
+
+    assert result[0].markdown == "hello"
+    assert spans[-1].phase == "parse"
+    assert "tracer down" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_failing_hook_does_not_mask_errors(parsed_option):
+    """Test the original exception propagates when a hook also fails"""
+
+    def broken(span):
+        raise RuntimeError("tracer down")
+
+    with (
+        patch(
+            "anyparser_core.parser.async_request",
+            fake_async_request(make_response(503, b"unavailable")),
+        ),
+        patch("anyparser_core.parser.validate_and_parse", return_value=parsed_option),
+    ):
+        parser = Anyparser(AnyparserOption(), hooks=[broken])
+        with pytest.raises(http.client.HTTPException, match="HTTP 503"):
+            await parser.parse("test.txt")
@@ -0,0 +1,222 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import http.client
+import json
+import math
+from unittest.mock import Mock, patch
+
+from anyparser_core import Anyparser, BreakerPolicy
+from anyparser_core.metrics import HdrHistogram, MetricsRegistry, render_prometheus
+from anyparser_core.options import AnyparserOption, AnyparserParsedOption, UploadedFile
+
+
+@pytest.fixture
+def parsed_option():
+    return AnyparserParsedOption(
+        files=[UploadedFile(filename="test.txt", contents=b"hello")],
+        api_url="https://api.example.com",
+        api_key="test-key",
+        format="json",
+        model="ocr",
+    )
+
+
+def make_response(status=200, body=None):
+    response = Mock()
+    response.status = status
+    response.read.return_value = body or json.dumps(
+        [{"rid": "rid", "original_filename": "test.txt", "checksum": "abc"}]
+    ).encode("utf-8")
+    return response
+
+
+def test_histogram_percentiles_within_precision():
+    """Test percentiles stay within the relative error of the bucket layout"""
+    histogram = HdrHistogram(scale=1e6, precision_bits=5)
+    for millis in range(1, 1001):
+        histogram.record(millis / 1000)
+
+    assert histogram.count == 1000
+    assert histogram.min == 0.001
+    assert histogram.max == 1.0
+    for quantile, expected in [(0.5, 0.5), (0.9, 0.9), (0.99, 0.99)]:
+        assert abs(histogram.percentile(quantile) - expected) / expected < 1 / 32
+    assert histogram.percentile(1.0) == 1.0
+    assert histogram.percentile(2.0) == 1.0
+    assert HdrHistogram().percentile(0.5) == 0.0
+
+
+def test_histogram_small_values_are_exact():
+    """Test values in the lowest buckets keep their exact upper bound"""
+    histogram = HdrHistogram(scale=1)
+    for value in (1, 2, 3, 10):
+        histogram.record(value)
+
+    # Bucket 2 holds values from 2 up to 3
+    assert histogram.percentile(0.5) == 3
+
+
+def test_histogram_is_compact():
+    """Test the number of buckets grows with magnitude, not with sample count"""
+    histogram = HdrHistogram()
+    for micros in range(1, 100_000):
+        histogram.record(micros / 1e6)
+
+    assert len(histogram.counts) < 1000
+
+
+def test_registry_get_or_create():
+    """Test metrics are shared by name and type mismatches are rejected"""
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs_total", "Jobs.", ("kind",))
+    assert registry.counter("jobs_total", "Jobs.", ("kind",)) is counter
+
+    with pytest.raises(ValueError):
+        registry.gauge("jobs_total", "Jobs.")
+    with pytest.raises(ValueError):
+        counter.inc(wrong="label")
+
+
+def test_render_prometheus_format():
+    """Test the exposition text has HELP, TYPE, escaped labels and summaries"""
+    registry = MetricsRegistry()
+    registry.counter("jobs_total", "Jobs run.", ("kind",)).inc(2, kind='say "hi"')
+    registry.gauge("queue_depth", "Queued jobs.").set(3)
+    limits = registry.gauge("limit", "Limits.", ("side",))
+    limits.set(math.inf, side="upper")
+    limits.set(-math.inf, side="lower")
+    latency = registry.histogram("job_seconds", "Job latency.")
+    latency.observe(0.25)
+
+    text = render_prometheus(registry)
+
+    assert registry.get("job_seconds") is latency
+    assert latency.percentile(0.5) == 0.25
+    assert 'limit{side="lower"} -Inf\nlimit{side="upper"} +Inf\n' in text
+
+    assert "# HELP jobs_total Jobs run.\n# TYPE jobs_total counter\n" in text
+    assert 'jobs_total{kind="say \\"hi\\""} 2\n' in text
+    assert "# TYPE queue_depth gauge\nqueue_depth 3\n" in text
+    assert "# TYPE job_seconds summary\n" in text
+    assert 'job_seconds{quantile="0.99"} 0.25\n' in text
+    assert "job_seconds_sum 0.25\njob_seconds_count 1\n" in text
+    assert text.endswith("\n")
+
+
+@pytest.mark.asyncio
+async def test_parse_updates_metrics(parsed_option):
+    """Test every call records requests, latency, bytes and prepared cache lookups"""
+    registry = MetricsRegistry()
+    response = make_response()
+
+    with (
+        patch("anyparser_core.parser.async_request", return_value=response),
+        patch("anyparser_core.parser.validate_and_parse", return_value=parsed_option),
+    ):
+        parser = Anyparser(AnyparserOption(), metrics=registry)
+        await parser.parse("test.txt")
+        await parser.parse("test.txt")
+
+    metrics = parser.metrics
+    assert metrics.requests.value(model="ocr", status=200) == 2
+    assert metrics.latency.count(model="ocr") == 2
+    assert metrics.files.value(model="ocr") == 2
+    assert metrics.bytes_uploaded.value(model="ocr") > 0
+    assert metrics.bytes_downloaded.value(model="ocr") == 2 * len(
+        response.read.return_value
+    )
+    assert metrics.in_flight.value() == 0
+    assert metrics.cache_hit_ratio("prepared") == 0.5
+
+    snapshot = registry.snapshot()
+    assert snapshot["anyparser_requests_total"]["samples"] == [
+        {"labels": {"model": "ocr", "status": "200"}, "value": 2}
+    ]
+    assert "anyparser_request_duration_seconds" in registry.render_prometheus()
+
+
+@pytest.mark.asyncio
+async def test_parse_records_failures(parsed_option):
+    """Test HTTP errors are counted by status and transport errors as 'error'"""
+    registry = MetricsRegistry()
+
+    with (
+        patch(
+            "anyparser_core.parser.async_request",
+            return_value=make_response(503, b"unavailable"),
+        ),
+        patch("anyparser_core.parser.validate_and_parse", return_value=parsed_option),
+    ):
+        parser = Anyparser(AnyparserOption(), metrics=registry)
+        with pytest.raises(http.client.HTTPException):
+            await parser.parse("test.txt")
+
+    with (
+        patch(
+            "anyparser_core.parser.async_request",
+            side_effect=ConnectionResetError("reset"),
+        ),
+        patch("anyparser_core.parser.validate_and_parse", return_value=parsed_option),
+    ):
+        with pytest.raises(ConnectionResetError):
+            await parser.parse("test.txt")
+
+    assert parser.metrics.requests.value(model="ocr", status=503) == 1
+    assert parser.metrics.requests.value(model="ocr", status="error") == 1
+    assert parser.metrics.in_flight.value() == 0
+
+
+@pytest.mark.asyncio
+async def test_requests_count_every_attempt(parsed_option):
+    """Test retried requests are counted once per HTTP request, calls once"""
+    with (
+        patch(
+            "anyparser_core.parser.async_request",
+            return_value=make_response(503, b"unavailable"),
+        ),
+        patch("anyparser_core.parser.validate_and_parse", return_value=parsed_option),
+        patch("anyparser_core.parser._RETRY_BACKOFF", 0),
+    ):
+        parser = Anyparser(AnyparserOption(), metrics=MetricsRegistry(), max_retries=2)
+        with pytest.raises(http.client.HTTPException):
+            await parser.parse("test.txt")
+
+    assert parser.metrics.requests.value(model="ocr", status=503) == 3
+    assert parser.metrics.retries.value(model="ocr") == 2
+    assert parser.metrics.latency.count(model="ocr") == 1
+
+
+@pytest.mark.asyncio
+async def test_clients_sharing_a_registry_keep_their_gauges(parsed_option):
+    """Test per-client gauges are labelled by client instead of overwritten"""
+    registry = MetricsRegistry()
+    with (
+        patch("anyparser_core.parser.async_request", return_value=make_response()),
+        patch("anyparser_core.parser.validate_and_parse", return_value=parsed_option),
+    ):
+        clients = [
+            Anyparser(
+                AnyparserOption(),
+                metrics=registry,
+                name=name,
+                circuit_breaker=BreakerPolicy(),
+                max_in_flight=capacity,
+            )
+            for name, capacity in [("a", 2), ("b", 5)]
+        ]
+        for client in clients:
+            await client.parse("test.txt")
+        unnamed = Anyparser(AnyparserOption(), metrics=registry)
+
+    slots = registry.get("anyparser_scheduler_slots")
+    assert slots.value(client="a", state="capacity") == 2
+    assert slots.value(client="b", state="capacity") == 5
+    text = registry.render_prometheus()
+    assert 'anyparser_circuit_state{client="a"} 0\n' in text
+    assert 'anyparser_scheduler_queued{client="b",priority="bulk"} 0\n' in text
+    assert unnamed.metrics.client.isdigit()
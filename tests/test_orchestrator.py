@@ -0,0 +1,148 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import time
+
+from anyparser_core import (
+    Anyparser,
+    AnyparserOption,
+    AnyparserRobotsTxtDirective,
+    CrawlOrchestrator,
+    RobotsCache,
+)
+from anyparser_core.metrics import MetricsRegistry
+from anyparser_core.testing import FakeAnyparserServer, FaultProfile, payloads
+from anyparser_core.validator.url import InvalidUrlError
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("ANYPARSER_API_KEY", "test-key")
+
+
+class Recorder:
+    """Results factory recording when each crawl reached the server."""
+
+    def __init__(self, politeness_delay=0):
+        self.politeness_delay = politeness_delay
+        self.started = []
+
+    def __call__(self, form):
+        url = form.get("url")
+        self.started.append((url, time.monotonic()))
+        result = payloads.crawl_result(url, 3, 50)
+        for item in result["items"]:
+            item["politeness_delay"] = self.politeness_delay
+        return [result]
+
+
+def crawler(server):
+    return Anyparser(
+        AnyparserOption(api_url=server.url, api_key="test-key", model="crawler"),
+        metrics=MetricsRegistry(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_hosts_crawled_concurrently_and_spaced_per_host():
+    """Test different hosts overlap while one host's crawls are spaced out"""
+    recorder = Recorder()
+    seeds = ["https://a.example/1", "https://a.example/2", "https://b.example/"]
+    async with FakeAnyparserServer(
+        results_factory=recorder, faults=FaultProfile(latency=0.05)
+    ) as server:
+        orchestrator = CrawlOrchestrator(crawler(server), min_delay=0.1)
+        feed = [(seed, page.url) async for seed, page in orchestrator.crawl(seeds)]
+
+    assert len(feed) == 9
+    assert {seed for seed, _ in feed} == set(seeds)
+    assert server.stats.max_in_flight == 2
+
+    started = dict(recorder.started)
+    assert abs(started["https://b.example/"] - started["https://a.example/1"]) < 0.04
+    assert started["https://a.example/2"] - started["https://a.example/1"] >= 0.15
+
+
+@pytest.mark.asyncio
+async def test_politeness_delay_spaces_host():
+    """Test the politeness delay reported by pages spaces the next crawl"""
+    recorder = Recorder(politeness_delay=150)
+    seeds = ["https://a.example/1", "https://a.example/2"]
+    async with FakeAnyparserServer(results_factory=recorder) as server:
+        orchestrator = CrawlOrchestrator(crawler(server))
+        assert orchestrator.delay(seeds[0], 0.15) == 0.15
+        async for _ in orchestrator.crawl(seeds):
+            pass
+
+    (_, first), (_, second) = recorder.started
+    assert second - first >= 0.15
+
+
+@pytest.mark.asyncio
+async def test_disallowed_seeds_and_failures():
+    """Test disallowed seeds are skipped and failed crawls are reported"""
+    recorder = Recorder()
+    async with FakeAnyparserServer(results_factory=recorder) as server:
+        parser = crawler(server)
+        orchestrator = CrawlOrchestrator(parser)
+        orchestrator.robots.put(
+            "https://a.example",
+            AnyparserRobotsTxtDirective(
+                user_agent="*", allow=[], disallow=["/private"], crawl_delay=0
+            ),
+        )
+        feed = [
+            item
+            async for item in orchestrator.crawl(
+                ["https://a.example/private/x", "https://a.example/", "not a url"],
+                return_exceptions=True,
+            )
+        ]
+
+    assert orchestrator.rejected == ["https://a.example/private/x"]
+    errors = [(seed, error) for seed, error in feed if isinstance(error, Exception)]
+    assert len(errors) == 1 and errors[0][0] == "not a url"
+    assert len(feed) == 4
+    assert [url for url, _ in recorder.started] == ["https://a.example/"]
+    assert parser.robots_cache is None
+
+
+@pytest.mark.asyncio
+async def test_crawls_fill_the_orchestrator_robots_cache():
+    """Test each crawl's robots.txt reaches the orchestrator's cache and the parser's own"""
+    async with FakeAnyparserServer(results_factory=Recorder()) as server:
+        parser = crawler(server)
+        orchestrator = CrawlOrchestrator(parser)
+        async for _ in orchestrator.crawl(["https://a.example/"]):
+            pass
+        assert orchestrator.robots.allowed("https://a.example/private/x") is False
+
+        parser.robots_cache = RobotsCache()
+        assert CrawlOrchestrator(parser).robots is parser.robots_cache
+        shared = RobotsCache()
+        orchestrator = CrawlOrchestrator(parser, robots=shared)
+        async for _ in orchestrator.crawl(["https://b.example/"]):
+            pass
+
+    for cache in (shared, parser.robots_cache):
+        assert cache.allowed("https://b.example/private/x") is False
+    with pytest.raises(ValueError, match="concurrency"):
+        CrawlOrchestrator(parser, concurrency=0)
+
+
+@pytest.mark.asyncio
+async def test_failed_crawl_raises_and_cancels_the_others():
+    """Test a failure is raised by default and crawls still running are cancelled"""
+    async with FakeAnyparserServer(
+        results_factory=Recorder(), faults=FaultProfile(latency=0.5)
+    ) as server:
+        orchestrator = CrawlOrchestrator(crawler(server))
+        with pytest.raises(InvalidUrlError):
+            async for _ in orchestrator.crawl(["https://b.example/", "not a url"]):
+                pass
+
+    assert server.stats.requests <= 1
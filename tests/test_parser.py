@@ -295,3 +295,95 @@ async def test_parse_crawler_mode(mock_response):
         assert result[0].robots_directive.allow == ["/"]
         assert result[0].robots_directive.disallow == ["/private"]
         assert result[0].robots_directive.crawl_delay == 1
+
+
+@pytest.mark.asyncio
+async def test_parse_iter_bounds_concurrency_and_batches():
+    """Test parse_iter batches inputs and never exceeds the concurrency limit"""
+    import asyncio
+
+    in_flight = 0
+    peak = 0
+    priorities = set()
+
+    async def fake_parse(self, file_paths_or_url, priority="default"):
+        nonlocal in_flight, peak
+        priorities.add(priority)
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return file_paths_or_url
+
+    with patch.object(Anyparser, "parse", fake_parse):
+        parser = Anyparser()
+        results = [
+            (batch, result)
+            async for batch, result in parser.parse_iter(
+                (f"{i}.pdf" for i in range(7)),
+                concurrency=2,
+                batch_size=3,
+                priority="bulk",
+            )
+        ]
+
+    assert peak == 2
+    assert priorities == {"bulk"}
+    assert sorted(len(batch) for batch, _ in results) == [1, 3, 3]
+    for batch, result in results:
+        assert result == (batch[0] if len(batch) == 1 else batch)
+
+
+@pytest.mark.asyncio
+async def test_parse_iter_exceptions():
+    """Test parse_iter raises failures unless return_exceptions is set"""
+
+    async def failing_parse(self, file_paths_or_url, priority="default"):
+        raise ValueError("boom")
+
+    with patch.object(Anyparser, "parse", failing_parse):
+        parser = Anyparser()
+        results = [
+            result
+            async for _, result in parser.parse_iter(["a.pdf"], return_exceptions=True)
+        ]
+        assert isinstance(results[0], ValueError)
+
+        with pytest.raises(ValueError, match="boom"):
+            async for _ in parser.parse_iter(["a.pdf"]):
+                pass
+
+        with pytest.raises(ValueError, match="concurrency"):
+            async for _ in parser.parse_iter(["a.pdf"], concurrency=0):
+                pass
+        with pytest.raises(ValueError, match="batch_size"):
+            async for _ in parser.parse_iter(["a.pdf"], batch_size=0):
+                pass
+
+
+@pytest.mark.asyncio
+async def test_parse_iter_cancels_pending_parses():
+    """Test parses still in flight are cancelled when iteration stops early"""
+    import asyncio
+
+    cancelled = []
+
+    async def fake_parse(self, file_paths_or_url, priority="default"):
+        if file_paths_or_url == "slow.pdf":
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(file_paths_or_url)
+                raise
+        return file_paths_or_url
+
+    with patch.object(Anyparser, "parse", fake_parse):
+        parser = Anyparser()
+        results = parser.parse_iter(["slow.pdf", "fast.pdf"], concurrency=2)
+        async for batch, _ in results:
+            assert batch == ["fast.pdf"]
+            break
+        await results.aclose()
+        await asyncio.sleep(0)
+
+    assert cancelled == ["slow.pdf"]
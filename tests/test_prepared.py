@@ -0,0 +1,215 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import http.client
+import json
+from unittest.mock import Mock, patch
+
+from anyparser_core import Anyparser, OcrLanguage
+from anyparser_core.form import build_form
+from anyparser_core.options import AnyparserOption, AnyparserParsedOption, UploadedFile
+from anyparser_core.balancer import EndpointPool
+from anyparser_core.metrics import MetricsRegistry
+from anyparser_core.prepared import (
+    PreparedParse,
+    _is_loopback,
+    build_headers,
+    resolve_endpoint,
+)
+
+
+@pytest.fixture
+def parsed_option():
+    return AnyparserParsedOption(
+        api_url="https://api.example.com",
+        api_key="test-key",
+        model="ocr",
+        ocr_language=[OcrLanguage.ENGLISH],
+    )
+
+
+@pytest.fixture
+def ok_response():
+    response = Mock()
+    response.status = 200
+    response.read.return_value = json.dumps(
+        [
+            {
+                "rid": "rid",
+                "original_filename": "test.txt",
+                "checksum": "abc",
+                "total_characters": 5,
+                "markdown": "hello",
+            }
+        ]
+    ).encode()
+    return response
+
+
+def test_resolve_endpoint_scheme():
+    """Test endpoints pick the connection class from the URL scheme"""
+    https = resolve_endpoint("https://api.example.com")
+    assert https.host == "api.example.com"
+    assert https.target == "https://api.example.com/parse/v1"
+    assert isinstance(https.connect(), http.client.HTTPSConnection)
+
+    plain = resolve_endpoint("http://127.0.0.1:8080")
+    assert plain.host == "127.0.0.1:8080"
+    assert not isinstance(plain.connect(), http.client.HTTPSConnection)
+    assert resolve_endpoint("http://localhost:8080").scheme == "http"
+    assert resolve_endpoint("http://[::1]:8080").scheme == "http"
+
+
+def test_resolve_endpoint_upgrades_remote_http():
+    """Test http:// URLs for remote hosts still connect over TLS"""
+    for api_url in ["http://api.example.com", "http://10.0.0.5:8080"]:
+        endpoint = resolve_endpoint(api_url)
+        assert endpoint.scheme == "https"
+        assert isinstance(endpoint.connect(), http.client.HTTPSConnection)
+
+
+def test_allow_http_keeps_plain_http_for_remote_hosts(monkeypatch):
+    """Test the opt-out connects self-hosted http:// endpoints without TLS"""
+    monkeypatch.setenv("ANYPARSER_API_KEY", "test-key")
+    assert resolve_endpoint("http://10.0.0.5:8080", allow_http=True).scheme == "http"
+    assert resolve_endpoint("https://10.0.0.5", allow_http=True).scheme == "https"
+    assert not _is_loopback("")
+
+    parser = Anyparser(
+        AnyparserOption(api_url="http://parser.internal", api_key="test-key"),
+        endpoints=["http://10.0.0.5:8080", "http://10.0.0.6:8080"],
+        allow_http=True,
+    )
+    assert parser.prepare().endpoint.scheme == "http"
+    assert [state.endpoint.scheme for state in parser.pool.endpoints] == [
+        "http",
+        "http",
+    ]
+    assert EndpointPool(["http://10.0.0.5"]).endpoints[0].endpoint.scheme == "https"
+
+
+def test_build_headers_are_bytes():
+    """Test headers are pre-encoded and include authorization"""
+    headers = build_headers("abc", "test-key")
+    assert headers[b"Content-Type"] == b"multipart/form-data; boundary=abc"
+    assert headers[b"Authorization"] == b"Bearer test-key"
+    assert b"Authorization" not in build_headers("abc", "")
+
+
+def test_prepared_body_matches_build_form(parsed_option):
+    """Test the spliced body is identical to a freshly built form"""
+    prepared = PreparedParse(Anyparser(), parsed_option, boundary="boundary123")
+    parsed_option.files = [
+        UploadedFile(filename="a.png", contents=b"first"),
+        UploadedFile(filename="b.png", contents=b"second"),
+    ]
+
+    body, headers = prepared.build_body(parsed_option)
+
+    assert body == build_form(parsed_option, "boundary123")
+    assert headers is prepared.headers
+
+
+def test_prepared_body_for_crawler():
+    """Test crawl requests splice in the URL and crawl settings"""
+    parsed = AnyparserParsedOption(
+        api_url="https://api.example.com", api_key="test-key", model="crawler"
+    )
+    prepared = PreparedParse(Anyparser(), parsed, boundary="boundary123")
+    parsed.url = "https://example.com"
+    parsed.max_depth = 2
+
+    body, _ = prepared.build_body(parsed)
+
+    assert body == build_form(parsed, "boundary123")
+
+
+def test_prepared_body_boundary_collision(parsed_option):
+    """Test a file containing the boundary gets a fresh boundary"""
+    prepared = PreparedParse(Anyparser(), parsed_option, boundary="boundary123")
+    parsed_option.files = [UploadedFile(filename="a.png", contents=b"--boundary123")]
+
+    body, headers = prepared.build_body(parsed_option)
+
+    boundary = headers[b"Content-Type"].split(b"boundary=")[1].decode()
+    assert boundary != "boundary123"
+    assert body == build_form(parsed_option, boundary)
+
+
+@pytest.mark.asyncio
+async def test_prepare_and_parse(tmp_path, monkeypatch, ok_response):
+    """Test a prepared parse reads files and sends the prepared request"""
+    monkeypatch.setenv("ANYPARSER_API_KEY", "test-key")
+    test_file = tmp_path / "test.txt"
+    test_file.write_text("hello")
+
+    parser = Anyparser(
+        AnyparserOption(api_url="https://api.example.com", api_key="test-key")
+    )
+    prepared = parser.prepare()
+
+    with patch(
+        "anyparser_core.parser.async_request", return_value=ok_response
+    ) as mock_request:
+        first = await prepared.parse(str(test_file))
+        second = await prepared.parse(str(test_file))
+
+    assert first == second
+    assert first[0].markdown == "hello"
+
+    _, method, target, body, headers = mock_request.call_args.args
+    assert method == "POST"
+    assert target == "https://api.example.com/parse/v1"
+    assert headers is prepared.headers
+    assert b'filename="test.txt"' in body
+    assert prepared.parsed.files is None
+
+
+@pytest.mark.asyncio
+async def test_parse_reuses_prepared_request(tmp_path, monkeypatch, ok_response):
+    """Test repeated parse calls with the same options share prepared parts"""
+    monkeypatch.setenv("ANYPARSER_API_KEY", "test-key")
+    test_file = tmp_path / "test.txt"
+    test_file.write_text("hello")
+
+    parser = Anyparser(
+        AnyparserOption(api_url="https://api.example.com", api_key="test-key")
+    )
+
+    with patch(
+        "anyparser_core.parser.async_request", return_value=ok_response
+    ) as mock_request:
+        await parser.parse(str(test_file))
+        await parser.parse(str(test_file))
+
+    first_headers = mock_request.call_args_list[0].args[4]
+    second_headers = mock_request.call_args_list[1].args[4]
+    assert first_headers is second_headers
+    assert len(parser._prepared) == 1
+
+
+def test_prepared_cache_evicts_least_recently_used(monkeypatch):
+    """Test the options used most recently keep their prepared request"""
+    monkeypatch.setenv("ANYPARSER_API_KEY", "test-key")
+    parser = Anyparser(metrics=MetricsRegistry())
+
+    def prepared_for(number):
+        return parser._prepared_for(
+            AnyparserParsedOption(
+                api_url="https://api.example.com", api_key="k", max_depth=number
+            )
+        )
+
+    first = prepared_for(0)
+    for number in range(1, 17):
+        assert prepared_for(0) is first
+        prepared_for(number)
+
+    assert len(parser._prepared) == 16
+    assert prepared_for(0) is first
+    assert prepared_for(1) is not None
+    assert parser.metrics.cache_lookups.value(cache="prepared", result="miss") == 18
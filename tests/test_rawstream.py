@@ -0,0 +1,145 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+import io
+import socket
+
+from anyparser_core import Anyparser, AnyparserOption
+from anyparser_core.metrics import MetricsRegistry
+from anyparser_core.rawstream import RawWriter
+from anyparser_core.testing import FakeAnyparserServer, FaultProfile
+
+MARKDOWN = "# Résumé\n\n" + "Ünïcödé 文字 ✓ " * 2000
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("ANYPARSER_API_KEY", "test-key")
+
+
+@pytest.fixture
+def document(tmp_path):
+    path = tmp_path / "document.txt"
+    path.write_text("content")
+    return str(path)
+
+
+def markdown_parser(server):
+    return Anyparser(
+        AnyparserOption(api_url=server.url, api_key="test-key", format="markdown"),
+        metrics=MetricsRegistry(),
+    )
+
+
+def serve(faults=None):
+    return FakeAnyparserServer(
+        results_factory=lambda form: [{"markdown": MARKDOWN}], faults=faults
+    )
+
+
+@pytest.mark.asyncio
+async def test_text_destination_gets_decoded_markdown(document):
+    """Test characters split across parts reach a text file intact"""
+    # An odd part size splits multi-byte characters between parts
+    faults = FaultProfile(slow_drip_rate=1.0, drip_chunk_size=4093, drip_interval=0)
+    async with serve(faults) as server:
+        parser = markdown_parser(server)
+        text = io.StringIO()
+        written = await parser.parse_to(document, text)
+
+    assert text.getvalue() == MARKDOWN
+    assert written == len(MARKDOWN.encode("utf-8"))
+    assert parser.metrics.bytes_downloaded.value(model="text") == written
+
+
+@pytest.mark.asyncio
+async def test_binary_file_and_socket_destinations(document, tmp_path):
+    """Test bytes reach binary files and sockets unchanged"""
+    encoded = MARKDOWN.encode("utf-8")
+    async with serve() as server:
+        parser = markdown_parser(server)
+
+        path = tmp_path / "out.md"
+        with open(path, "wb") as f:
+            await parser.parse_to(document, f)
+        assert path.read_bytes() == encoded
+
+        left, right = socket.socketpair()
+        left.setblocking(False)
+        loop = asyncio.get_running_loop()
+        received = loop.run_in_executor(None, _read_all, right)
+        with left:
+            await parser.parse_to(document, left)
+        assert await received == encoded
+
+        # A blocking socket is written from a worker thread
+        left, right = socket.socketpair()
+        received = loop.run_in_executor(None, _read_all, right)
+        with left:
+            await parser.parse_to(document, left)
+        assert await received == encoded
+
+
+@pytest.mark.asyncio
+async def test_stream_writer_destination(document):
+    """Test an asyncio stream writer is written to and drained"""
+    received = asyncio.get_running_loop().create_future()
+
+    async def handle(reader, writer):
+        received.set_result(await reader.read())
+        writer.close()
+
+    listener = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    async with listener, serve() as server:
+        _, writer = await asyncio.open_connection("127.0.0.1", port)
+        await markdown_parser(server).parse_to(document, writer)
+        writer.close()
+        await writer.wait_closed()
+
+        assert await received == MARKDOWN.encode("utf-8")
+
+
+@pytest.mark.asyncio
+async def test_cancelled_stream_aborts_the_connection(document):
+    """Test cancelling parse_to while the body streams in closes the request"""
+    destination = io.BytesIO()
+    faults = FaultProfile(slow_drip_rate=1.0, drip_chunk_size=1024, drip_interval=0.05)
+    async with serve(faults) as server:
+        task = asyncio.ensure_future(
+            markdown_parser(server).parse_to(document, destination)
+        )
+        while not destination.getvalue():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert 0 < len(destination.getvalue()) < len(MARKDOWN.encode("utf-8"))
+
+
+@pytest.mark.asyncio
+async def test_truncated_character_and_bad_destination():
+    """Test a body ending mid-character fails and unwritable destinations are rejected"""
+    writer = RawWriter(io.StringIO())
+    await writer.write("é".encode("utf-8")[:1])
+    with pytest.raises(UnicodeDecodeError):
+        await writer.close()
+
+    with pytest.raises(TypeError):
+        RawWriter(object())
+
+
+def _read_all(sock):
+    chunks = []
+    with sock:
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
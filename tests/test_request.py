@@ -8,7 +8,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import http.client
 from unittest.mock import Mock
 
-from anyparser_core.request import async_request
+from anyparser_core.request import PreloadedResponse, abort_connection, async_request
 
 
 @pytest.mark.asyncio
@@ -74,3 +74,38 @@ async def test_async_request_large_payload():
 
     mock_conn.request.assert_called_once()
     assert response == mock_response
+
+
+@pytest.mark.asyncio
+async def test_async_request_reads_body_with_head():
+    """Test the body is read in the same call as the head when asked"""
+    mock_conn = Mock(spec=http.client.HTTPSConnection)
+    mock_response = Mock()
+    mock_response.status = 200
+    mock_response.read.return_value = b"body"
+    mock_conn.getresponse.return_value = mock_response
+    sent = []
+
+    response = await async_request(
+        mock_conn,
+        "POST",
+        "/test",
+        b"",
+        {},
+        on_sent=lambda: sent.append(True),
+        read=True,
+    )
+
+    assert isinstance(response, PreloadedResponse)
+    assert response.status == 200
+    assert response.read() == b"body"
+    assert sent == [True]
+    mock_response.read.assert_called_once_with()
+
+
+def test_abort_connection_ignores_shutdown_errors():
+    """Test a socket that is already disconnected is still closed"""
+    mock_conn = Mock()
+    mock_conn.sock.shutdown.side_effect = OSError
+    abort_connection(mock_conn)
+    mock_conn.close.assert_called_once_with()
@@ -0,0 +1,115 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from anyparser_core import (
+    Anyparser,
+    AnyparserOption,
+    AnyparserRobotsTxtDirective,
+    DisallowedError,
+    RobotsCache,
+)
+from anyparser_core.metrics import MetricsRegistry
+from anyparser_core.robots import RobotsMatcher
+from anyparser_core.testing import FakeAnyparserServer
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("ANYPARSER_API_KEY", "test-key")
+
+
+def test_longest_rule_wins():
+    """Test the most specific rule decides, with allow winning ties"""
+    matcher = RobotsMatcher(
+        allow=["/private/public", "/page"], disallow=["/private", "/page"]
+    )
+
+    assert matcher.allowed("/") is True
+    assert matcher.allowed("/private/data") is False
+    assert matcher.allowed("/private/public/index.html") is True
+    assert matcher.allowed("/page") is True
+
+
+@pytest.mark.parametrize(
+    "rule,path,matches",
+    [
+        ("/*.php", "/index.php", True),
+        ("/*.php", "/dir/index.php?x=1", True),
+        ("/*.php$", "/index.php", True),
+        ("/*.php$", "/index.php?x=1", False),
+        ("/fish*", "/fishheads", True),
+        ("/fish*", "/Fish", False),
+        ("/*/print", "/docs/a/print", True),
+        ("/a*b*c", "/axxbyyc", True),
+        ("/a*b*c", "/axxcyyb", False),
+        ("/end$", "/end/", False),
+        ("*", "/anything", True),
+    ],
+)
+def test_wildcards(rule, path, matches):
+    """Test "*" and "$" follow the robots.txt matching rules"""
+    assert RobotsMatcher(disallow=[rule]).allowed(path) is not matches
+
+
+def test_empty_disallow_allows_everything():
+    """Test an empty disallow rule does not block anything"""
+    assert RobotsMatcher(disallow=[""]).allowed("https://example.com/x") is True
+
+
+def test_cache_expires_and_filters_seeds():
+    """Test cached directives filter seeds until their time to live runs out"""
+    now = [0.0]
+    cache = RobotsCache(ttl=60, clock=lambda: now[0])
+    cache.put(
+        "https://example.com/docs",
+        AnyparserRobotsTxtDirective(
+            user_agent="*", allow=[], disallow=["/admin"], crawl_delay=5
+        ),
+    )
+
+    allowed, rejected = cache.filter_seeds(
+        [
+            "https://example.com/",
+            "https://EXAMPLE.com/admin/users",
+            "https://other.example/admin",
+        ]
+    )
+    assert allowed == ["https://example.com/", "https://other.example/admin"]
+    assert rejected == ["https://EXAMPLE.com/admin/users"]
+    assert cache.crawl_delay("https://example.com/a") == 5.0
+
+    full = RobotsCache(max_origins=2)
+    for host in ["a", "b", "c"]:
+        full.put(f"https://{host}.example/", AnyparserRobotsTxtDirective())
+    assert len(full) == 2
+    assert full.allowed("https://a.example/") is None
+    assert full.allowed("https://c.example/") is True
+
+    now[0] = 61
+    assert cache.allowed("https://example.com/admin") is None
+    assert cache.crawl_delay("https://example.com/a") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_parser_rejects_disallowed_seed():
+    """Test a crawl fills the cache and a disallowed seed never reaches the API"""
+    cache = RobotsCache()
+    async with FakeAnyparserServer(crawl_pages=2, chars=100) as server:
+        parser = Anyparser(
+            AnyparserOption(api_url=server.url, api_key="test-key", model="crawler"),
+            metrics=MetricsRegistry(),
+            robots_cache=cache,
+        )
+        await parser.parse("https://example.com")
+        assert cache.get("https://example.com/x").disallow == ["/private/"]
+
+        with pytest.raises(DisallowedError) as error:
+            await parser.parse("https://example.com/private/settings")
+
+    assert error.value.url == "https://example.com/private/settings"
+    assert server.stats.requests == 1
@@ -0,0 +1,151 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+
+from anyparser_core import Anyparser, AnyparserOption
+from anyparser_core.metrics import MetricsRegistry
+from anyparser_core.scheduler import PriorityScheduler
+from anyparser_core.testing import FakeAnyparserServer, FaultProfile
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("ANYPARSER_API_KEY", "test-key")
+
+
+async def drain(scheduler, waiters, order):
+    """Release slots one at a time, recording which waiter got each."""
+    while any(not task.done() for task in waiters):
+        scheduler.release()
+        await asyncio.sleep(0)
+        for task in waiters:
+            if task.done() and task not in order:
+                order.append(task)
+
+
+async def queue(scheduler, priority, count):
+    tasks = [asyncio.ensure_future(scheduler.acquire(priority)) for _ in range(count)]
+    await asyncio.sleep(0)
+    return tasks
+
+
+@pytest.mark.asyncio
+async def test_interactive_jumps_bulk_backlog():
+    """Test a late interactive call is served before an earlier bulk backlog"""
+    scheduler = PriorityScheduler(1)
+    await scheduler.acquire("bulk")
+    bulk = await queue(scheduler, "bulk", 4)
+    interactive = await queue(scheduler, "interactive", 1)
+    assert scheduler.snapshot()["queued"] == {"interactive": 1, "default": 0, "bulk": 4}
+
+    order = []
+    await drain(scheduler, bulk + interactive, order)
+
+    assert order[0] is interactive[0]
+    assert order[1:] == bulk
+
+
+@pytest.mark.asyncio
+async def test_slots_shared_by_weight():
+    """Test backlogged classes receive slots in proportion to their weights"""
+    scheduler = PriorityScheduler(1, {"high": 3, "low": 1})
+    await scheduler.acquire("low")
+    high = await queue(scheduler, "high", 12)
+    low = await queue(scheduler, "low", 12)
+
+    order = []
+    await drain(scheduler, high + low, order)
+
+    first = order[:8]
+    assert sum(task in high for task in first) == 6
+    assert sum(task in low for task in first) == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_frees_its_place():
+    """Test cancelling a queued call neither leaks a slot nor blocks others"""
+    scheduler = PriorityScheduler(1)
+    await scheduler.acquire("default")
+    first, second = await queue(scheduler, "default", 2)
+
+    first.cancel()
+    await asyncio.sleep(0)
+    scheduler.release()
+    await asyncio.sleep(0)
+
+    assert second.done() and not second.cancelled()
+    assert scheduler.snapshot() == {
+        "capacity": 1,
+        "in_flight": 1,
+        "queued": {"interactive": 0, "default": 0, "bulk": 0},
+    }
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_returns_granted_slot():
+    """Test a call cancelled just after being granted a slot gives it back"""
+    scheduler = PriorityScheduler(1)
+    await scheduler.acquire("default")
+    (waiter,) = await queue(scheduler, "default", 1)
+
+    scheduler.release()
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert scheduler.snapshot()["in_flight"] == 0
+
+
+def test_scheduler_rejects_bad_configuration():
+    """Test invalid capacities, weights and priorities are rejected"""
+    with pytest.raises(ValueError):
+        PriorityScheduler(0)
+    with pytest.raises(ValueError):
+        PriorityScheduler(1, {"bulk": 0})
+    with pytest.raises(ValueError, match="Invalid priority"):
+        PriorityScheduler(1).check("urgent")
+
+
+@pytest.mark.asyncio
+async def test_parse_priority_jumps_bulk_queue(tmp_path):
+    """Test an interactive parse overtakes queued bulk work on a busy parser"""
+    paths = []
+    for index in range(6):
+        path = tmp_path / f"bulk-{index}.txt"
+        path.write_text("bulk")
+        paths.append(str(path))
+    urgent = tmp_path / "urgent.txt"
+    urgent.write_text("urgent")
+
+    async with FakeAnyparserServer(faults=FaultProfile(latency=0.02)) as server:
+        parser = Anyparser(
+            AnyparserOption(api_url=server.url, api_key="test-key"),
+            metrics=MetricsRegistry(),
+            max_in_flight=1,
+        )
+        completed = []
+
+        async def run_bulk():
+            async for batch, _ in parser.parse_iter(
+                paths, concurrency=6, priority="bulk"
+            ):
+                completed.append(os.path.basename(batch[0]))
+
+        bulk = asyncio.ensure_future(run_bulk())
+        await asyncio.sleep(0.01)
+        results = await parser.parse(str(urgent), priority="interactive")
+        completed.append(results[0].original_filename)
+        await bulk
+
+        with pytest.raises(ValueError, match="Invalid priority"):
+            await parser.parse(str(urgent), priority="urgent")
+
+    assert completed.index("urgent.txt") <= 1
+    assert server.stats.max_in_flight == 1
+    assert parser.stats()["scheduler"]["in_flight"] == 0
+    assert parser.metrics.queue_wait.count(priority="interactive") == 1
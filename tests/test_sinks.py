@@ -0,0 +1,178 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+import io
+import json
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+from anyparser_core import (
+    AnyparserCrawlResult,
+    AnyparserRobotsTxtDirective,
+    AnyparserUrl,
+    NdjsonFileSink,
+    ResultSink,
+    RotatingFileSink,
+    StdoutSink,
+)
+from anyparser_core.serialize import dumps, result_to_dict
+
+
+class SlowSink(ResultSink):
+    """Sink taking a while for every write and recording what it wrote."""
+
+    def __init__(self, buffer, fail=False):
+        super().__init__(buffer)
+        self.lines = []
+        self.fail = fail
+
+    def _write_lines(self, lines):
+        time.sleep(0.01)
+        if self.fail:
+            raise OSError("disk full")
+        self.lines += lines
+
+
+def crawl_result():
+    return AnyparserCrawlResult(
+        rid="r",
+        start_url="https://example.com",
+        total_characters=4,
+        total_items=1,
+        markdown="body",
+        items=[AnyparserUrl(url="https://example.com/ü", markdown="body")],
+        robots_directive=AnyparserRobotsTxtDirective(disallow=["/private"]),
+    )
+
+
+def test_dumps_matches_asdict_without_copying():
+    """Test the serializer output equals asdict and reuses leaf values"""
+    result = crawl_result()
+
+    assert dumps(result) == json.dumps(
+        asdict(result), ensure_ascii=False, separators=(",", ":")
+    )
+    converted = result_to_dict([result])[0]
+    assert converted == asdict(result)
+    assert converted["items"] is not result.items
+    assert converted["items"][0]["markdown"] is result.items[0].markdown
+
+
+def test_serializers_handle_plain_values():
+    """Test dicts, datetimes and other values are converted or rejected"""
+
+    @dataclass
+    class Stamped:
+        at: datetime
+
+    stamped = Stamped(datetime(2024, 1, 1))
+    assert dumps({"stamped": stamped}) == '{"stamped":{"at":"2024-01-01T00:00:00"}}'
+    assert result_to_dict({"stamped": stamped, "type": Stamped}) == {
+        "stamped": {"at": datetime(2024, 1, 1)},
+        "type": Stamped,
+    }
+    with pytest.raises(TypeError, match="Object of type object"):
+        dumps(object())
+
+
+def test_result_sink_is_abstract():
+    """Test sinks must implement writing and buffer at least one line"""
+    with pytest.raises(TypeError):
+        ResultSink()
+    with pytest.raises(ValueError):
+        SlowSink(buffer=0)
+
+
+@pytest.mark.asyncio
+async def test_slow_sink_pauses_producer():
+    """Test a producer never runs more than the buffer ahead of the writer"""
+    sink = SlowSink(buffer=4)
+    ahead = []
+
+    async def produce():
+        for number in range(40):
+            ahead.append(sink.records - sink.written)
+            yield {"n": number}
+
+    assert await sink.consume(produce()) == 40
+    await sink.close()
+
+    assert [json.loads(line)["n"] for line in sink.lines] == list(range(40))
+    # The queue holds the buffer, plus the batch being written
+    assert max(ahead) <= 8
+
+
+@pytest.mark.asyncio
+async def test_write_errors_reach_the_producer():
+    """Test a failed write is raised instead of blocking the producer"""
+    sink = SlowSink(buffer=1, fail=True)
+
+    with pytest.raises(OSError):
+        for number in range(10):
+            await sink.write({"n": number})
+    with pytest.raises(OSError):
+        await sink.close()
+
+
+@pytest.mark.asyncio
+async def test_file_sink_writes_parse_iter_records(tmp_path):
+    """Test parse_iter tuples become result and error records"""
+    path = tmp_path / "out.ndjson"
+
+    async def stream():
+        yield ["a.pdf"], [crawl_result()]
+        yield ["b.pdf"], ValueError("cannot parse")
+
+    async with NdjsonFileSink(path) as sink:
+        await sink.consume(stream())
+        sink.write_sync({"done": True})
+
+    records = [json.loads(line) for line in path.read_text("utf-8").splitlines()]
+    assert records[0]["inputs"] == ["a.pdf"]
+    assert records[0]["result"][0]["items"][0]["url"] == "https://example.com/ü"
+    assert records[1] == {"inputs": ["b.pdf"], "error": "cannot parse"}
+    assert records[2] == {"done": True}
+
+
+@pytest.mark.asyncio
+async def test_rotating_sink_splits_files(tmp_path):
+    """Test files rotate by record count and size, continuing after old files"""
+    async with RotatingFileSink(tmp_path, max_records=3) as sink:
+        await sink.consume({"n": number} for number in range(7))
+    assert [path.name for path in sink.files] == [
+        "results-00000.ndjson",
+        "results-00001.ndjson",
+        "results-00002.ndjson",
+    ]
+    assert [len(path.read_text().splitlines()) for path in sink.files] == [3, 3, 1]
+
+    async with RotatingFileSink(tmp_path, max_bytes=20) as sink:
+        for number in range(3):
+            await sink.write({"n": number, "pad": "x"})
+    assert [path.name for path in sink.files] == [
+        "results-00003.ndjson",
+        "results-00004.ndjson",
+        "results-00005.ndjson",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stdout_sink_writes_stream():
+    """Test the stdout sink writes to the given stream and rejects late writes"""
+    stream = io.StringIO()
+    sink = StdoutSink(stream)
+    await sink.write({"a": 1})
+    await sink.close()
+
+    assert stream.getvalue() == '{"a":1}\n'
+    with pytest.raises(ValueError):
+        await sink.write({"a": 2})
+    with pytest.raises(ValueError):
+        sink.write_sync({"a": 2})
+    await sink.close()
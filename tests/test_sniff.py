@@ -0,0 +1,159 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from anyparser_core import (
+    Anyparser,
+    AnyparserOption,
+    AnyparserPdfResult,
+    build_form,
+    sniff_content_type,
+    sniff_file,
+)
+from anyparser_core import sniff as sniff_module
+from anyparser_core.metrics import MetricsRegistry
+from anyparser_core.options import AnyparserParsedOption, UploadedFile
+from anyparser_core.parser import _content_types, _is_pdf
+from anyparser_core.testing import FakeAnyparserServer
+from anyparser_core.validator import validate_and_parse
+
+OOXML = "application/vnd.openxmlformats-officedocument."
+OLE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("ANYPARSER_API_KEY", "test-key")
+
+
+@pytest.mark.parametrize(
+    "head, filename, expected",
+    [
+        (b"%PDF-1.7\n", "report.txt", "application/pdf"),
+        (b"%PDF-1.4\n", "scan", "application/pdf"),
+        (b"\x89PNG\r\n\x1a\n\x00\x00", "image", "image/png"),
+        (b"\xff\xd8\xff\xe0", "photo.png", "image/jpeg"),
+        (b"\x00\x00\x00\x18ftypheic", "IMG_0001", "image/heic"),
+        (b"\x00\x00\x00\x18ftypisom", "clip", "video/mp4"),
+        (
+            b"PK\x03\x04\x14\x00[Content_Types].xml word/document.xml",
+            "x",
+            OOXML + "wordprocessingml.document",
+        ),
+        (
+            b"PK\x03\x04\x14\x00[Content_Types].xml",
+            "book.xlsx",
+            OOXML + "spreadsheetml.sheet",
+        ),
+        (
+            b"PK\x03\x04\x14\x00mimetypeapplication/epub+zip",
+            "book",
+            "application/epub+zip",
+        ),
+        (b"PK\x03\x04\x14\x00data.bin", "archive.pdf", "application/zip"),
+        (OLE + b"\x00" * 8, "letter.doc", "application/msword"),
+        (OLE + b"\x00" * 8, "letter", "application/x-ole-storage"),
+        (b"test", "test.pdf", "application/pdf"),
+        (b"<!DOCTYPE html><html>", "page", "text/html"),
+        (b"<?xml version='1.0'?><svg/>", "logo.svg", "image/svg+xml"),
+        (b"# Title\n\nCaf\xc3", "README.md", "text/markdown"),
+        (b"a,b\n1,2\n", "data.csv", "text/csv"),
+        (b"plain words", "notes", "text/plain"),
+        (b"\xff\xfeh\x00i\x00", "notes", "text/plain"),
+        (b"\x00\x01\x02binary", "blob", "application/octet-stream"),
+    ],
+)
+def test_sniff_content_type(head, filename, expected):
+    """Test signatures win over extensions, which win over text detection"""
+    assert sniff_content_type(head, filename) == expected
+
+
+def test_sniff_file_caches_by_identity(tmp_path, monkeypatch):
+    """Test an unchanged file is not read again and a changed one is"""
+    path = tmp_path / "upload"
+    path.write_bytes(b"%PDF-1.7\n" + b"x" * 4096)
+    assert sniff_file(path) == "application/pdf"
+
+    def fail(file):
+        raise AssertionError("file read again")
+
+    monkeypatch.setattr(sniff_module, "_read_head", fail)
+    assert sniff_file(str(path)) == "application/pdf"
+    with open(path, "rb") as f:
+        f.seek(100)
+        assert sniff_file(f) == "application/pdf"
+        assert f.tell() == 100
+
+    monkeypatch.undo()
+    path.write_bytes(b"\x89PNG\r\n\x1a\n")
+    assert sniff_file(path) == "image/png"
+
+
+def test_sniff_file_evicts_least_recently_used(tmp_path, monkeypatch):
+    """Test the cache keeps only the most recently sniffed files"""
+    monkeypatch.setattr(sniff_module, "_CACHE_SIZE", 1)
+    monkeypatch.setattr(sniff_module, "_cache", sniff_module.OrderedDict())
+    for name in ["a.pdf", "b.png"]:
+        (tmp_path / name).write_bytes(b"data")
+        sniff_file(tmp_path / name)
+
+    assert len(sniff_module._cache) == 1
+    assert sniff_module._cache.popitem()[1] == (None, "text/plain")
+
+
+def test_sniff_file_without_pread(tmp_path, monkeypatch):
+    """Test open files are read by seeking where pread is unavailable"""
+    monkeypatch.delattr(sniff_module.os, "pread")
+    path = tmp_path / "upload"
+    path.write_bytes(b"\x89PNG\r\n\x1a\n" + b"x" * 1024)
+
+    with open(path, "rb") as f:
+        f.seek(700)
+        assert sniff_file(f) == "image/png"
+        assert f.tell() == 700
+
+
+def test_uploads_are_sniffed_once(monkeypatch):
+    """Test the type sniffed when a file is loaded is reused for the form and results"""
+    upload = UploadedFile(filename="scan", contents=b"%PDF-1.4\n")
+    parsed = AnyparserParsedOption(
+        api_url="https://api.example.com", api_key="k", files=[upload]
+    )
+
+    def fail(head, filename=""):
+        raise AssertionError("sniffed again")
+
+    monkeypatch.setattr(sniff_module, "sniff_content_type", fail)
+    assert b"Content-Type: application/pdf" in build_form(parsed, "boundary")
+    assert _content_types(parsed) == {"scan": "application/pdf"}
+    monkeypatch.undo()
+
+    # A result for a file that was not uploaded is judged by its name
+    assert _is_pdf("other.pdf", {"scan": "application/pdf"})
+    assert not _is_pdf("other.txt", None)
+
+
+@pytest.mark.asyncio
+async def test_extensionless_pdf_is_uploaded_and_decoded_as_pdf(tmp_path):
+    """Test the sniffed type drives the upload and the result type"""
+    path = tmp_path / "scan"
+    path.write_bytes(b"%PDF-1.4\n%binary\n")
+
+    parsed = await validate_and_parse(
+        str(path), AnyparserOption(api_url="https://api.example.com")
+    )
+    assert parsed.files[0].content_type == "application/pdf"
+    assert b"Content-Type: application/pdf" in build_form(parsed, "boundary")
+
+    async with FakeAnyparserServer(pdf_pages=2) as server:
+        parser = Anyparser(
+            AnyparserOption(api_url=server.url, api_key="test-key"),
+            metrics=MetricsRegistry(),
+        )
+        result = await parser.parse(str(path))
+
+    assert isinstance(result[0], AnyparserPdfResult)
+    assert [page.page_number for page in result[0].items] == [1, 2]
@@ -0,0 +1,255 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import http.client
+import json
+from dataclasses import replace
+
+from anyparser_core import Anyparser, AnyparserOption
+from anyparser_core.jsonstream import CrawlStreamDecoder
+from anyparser_core.metrics import MetricsRegistry
+from anyparser_core.store import CrawlStore
+from anyparser_core.testing import FakeAnyparserServer, FaultProfile, payloads
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("ANYPARSER_API_KEY", "test-key")
+
+
+def crawler(server):
+    return Anyparser(
+        AnyparserOption(
+            api_url=server.url, api_key="test-key", model="crawler", max_executions=100
+        ),
+        metrics=MetricsRegistry(),
+    )
+
+
+def test_decoder_yields_items_byte_by_byte():
+    """Test pages are decoded however the body is split"""
+    body = json.dumps(
+        [payloads.crawl_result("https://example.com", 3, 50)], indent=1
+    ).encode()
+
+    decoder = CrawlStreamDecoder()
+    items = []
+    for index in range(len(body)):
+        items += decoder.feed(body[index : index + 1])
+    items += decoder.close()
+
+    assert [item["url"] for item in items] == [
+        "https://example.com",
+        "https://example.com/page/1",
+        "https://example.com/page/2",
+    ]
+    assert decoder.results[0]["rid"] == "rid-crawl"
+    assert decoder.results[0]["robots_directive"]["user_agent"] == "*"
+
+
+def test_decoder_rejects_truncated_body():
+    """Test a body cut off mid-page is reported when the decoder is closed"""
+    body = json.dumps([payloads.crawl_result("https://example.com", 3, 50)]).encode()
+
+    decoder = CrawlStreamDecoder()
+    decoder.feed(body[: len(body) // 2])
+    with pytest.raises(ValueError, match="Truncated"):
+        decoder.close()
+
+
+@pytest.mark.parametrize(
+    "body, message",
+    [
+        (b"[1]", "Unexpected '1'"),
+        (b"{}", "must be a JSON array"),
+        (b'[{1: 2, "items": []}]', "Malformed crawl result"),
+        (b'[{"items": {}}]', "must be an array"),
+    ],
+)
+def test_decoder_rejects_malformed_body(body, message):
+    """Test bodies that are not crawl responses are rejected"""
+    decoder = CrawlStreamDecoder()
+    with pytest.raises(ValueError, match=message):
+        decoder.feed(body)
+        decoder.close()
+
+
+def test_decoder_waits_for_number_split_across_parts():
+    """Test a number at the end of a part is not decoded until it ends"""
+    decoder = CrawlStreamDecoder()
+    assert decoder.feed(b'[{"total_items": 12') == []
+    assert decoder.feed(b'3, "items": [{"url": "https://example.com"}]}]') == [
+        {"url": "https://example.com"}
+    ]
+    assert decoder.close() == []
+    assert decoder.results == [{"total_items": 123}]
+
+
+def test_decoder_joins_large_page_a_logarithmic_number_of_times():
+    """Test the parts of one large page are only joined as the text doubles"""
+    result = payloads.crawl_result("https://example.com", 1, 1 << 20)
+    body = json.dumps([result]).encode()
+
+    decoder = CrawlStreamDecoder()
+    parse = decoder._parse
+    calls = []
+
+    def counting_parse(final):
+        calls.append(final)
+        return parse(final)
+
+    decoder._parse = counting_parse
+    items = []
+    for index in range(0, len(body), 1024):
+        items += decoder.feed(body[index : index + 1024])
+    items += decoder.close()
+
+    assert items == result["items"]
+    assert len(calls) < 30
+
+
+@pytest.mark.asyncio
+async def test_store_lookups_and_run_diff(tmp_path):
+    """Test pages are found by normalized URL and runs are diffed"""
+    path = tmp_path / "crawl.db"
+    async with FakeAnyparserServer(crawl_pages=4, chars=100) as server:
+        parser = crawler(server)
+        with CrawlStore(path) as store:
+            first = store.record((await parser.parse("https://example.com"))[0])
+
+        server.crawl_pages = 3
+        result = (await parser.parse("https://example.com"))[0]
+
+    result.items[1].markdown = "# Rewritten"
+    with CrawlStore(path) as store:
+        second = store.record(result)
+
+        stored = store.get("HTTPS://EXAMPLE.COM:443/page/1#section")
+        assert stored.status_code == 200
+        assert stored.crawled_at == "2024-01-01T00:00:00Z"
+        assert stored.directive.underlying[0].name == "robots"
+        assert stored.robots_directive.user_agent == "*"
+        assert stored.run_id == second
+        assert store.page("https://example.com/page/1").markdown == "# Rewritten"
+        assert "https://example.com/page/3" in store
+        assert len(store) == 4
+
+        diff = store.diff(first, second)
+        assert diff.changed == ["https://example.com/page/1"]
+        assert diff.removed == ["https://example.com/page/3"]
+        assert diff.new == []
+        assert len(diff.unchanged) == 2
+        assert [run.pages for run in store.runs()] == [4, 3]
+
+
+@pytest.mark.asyncio
+async def test_crawl_iter_streams_pages_into_store():
+    """Test pages are yielded and stored before the response has finished"""
+    faults = FaultProfile(slow_drip_rate=1.0, drip_chunk_size=4096, drip_interval=0.01)
+    async with FakeAnyparserServer(crawl_pages=40, chars=500, faults=faults) as server:
+        parser = crawler(server)
+        store = CrawlStore()
+        pages = []
+        in_flight = []
+        async for page in parser.crawl_iter("https://example.com", store=store):
+            pages.append(page)
+            in_flight.append(server.stats.in_flight)
+
+        expected = (await parser.parse("https://example.com"))[0]
+
+    assert pages == expected.items
+    assert in_flight[0] == 1
+    assert len(store) == 40
+    assert store.runs()[0].finished_at is not None
+    assert store.get("https://example.com").robots_directive == (
+        expected.robots_directive
+    )
+    assert parser.metrics.requests.value(model="crawler", status=200) == 2
+    assert parser.metrics.bytes_downloaded.value(model="crawler") > 0
+
+
+@pytest.mark.asyncio
+async def test_incremental_crawl_from_store():
+    """Test a store stands in for the earlier crawl result"""
+    async with FakeAnyparserServer(crawl_pages=3, chars=100) as server:
+        parser = crawler(server)
+        store = CrawlStore()
+        async for _ in parser.crawl_iter("https://example.com", store=store):
+            pass
+
+        server.crawl_pages = 4
+        incremental = await parser.crawl_incremental("https://example.com", store)
+
+    assert incremental.diff.new == ["https://example.com/page/3"]
+    assert len(incremental.diff.unchanged) == 3
+    assert incremental.result.total_items == 4
+
+
+@pytest.mark.asyncio
+async def test_store_diff_tracks_failed_pages():
+    """Test pages failing in a run are removed, then new once they recover"""
+    async with FakeAnyparserServer(crawl_pages=3, chars=100) as server:
+        result = (await crawler(server).parse("https://example.com"))[0]
+
+    failed = replace(result.items[1], status_code=404, status_message="Not Found")
+    unseen = replace(
+        result.items[2], url="https://example.com/missing", status_code=404
+    )
+    with CrawlStore(commit_every=2) as store:
+        first = store.record(result)
+        second = store.record(replace(result, items=[*result.items, unseen]))
+        third = store.record(replace(result, items=[result.items[0], failed]))
+        fourth = store.record(result)
+
+        assert store.get("https://example.com/unknown") is None
+        assert [page.url for page in store.pages()] == [
+            "https://example.com",
+            "https://example.com/missing",
+            "https://example.com/page/1",
+            "https://example.com/page/2",
+        ]
+        assert store.diff(first, second).new == []
+        diff = store.diff(second, third)
+        assert diff.removed == [
+            "https://example.com/page/1",
+            "https://example.com/page/2",
+        ]
+        assert store.diff(third, fourth).new == [
+            "https://example.com/page/1",
+            "https://example.com/page/2",
+        ]
+
+
+@pytest.mark.asyncio
+async def test_crawl_iter_leaves_abandoned_and_failed_runs_unfinished():
+    """Test only crawls received in full are recorded as finished runs"""
+    async with FakeAnyparserServer(crawl_pages=20, chars=100) as server:
+        parser = crawler(server)
+        store = CrawlStore()
+        async for _ in parser.crawl_iter("https://example.com", store=store):
+            pass
+
+        pages = parser.crawl_iter("https://example.com", store=store)
+        await pages.__anext__()
+        await pages.aclose()
+
+        server.faults = FaultProfile(
+            server_error_rate=1.0, server_error_statuses=(503,)
+        )
+        with pytest.raises(http.client.HTTPException, match="HTTP 503"):
+            async for _ in parser.crawl_iter("https://example.com", store=store):
+                pass
+
+    finished, abandoned, failed = store.runs()
+    assert finished.finished_at is not None
+    assert abandoned.finished_at is None
+    assert abandoned.pages >= 1
+    assert failed.finished_at is None
+    with pytest.raises(ValueError, match=f"Run {abandoned.id} "):
+        store.diff(finished.id, abandoned.id)
+    with pytest.raises(ValueError, match=f"Run {failed.id} "):
+        store.diff(failed.id, finished.id)
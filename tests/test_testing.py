@@ -0,0 +1,266 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+import http.client
+import socket
+from unittest.mock import Mock
+
+from anyparser_core import (
+    Anyparser,
+    AnyparserCrawlResult,
+    AnyparserOption,
+    AnyparserParsedOption,
+    AnyparserPdfResult,
+    UploadedFile,
+)
+from anyparser_core.form import build_form
+from anyparser_core.testing import FakeAnyparserServer, FaultProfile, parse_multipart
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("ANYPARSER_API_KEY", "test-key")
+
+
+@pytest.fixture
+def pdf_file(tmp_path):
+    path = tmp_path / "report.pdf"
+    path.write_bytes(b"%PDF-1.7 test")
+    return str(path)
+
+
+def make_parser(server, **options):
+    return Anyparser(AnyparserOption(api_url=server.url, api_key="test-key", **options))
+
+
+def test_parse_multipart_round_trip():
+    """Test the decoder recovers every field and file build_form encodes"""
+    parsed = AnyparserParsedOption(
+        api_url="https://api.example.com",
+        api_key="test-key",
+        files=[
+            UploadedFile(filename="a.txt", contents=b"first\r\n--not-a-boundary"),
+            UploadedFile(filename="b.png", contents=b"\x89PNG"),
+        ],
+    )
+
+    form = parse_multipart(build_form(parsed, "boundary123"), "boundary123")
+
+    assert form.fields == {"format": "json", "model": "text"}
+    assert [(f.filename, f.content_type, f.contents) for f in form.files] == [
+        ("a.txt", "text/plain", b"first\r\n--not-a-boundary"),
+        ("b.png", "image/png", b"\x89PNG"),
+    ]
+
+    with pytest.raises(ValueError):
+        parse_multipart(b"garbage", "boundary123")
+
+
+@pytest.mark.parametrize(
+    "body, message",
+    [
+        (b"--b\r\n\r\nvalue", "Unterminated"),
+        (b"--bxx", "Malformed multipart delimiter"),
+        (
+            b"--b\r\nContent-Disposition: form-data\r\n\r\nvalue\r\n--b--",
+            "without a field name",
+        ),
+    ],
+)
+def test_parse_multipart_rejects_malformed_parts(body, message):
+    """Test malformed delimiters and parts are rejected"""
+    with pytest.raises(ValueError, match=message):
+        parse_multipart(body, "b")
+
+
+def multipart_body(**fields):
+    parts = [
+        f'--b\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+        for name, value in fields.items()
+    ]
+    return ("".join(parts) + "--b--\r\n").encode()
+
+
+FORM = "multipart/form-data; boundary=b"
+
+
+@pytest.mark.parametrize(
+    "method, target, content_type, body, status",
+    [
+        ("POST", "/other", FORM, b"", 404),
+        ("GET", "/parse/v1", FORM, b"", 405),
+        ("POST", "/parse/v1", "text/plain", b"", 400),
+        ("POST", "/parse/v1", FORM, b"garbage", 400),
+        ("POST", "/parse/v1", FORM, multipart_body(format="bogus"), 400),
+        ("POST", "/parse/v1", FORM, multipart_body(model="bogus"), 400),
+        ("POST", "/parse/v1", FORM, multipart_body(model="crawler"), 400),
+        ("POST", "/parse/v1", FORM, multipart_body(format="json"), 400),
+    ],
+)
+def test_fake_server_validates_requests(method, target, content_type, body, status):
+    """Test requests the real API would reject get the same status"""
+    with FakeAnyparserServer() as server:
+        conn = http.client.HTTPConnection(server.host, server.port)
+        conn.request(
+            method,
+            target,
+            body,
+            {"Authorization": "Bearer test-key", "Content-Type": content_type},
+        )
+        response = conn.getresponse()
+        response.read()
+        conn.close()
+
+    assert response.status == status
+    assert server.stats.statuses == {status: 1}
+
+
+@pytest.mark.parametrize(
+    "request_bytes, reply",
+    [
+        (b"POST /parse/v1 HTTP/1.1\r\nHost: x\r\n\r\n", b"HTTP/1.1 411 "),
+        (
+            b"GET /parse/v1 HTTP/1.0\r\nContent-Length: 0\r\n\r\n",
+            b"HTTP/1.1 405 ",
+        ),
+        (b"GARBAGE\r\n", b""),
+    ],
+)
+def test_fake_server_closes_connections(request_bytes, reply):
+    """Test the server closes connections it cannot or should not reuse"""
+    with FakeAnyparserServer() as server:
+        with socket.create_connection((server.host, server.port)) as sock:
+            sock.sendall(request_bytes)
+            received = b""
+            while True:
+                data = sock.recv(65536)
+                if not data:
+                    break
+                received += data
+
+    assert received.startswith(reply)
+
+
+@pytest.mark.asyncio
+async def test_fake_server_goaway_drops_http1_connection(pdf_file):
+    """Test an injected goaway closes an HTTP/1.1 connection without a response"""
+    async with FakeAnyparserServer(faults=FaultProfile(goaway_rate=1.0)) as server:
+        with pytest.raises(ConnectionError):
+            await make_parser(server).parse(pdf_file)
+
+    assert server.stats.goaways == 1
+    assert server.stats.statuses == {}
+
+
+def test_fake_server_in_thread_reports_startup_errors():
+    """Test a server that cannot listen raises in the starting thread"""
+    with FakeAnyparserServer() as server:
+        with pytest.raises(OSError):
+            with FakeAnyparserServer(port=server.port):
+                pass
+
+
+def test_fake_server_reset_without_linger():
+    """Test a reset still aborts the transport if SO_LINGER cannot be set"""
+    writer = Mock()
+    writer.get_extra_info.return_value.setsockopt.side_effect = OSError
+    FakeAnyparserServer._reset(writer)
+    writer.transport.abort.assert_called_once_with()
+
+
+@pytest.mark.asyncio
+async def test_fake_server_pdf_results(pdf_file):
+    """Test uploads come back as PDF results with one item per page"""
+    async with FakeAnyparserServer(api_key="test-key", pdf_pages=3) as server:
+        results = await make_parser(server).parse(pdf_file)
+
+    assert len(results) == 1
+    assert isinstance(results[0], AnyparserPdfResult)
+    assert results[0].original_filename == "report.pdf"
+    assert [page.page_number for page in results[0].items] == [1, 2, 3]
+    assert server.stats.statuses == {200: 1}
+
+
+@pytest.mark.asyncio
+async def test_fake_server_crawl_results():
+    """Test crawl requests are capped by max_executions"""
+    async with FakeAnyparserServer(crawl_pages=50) as server:
+        parser = make_parser(server, model="crawler", max_executions=5)
+        results = await parser.parse("https://example.com")
+
+    assert isinstance(results[0], AnyparserCrawlResult)
+    assert results[0].total_items == 5
+    assert results[0].items[0].url == "https://example.com"
+
+
+@pytest.mark.asyncio
+async def test_fake_server_markdown_format(pdf_file):
+    """Test text formats return the markdown body"""
+    async with FakeAnyparserServer() as server:
+        content = await make_parser(server, format="markdown").parse(pdf_file)
+
+    assert content.startswith("# Page 1")
+
+
+@pytest.mark.asyncio
+async def test_fake_server_rejects_wrong_key(pdf_file):
+    """Test requests with a different bearer token get a 401"""
+    async with FakeAnyparserServer(api_key="other-key") as server:
+        with pytest.raises(http.client.HTTPException, match="HTTP 401"):
+            await make_parser(server).parse(pdf_file)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "faults, status",
+    [
+        (FaultProfile(rate_limit_rate=1.0), 429),
+        (FaultProfile(server_error_rate=1.0, server_error_statuses=(503,)), 503),
+    ],
+)
+async def test_fake_server_injects_errors(pdf_file, faults, status):
+    """Test rate limits and server errors are injected at the configured rate"""
+    async with FakeAnyparserServer(faults=faults) as server:
+        with pytest.raises(http.client.HTTPException, match=f"HTTP {status}"):
+            await make_parser(server).parse(pdf_file)
+
+    assert server.stats.statuses == {status: 1}
+
+
+@pytest.mark.asyncio
+async def test_fake_server_resets_connections(pdf_file):
+    """Test injected resets surface as connection errors on the client"""
+    async with FakeAnyparserServer(faults=FaultProfile(reset_rate=1.0)) as server:
+        with pytest.raises((ConnectionError, http.client.HTTPException)):
+            await make_parser(server).parse(pdf_file)
+
+    assert server.stats.resets == 1
+
+
+@pytest.mark.asyncio
+async def test_fake_server_slow_drip_and_concurrency(pdf_file):
+    """Test dripped responses decode intact and concurrent requests overlap"""
+    faults = FaultProfile(
+        latency=0.05, slow_drip_rate=1.0, drip_chunk_size=4096, drip_interval=0
+    )
+    async with FakeAnyparserServer(faults=faults) as server:
+        parser = make_parser(server)
+        results = await asyncio.gather(*[parser.parse(pdf_file) for _ in range(4)])
+
+    assert all(result[0].total_items == 10 for result in results)
+    assert server.stats.slow_drips == 4
+    assert server.stats.max_in_flight > 1
+
+
+def test_fake_server_in_thread(pdf_file):
+    """Test the server runs on a background loop for synchronous callers"""
+    with FakeAnyparserServer() as server:
+        results = asyncio.run(make_parser(server).parse(pdf_file))
+
+    assert results[0].original_filename == "report.pdf"
+    assert server.stats.requests == 1
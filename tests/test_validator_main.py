@@ -238,3 +238,85 @@ async def test_validate_and_parse_file_locked(tmp_path, monkeypatch, mock_api_ke
 
     with pytest.raises(IOError, match="is locked by another process"):
         await validate_and_parse(str(test_file))
+
+
+def test_resolve_options_reuses_validation(monkeypatch, mock_api_key):
+    """Test repeated identical options are only validated once"""
+    from unittest.mock import patch
+
+    from anyparser_core.validator import main
+
+    monkeypatch.setenv("ANYPARSER_API_KEY", mock_api_key)
+    main._prevalidated_option.cache_clear()
+    options = AnyparserOption(
+        api_url="https://api.example.com",
+        api_key="test-key",
+        model="ocr",
+        ocr_language=[OcrLanguage.ENGLISH],
+    )
+
+    with patch.object(main, "validate_option", wraps=main.validate_option) as spy:
+        first = main.resolve_options(options)
+        second = main.resolve_options(
+            AnyparserOption(
+                api_url="https://api.example.com",
+                api_key="test-key",
+                model="ocr",
+                ocr_language=[OcrLanguage.ENGLISH],
+            )
+        )
+
+    assert spy.call_count == 1
+    assert first == second
+    assert first is not second
+    assert second.ocr_language == [OcrLanguage.ENGLISH]
+
+
+def test_resolve_options_revalidates_on_change(monkeypatch, mock_api_key):
+    """Test changed options or environment are validated again"""
+    from anyparser_core.validator import main
+
+    monkeypatch.setenv("ANYPARSER_API_KEY", mock_api_key)
+    options = AnyparserOption(api_url="https://api.example.com", api_key="test-key")
+    assert main.resolve_options(options).format == "json"
+
+    options.format = "markdown"
+    assert main.resolve_options(options).format == "markdown"
+
+    monkeypatch.setenv("ANYPARSER_API_URL", "not-a-url")
+    with pytest.raises(ValueError, match="Invalid API URL"):
+        main.resolve_options(options)
+
+
+def test_resolve_options_returns_independent_copies(monkeypatch, mock_api_key):
+    """Test mutating a resolved option does not leak into later calls"""
+    from anyparser_core.validator import main
+
+    monkeypatch.setenv("ANYPARSER_API_KEY", mock_api_key)
+    options = AnyparserOption(
+        api_url="https://api.example.com",
+        api_key="test-key",
+        model="ocr",
+        ocr_language=[OcrLanguage.ENGLISH],
+    )
+
+    main.resolve_options(options).ocr_language.append(OcrLanguage.JAPANESE)
+
+    assert main.resolve_options(options).ocr_language == [OcrLanguage.ENGLISH]
+
+
+def test_resolve_options_validates_unhashable_values(monkeypatch, mock_api_key):
+    """Test options holding unhashable values are validated without the cache"""
+    from anyparser_core.validator import main
+
+    monkeypatch.setenv("ANYPARSER_API_KEY", mock_api_key)
+    main._prevalidated_option.cache_clear()
+    options = AnyparserOption(
+        api_url="https://api.example.com",
+        api_key="test-key",
+        model="ocr",
+        ocr_language={OcrLanguage.ENGLISH},
+    )
+
+    assert main.resolve_options(options).ocr_language == {OcrLanguage.ENGLISH}
+    assert main._prevalidated_option.cache_info().currsize == 0
@@ -54,3 +54,18 @@ def test_validate_option_no_ocr_options():
 
     # Should not raise any exceptions
     validate_option(options)
+
+
+def test_ocr_lookup_sets_match_tables():
+    """Test the frozen lookup sets cover every enum value"""
+    from anyparser_core.config.hardcoded import (
+        OCR_LANGUAGE_SET,
+        OCR_LANGUAGES,
+        OCR_PRESET_SET,
+        OCR_PRESETS,
+    )
+
+    assert OCR_LANGUAGE_SET == frozenset(OCR_LANGUAGES)
+    assert OCR_PRESET_SET == frozenset(OCR_PRESETS)
+    assert {language.value for language in OcrLanguage} <= OCR_LANGUAGE_SET
+    assert {preset.value for preset in OcrPreset} <= OCR_PRESET_SET